@@ -5,6 +5,7 @@ Structure:
     api/
     ├── __init__.py          # This file - app factory
     ├── deps.py              # Dependency injection
+    ├── static.py            # Precompressed, cache-validated static files
     └── v1/
         ├── setup/           # Setup wizard endpoints
         ├── dashboard/       # Dashboard/monitoring endpoints
@@ -18,14 +19,15 @@ Usage:
 """
 
 import os
+import threading
 from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, RedirectResponse, HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 from dotenv import load_dotenv
 
 import lelamp.globals as g
+from api.static import IndexPage, PrecompressedStaticFiles, precompress
 from lelamp.user_data import get_env_path
 
 
@@ -88,14 +90,24 @@ def create_api(
     dist_dir = base_dir / "frontend" / "dist"
     assets_dir = base_dir / "assets"
 
+    index_page = IndexPage(dist_dir / "index.html")
+
+    # Compress the bundle once (skips files that are already up to date)
+    if dist_dir.exists():
+        threading.Thread(target=precompress, args=(dist_dir,), name="precompress", daemon=True).start()
+
     # Mount assets
     if assets_dir.exists():
-        app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
+        app.mount("/assets", PrecompressedStaticFiles(directory=assets_dir), name="assets")
 
-    # Mount dist-assets for React bundles
+    # Mount dist-assets for React bundles (hashed names, cached as immutable)
     dist_assets = dist_dir / "dist-assets"
     if dist_assets.exists():
-        app.mount("/dist-assets", StaticFiles(directory=dist_assets), name="dist-assets")
+        app.mount(
+            "/dist-assets",
+            PrecompressedStaticFiles(directory=dist_assets, immutable_hashed=True),
+            name="dist-assets",
+        )
 
     # Serve static files from dist root (favicon, lelamp.svg, etc.)
     @app.get("/lelamp.svg")
@@ -138,10 +150,10 @@ def create_api(
     @app.get("/setup")
     @app.get("/dashboard")
     @app.get("/settings")
-    async def serve_spa():
+    async def serve_spa(request: Request):
         """Serve the React SPA."""
-        if dist_dir.exists() and (dist_dir / "index.html").exists():
-            return FileResponse(dist_dir / "index.html")
+        if index_page.exists():
+            return index_page.response(request)
         return HTMLResponse(
             content="<h1>LeLamp</h1><p>Frontend not built. Run: cd frontend && npm run build</p>"
         )
@@ -14,11 +14,10 @@ Example usage in a route:
 
 from typing import Optional
 from pathlib import Path
-import yaml
 
 # Import global services
 import lelamp.globals as g
-from lelamp.user_data import get_config_path, USER_CONFIG_FILE
+from lelamp.user_data import get_config_path
 
 
 def get_config() -> dict:
@@ -27,20 +26,13 @@ def get_config() -> dict:
 
 
 def load_config() -> dict:
-    """Load config from disk (fresh read from ~/.lelamp/config.yaml)."""
-    config_path = get_config_path()
-    with open(config_path, 'r') as f:
-        return yaml.safe_load(f) or {}
+    """Copy of the current config (safe to modify, then pass to save_config)."""
+    return g.config_store.snapshot()
 
 
 def save_config(config: dict) -> None:
-    """Save config to disk (~/.lelamp/config.yaml) and update in-memory copy."""
-    # Update the in-memory global config so other services see the changes
-    g.CONFIG = config
-
-    # Always save to user config location
-    with open(USER_CONFIG_FILE, 'w') as f:
-        yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+    """Save config to ~/.lelamp/config.yaml and update the in-memory copy."""
+    g.save_config(config)
 
 
 def get_animation_service():
@@ -0,0 +1,253 @@
+"""
+Static file serving for the web UI.
+
+The frontend bundle is a few hundred KB of JS/CSS that every dashboard
+load pulled uncompressed over the lamp's Wi-Fi. This module serves it
+the way a CDN would:
+
+- precompress() writes .gz (and .br when the brotli module is installed)
+  next to each compressible file, once, at startup or after a build
+- requests get the smallest encoding their Accept-Encoding allows,
+  straight from the precompressed file (no per-request compression)
+- Vite's content-hashed files (dist-assets/index-<hash>.js) are cached
+  by the browser as immutable; everything else, including the whole
+  /assets tree whose names only look hashed, is revalidated with its
+  ETag, answered with 304 when unchanged
+- index.html is served from memory with a content ETag, so a reload
+  after a rebuild always picks up the new asset names
+
+Usage:
+    python -m api.static frontend/dist   # precompress after a build
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import stat
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE = {".js", ".mjs", ".css", ".html", ".svg", ".json", ".map", ".txt", ".xml", ".ico", ".wasm"}
+MIN_SIZE = 1024  # Smaller files aren't worth an extra encoding
+MIN_SAVING = 0.9  # Keep an encoding only if it's under 90% of the original
+
+# Preference order when the client accepts several with the same q-value
+ENCODINGS: List[Tuple[str, str]] = [("br", ".br"), ("gzip", ".gz")]
+
+# Vite output names: index-BxYz12_a.js, logo-4f3a9c1e.svg
+HASHED_NAME = re.compile(r"[-.][A-Za-z0-9_-]{8,}\.[a-z0-9]+$")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+# =============================================================================
+# Precompression
+# =============================================================================
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def precompress(directory: Path, min_size: int = MIN_SIZE) -> Dict[str, int]:
+    """
+    Write .gz/.br siblings for the compressible files under directory.
+
+    Up-to-date siblings are left alone, so this is cheap to run on every
+    startup. Returns byte totals for the files it looked at.
+    """
+    encodings = [(name, suffix) for name, suffix in ENCODINGS if name != "br" or brotli is not None]
+    totals = {"files": 0, "written": 0, "original": 0}
+    totals.update({name: 0 for name, _ in encodings})
+
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            path = Path(root) / filename
+            if path.suffix not in COMPRESSIBLE:
+                continue
+            size = path.stat().st_size
+            if size < min_size:
+                continue
+            totals["files"] += 1
+            totals["original"] += size
+            data = None
+            for name, suffix in encodings:
+                target = path.with_name(path.name + suffix)
+                if _sibling_fresh(path, target):
+                    totals[name] += target.stat().st_size
+                    continue
+                if data is None:
+                    data = path.read_bytes()
+                encoded = _compress(data, name)
+                if len(encoded) > len(data) * MIN_SAVING:
+                    target.unlink(missing_ok=True)
+                    totals[name] += len(data)
+                    continue
+                try:
+                    tmp = target.with_name(target.name + ".tmp")
+                    tmp.write_bytes(encoded)
+                    os.replace(tmp, target)
+                except OSError as e:
+                    logger.warning(f"Could not write {target}: {e}")
+                    return totals
+                totals["written"] += 1
+                totals[name] += len(encoded)
+
+    if totals["written"]:
+        logger.info(f"Precompressed {totals['written']} static files in {directory}")
+    return totals
+
+
+def _sibling_fresh(path: Path, sibling: Path) -> bool:
+    try:
+        return sibling.stat().st_mtime >= path.stat().st_mtime
+    except OSError:
+        return False
+
+
+# =============================================================================
+# Negotiation
+# =============================================================================
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Encodings from an Accept-Encoding header we can serve, best first."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if token:
+            weights[token] = q
+    wildcard = weights.get("*", 0.0)
+    order = [name for name, _ in ENCODINGS]
+    candidates = [(weights.get(name, wildcard), -order.index(name), name) for name in order]
+    return [name for q, _, name in sorted(candidates, reverse=True) if q > 0]
+
+
+def cache_control(path: str, immutable_hashed: bool = False) -> str:
+    if immutable_hashed and HASHED_NAME.search(os.path.basename(path)):
+        return IMMUTABLE
+    return REVALIDATE
+
+
+# =============================================================================
+# Serving
+# =============================================================================
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves .br/.gz siblings and sets cache headers.
+
+    Only mounts of build output with content-hashed names should pass
+    immutable_hashed=True; elsewhere a name like Scifi-SignalLost.wav
+    would match HASHED_NAME and never be revalidated.
+    """
+
+    def __init__(self, *args, immutable_hashed: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_hashed = immutable_hashed
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        headers = {"Cache-Control": cache_control(full_path, self.immutable_hashed)}
+        media_type = mimetypes.guess_type(full_path)[0] or "text/plain"
+        served_path, served_stat = full_path, stat_result
+
+        if os.path.splitext(full_path)[1] in COMPRESSIBLE:
+            headers["Vary"] = "Accept-Encoding"
+            for name in accepted_encodings(request_headers.get("accept-encoding", "")):
+                sibling = full_path + dict(ENCODINGS)[name]
+                try:
+                    sibling_stat = os.stat(sibling)
+                except OSError:
+                    continue
+                if stat.S_ISREG(sibling_stat.st_mode) and sibling_stat.st_mtime >= stat_result.st_mtime:
+                    served_path, served_stat = sibling, sibling_stat
+                    headers["Content-Encoding"] = name
+                    break
+
+        # The ETag comes from the file actually sent, so each encoding has its own
+        response = FileResponse(
+            served_path, status_code=status_code, stat_result=served_stat,
+            media_type=media_type, headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class IndexPage:
+    """index.html from memory with a content ETag and in-memory gzip."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._mtime: Optional[float] = None
+        self._body = b""
+        self._gzip = b""
+        self._etag = ""
+
+    def _load(self) -> bool:
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return False
+        if mtime != self._mtime:
+            body = self.path.read_bytes()
+            self._body = body
+            self._gzip = gzip.compress(body, compresslevel=9, mtime=0)
+            self._etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+            self._mtime = mtime
+        return True
+
+    def exists(self) -> bool:
+        return self._load()
+
+    def response(self, request: Request) -> Response:
+        self._load()
+        headers = {"ETag": self._etag, "Cache-Control": REVALIDATE, "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match", "")
+        if self._etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        body = self._body
+        if "gzip" in accepted_encodings(request.headers.get("accept-encoding", "")):
+            body = self._gzip
+            headers["Content-Encoding"] = "gzip"
+        return Response(body, media_type="text/html", headers=headers)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent.parent / "frontend" / "dist"
+    result = precompress(target)
+    print(f"{result['files']} files, {result['original']} bytes -> "
+          + ", ".join(f"{name} {result[name]}" for name, _ in ENCODINGS if name in result))
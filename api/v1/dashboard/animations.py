@@ -15,8 +15,8 @@ from typing import Optional
 import logging
 
 from api.deps import get_animation_service
+from lelamp.recording_catalog import get_recording_catalog
 from lelamp.user_data import (
-    list_all_recordings,
     get_recording_path,
     save_recording_path,
     is_user_recording,
@@ -54,37 +54,18 @@ _recording_start_time: float = 0
 async def list_animations():
     """List all available animations (from both user and builtin directories)."""
     try:
-        animations = []
-
-        # Use user_data helper to get all recordings from both locations
-        all_recordings = list_all_recordings()
-
-        for rec in all_recordings:
-            name = rec['name']
-            path = rec['path']
-            source = rec['source']  # 'user' or 'builtin'
-
-            # Get file stats
-            stat = path.stat()
-            size = stat.st_size
-
-            # Count frames (lines - 1 for header)
-            with open(path, 'r') as csvfile:
-                frame_count = sum(1 for _ in csvfile) - 1
-
-            # Estimate duration at 30fps
-            duration_sec = frame_count / 30.0
-
-            animations.append({
-                "name": name,
-                "frames": frame_count,
-                "duration": round(duration_sec, 1),
-                "size_kb": round(size / 1024, 1),
-                "source": source  # 'user' or 'builtin'
-            })
-
-        # Sort by name
-        animations.sort(key=lambda x: x['name'])
+        # Metadata comes from the catalog index, no file reads per request
+        animations = [
+            {
+                "name": entry.name,
+                "frames": entry.frames,
+                "duration": round(entry.duration, 1),
+                "size_kb": round(entry.size / 1024, 1),
+                "source": entry.source,  # 'user' or 'builtin'
+                "peak_velocity": entry.peak_velocity,
+            }
+            for entry in get_recording_catalog().list()
+        ]
 
         # Get current playing animation
         animation_service = get_animation_service()
@@ -304,6 +285,7 @@ async def stop_recording():
             writer.writerows(_recording_data)
 
         logging.info(f"Saved recording to: {csv_path}")
+        get_recording_catalog().invalidate(_recording_name)
 
         frame_count = len(_recording_data)
         duration = frame_count / 30.0
@@ -424,11 +406,6 @@ async def delete_animation(name: str):
         if not delete_recording(name):
             return {"success": False, "error": f"Failed to delete animation '{name}'"}
 
-        # Clear from cache if animation service has it cached
-        animation_service = get_animation_service()
-        if animation_service and name in animation_service._recording_cache:
-            del animation_service._recording_cache[name]
-
         return {
             "success": True,
             "name": name,
@@ -64,6 +64,8 @@ async def get_system_status():
                 "vision": vision is not None,
                 "audio": audio is not None,
             },
+            "boot": g.boot_orchestrator.get_status() if g.boot_orchestrator else None,
+            "scene_analysis": g.ollama_vision_service.get_analysis_stats() if g.ollama_vision_service else None,
             "config": {
                 "name": config.get('personality', {}).get('name', 'LeLamp'),
                 "setup_complete": config.get('setup', {}).get('setup_complete', False),
@@ -78,3 +80,15 @@ async def get_system_status():
 async def health_check():
     """Simple health check endpoint."""
     return {"status": "ok"}
+
+
+@router.get("/boot")
+async def get_boot_status():
+    """Per-service readiness and boot timings."""
+    if g.boot_orchestrator is None:
+        return {"success": False, "error": "Services not initialized"}
+    return {
+        "success": True,
+        **g.boot_orchestrator.get_status(),
+        "critical_path": g.boot_orchestrator.critical_path(),
+    }
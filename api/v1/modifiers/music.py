@@ -57,7 +57,9 @@ async def get_music_modifier():
             "active_joints": list(music_mod.target_joints),
             "available_joints": AVAILABLE_JOINTS,
             "fallback_bpm": music_mod.config.fallback_bpm,
-            "current_bpm": cached_bpm
+            "current_bpm": cached_bpm,
+            "beat_tracker": music_mod.beat_source.get_stats() if music_mod.beat_source else None,
+            "time_warp": animation.get_time_warp_stats(),
         }
     except Exception as e:
         return {"error": str(e), "enabled": False}
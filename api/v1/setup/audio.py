@@ -5,6 +5,7 @@ Provides endpoints for testing and configuring audio hardware:
 - Speaker test with volume control
 - Microphone test with live monitoring and waveform visualization
 - Volume level adjustment
+- Wake word template enrollment for the keyword spotter
 """
 
 import asyncio
@@ -13,6 +14,7 @@ import logging
 import subprocess
 import tempfile
 import threading
+import time
 import wave
 from pathlib import Path
 from typing import Optional, Dict, Any, List
@@ -498,7 +500,7 @@ async def test_microphone():
     Records for 3 seconds, then plays back the recording.
     """
     try:
-        success = record_and_playback(3.0)
+        success = await asyncio.to_thread(record_and_playback, 3.0)
         return {
             "success": success,
             "message": "Recorded and played back" if success else "Failed to record/playback"
@@ -553,35 +555,26 @@ async def get_mic_level():
     """
     Get current microphone input level.
 
-    Returns level as percentage (0-100) based on RMS of a short sample.
+    Returns level as percentage (0-100) from the shared level meter, which
+    taps the running capture (or starts one shared capture on demand).
     """
     try:
-        import sounddevice as sd
-        import numpy as np
-
-        # Record a very short sample (50ms)
-        sample_rate = 24000  # Standardized sample rate
-        duration = 0.05  # 50ms
-        samples = int(sample_rate * duration)
+        from lelamp.service.audio import get_level_meter
 
-        recording = sd.rec(samples, samplerate=sample_rate, channels=1, dtype='int16')
-        sd.wait()
-
-        # Calculate RMS level
-        audio_data = recording.flatten().astype(np.float32)
-        rms = np.sqrt(np.mean(audio_data ** 2))
+        snapshot = await get_level_meter().wait_for_snapshot(timeout=0.3)
+        if snapshot is None:
+            return {"success": False, "level": 0, "error": "No microphone audio"}
 
-        # Normalize to 0-100 (int16 max is 32767)
-        # Use a lower reference for more sensitivity
-        level = min(100, int((rms / 10000) * 100))
+        # Normalize to 0-100 (same scale as the old 10000/32767 int16 reference)
+        level = min(100, int(snapshot.rms * 32768 / 10000 * 100))
 
         return {
             "success": True,
-            "level": level
+            "level": level,
+            "peak": min(100, int(snapshot.peak * 100)),
+            "age": round(time.time() - snapshot.timestamp, 3),
         }
 
-    except ImportError:
-        return {"success": False, "level": 0, "error": "sounddevice not installed"}
     except Exception as e:
         logger.error(f"Error getting mic level: {e}")
         return {"success": False, "level": 0, "error": str(e)}
@@ -918,100 +911,40 @@ async def audio_waveform_ws(websocket: WebSocket):
     """
     WebSocket endpoint for real-time microphone waveform visualization.
 
-    Streams audio samples at ~30fps for smooth waveform rendering.
+    Streams every block from the shared level meter (~23fps at 1024
+    samples); any number of clients share one capture.
     Each message contains:
     - samples: array of normalized audio samples (-1 to 1)
     - rms: current RMS level (0-100)
     - peak: peak level in this chunk (0-100)
+    - spectrum: 32 log-spaced band levels (0-1)
     """
     await websocket.accept()
     logger.info("Audio waveform WebSocket connected")
 
-    stream = None
-    stop_event = threading.Event()
-    audio_queue = asyncio.Queue(maxsize=10)
-
-    def audio_callback(indata, frames, time_info, status):
-        """Sounddevice callback - runs in separate thread."""
-        if status:
-            logger.debug(f"Audio callback status: {status}")
-        if stop_event.is_set():
-            return
-
-        try:
-            import numpy as np
-            # Convert to float and normalize
-            samples = indata[:, 0].astype(np.float32)
-
-            # Downsample to ~128 points for visualization
-            if len(samples) > 128:
-                # Take evenly spaced samples
-                indices = np.linspace(0, len(samples) - 1, 128, dtype=int)
-                samples = samples[indices]
-
-            # Normalize to -1 to 1 range
-            samples = samples / 32768.0
-
-            # Calculate RMS and peak
-            rms = np.sqrt(np.mean(samples ** 2))
-            peak = np.max(np.abs(samples))
-
-            # Scale to 0-100 for display
-            rms_percent = min(100, int(rms * 300))  # Scale up for visibility
-            peak_percent = min(100, int(peak * 150))
-
-            # Put in queue (non-blocking)
-            try:
-                audio_queue.put_nowait({
-                    "samples": samples.tolist(),
-                    "rms": rms_percent,
-                    "peak": peak_percent,
-                })
-            except asyncio.QueueFull:
-                pass  # Drop frame if queue is full
-
-        except Exception as e:
-            logger.error(f"Error in audio callback: {e}")
-
     try:
-        import sounddevice as sd
-        import numpy as np
+        from lelamp.service.audio import get_level_meter
 
-        # Start audio stream
-        stream = sd.InputStream(
-            samplerate=24000,  # Standardized sample rate
-            channels=1,
-            dtype='int16',
-            blocksize=800,  # ~33ms chunks at 24kHz = ~30fps
-            callback=audio_callback,
-        )
-        stream.start()
-        logger.info("Audio waveform stream started")
-
-        # Stream data to WebSocket
+        meter = get_level_meter()
+        last_seq = 0
         while True:
+            snapshot = await meter.wait_for_snapshot(last_seq, timeout=0.1)
             try:
-                # Wait for audio data with timeout
-                data = await asyncio.wait_for(audio_queue.get(), timeout=0.1)
-                try:
-                    await websocket.send_json(data)
-                except WebSocketDisconnect:
-                    logger.debug("WebSocket disconnected during send")
-                    break
-            except asyncio.TimeoutError:
-                # Send heartbeat to keep connection alive
-                try:
+                if snapshot is not None and snapshot.seq > last_seq:
+                    last_seq = snapshot.seq
+                    await websocket.send_json({
+                        "samples": list(snapshot.waveform),
+                        "rms": min(100, int(snapshot.rms * 300)),  # Scale up for visibility
+                        "peak": min(100, int(snapshot.peak * 150)),
+                        "spectrum": list(snapshot.spectrum),
+                    })
+                else:
+                    # Send heartbeat to keep connection alive
                     await websocket.send_json({"heartbeat": True})
-                except WebSocketDisconnect:
-                    logger.debug("WebSocket disconnected during heartbeat")
-                    break
+            except WebSocketDisconnect:
+                logger.debug("WebSocket disconnected during send")
+                break
 
-    except ImportError as e:
-        logger.error(f"sounddevice not installed: {e}")
-        try:
-            await websocket.send_json({"error": "sounddevice not installed"})
-        except Exception:
-            pass
     except Exception as e:
         import traceback
         error_name = type(e).__name__
@@ -1022,11 +955,7 @@ async def audio_waveform_ws(websocket: WebSocket):
         except Exception:
             pass
     finally:
-        stop_event.set()
-        if stream:
-            stream.stop()
-            stream.close()
-        logger.info("Audio waveform stream closed")
+        logger.info("Audio waveform WebSocket closed")
 
 
 # =============================================================================
@@ -1211,3 +1140,58 @@ async def set_debug_logging(enabled: bool):
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
+
+
+# =============================================================================
+# Wake Word Templates (keyword spotter enrollment)
+# =============================================================================
+
+@router.get("/wake-templates")
+async def get_wake_templates():
+    """List enrolled wake word templates."""
+    try:
+        from lelamp.service.wake.enrollment import RECOMMENDED_TEMPLATES, list_templates
+
+        templates = list_templates()
+        return {
+            "success": True,
+            "templates": templates,
+            "count": len(templates),
+            "recommended": RECOMMENDED_TEMPLATES,
+            "mode": "spotter" if templates else "whisper",
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+@router.post("/wake-templates/record")
+async def record_wake_template(seconds: float = 2.0):
+    """
+    Record one utterance of the wake phrase and save it as a template.
+
+    The user should start speaking right after the request is sent. Takes
+    effect the next time the wake service starts.
+    """
+    try:
+        from lelamp.service.wake.enrollment import enroll, list_templates
+
+        path = await asyncio.to_thread(enroll, min(max(seconds, 1.0), 5.0))
+        return {"success": True, "name": path.stem, "count": len(list_templates())}
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Wake template recording failed: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@router.delete("/wake-templates/{name}")
+async def delete_wake_template(name: str):
+    """Delete an enrolled wake word template."""
+    try:
+        from lelamp.service.wake.enrollment import delete_template, list_templates
+
+        if not delete_template(name):
+            return {"success": False, "error": "Template not found"}
+        return {"success": True, "count": len(list_templates())}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
@@ -5,29 +5,27 @@ Provides endpoints for detecting and configuring cameras:
 - List available camera devices
 - Live camera preview (MJPEG stream)
 - Camera selection and configuration
+
+Preview streams and snapshots share one camera session (see
+lelamp/service/vision/camera_session.py) instead of opening the device
+per request.
 """
 
-import asyncio
 import logging
-import threading
-import time
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Generator
+from typing import Optional, Dict, Any, List, AsyncGenerator
 
 import cv2
 from fastapi import APIRouter, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
 from api.deps import load_config, save_config
+from lelamp.service.vision.camera_session import get_camera_session
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Preview state
-_preview_cap = None
-_preview_lock = threading.Lock()
-
 
 # =============================================================================
 # Pydantic Models
@@ -158,6 +156,9 @@ def get_available_cameras() -> List[Dict[str, Any]]:
 
 def _test_camera(device_path: str) -> bool:
     """Test if a camera device works by trying to read a frame."""
+    # Opening it again while the preview session holds it would fail
+    if get_camera_session().is_serving(device_path):
+        return True
     try:
         cap = cv2.VideoCapture(device_path)
         if not cap.isOpened():
@@ -171,51 +172,38 @@ def _test_camera(device_path: str) -> bool:
         return False
 
 
-def _generate_mjpeg_frames(device_path: str) -> Generator[bytes, None, None]:
+async def _generate_mjpeg_frames(device_path: str) -> AsyncGenerator[bytes, None]:
     """
     Generate MJPEG frames for streaming.
 
-    Yields frames as multipart/x-mixed-replace content.
+    Yields frames as multipart/x-mixed-replace content, one per new frame
+    from the shared camera session, until the client disconnects or the
+    session switches to another device.
     """
-    cap = None
+    session = get_camera_session()
+    lease = session.acquire(device_path)
     try:
-        cap = cv2.VideoCapture(device_path)
-        if not cap.isOpened():
-            logger.error(f"Failed to open camera at {device_path}")
-            return
-
-        # Set reasonable resolution for preview
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        cap.set(cv2.CAP_PROP_FPS, 15)
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            # Encode as JPEG
-            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-            if not ret:
+        seq = 0
+        while lease.active:
+            frame = await session.wait_for_frame(lease, after_seq=seq)
+            if frame is None:
                 continue
+            seq = frame.seq
 
-            frame_bytes = buffer.tobytes()
+            frame_bytes = session.encode(frame, quality=70)
+            if frame_bytes is None:
+                continue
             yield (
                 b'--frame\r\n'
                 b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n'
             )
 
-            # Limit frame rate
-            time.sleep(1/15)
-
-    except GeneratorExit:
-        pass
+        if session.error:
+            logger.error(session.error)
     except Exception as e:
         logger.error(f"Error generating frames: {e}")
     finally:
-        if cap:
-            cap.release()
+        lease.release()
 
 
 # =============================================================================
@@ -244,6 +232,7 @@ async def get_camera_status():
             "camera_count": len(cameras),
             "working_count": len(working_cameras),
             "current_device": vision_config.get("camera_device"),
+            "session": get_camera_session().get_stats(),
         }
     except Exception as e:
         logger.error(f"Error checking camera status: {e}")
@@ -324,23 +313,16 @@ async def camera_snapshot(device: str = Query(..., description="Camera device pa
     """
     Get a single JPEG snapshot from camera.
     """
-    try:
-        cap = cv2.VideoCapture(device)
-        if not cap.isOpened():
-            return {"success": False, "error": "Failed to open camera"}
-
-        ret, frame = cap.read()
-        cap.release()
-
-        if not ret or frame is None:
-            return {"success": False, "error": "Failed to capture frame"}
+    if not device.startswith("/dev/"):
+        return {"success": False, "error": "Invalid device path"}
 
-        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-        if not ret:
-            return {"success": False, "error": "Failed to encode frame"}
+    try:
+        session = get_camera_session()
+        jpeg = await session.snapshot(device, quality=85)
+        if jpeg is None:
+            return {"success": False, "error": session.error or "Failed to capture frame"}
 
-        from fastapi.responses import Response
-        return Response(content=buffer.tobytes(), media_type="image/jpeg")
+        return Response(content=jpeg, media_type="image/jpeg")
 
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -265,6 +265,16 @@ async def get_temperature():
         return {"success": False, "error": str(e)}
 
 
+@router.get("/thermal")
+async def thermal_status():
+    """Get thermal governor level, current rate scales and its inputs."""
+    import lelamp.globals as g
+
+    if g.thermal_governor is None:
+        return {"success": False, "error": "Thermal governor not running"}
+    return {"success": True, **g.thermal_governor.get_status()}
+
+
 # =============================================================================
 # System Information
 # =============================================================================
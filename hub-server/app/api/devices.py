@@ -6,6 +6,7 @@ Endpoints:
 - GET /{serial} - Get device info
 - PUT /{serial} - Update device info
 - POST /{serial}/heartbeat - Device heartbeat
+- POST /{serial}/rotate-key - Issue a new API key
 - POST /{serial}/link - Link device to user account
 - DELETE /{serial}/link - Unlink device from user
 """
@@ -19,6 +20,8 @@ from fastapi import APIRouter, Depends, HTTPException, Header, Request
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from app import device_auth
+from app.device_auth import DeviceIdentity, get_client_ip
 from app.models import get_db, Device, generate_api_key
 
 router = APIRouter()
@@ -73,20 +76,16 @@ class DeviceLinkRequest(BaseModel):
 # Authentication Helpers
 # =============================================================================
 
-def verify_device_api_key(
+async def verify_device_api_key(
     authorization: str = Header(None),
-    x_device_serial: str = Header(None),
-    db: Session = Depends(get_db)
-) -> Device:
-    """Verify device API key and return device."""
+    x_device_serial: str = Header(None)
+) -> DeviceIdentity:
+    """Verify device API key and return device identity (cached)."""
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing authorization header")
 
-    # Extract token from "Bearer <token>"
-    token = authorization.replace("Bearer ", "") if authorization.startswith("Bearer ") else authorization
-
     # Find device by API key
-    device = db.query(Device).filter(Device.api_key == token).first()
+    device = await device_auth.authenticate(device_auth.extract_token(authorization))
     if not device:
         raise HTTPException(status_code=401, detail="Invalid API key")
 
@@ -97,13 +96,13 @@ def verify_device_api_key(
     return device
 
 
-def get_client_ip(request: Request) -> str:
-    """Get client IP address from request."""
-    # Check for forwarded headers
-    forwarded = request.headers.get("X-Forwarded-For")
-    if forwarded:
-        return forwarded.split(",")[0].strip()
-    return request.client.host if request.client else "unknown"
+def load_own_device(db: Session, device: DeviceIdentity) -> Device:
+    """Load the session-bound Device row for an authenticated device."""
+    row = db.get(Device, device.serial)
+    if not row:
+        device_auth.invalidate_serial(device.serial)
+        raise HTTPException(status_code=401, detail="Device no longer registered")
+    return row
 
 
 # =============================================================================
@@ -191,7 +190,7 @@ async def register_device(
 async def get_device(
     serial: str,
     db: Session = Depends(get_db),
-    device: Device = Depends(verify_device_api_key)
+    device: DeviceIdentity = Depends(verify_device_api_key)
 ):
     """Get device information."""
     target_device = db.query(Device).filter(Device.serial == serial).first()
@@ -213,12 +212,14 @@ async def update_device(
     serial: str,
     request: DeviceUpdateRequest,
     db: Session = Depends(get_db),
-    device: Device = Depends(verify_device_api_key)
+    device: DeviceIdentity = Depends(verify_device_api_key)
 ):
     """Update device information."""
     if device.serial != serial:
         raise HTTPException(status_code=403, detail="Can only update own device")
 
+    device = load_own_device(db, device)
+
     if request.hostname:
         device.hostname = request.hostname
     if request.lelamp_version:
@@ -228,6 +229,7 @@ async def update_device(
 
     device.updated_at = datetime.utcnow()
     db.commit()
+    device_auth.invalidate_serial(serial)
 
     return {"success": True, "device": device.to_dict()}
 
@@ -237,16 +239,19 @@ async def device_heartbeat(
     serial: str,
     req: Request,
     db: Session = Depends(get_db),
-    device: Device = Depends(verify_device_api_key)
+    device: DeviceIdentity = Depends(verify_device_api_key)
 ):
-    """Record device heartbeat."""
+    """Record device heartbeat (last_seen/last_ip are written behind)."""
     if device.serial != serial:
         raise HTTPException(status_code=403, detail="Serial mismatch")
 
-    device.last_seen = datetime.utcnow()
-    device.last_ip = get_client_ip(req)
-    device.status = "active"
-    db.commit()
+    if device.status != "active":
+        row = load_own_device(db, device)
+        row.status = "active"
+        db.commit()
+        device_auth.invalidate_serial(serial)
+
+    await device_auth.mark_seen(serial, get_client_ip(req))
 
     return {
         "success": True,
@@ -254,16 +259,36 @@ async def device_heartbeat(
     }
 
 
+@router.post("/{serial}/rotate-key")
+async def rotate_api_key(
+    serial: str,
+    db: Session = Depends(get_db),
+    device: DeviceIdentity = Depends(verify_device_api_key)
+):
+    """Replace the device API key. The old key stops working immediately."""
+    if device.serial != serial:
+        raise HTTPException(status_code=403, detail="Serial mismatch")
+
+    row = load_own_device(db, device)
+    row.api_key = generate_api_key()
+    db.commit()
+    device_auth.invalidate_serial(serial)
+
+    return {"success": True, "api_key": row.api_key}
+
+
 @router.get("/{serial}/linking-code")
 async def get_linking_code(
     serial: str,
     db: Session = Depends(get_db),
-    device: Device = Depends(verify_device_api_key)
+    device: DeviceIdentity = Depends(verify_device_api_key)
 ):
     """Generate a 6-digit linking code for the device."""
     if device.serial != serial:
         raise HTTPException(status_code=403, detail="Serial mismatch")
 
+    device = load_own_device(db, device)
+
     # Generate 6-digit code
     code = ''.join(random.choices(string.digits, k=6))
 
@@ -326,6 +351,7 @@ async def link_device_to_user(
     device.linking_code = None
     device.linking_code_expires = None
     db.commit()
+    device_auth.invalidate_serial(serial)
 
     return {
         "success": True,
@@ -361,6 +387,7 @@ async def unlink_device(
 
     device.user_id = None
     db.commit()
+    device_auth.invalidate_serial(serial)
 
     return {"success": True, "message": "Device unlinked"}
 
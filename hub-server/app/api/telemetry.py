@@ -5,22 +5,35 @@ Endpoints:
 - POST /metrics - Upload system metrics batch
 - POST /conversations - Upload conversation turns
 - POST /audio - Upload audio recording
-- GET /metrics/{serial} - Get metrics for device
-- GET /conversations/{serial} - Get conversations for device
+- POST /audio/sessions - Start a resumable audio upload
+- GET/PUT/DELETE /audio/sessions/{upload_id} - Resume offset / append chunk / cancel
+- POST /audio/sessions/{upload_id}/complete - Finish a resumable upload
+- GET /batches/{batch_id} - Check whether a batch has been ingested
+- GET /metrics/{serial} - Get metrics for device (cursor or offset paginated)
+- GET /conversations/{serial} - Get conversations for device (cursor or offset paginated)
+- GET /rollups/{serial} - Get minute/hour/day aggregates for a metric
 """
 
+import asyncio
+import base64
+import json
 import os
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Header, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Header, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from app import audio_store, device_auth, ingest, rollups
 from app.config import settings
-from app.models import get_db, Device, SystemMetric, ConversationTurn, AudioUpload
+from app.device_auth import DeviceIdentity
+from app.models import engine, get_db, SystemMetric, ConversationTurn, AudioUpload, AudioUploadSession
 
 router = APIRouter()
 
@@ -69,6 +82,7 @@ class ConversationBatchRequest(BaseModel):
     """Batch of conversation turns to upload."""
     device_serial: str
     session_id: str
+    batch_id: Optional[str] = None
     turns: List[ConversationTurnData]
 
 
@@ -81,19 +95,25 @@ class AudioMetadata(BaseModel):
     sample_rate: Optional[int] = None
 
 
+class AudioSessionRequest(BaseModel):
+    """Start of a resumable audio upload."""
+    metadata: AudioMetadata
+    filename: Optional[str] = None
+    total_bytes: Optional[int] = None
+    sha256: Optional[str] = None  # verified on completion if given
+
+
 # =============================================================================
 # Authentication Helper
 # =============================================================================
 
-def verify_device(
+async def verify_device(
+    request: Request,
     authorization: str = Header(...),
-    x_device_serial: str = Header(...),
-    db: Session = Depends(get_db)
-) -> Device:
-    """Verify device API key and return device."""
-    token = authorization.replace("Bearer ", "") if authorization.startswith("Bearer ") else authorization
-
-    device = db.query(Device).filter(Device.api_key == token).first()
+    x_device_serial: str = Header(...)
+) -> DeviceIdentity:
+    """Verify device API key and return device (cached; last_seen is written behind)."""
+    device = await device_auth.authenticate(device_auth.extract_token(authorization))
     if not device:
         raise HTTPException(status_code=401, detail="Invalid API key")
 
@@ -101,8 +121,7 @@ def verify_device(
         raise HTTPException(status_code=401, detail="Serial mismatch")
 
     # Update last seen
-    device.last_seen = datetime.utcnow()
-    db.commit()
+    await device_auth.mark_seen(device.serial, device_auth.get_client_ip(request))
 
     return device
 
@@ -114,10 +133,15 @@ def verify_device(
 @router.post("/metrics")
 async def upload_metrics(
     request: MetricsBatchRequest,
-    db: Session = Depends(get_db),
-    device: Device = Depends(verify_device)
+    device: DeviceIdentity = Depends(verify_device)
 ):
-    """Upload a batch of system metrics."""
+    """
+    Upload a batch of system metrics.
+
+    Rows are bulk inserted off the event loop. Re-sending a batch_id that was
+    already ingested is a no-op (reported as duplicate). With INGEST_MODE=queue
+    the batch is queued and 202 is returned immediately.
+    """
     if device.serial != request.device_serial:
         raise HTTPException(status_code=403, detail="Serial mismatch")
 
@@ -128,42 +152,31 @@ async def upload_metrics(
         )
 
     batch_id = request.batch_id or str(uuid.uuid4())
-    accepted = 0
-
-    for metric in request.metrics:
-        db_metric = SystemMetric(
-            device_serial=device.serial,
-            timestamp=metric.timestamp,
-            cpu_percent=metric.cpu_percent,
-            cpu_temp_celsius=metric.cpu_temp_celsius,
-            memory_total_mb=metric.memory_total_mb,
-            memory_used_mb=metric.memory_used_mb,
-            memory_percent=metric.memory_percent,
-            disk_total_gb=metric.disk_total_gb,
-            disk_used_gb=metric.disk_used_gb,
-            disk_percent=metric.disk_percent,
-            network_bytes_sent=metric.network_bytes_sent,
-            network_bytes_recv=metric.network_bytes_recv,
-            agent_state=metric.agent_state,
-            active_services=metric.active_services
-        )
-        db.add(db_metric)
-        accepted += 1
+    rows = [metric.model_dump() for metric in request.metrics]
 
-    db.commit()
+    try:
+        result = await ingest.submit(ingest.KIND_METRICS, device.serial, batch_id, rows)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Ingest queue full, retry later")
+
+    if result is None:
+        return JSONResponse(
+            status_code=202,
+            content={"success": True, "queued": len(rows), "batch_id": batch_id}
+        )
 
     return {
         "success": True,
-        "accepted": accepted,
-        "batch_id": batch_id
+        "accepted": result.accepted,
+        "batch_id": batch_id,
+        "duplicate": result.duplicate
     }
 
 
 @router.post("/conversations")
 async def upload_conversations(
     request: ConversationBatchRequest,
-    db: Session = Depends(get_db),
-    device: Device = Depends(verify_device)
+    device: DeviceIdentity = Depends(verify_device)
 ):
     """Upload conversation turns."""
     if device.serial != request.device_serial:
@@ -175,119 +188,303 @@ async def upload_conversations(
             detail=f"Too many turns (max {settings.MAX_CONVERSATIONS_PER_BATCH})"
         )
 
-    accepted = 0
-
-    for turn in request.turns:
-        db_turn = ConversationTurn(
-            device_serial=device.serial,
-            session_id=request.session_id,
-            turn_id=turn.turn_id,
-            timestamp=turn.timestamp,
-            role=turn.role,
-            text=turn.text,
-            stt_latency_ms=turn.stt_latency_ms,
-            llm_latency_ms=turn.llm_latency_ms,
-            tts_latency_ms=turn.tts_latency_ms,
-            e2e_latency_ms=turn.e2e_latency_ms
+    batch_id = request.batch_id or str(uuid.uuid4())
+    rows = [dict(turn.model_dump(), session_id=request.session_id) for turn in request.turns]
+
+    try:
+        result = await ingest.submit(ingest.KIND_CONVERSATIONS, device.serial, batch_id, rows)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Ingest queue full, retry later")
+
+    if result is None:
+        return JSONResponse(
+            status_code=202,
+            content={
+                "success": True,
+                "session_id": request.session_id,
+                "turns_queued": len(rows),
+                "batch_id": batch_id
+            }
         )
-        db.add(db_turn)
-        accepted += 1
 
+    return {
+        "success": True,
+        "session_id": request.session_id,
+        "turns_accepted": result.accepted,
+        "batch_id": batch_id,
+        "duplicate": result.duplicate
+    }
+
+
+def _file_ext(filename: Optional[str]) -> str:
+    """Safe file extension for the blob store (defaults to .wav)."""
+    ext = Path(filename).suffix.lower() if filename else ""
+    if not ext or len(ext) > 10 or not ext[1:].isalnum():
+        return ".wav"
+    return ext
+
+
+def _record_audio_upload(db: Session, serial: str, meta: AudioMetadata, blob: audio_store.StoredBlob, ext: str) -> AudioUpload:
+    """Create the AudioUpload row pointing at a stored blob."""
+    audio_upload = AudioUpload(
+        device_serial=serial,
+        session_id=meta.session_id,
+        storage_type="local",
+        storage_path=str(blob.path),
+        audio_type=meta.audio_type,
+        duration_seconds=meta.duration_seconds,
+        size_bytes=blob.size_bytes,
+        format=ext.lstrip('.'),
+        sample_rate=meta.sample_rate,
+        timestamp=meta.timestamp
+    )
+    db.add(audio_upload)
     db.commit()
+    db.refresh(audio_upload)
+    return audio_upload
+
 
+def _audio_upload_response(audio_upload: AudioUpload, blob: audio_store.StoredBlob) -> dict:
     return {
         "success": True,
-        "session_id": request.session_id,
-        "turns_accepted": accepted
+        "upload_id": audio_upload.id,
+        "storage_path": str(blob.path),
+        "size_bytes": blob.size_bytes,
+        "sha256": blob.sha256,
+        "deduplicated": blob.deduplicated
     }
 
 
 @router.post("/audio")
 async def upload_audio(
-    file: UploadFile = File(...),
-    metadata: str = Form(...),
-    authorization: str = Header(...),
-    x_device_serial: str = Header(...),
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_db),
+    device: DeviceIdentity = Depends(verify_device)
 ):
     """
-    Upload an audio recording.
+    Upload an audio recording in a single request.
 
-    Audio files are stored locally or in GCS depending on configuration.
+    multipart/form-data with a `file` part and a `metadata` JSON field. The
+    body is parsed as it streams in: the file part is written to disk in
+    chunks while hashed, then stored content-addressed (identical uploads
+    share one blob). For large files or flaky links use the resumable
+    /audio/sessions endpoints instead.
     """
-    # Verify device
-    token = authorization.replace("Bearer ", "") if authorization.startswith("Bearer ") else authorization
-    device = db.query(Device).filter(Device.api_key == token).first()
-    if not device or device.serial != x_device_serial:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_AUDIO_UPLOAD_BYTES + 64 * 1024:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {settings.MAX_AUDIO_UPLOAD_BYTES} bytes")
+
+    upload = await audio_store.spool_multipart(request, "file")
 
     # Parse metadata
-    import json
     try:
-        meta = AudioMetadata(**json.loads(metadata))
+        meta = AudioMetadata(**json.loads(upload.fields["metadata"]))
     except Exception as e:
+        upload.discard()
         raise HTTPException(status_code=400, detail=f"Invalid metadata: {e}")
 
-    # Generate unique filename
-    upload_id = str(uuid.uuid4())
-    file_ext = Path(file.filename).suffix if file.filename else ".wav"
-    filename = f"{device.serial}/{meta.audio_type}/{upload_id}{file_ext}"
+    ext = _file_ext(upload.filename)
+    blob = await upload.commit(ext)
 
-    # Save file locally
-    upload_path = Path(settings.UPLOAD_DIR) / filename
-    upload_path.parent.mkdir(parents=True, exist_ok=True)
+    audio_upload = await run_in_threadpool(_record_audio_upload, db, device.serial, meta, blob, ext)
+    return _audio_upload_response(audio_upload, blob)
 
-    # Read and save file
-    content = await file.read()
-    upload_path.write_bytes(content)
 
-    # Create database record
-    audio_upload = AudioUpload(
+@router.post("/audio/sessions")
+async def create_audio_session(
+    request: AudioSessionRequest,
+    db: Session = Depends(get_db),
+    device: DeviceIdentity = Depends(verify_device)
+):
+    """
+    Start a resumable audio upload.
+
+    Then PUT chunks to /audio/sessions/{upload_id}?offset=N (raw body), GET
+    the session to learn the resume offset after a failure, and POST
+    /complete when all bytes are sent.
+    """
+    if request.total_bytes is not None and request.total_bytes > settings.MAX_AUDIO_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {settings.MAX_AUDIO_UPLOAD_BYTES} bytes")
+
+    session = AudioUploadSession(
         device_serial=device.serial,
-        session_id=meta.session_id,
-        storage_type="local",
-        storage_path=str(upload_path),
-        audio_type=meta.audio_type,
-        duration_seconds=meta.duration_seconds,
-        size_bytes=len(content),
-        format=file_ext.lstrip('.'),
-        sample_rate=meta.sample_rate,
-        timestamp=meta.timestamp
+        meta=request.metadata.model_dump(mode="json"),
+        file_ext=_file_ext(request.filename),
+        total_bytes=request.total_bytes,
+        sha256=request.sha256
     )
-    db.add(audio_upload)
-    db.commit()
-    db.refresh(audio_upload)
+    db.add(session)
+    await run_in_threadpool(db.commit)
 
     return {
         "success": True,
-        "upload_id": audio_upload.id,
-        "storage_path": str(upload_path),
-        "size_bytes": len(content)
+        "upload_id": session.id,
+        "offset": 0,
+        "chunk_bytes": settings.AUDIO_CHUNK_BYTES
+    }
+
+
+def _get_audio_session(db: Session, upload_id: str, serial: str) -> AudioUploadSession:
+    session = db.get(AudioUploadSession, upload_id)
+    if not session or session.device_serial != serial:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+
+@router.get("/audio/sessions/{upload_id}")
+def get_audio_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    device: DeviceIdentity = Depends(verify_device)
+):
+    """Get the number of bytes received so far (the offset to resume from)."""
+    session = _get_audio_session(db, upload_id, device.serial)
+    return {
+        "success": True,
+        "upload_id": upload_id,
+        "offset": audio_store.partial_offset(upload_id),
+        "total_bytes": session.total_bytes
+    }
+
+
+@router.put("/audio/sessions/{upload_id}")
+async def upload_audio_chunk(
+    upload_id: str,
+    offset: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    device: DeviceIdentity = Depends(verify_device)
+):
+    """Append the raw request body at `offset`. Returns 409 with the real offset on mismatch."""
+    await run_in_threadpool(_get_audio_session, db, upload_id, device.serial)
+    new_offset = await audio_store.append_chunk(upload_id, offset, request.stream())
+    return {"success": True, "upload_id": upload_id, "offset": new_offset}
+
+
+@router.post("/audio/sessions/{upload_id}/complete")
+async def complete_audio_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    device: DeviceIdentity = Depends(verify_device)
+):
+    """Verify and store a finished resumable upload."""
+    session = await run_in_threadpool(_get_audio_session, db, upload_id, device.serial)
+
+    received = audio_store.partial_offset(upload_id)
+    if session.total_bytes is not None and received != session.total_bytes:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Upload incomplete", "offset": received, "total_bytes": session.total_bytes}
+        )
+
+    blob = await audio_store.finalize(upload_id, session.file_ext, session.sha256)
+    meta = AudioMetadata(**session.meta)
+
+    def record():
+        db.delete(session)
+        return _record_audio_upload(db, device.serial, meta, blob, session.file_ext)
+
+    audio_upload = await run_in_threadpool(record)
+    return _audio_upload_response(audio_upload, blob)
+
+
+@router.delete("/audio/sessions/{upload_id}")
+async def cancel_audio_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    device: DeviceIdentity = Depends(verify_device)
+):
+    """Abandon a resumable upload and discard received bytes."""
+    session = await run_in_threadpool(_get_audio_session, db, upload_id, device.serial)
+    await audio_store.discard(upload_id)
+
+    def delete():
+        db.delete(session)
+        db.commit()
+
+    await run_in_threadpool(delete)
+    return {"success": True}
+
+
+@router.get("/batches/{batch_id}")
+async def get_batch_status(
+    batch_id: str,
+    device: DeviceIdentity = Depends(verify_device)
+):
+    """Check whether a batch has been ingested (useful after a 202)."""
+    entries = await run_in_threadpool(ingest.get_batch, device.serial, batch_id)
+    queue = ingest.get_queue()
+
+    return {
+        "success": True,
+        "batch_id": batch_id,
+        "ingested": entries,
+        "queue": queue.stats() if queue else None
     }
 
 
+def _encode_cursor(timestamp: datetime, row_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{row_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        ts, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(ts), row_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _keyset_page(query, model, limit: int, cursor: Optional[str], offset: int = 0):
+    """
+    Newest-first page ordered by (timestamp, id). Returns (rows, next_cursor, total).
+
+    `cursor` continues after the previous page without scanning skipped rows;
+    `offset` (the original paging parameter) still works on its own or on
+    top of a cursor. `total` counts all rows matching the filters.
+    """
+    limit = max(1, min(limit, 1000))
+    total = query.count()
+    if cursor:
+        ts, row_id = _decode_cursor(cursor)
+        query = query.filter(or_(
+            model.timestamp < ts,
+            and_(model.timestamp == ts, model.id < row_id)
+        ))
+    rows = (
+        query
+        .order_by(model.timestamp.desc(), model.id.desc())
+        .offset(max(0, offset))
+        .limit(limit + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].timestamp, rows[-1].id)
+    return rows, next_cursor, total
+
+
 @router.get("/metrics/{serial}")
 async def get_device_metrics(
     serial: str,
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    device: Device = Depends(verify_device)
+    device: DeviceIdentity = Depends(verify_device)
 ):
-    """Get metrics for a device."""
+    """
+    Get metrics for a device, newest first.
+
+    Pass the returned next_cursor to fetch the following page (or page with
+    offset as before).
+    """
     if device.serial != serial:
         raise HTTPException(status_code=403, detail="Access denied")
 
-    metrics = (
-        db.query(SystemMetric)
-        .filter(SystemMetric.device_serial == serial)
-        .order_by(SystemMetric.timestamp.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
-
-    total = db.query(SystemMetric).filter(SystemMetric.device_serial == serial).count()
+    query = db.query(SystemMetric).filter(SystemMetric.device_serial == serial)
+    metrics, next_cursor, total = await run_in_threadpool(_keyset_page, query, SystemMetric, limit, cursor, offset)
 
     return {
         "success": True,
@@ -304,7 +501,8 @@ async def get_device_metrics(
         ],
         "total": total,
         "limit": limit,
-        "offset": offset
+        "offset": offset,
+        "next_cursor": next_cursor
     }
 
 
@@ -314,10 +512,16 @@ async def get_device_conversations(
     session_id: Optional[str] = None,
     limit: int = 100,
     offset: int = 0,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
-    device: Device = Depends(verify_device)
+    device: DeviceIdentity = Depends(verify_device)
 ):
-    """Get conversation history for a device."""
+    """
+    Get conversation history for a device, newest first.
+
+    Pass the returned next_cursor to fetch the following page (or page with
+    offset as before).
+    """
     if device.serial != serial:
         raise HTTPException(status_code=403, detail="Access denied")
 
@@ -326,15 +530,7 @@ async def get_device_conversations(
     if session_id:
         query = query.filter(ConversationTurn.session_id == session_id)
 
-    turns = (
-        query
-        .order_by(ConversationTurn.timestamp.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
-
-    total = query.count()
+    turns, next_cursor, total = await run_in_threadpool(_keyset_page, query, ConversationTurn, limit, cursor, offset)
 
     return {
         "success": True,
@@ -352,7 +548,50 @@ async def get_device_conversations(
         ],
         "total": total,
         "limit": limit,
-        "offset": offset
+        "offset": offset,
+        "next_cursor": next_cursor
+    }
+
+
+@router.get("/rollups/{serial}")
+def get_device_rollups(
+    serial: str,
+    metric: str = "cpu_percent",
+    resolution: str = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    device: DeviceIdentity = Depends(verify_device)
+):
+    """
+    Get time-bucketed aggregates (count/min/max/avg/p95) for one metric.
+
+    Defaults to the last 7 days. Reads only the rollup table, never raw rows.
+    """
+    if device.serial != serial:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    if metric not in rollups.METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric (one of {list(rollups.METRICS)})")
+    if resolution not in rollups.RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown resolution (one of {list(rollups.RESOLUTIONS)})")
+
+    end = rollups.to_naive_utc(end) if end else datetime.utcnow()
+    start = rollups.to_naive_utc(start) if start else end - timedelta(days=7)
+
+    max_buckets = 5000
+    if (end - start).total_seconds() / rollups.RESOLUTIONS[resolution] > max_buckets:
+        raise HTTPException(status_code=400, detail=f"Range too large for {resolution} resolution")
+
+    with engine.connect() as conn:
+        buckets = rollups.query(conn, serial, metric, resolution, start, end)
+
+    return {
+        "success": True,
+        "metric": metric,
+        "resolution": resolution,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "buckets": buckets
     }
 
 
@@ -363,7 +602,7 @@ async def get_device_audio_uploads(
     limit: int = 50,
     offset: int = 0,
     db: Session = Depends(get_db),
-    device: Device = Depends(verify_device)
+    device: DeviceIdentity = Depends(verify_device)
 ):
     """Get audio upload records for a device."""
     if device.serial != serial:
@@ -16,6 +16,7 @@ from fastapi import APIRouter, Depends, HTTPException, Header
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from app import device_auth
 from app.models import get_db, Device
 
 router = APIRouter()
@@ -170,6 +171,7 @@ async def unlink_user_device(
 
     device.user_id = None
     db.commit()
+    device_auth.invalidate_serial(serial)
 
     return {
         "success": True,
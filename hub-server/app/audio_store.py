@@ -0,0 +1,401 @@
+"""
+Content-addressed audio storage.
+
+Uploads are streamed to a temp file in AUDIO_CHUNK_BYTES chunks while a
+SHA-256 is computed, then atomically renamed to:
+
+    {UPLOAD_DIR}/blobs/{sha[:2]}/{sha[2:4]}/{sha}{ext}
+
+Identical uploads share one blob. Memory per upload is bounded by the chunk
+size regardless of file size, and MAX_AUDIO_UPLOAD_BYTES is enforced while
+streaming. Single-request multipart uploads are parsed incrementally from
+the request stream, so the file part goes straight to the temp file instead
+of being spooled by the form parser first.
+
+Resumable uploads keep a partial file at {UPLOAD_DIR}/partial/{upload_id};
+its size on disk is the authoritative resume offset and its mtime the last
+activity. Appends, finalize, discard and expiry hold a per-upload lock, so
+duplicate retries of a chunk can't both append and an upload in progress
+is never expired under a writer.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiofiles
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.models import SessionLocal, AudioUploadSession
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredBlob:
+    """Result of storing an upload."""
+    sha256: str
+    size_bytes: int
+    path: Path
+    deduplicated: bool
+
+
+def _root() -> Path:
+    return Path(settings.UPLOAD_DIR)
+
+
+def tmp_dir() -> Path:
+    return _root() / "tmp"
+
+
+def partial_path(upload_id: str) -> Path:
+    # upload_id is server-generated; reject anything that could escape the dir
+    if not upload_id or "/" in upload_id or "\\" in upload_id or upload_id.startswith("."):
+        raise HTTPException(status_code=400, detail="Invalid upload id")
+    return _root() / "partial" / upload_id
+
+
+def blob_path(sha256: str, ext: str) -> Path:
+    return _root() / "blobs" / sha256[:2] / sha256[2:4] / f"{sha256}{ext}"
+
+
+def _too_large():
+    return HTTPException(
+        status_code=413,
+        detail=f"Upload exceeds {settings.MAX_AUDIO_UPLOAD_BYTES} bytes"
+    )
+
+
+def _commit(tmp: Path, sha256: str, size: int, ext: str) -> StoredBlob:
+    """Atomically move a completed temp file into the content-addressed layout."""
+    final = blob_path(sha256, ext)
+    if final.exists():
+        tmp.unlink(missing_ok=True)
+        return StoredBlob(sha256, size, final, deduplicated=True)
+    final.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp, final)
+    return StoredBlob(sha256, size, final, deduplicated=False)
+
+
+async def store_stream(chunks: AsyncIterator[bytes], ext: str) -> StoredBlob:
+    """Stream chunks to disk, hashing as we go, and commit to the blob store."""
+    tmp, sha256, size = await _spool(chunks)
+    return await run_in_threadpool(_commit, tmp, sha256, size, ext)
+
+
+async def _spool(chunks: AsyncIterator[bytes]) -> Tuple[Path, str, int]:
+    """Stream chunks to a temp file. Returns (temp path, sha256, size)."""
+    tmp_dir().mkdir(parents=True, exist_ok=True)
+    tmp = tmp_dir() / f"{uuid.uuid4()}.part"
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(tmp, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > settings.MAX_AUDIO_UPLOAD_BYTES:
+                    raise _too_large()
+                digest.update(chunk)
+                await out.write(chunk)
+            await out.flush()
+            await run_in_threadpool(os.fsync, out.fileno())
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+    return tmp, digest.hexdigest(), size
+
+
+# =============================================================================
+# Multipart uploads
+# =============================================================================
+
+MAX_FORM_FIELD_BYTES = 64 * 1024  # Non-file fields (metadata JSON) are kept in memory
+
+
+@dataclass
+class SpooledUpload:
+    """A multipart upload whose file part is on disk but not yet in the blob store."""
+    tmp: Path
+    sha256: str
+    size_bytes: int
+    filename: Optional[str]
+    fields: Dict[str, str]
+
+    async def commit(self, ext: str) -> StoredBlob:
+        return await run_in_threadpool(_commit, self.tmp, self.sha256, self.size_bytes, ext)
+
+    def discard(self):
+        self.tmp.unlink(missing_ok=True)
+
+
+async def _iter_multipart(request, file_field: str, form: Dict[str, Any]) -> AsyncIterator[bytes]:
+    """
+    Parse a multipart/form-data body as it streams in and yield the bytes of
+    `file_field`. Other fields and the file name are collected into `form`.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected multipart/form-data")
+
+    part = {"headers": {}, "field": b"", "value": b"", "name": None}
+    file_data: List[bytes] = []  # File bytes parsed from the current body chunk
+    fields_size = [0]
+
+    def on_part_begin():
+        part.update(headers={}, field=b"", value=b"", name=None)
+
+    def on_header_field(data, start, end):
+        part["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"], part["value"] = b"", b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        part["name"] = options.get(b"name", b"").decode("latin-1")
+        if part["name"] == file_field:
+            form["file"] = True
+            if b"filename" in options:
+                form["filename"] = options[b"filename"].decode("utf-8", "replace")
+        else:
+            form["fields"][part["name"]] = b""
+
+    def on_part_data(data, start, end):
+        if part["name"] == file_field:
+            file_data.append(bytes(data[start:end]))
+            return
+        fields_size[0] += end - start
+        if fields_size[0] > MAX_FORM_FIELD_BYTES:
+            raise HTTPException(status_code=413, detail="Form fields too large")
+        form["fields"][part["name"]] += data[start:end]
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+    async for chunk in request.stream():
+        try:
+            parser.write(chunk)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Malformed multipart body: {e}")
+        for data in file_data:
+            yield data
+        file_data.clear()
+    parser.finalize()
+
+
+async def spool_multipart(request, file_field: str = "file") -> SpooledUpload:
+    """
+    Stream a multipart/form-data request's `file_field` to a temp file (hashed
+    as it arrives); the other fields are returned decoded in `fields`.
+    """
+    form: Dict[str, Any] = {"file": False, "filename": None, "fields": {}}
+    tmp, sha256, size = await _spool(_iter_multipart(request, file_field, form))
+    if not form["file"]:
+        tmp.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=f"Missing form field: {file_field}")
+    fields = {name: value.decode("utf-8", "replace") for name, value in form["fields"].items()}
+    return SpooledUpload(tmp, sha256, size, form["filename"], fields)
+
+
+# =============================================================================
+# Resumable uploads
+# =============================================================================
+
+# upload_id -> [lock, holders + waiters]; entries are dropped when unused
+_upload_locks: Dict[str, List] = {}
+
+
+@asynccontextmanager
+async def _upload_lock(upload_id: str):
+    """Serialize appends/finalize of one upload (the hub runs a single process)."""
+    entry = _upload_locks.get(upload_id)
+    if entry is None:
+        entry = _upload_locks[upload_id] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            _upload_locks.pop(upload_id, None)
+
+
+def partial_offset(upload_id: str) -> int:
+    path = partial_path(upload_id)
+    return path.stat().st_size if path.exists() else 0
+
+
+async def append_chunk(upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> int:
+    """
+    Append a chunk at `offset` to a partial upload. Returns the new offset.
+
+    Raises 409 if `offset` does not match the bytes already received, so a
+    device that lost a response can GET the offset and resume from there.
+    The offset check and the write happen under the upload's lock; a
+    concurrent retry of the same chunk waits and then gets the 409.
+    """
+    path = partial_path(upload_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    async with _upload_lock(upload_id):
+        current = partial_offset(upload_id)
+        if offset != current:
+            raise HTTPException(status_code=409, detail={"message": "Offset mismatch", "offset": current})
+
+        size = current
+        async with aiofiles.open(path, "ab") as out:
+            async for chunk in chunks:
+                # Checked before writing, so the partial file never exceeds the limit
+                if size + len(chunk) > settings.MAX_AUDIO_UPLOAD_BYTES:
+                    raise _too_large()
+                await out.write(chunk)
+                size += len(chunk)
+
+    return size
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(settings.AUDIO_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _finalize(upload_id: str, ext: str, expected_sha256: Optional[str]) -> StoredBlob:
+    path = partial_path(upload_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="No data received for upload")
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+    sha256 = _hash_file(path)
+    if expected_sha256 and expected_sha256.lower() != sha256:
+        raise HTTPException(status_code=422, detail={"message": "Checksum mismatch", "sha256": sha256})
+    return _commit(path, sha256, path.stat().st_size, ext)
+
+
+async def finalize(upload_id: str, ext: str, expected_sha256: Optional[str] = None) -> StoredBlob:
+    """Hash the completed partial file (streamed) and commit it to the blob store."""
+    async with _upload_lock(upload_id):
+        return await run_in_threadpool(_finalize, upload_id, ext, expected_sha256)
+
+
+async def discard(upload_id: str):
+    """Delete a partial upload; waits for an append or finalize in progress."""
+    async with _upload_lock(upload_id):
+        partial_path(upload_id).unlink(missing_ok=True)
+
+
+def _idle_files(directory: Path, cutoff: float) -> List[Path]:
+    if not directory.exists():
+        return []
+    idle = []
+    for path in directory.iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                idle.append(path)
+        except FileNotFoundError:
+            pass
+    return idle
+
+
+def _remove_if_idle(path: Path, cutoff: float) -> bool:
+    try:
+        if path.stat().st_mtime < cutoff:
+            path.unlink()
+            return True
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove stale upload {path}: {e}")
+    return False
+
+
+def cleanup_stale(max_age_seconds: float) -> int:
+    """Remove temp files of single-request uploads not modified for max_age_seconds. Blocking."""
+    cutoff = time.time() - max_age_seconds
+    return sum(_remove_if_idle(path, cutoff) for path in _idle_files(tmp_dir(), cutoff))
+
+
+def _last_activity(session: AudioUploadSession) -> datetime:
+    """When bytes were last appended (partial file mtime), else when the session started."""
+    try:
+        return datetime.utcfromtimestamp(partial_path(session.id).stat().st_mtime)
+    except FileNotFoundError:
+        return session.created_at
+
+
+def _stale_sessions(cutoff: datetime) -> List[str]:
+    db = SessionLocal()
+    try:
+        sessions = db.query(AudioUploadSession).filter(AudioUploadSession.created_at < cutoff).all()
+        return [session.id for session in sessions if _last_activity(session) < cutoff]
+    finally:
+        db.close()
+
+
+def _expire_session(upload_id: str, cutoff: datetime) -> bool:
+    """Delete a session and its partial file if still idle (called under the upload lock)."""
+    db = SessionLocal()
+    try:
+        session = db.get(AudioUploadSession, upload_id)
+        if session is None or _last_activity(session) >= cutoff:
+            return False  # Completed, cancelled or resumed since the scan
+        partial_path(upload_id).unlink(missing_ok=True)
+        db.delete(session)
+        db.commit()
+        return True
+    finally:
+        db.close()
+
+
+async def expire_sessions() -> int:
+    """
+    Drop resumable sessions with no appended bytes for AUDIO_SESSION_TTL_HOURS
+    and orphaned temp files. Each session is re-checked under its upload lock,
+    so a slow upload that is still receiving chunks is never expired.
+    """
+    max_age = timedelta(hours=settings.AUDIO_SESSION_TTL_HOURS)
+    cutoff = datetime.utcnow() - max_age
+    expired = 0
+    for upload_id in await run_in_threadpool(_stale_sessions, cutoff):
+        async with _upload_lock(upload_id):
+            expired += await run_in_threadpool(_expire_session, upload_id, cutoff)
+
+    # Partial files whose session is gone, once idle just as long
+    idle_cutoff = time.time() - max_age.total_seconds()
+    for path in await run_in_threadpool(_idle_files, _root() / "partial", idle_cutoff):
+        async with _upload_lock(path.name):
+            expired += await run_in_threadpool(_remove_if_idle, path, idle_cutoff)
+
+    return expired + await run_in_threadpool(cleanup_stale, max_age.total_seconds())
@@ -7,6 +7,8 @@ Environment variables:
 - GCS_BUCKET: Google Cloud Storage bucket name
 - GCS_CREDENTIALS: Path to GCS service account JSON
 - UPLOAD_DIR: Local directory for file uploads
+- INGEST_MODE: "sync" or "queue" telemetry ingestion
+- RAW_RETENTION_DAYS: Prune raw metric/conversation rows older than this (0 = never)
 """
 
 import os
@@ -30,6 +32,9 @@ class Settings(BaseSettings):
 
     # File storage
     UPLOAD_DIR: str = "./uploads"
+    MAX_AUDIO_UPLOAD_BYTES: int = 200 * 1024 * 1024
+    AUDIO_CHUNK_BYTES: int = 1024 * 1024
+    AUDIO_SESSION_TTL_HOURS: int = 24  # abandoned resumable uploads are removed after this
 
     # Security
     API_KEY_LENGTH: int = 32
@@ -39,6 +44,21 @@ class Settings(BaseSettings):
     MAX_METRICS_PER_BATCH: int = 1000
     MAX_CONVERSATIONS_PER_BATCH: int = 100
 
+    # Device auth
+    AUTH_CACHE_TTL_SECONDS: float = 60.0  # 0 disables the cache
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    LAST_SEEN_FLUSH_SECONDS: float = 5.0  # 0 writes last_seen on every request
+
+    # Ingestion
+    INGEST_MODE: str = "sync"  # "sync" (write before responding) or "queue" (202 + background writer)
+    INGEST_QUEUE_MAX_BATCHES: int = 10000
+
+    # Retention (days, 0 keeps forever)
+    RAW_RETENTION_DAYS: int = 0  # Opt in; raw history is kept by default
+    ROLLUP_MINUTE_RETENTION_DAYS: int = 7
+    ROLLUP_HOUR_RETENTION_DAYS: int = 180
+    RETENTION_INTERVAL_SECONDS: int = 3600
+
     # Server
     DEBUG: bool = False
 
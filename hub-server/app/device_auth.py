@@ -0,0 +1,274 @@
+"""
+Device API key authentication.
+
+Shared by the devices and telemetry routers:
+- DeviceAuthCache: TTL'd, size-bounded map from sha256(api_key) to the
+  device identity, so repeat requests skip the ``Device.api_key`` lookup
+- LastSeenWriter: coalesces last_seen/last_ip updates in memory and flushes
+  them in one batched UPDATE every LAST_SEEN_FLUSH_SECONDS
+
+The cache is per-process. Call ``invalidate_serial`` whenever a device's key,
+owner or status changes; in multi-worker deployments AUTH_CACHE_TTL_SECONDS
+bounds how long another worker may keep serving the old entry.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import bindparam, func, update
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.models import engine, write_lock, SessionLocal, Device
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DeviceIdentity:
+    """Authenticated device, as cached. Load the Device row for writes."""
+    serial: str
+    user_id: Optional[str]
+    status: Optional[str]
+
+
+def extract_token(authorization: str) -> str:
+    """Strip an optional "Bearer " prefix."""
+    return authorization.replace("Bearer ", "") if authorization.startswith("Bearer ") else authorization
+
+
+def hash_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_client_ip(request: Request) -> str:
+    """Get client IP address from request."""
+    # Check for forwarded headers
+    forwarded = request.headers.get("X-Forwarded-For")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+# =============================================================================
+# Auth Cache
+# =============================================================================
+
+class DeviceAuthCache:
+    """LRU + TTL cache of api-key hash -> DeviceIdentity. Thread-safe."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, DeviceIdentity]]" = OrderedDict()
+        # serial -> epoch of its last invalidation, so a lookup that read the
+        # database before an invalidation can't re-cache the stale identity.
+        # Only kept while a lookup older than the invalidation is in flight.
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._inflight: Counter = Counter()  # generation -> running lookups
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key_hash: str) -> Optional[DeviceIdentity]:
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key_hash)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key_hash]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key_hash)
+            self.hits += 1
+            return entry[1]
+
+    @contextmanager
+    def lookup(self) -> Iterator[int]:
+        """Bracket a database lookup; yields the generation to pass to put()."""
+        with self._lock:
+            generation = self._epoch
+            self._inflight[generation] += 1
+        try:
+            yield generation
+        finally:
+            with self._lock:
+                self._inflight[generation] -= 1
+                if not self._inflight[generation]:
+                    del self._inflight[generation]
+                # Invalidations no running lookup predates can't reject a put() any more
+                oldest = min(self._inflight, default=self._epoch)
+                for serial in [s for s, epoch in self._generations.items() if epoch <= oldest]:
+                    del self._generations[serial]
+
+    def put(self, key_hash: str, identity: DeviceIdentity, generation: Optional[int] = None):
+        """Cache an identity, unless its serial was invalidated after `generation`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and self._generations.get(identity.serial, 0) > generation:
+                return
+            self._entries[key_hash] = (time.monotonic() + self.ttl_seconds, identity)
+            self._entries.move_to_end(key_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_serial(self, serial: str):
+        """Drop every cached key for a device (key rotated, linked/unlinked, status changed)."""
+        with self._lock:
+            self._epoch += 1
+            if self._inflight:
+                self._generations[serial] = self._epoch
+            for key_hash in [k for k, (_, ident) in self._entries.items() if ident.serial == serial]:
+                del self._entries[key_hash]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+auth_cache = DeviceAuthCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES)
+
+
+def lookup_cached(token: str) -> Optional[DeviceIdentity]:
+    """Resolve a token from the cache only (no I/O, safe on the event loop)."""
+    return auth_cache.get(hash_key(token))
+
+
+def load_identity(token: str) -> Optional[DeviceIdentity]:
+    """Resolve a token from the database and cache it. Blocking."""
+    with auth_cache.lookup() as generation:
+        db = SessionLocal()
+        try:
+            row = (
+                db.query(Device.serial, Device.user_id, Device.status)
+                .filter(Device.api_key == token)
+                .first()
+            )
+        finally:
+            db.close()
+
+        if row is None:
+            return None
+
+        identity = DeviceIdentity(serial=row.serial, user_id=row.user_id, status=row.status)
+        auth_cache.put(hash_key(token), identity, generation)
+        return identity
+
+
+async def authenticate(token: str) -> Optional[DeviceIdentity]:
+    """Resolve a token, hitting the database (off the loop) only on a cache miss."""
+    identity = lookup_cached(token)
+    if identity is None:
+        identity = await run_in_threadpool(load_identity, token)
+    return identity
+
+
+def invalidate_serial(serial: str):
+    auth_cache.invalidate_serial(serial)
+
+
+# =============================================================================
+# Write-behind last_seen
+# =============================================================================
+
+class LastSeenWriter:
+    """Coalesces per-device last_seen/last_ip updates into periodic batched UPDATEs."""
+
+    def __init__(self):
+        self._pending: Dict[str, Tuple[datetime, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.rows_flushed = 0
+
+    def touch(self, serial: str, ip: Optional[str] = None):
+        """Record that a device was seen. Later touches overwrite earlier ones."""
+        with self._lock:
+            self._pending[serial] = (datetime.utcnow(), ip)
+
+    def flush(self) -> int:
+        """Write all pending updates in one executemany UPDATE. Blocking."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        table = Device.__table__
+        stmt = (
+            update(table)
+            .where(table.c.serial == bindparam("b_serial"))
+            .values(
+                last_seen=bindparam("b_last_seen"),
+                last_ip=func.coalesce(bindparam("b_last_ip"), table.c.last_ip),
+            )
+        )
+        params = [
+            {"b_serial": serial, "b_last_seen": seen, "b_last_ip": ip}
+            for serial, (seen, ip) in pending.items()
+        ]
+        with write_lock, engine.begin() as conn:
+            conn.execute(stmt, params)
+
+        self.flushes += 1
+        self.rows_flushed += len(params)
+        return len(params)
+
+    def start(self):
+        if settings.LAST_SEEN_FLUSH_SECONDS > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await run_in_threadpool(self.flush)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.LAST_SEEN_FLUSH_SECONDS)
+            try:
+                await run_in_threadpool(self.flush)
+            except Exception as e:
+                logger.error(f"Failed to flush last_seen updates: {e}")
+
+
+last_seen_writer = LastSeenWriter()
+
+
+async def mark_seen(serial: str, ip: Optional[str] = None):
+    """Record a device as seen (write-behind, or write-through if flushing is disabled)."""
+    last_seen_writer.touch(serial, ip)
+    if settings.LAST_SEEN_FLUSH_SECONDS <= 0:
+        await run_in_threadpool(last_seen_writer.flush)
+
+
+async def start():
+    last_seen_writer.start()
+
+
+async def stop():
+    await last_seen_writer.stop()
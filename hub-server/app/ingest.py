@@ -0,0 +1,238 @@
+"""
+Telemetry ingestion.
+
+Writes metric and conversation batches with a single Core ``executemany``
+insert per batch instead of one ORM object per row. All writes run off the
+event loop (in the thread pool, or in the background ingest queue) and are
+idempotent on ``(device_serial, kind, batch_id)`` via the telemetry_batches
+table. Rollups (app.rollups) are updated in the same transaction.
+
+Usage:
+    result = await ingest.submit(ingest.KIND_METRICS, serial, batch_id, rows)
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app import rollups
+from app.config import settings
+from app.models import engine, write_lock, SystemMetric, ConversationTurn, TelemetryBatch
+
+logger = logging.getLogger(__name__)
+
+KIND_METRICS = "metrics"
+KIND_CONVERSATIONS = "conversations"
+
+
+@dataclass
+class IngestResult:
+    """Outcome of writing one batch."""
+    batch_id: str
+    accepted: int
+    duplicate: bool = False
+
+
+# =============================================================================
+# Synchronous writers (run in a worker thread)
+# =============================================================================
+
+def _write_batch(kind: str, table, device_serial: str, batch_id: str, rows: List[Dict[str, Any]]) -> IngestResult:
+    """Insert the batch ledger row and all data rows in one transaction."""
+    try:
+        with write_lock, engine.begin() as conn:
+            conn.execute(
+                insert(TelemetryBatch.__table__),
+                {
+                    "device_serial": device_serial,
+                    "batch_id": batch_id,
+                    "kind": kind,
+                    "row_count": len(rows),
+                },
+            )
+            if rows:
+                conn.execute(insert(table), rows)
+                rollups.apply_batch(conn, device_serial, kind, rows)
+    except IntegrityError:
+        # Same batch_id already ingested - report the original count
+        with engine.connect() as conn:
+            existing = conn.execute(
+                select(TelemetryBatch.row_count).where(
+                    TelemetryBatch.device_serial == device_serial,
+                    TelemetryBatch.kind == kind,
+                    TelemetryBatch.batch_id == batch_id,
+                )
+            ).scalar()
+        if existing is None:
+            raise
+        return IngestResult(batch_id=batch_id, accepted=existing, duplicate=True)
+
+    return IngestResult(batch_id=batch_id, accepted=len(rows))
+
+
+def write_metrics(device_serial: str, batch_id: str, rows: List[Dict[str, Any]]) -> IngestResult:
+    """Bulk insert system metric rows for a device."""
+    rows = [dict(row, device_serial=device_serial) for row in rows]
+    return _write_batch(KIND_METRICS, SystemMetric.__table__, device_serial, batch_id, rows)
+
+
+def write_conversations(device_serial: str, batch_id: str, rows: List[Dict[str, Any]]) -> IngestResult:
+    """Bulk insert conversation turn rows for a device."""
+    rows = [dict(row, device_serial=device_serial) for row in rows]
+    return _write_batch(KIND_CONVERSATIONS, ConversationTurn.__table__, device_serial, batch_id, rows)
+
+
+def get_batch(device_serial: str, batch_id: str) -> List[Dict[str, Any]]:
+    """Look up ledger entries for a batch_id (one per kind)."""
+    with engine.connect() as conn:
+        result = conn.execute(
+            select(TelemetryBatch.kind, TelemetryBatch.row_count, TelemetryBatch.created_at).where(
+                TelemetryBatch.device_serial == device_serial,
+                TelemetryBatch.batch_id == batch_id,
+            )
+        )
+        return [
+            {
+                "kind": r.kind,
+                "row_count": r.row_count,
+                "created_at": r.created_at.isoformat() if r.created_at else None,
+            }
+            for r in result
+        ]
+
+
+_WRITERS: Dict[str, Callable[[str, str, List[Dict[str, Any]]], IngestResult]] = {
+    KIND_METRICS: write_metrics,
+    KIND_CONVERSATIONS: write_conversations,
+}
+
+
+# =============================================================================
+# Background Ingest Queue
+# =============================================================================
+
+@dataclass
+class _Job:
+    kind: str
+    device_serial: str
+    batch_id: str
+    rows: List[Dict[str, Any]]
+
+
+class IngestQueue:
+    """Bounded in-process queue drained by a single background writer task.
+
+    Enqueueing is O(1) on the event loop, so upload handlers can return 202
+    immediately. A single writer keeps SQLite free of write contention.
+    """
+
+    def __init__(self, maxsize: int):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._task: Optional[asyncio.Task] = None
+        self.batches_written = 0
+        self.rows_written = 0
+        self.duplicates = 0
+        self.errors = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush pending batches and stop the writer."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def put(self, kind: str, device_serial: str, batch_id: str, rows: List[Dict[str, Any]]) -> bool:
+        """Enqueue a batch. Returns False if the queue is full."""
+        try:
+            self._queue.put_nowait(_Job(kind, device_serial, batch_id, rows))
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending_batches": self._queue.qsize(),
+            "batches_written": self.batches_written,
+            "rows_written": self.rows_written,
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+        }
+
+    async def _run(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                result = await run_in_threadpool(_WRITERS[job.kind], job.device_serial, job.batch_id, job.rows)
+                if result.duplicate:
+                    self.duplicates += 1
+                else:
+                    self.batches_written += 1
+                    self.rows_written += result.accepted
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Failed to ingest {job.kind} batch {job.batch_id} for {job.device_serial}: {e}")
+            finally:
+                self._queue.task_done()
+
+
+_queue: Optional[IngestQueue] = None
+
+
+def queue_enabled() -> bool:
+    return settings.INGEST_MODE == "queue"
+
+
+def get_queue() -> Optional[IngestQueue]:
+    return _queue
+
+
+async def start():
+    """Start the background writer if queued ingestion is enabled."""
+    global _queue
+    if queue_enabled() and _queue is None:
+        _queue = IngestQueue(settings.INGEST_QUEUE_MAX_BATCHES)
+        _queue.start()
+        logger.info("Telemetry ingest queue started")
+
+
+async def stop():
+    """Drain and stop the background writer."""
+    global _queue
+    if _queue is not None:
+        await _queue.stop()
+        _queue = None
+
+
+# =============================================================================
+# Entry points for request handlers
+# =============================================================================
+
+async def submit(kind: str, device_serial: str, batch_id: str, rows: List[Dict[str, Any]]) -> Optional[IngestResult]:
+    """
+    Ingest a batch without blocking the event loop.
+
+    Returns the IngestResult once written, or None if the batch was queued
+    for background writing.
+
+    Raises:
+        asyncio.QueueFull: If queued ingestion is enabled and the queue is full
+    """
+    if _queue is not None:
+        if not _queue.put(kind, device_serial, batch_id, rows):
+            raise asyncio.QueueFull()
+        return None
+    return await run_in_threadpool(_WRITERS[kind], device_serial, batch_id, rows)
@@ -6,16 +6,21 @@ Tables:
 - system_metrics: Device system telemetry
 - conversation_turns: Chat history
 - audio_uploads: Audio file metadata
+- audio_upload_sessions: In-progress resumable audio uploads
+- telemetry_batches: Ingested upload batches (for idempotent retries)
+- metric_rollups: Per-device minute/hour/day aggregates
 """
 
 import uuid
 import secrets
+import threading
+from contextlib import nullcontext
 from datetime import datetime
 from typing import Generator
 
 from sqlalchemy import (
     Column, String, Integer, Float, Boolean, DateTime, Text, JSON,
-    ForeignKey, create_engine, Index
+    ForeignKey, create_engine, event, Index, UniqueConstraint
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship, Session
@@ -27,7 +32,25 @@ engine = create_engine(
     get_database_url(),
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+IS_SQLITE = "sqlite" in settings.DATABASE_URL
+
+# SQLite allows a single writer; background/bulk writers serialize on this
+# in-process instead of spinning on "database is locked".
+write_lock = threading.Lock() if IS_SQLITE else nullcontext()
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers proceed while a telemetry batch is being written."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=30000")
+        cursor.close()
+
+# expire_on_commit=False: objects stay loaded after commit, so async handlers
+# reading e.g. device.serial never trigger a lazy reload on the event loop
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
 
@@ -220,6 +243,75 @@ class AudioUpload(Base):
     device = relationship("Device", back_populates="audio_uploads")
 
 
+class AudioUploadSession(Base):
+    """In-progress resumable audio upload.
+
+    Bytes received so far live in the partial file (see app.audio_store);
+    this row holds ownership and the metadata applied on completion.
+    """
+    __tablename__ = "audio_upload_sessions"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    device_serial = Column(String(64), ForeignKey("devices.serial"), nullable=False, index=True)
+    meta = Column(JSON, nullable=False)  # AudioMetadata fields
+    file_ext = Column(String(16), nullable=False, default=".wav")
+    total_bytes = Column(Integer, nullable=True)  # optional, declared by device
+    sha256 = Column(String(64), nullable=True)  # optional, verified on completion
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# =============================================================================
+# Telemetry Batch Model
+# =============================================================================
+
+class TelemetryBatch(Base):
+    """Record of an ingested upload batch, keyed on the device-supplied batch_id.
+
+    Inserted in the same transaction as the batch rows so a retried upload
+    with the same batch_id is detected and not written twice.
+    """
+    __tablename__ = "telemetry_batches"
+
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    device_serial = Column(String(64), ForeignKey("devices.serial"), nullable=False)
+    batch_id = Column(String(64), nullable=False)
+    kind = Column(String(16), nullable=False)  # "metrics" or "conversations"
+    row_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Indexes
+    __table_args__ = (
+        UniqueConstraint('device_serial', 'kind', 'batch_id', name='uq_batch_device_kind_id'),
+    )
+
+
+# =============================================================================
+# Metric Rollup Model
+# =============================================================================
+
+class MetricRollup(Base):
+    """Time-bucketed aggregate of one metric for one device.
+
+    Maintained incrementally on ingest (see app.rollups), so range queries
+    never scan raw rows and survive raw-row retention pruning.
+    """
+    __tablename__ = "metric_rollups"
+
+    device_serial = Column(String(64), ForeignKey("devices.serial"), primary_key=True)
+    resolution = Column(String(8), primary_key=True)  # minute, hour, day
+    metric = Column(String(32), primary_key=True)  # cpu_percent, cpu_temp_celsius, ...
+    bucket_start = Column(DateTime, primary_key=True)
+
+    count = Column(Integer, nullable=False, default=0)
+    sum_value = Column(Float, nullable=False, default=0.0)
+    min_value = Column(Float, nullable=True)
+    max_value = Column(Float, nullable=True)
+    p95_value = Column(Float, nullable=True)
+    histogram = Column(JSON, nullable=True)  # sparse {bin_index: count}, used to merge p95
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 # =============================================================================
 # Database Initialization
 # =============================================================================
@@ -238,6 +330,8 @@ def drop_db():
 __all__ = [
     "Base",
     "engine",
+    "IS_SQLITE",
+    "write_lock",
     "SessionLocal",
     "get_db",
     "init_db",
@@ -248,4 +342,7 @@ __all__ = [
     "SystemMetric",
     "ConversationTurn",
     "AudioUpload",
+    "AudioUploadSession",
+    "TelemetryBatch",
+    "MetricRollup",
 ]
@@ -0,0 +1,371 @@
+"""
+Telemetry rollups and retention.
+
+Per-device minute/hour/day aggregates (count, min, max, avg, p95) of:
+- cpu_percent, cpu_temp_celsius, memory_percent (from system metrics)
+- e2e_latency_ms (from conversation turns)
+
+Rollups are upserted incrementally inside the ingest transaction
+(INSERT ... ON CONFLICT DO UPDATE, so concurrent batches merge safely).
+p95 is derived from a sparse fixed-bin histogram stored with each bucket,
+so buckets can be merged across batches without keeping raw values.
+
+The retention job prunes raw rows older than RAW_RETENTION_DAYS when set
+(off by default) and fine-grained rollups per ROLLUP_*_RETENTION_DAYS;
+rollups remain queryable.
+It also expires abandoned resumable audio uploads.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, delete, func, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from starlette.concurrency import run_in_threadpool
+
+from app import audio_store
+from app.config import settings
+from app.models import engine, write_lock, MetricRollup, SystemMetric, ConversationTurn
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS: Dict[str, int] = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+
+@dataclass(frozen=True)
+class MetricSpec:
+    """Where a rolled-up metric comes from and how its histogram is binned."""
+    kind: str  # ingest kind: "metrics" or "conversations"
+    bin_width: float
+    max_bin: int  # values beyond max_bin * bin_width land in the last bin
+
+
+METRICS: Dict[str, MetricSpec] = {
+    "cpu_percent": MetricSpec("metrics", bin_width=1.0, max_bin=100),
+    "cpu_temp_celsius": MetricSpec("metrics", bin_width=1.0, max_bin=120),
+    "memory_percent": MetricSpec("metrics", bin_width=1.0, max_bin=100),
+    "e2e_latency_ms": MetricSpec("conversations", bin_width=50.0, max_bin=200),
+}
+
+
+def to_naive_utc(ts: datetime) -> datetime:
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def bucket_start(ts: datetime, resolution: str) -> datetime:
+    """Floor a timestamp to the start of its bucket."""
+    ts = to_naive_utc(ts)
+    seconds = RESOLUTIONS[resolution]
+    epoch = int((ts - datetime(1970, 1, 1)).total_seconds())
+    return datetime(1970, 1, 1) + timedelta(seconds=epoch - epoch % seconds)
+
+
+@dataclass
+class _Agg:
+    """Mergeable aggregate for one bucket."""
+    spec: MetricSpec
+    count: int = 0
+    total: float = 0.0
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    histogram: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+        b = str(min(max(int(value // self.spec.bin_width), 0), self.spec.max_bin))
+        self.histogram[b] = self.histogram.get(b, 0) + 1
+
+    def p95(self) -> Optional[float]:
+        if not self.count:
+            return None
+        target = 0.95 * self.count
+        seen = 0
+        for b in sorted(self.histogram, key=int):
+            seen += self.histogram[b]
+            if seen >= target:
+                # Upper edge of the bin, clamped to the observed range
+                return min((int(b) + 1) * self.spec.bin_width, self.max_value)
+        return self.max_value
+
+    def values(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_value": self.total,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "p95_value": self.p95(),
+            "histogram": self.histogram,
+            "updated_at": datetime.utcnow(),
+        }
+
+
+# =============================================================================
+# Incremental update (called from ingest)
+# =============================================================================
+
+def apply_batch(conn: Connection, device_serial: str, kind: str, rows: List[Dict[str, Any]]):
+    """Fold a batch of raw rows into the device's rollups. Runs in the caller's transaction."""
+    metrics = [name for name, spec in METRICS.items() if spec.kind == kind]
+    if not metrics or not rows:
+        return
+
+    # Aggregate the batch in memory
+    batch: Dict[Tuple[str, str, datetime], _Agg] = {}
+    for row in rows:
+        ts = row.get("timestamp")
+        if ts is None:
+            continue
+        for metric in metrics:
+            value = row.get(metric)
+            if value is None:
+                continue
+            for resolution in RESOLUTIONS:
+                key = (resolution, metric, bucket_start(ts, resolution))
+                agg = batch.get(key)
+                if agg is None:
+                    agg = batch[key] = _Agg(METRICS[metric])
+                agg.add(float(value))
+
+    if not batch:
+        return
+
+    # Upsert every bucket; the merge happens in the database so concurrent
+    # batches for the same bucket add up instead of racing a SELECT
+    table = MetricRollup.__table__
+    stmt = _insert(conn)(table)
+    excluded = stmt.excluded
+    least, greatest = ("least", "greatest") if conn.dialect.name == "postgresql" else ("min", "max")
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.device_serial, table.c.resolution, table.c.metric, table.c.bucket_start],
+        set_={
+            "count": table.c.count + excluded.count,
+            "sum_value": table.c.sum_value + excluded.sum_value,
+            "min_value": getattr(func, least)(func.coalesce(table.c.min_value, excluded.min_value), excluded.min_value),
+            "max_value": getattr(func, greatest)(func.coalesce(table.c.max_value, excluded.max_value), excluded.max_value),
+            "histogram": _merged_histogram(conn),
+            "updated_at": excluded.updated_at,
+        },
+    ).returning(
+        table.c.resolution, table.c.metric, table.c.bucket_start,
+        table.c.count, table.c.max_value, table.c.histogram,
+    )
+    merged = conn.execute(stmt, [
+        dict(agg.values(), device_serial=device_serial, resolution=res, metric=metric, bucket_start=start)
+        for (res, metric, start), agg in batch.items()
+    ]).fetchall()
+
+    # p95 of merged buckets comes from the merged histogram. The upsert holds
+    # the row lock until commit, so no other batch can slip in between.
+    to_update = []
+    for row in merged:
+        agg = batch.get((row.resolution, row.metric, row.bucket_start))
+        if agg is None or row.count == agg.count:
+            continue  # Freshly inserted, p95 is already right
+        merged_agg = _Agg(agg.spec, count=row.count, max_value=row.max_value, histogram=row.histogram or {})
+        to_update.append(dict(
+            p95_value=merged_agg.p95(),
+            b_serial=device_serial, b_resolution=row.resolution,
+            b_metric=row.metric, b_bucket_start=row.bucket_start,
+        ))
+
+    if to_update:
+        conn.execute(
+            update(table)
+            .where(
+                table.c.device_serial == bindparam("b_serial"),
+                table.c.resolution == bindparam("b_resolution"),
+                table.c.metric == bindparam("b_metric"),
+                table.c.bucket_start == bindparam("b_bucket_start"),
+            )
+            .values(p95_value=bindparam("p95_value")),
+            to_update,
+        )
+
+
+def _insert(conn: Connection):
+    """Dialect insert that supports ON CONFLICT DO UPDATE."""
+    return postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+
+
+def _merged_histogram(conn: Connection):
+    """SQL expression summing the stored and incoming sparse histograms per bin."""
+    if conn.dialect.name == "postgresql":
+        return text(
+            "(SELECT json_object_agg(m.key, m.total) FROM ("
+            "SELECT h.key, SUM(h.value::int) AS total FROM ("
+            "SELECT key, value FROM json_each_text(metric_rollups.histogram) "
+            "UNION ALL SELECT key, value FROM json_each_text(excluded.histogram)"
+            ") AS h GROUP BY h.key) AS m)"
+        )
+    return text(
+        "(SELECT json_group_object(m.key, m.total) FROM ("
+        "SELECT h.key, SUM(h.value) AS total FROM ("
+        "SELECT key, value FROM json_each(metric_rollups.histogram) "
+        "UNION ALL SELECT key, value FROM json_each(excluded.histogram)"
+        ") AS h GROUP BY h.key) AS m)"
+    )
+
+
+def backfill(device_serial: Optional[str] = None, chunk_size: int = 5000) -> int:
+    """
+    Rebuild rollups from raw rows (for data ingested before rollups existed).
+
+    Existing rollups for the affected devices are replaced, so only run this
+    before raw rows have been pruned. Blocking.
+    """
+    raw_tables = {"metrics": SystemMetric.__table__, "conversations": ConversationTurn.__table__}
+    rollups = MetricRollup.__table__
+    processed = 0
+
+    with write_lock, engine.begin() as conn:
+        serials = [device_serial] if device_serial else [
+            r[0] for r in conn.execute(select(SystemMetric.device_serial).distinct())
+        ] + [
+            r[0] for r in conn.execute(select(ConversationTurn.device_serial).distinct())
+        ]
+        for serial in sorted(set(serials)):
+            conn.execute(delete(rollups).where(rollups.c.device_serial == serial))
+            for kind, table in raw_tables.items():
+                columns = [table.c.timestamp] + [
+                    table.c[name] for name, spec in METRICS.items() if spec.kind == kind
+                ]
+                result = conn.execution_options(yield_per=chunk_size).execute(
+                    select(*columns).where(table.c.device_serial == serial)
+                )
+                for partition in result.mappings().partitions():
+                    apply_batch(conn, serial, kind, [dict(r) for r in partition])
+                    processed += len(partition)
+
+    return processed
+
+
+# =============================================================================
+# Queries
+# =============================================================================
+
+def query(
+    conn: Connection,
+    device_serial: str,
+    metric: str,
+    resolution: str,
+    start: datetime,
+    end: datetime,
+) -> List[Dict[str, Any]]:
+    """Return buckets in [start, end) ordered by time."""
+    table = MetricRollup.__table__
+    result = conn.execute(
+        select(
+            table.c.bucket_start, table.c.count, table.c.sum_value,
+            table.c.min_value, table.c.max_value, table.c.p95_value,
+        )
+        .where(
+            table.c.device_serial == device_serial,
+            table.c.resolution == resolution,
+            table.c.metric == metric,
+            table.c.bucket_start >= bucket_start(start, resolution),
+            table.c.bucket_start < to_naive_utc(end),
+        )
+        .order_by(table.c.bucket_start)
+    )
+    return [
+        {
+            "bucket_start": r.bucket_start.isoformat(),
+            "count": r.count,
+            "min": r.min_value,
+            "max": r.max_value,
+            "avg": r.sum_value / r.count if r.count else None,
+            "p95": r.p95_value,
+        }
+        for r in result
+    ]
+
+
+# =============================================================================
+# Retention
+# =============================================================================
+
+def _prune(table, time_column, cutoff: datetime, extra=None, chunk_size: int = 5000) -> int:
+    """Delete rows older than cutoff in chunks so the write lock is held briefly."""
+    deleted = 0
+    where = time_column < cutoff if extra is None else and_(time_column < cutoff, extra)
+    pk = list(table.primary_key.columns)
+    while True:
+        with write_lock, engine.begin() as conn:
+            if len(pk) == 1:
+                ids = select(pk[0]).where(where).limit(chunk_size).scalar_subquery()
+                n = conn.execute(delete(table).where(pk[0].in_(ids))).rowcount
+            else:
+                n = conn.execute(delete(table).where(where)).rowcount
+        deleted += n or 0
+        if not n or n < chunk_size or len(pk) != 1:
+            return deleted
+
+
+def prune(now: Optional[datetime] = None) -> Dict[str, int]:
+    """Apply the retention policy. Blocking."""
+    now = now or datetime.utcnow()
+    result = {}
+
+    if settings.RAW_RETENTION_DAYS > 0:
+        cutoff = now - timedelta(days=settings.RAW_RETENTION_DAYS)
+        result["system_metrics"] = _prune(SystemMetric.__table__, SystemMetric.timestamp, cutoff)
+        result["conversation_turns"] = _prune(ConversationTurn.__table__, ConversationTurn.timestamp, cutoff)
+
+    rollups = MetricRollup.__table__
+    for resolution, days in (
+        ("minute", settings.ROLLUP_MINUTE_RETENTION_DAYS),
+        ("hour", settings.ROLLUP_HOUR_RETENTION_DAYS),
+    ):
+        if days > 0:
+            cutoff = now - timedelta(days=days)
+            result[f"rollups_{resolution}"] = _prune(
+                rollups, rollups.c.bucket_start, cutoff, extra=rollups.c.resolution == resolution
+            )
+
+    return result
+
+
+_retention_task: Optional[asyncio.Task] = None
+
+
+async def _retention_loop():
+    while True:
+        try:
+            result = await run_in_threadpool(prune)
+            result["audio_sessions"] = await audio_store.expire_sessions()
+            if any(result.values()):
+                logger.info(f"Retention pruned: {result}")
+        except Exception as e:
+            logger.error(f"Retention job failed: {e}")
+        await asyncio.sleep(settings.RETENTION_INTERVAL_SECONDS)
+
+
+async def start():
+    """Start the periodic retention job."""
+    global _retention_task
+    if settings.RETENTION_INTERVAL_SECONDS > 0 and _retention_task is None:
+        _retention_task = asyncio.create_task(_retention_loop())
+
+
+async def stop():
+    global _retention_task
+    if _retention_task is not None:
+        _retention_task.cancel()
+        try:
+            await _retention_task
+        except asyncio.CancelledError:
+            pass
+        _retention_task = None
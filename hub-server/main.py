@@ -48,11 +48,22 @@ async def lifespan(app: FastAPI):
     # Create upload directories
     Path(settings.UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
 
+    # Start background telemetry writer (INGEST_MODE=queue only)
+    from app import ingest, device_auth, rollups
+    await ingest.start()
+    await device_auth.start()
+
+    # Start raw-row retention job
+    await rollups.start()
+
     logger.info("Hub server ready")
     yield
 
     # Shutdown
     logger.info("Hub server shutting down...")
+    await rollups.stop()
+    await ingest.stop()
+    await device_auth.stop()
 
 
 # Create FastAPI app
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Authenticated request throughput benchmark.
+
+Runs the same authenticated workload (heartbeats and single-row metric
+uploads from many devices) twice against a throwaway SQLite database:
+
+- before: auth cache disabled, last_seen written on every request
+- after:  auth cache + write-behind last_seen (the defaults)
+
+Usage:
+    python scripts/bench_device_auth.py --devices 200 --requests 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Hub device auth benchmark")
+    parser.add_argument("--devices", type=int, default=200, help="Number of simulated devices")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per device per phase")
+    return parser.parse_args()
+
+
+async def drive(client, devices, requests_per_device, path_fn, body_fn=None):
+    """Fire requests_per_device sequential requests from every device concurrently."""
+    errors = 0
+
+    async def worker(serial, api_key):
+        nonlocal errors
+        headers = {"Authorization": f"Bearer {api_key}", "X-Device-Serial": serial}
+        for i in range(requests_per_device):
+            body = body_fn(serial, i) if body_fn else None
+            r = await client.post(path_fn(serial), headers=headers, json=body)
+            if r.status_code >= 400:
+                errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(s, k) for s, k in devices))
+    elapsed = time.perf_counter() - t0
+    return len(devices) * requests_per_device / elapsed, errors
+
+
+async def run(args):
+    import httpx
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from main import app
+    from app import device_auth
+    from app.config import settings
+    from app.models import init_db
+
+    init_db()
+
+    def metric_body(serial, i):
+        return {
+            "device_serial": serial,
+            "batch_id": f"{serial}-{time.monotonic_ns()}-{i}",
+            "metrics": [{"timestamp": datetime.utcnow().isoformat(), "cpu_percent": 12.5}],
+        }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://hub") as client:
+        devices = []
+        for i in range(args.devices):
+            serial = f"bench-{i:05d}"
+            r = await client.post("/api/v1/devices/register", json={"serial": serial})
+            r.raise_for_status()
+            devices.append((serial, r.json()["api_key"]))
+
+        results = {}
+        for phase in ("before", "after"):
+            if phase == "before":
+                device_auth.auth_cache.ttl_seconds = 0
+                settings.LAST_SEEN_FLUSH_SECONDS = 0
+            else:
+                device_auth.auth_cache.ttl_seconds = 60.0
+                settings.LAST_SEEN_FLUSH_SECONDS = 5.0
+                await device_auth.start()
+
+            hb, hb_err = await drive(
+                client, devices, args.requests,
+                lambda s: f"/api/v1/devices/{s}/heartbeat",
+            )
+            up, up_err = await drive(
+                client, devices, args.requests,
+                lambda s: "/api/v1/telemetry/metrics", metric_body,
+            )
+            results[phase] = (hb, up, hb_err + up_err)
+
+        await device_auth.stop()
+
+    print(f"{'':10} {'heartbeat req/s':>16} {'metrics req/s':>14} {'errors':>7}")
+    for phase, (hb, up, errors) in results.items():
+        print(f"{phase:10} {hb:>16,.0f} {up:>14,.0f} {errors:>7}")
+    before, after = results["before"], results["after"]
+    print(f"{'speedup':10} {after[0] / before[0]:>15.1f}x {after[1] / before[1]:>13.1f}x")
+    print(f"Auth cache: {device_auth.auth_cache.stats()}")
+    print(f"last_seen flushes: {device_auth.last_seen_writer.flushes} "
+          f"({device_auth.last_seen_writer.rows_flushed} rows)")
+
+
+def main():
+    args = parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="lelamp-hub-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmpdir) / 'hub.db'}"
+    os.environ["UPLOAD_DIR"] = str(Path(tmpdir) / "uploads")
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    print(f"Database: {os.environ['DATABASE_URL']}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Telemetry ingestion load test.
+
+Simulates many devices uploading metrics and conversation batches at the
+same time against a throwaway SQLite database, running the hub app
+in-process via httpx's ASGI transport. Reports rows/sec and request latency.
+
+Usage:
+    python scripts/loadtest_ingest.py --devices 200 --batches 5 --rows 100
+    python scripts/loadtest_ingest.py --mode queue
+    python scripts/loadtest_ingest.py --retry-ratio 0.2   # re-send 20% of batches
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Hub telemetry ingestion load test")
+    parser.add_argument("--devices", type=int, default=200, help="Number of simulated devices")
+    parser.add_argument("--batches", type=int, default=5, help="Metric batches per device")
+    parser.add_argument("--rows", type=int, default=100, help="Metric rows per batch")
+    parser.add_argument("--turns", type=int, default=10, help="Conversation turns per device")
+    parser.add_argument("--mode", choices=["sync", "queue"], default="sync", help="INGEST_MODE")
+    parser.add_argument("--retry-ratio", type=float, default=0.0, help="Fraction of batches re-sent")
+    return parser.parse_args()
+
+
+def make_metrics(count: int, start: datetime) -> list:
+    return [
+        {
+            "timestamp": (start + timedelta(seconds=i * 10)).isoformat(),
+            "cpu_percent": random.uniform(5, 95),
+            "cpu_temp_celsius": random.uniform(40, 80),
+            "memory_total_mb": 8192,
+            "memory_used_mb": random.randint(1000, 7000),
+            "memory_percent": random.uniform(10, 90),
+            "disk_percent": random.uniform(10, 60),
+            "agent_state": random.choice(["idle", "listening", "speaking"]),
+            "active_services": ["rgb", "motors", "audio"],
+        }
+        for i in range(count)
+    ]
+
+
+def make_turns(count: int, start: datetime) -> list:
+    return [
+        {
+            "turn_id": str(uuid.uuid4()),
+            "timestamp": (start + timedelta(seconds=i * 5)).isoformat(),
+            "role": "user" if i % 2 == 0 else "agent",
+            "text": "turn the light blue" if i % 2 == 0 else "Sure, going blue!",
+            "e2e_latency_ms": random.uniform(300, 1500),
+        }
+        for i in range(count)
+    ]
+
+
+async def run(args):
+    import logging
+    import httpx
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from main import app
+    from app import ingest
+    from app.models import init_db
+
+    init_db()
+    await ingest.start()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://hub") as client:
+        # Register devices
+        devices = []
+        for i in range(args.devices):
+            serial = f"loadtest-{i:05d}"
+            r = await client.post("/api/v1/devices/register", json={"serial": serial})
+            r.raise_for_status()
+            devices.append((serial, r.json()["api_key"]))
+
+        latencies = []
+        statuses = {}
+
+        async def post(path, headers, body):
+            t0 = time.perf_counter()
+            r = await client.post(path, headers=headers, json=body)
+            latencies.append(time.perf_counter() - t0)
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+        async def device_worker(serial, api_key):
+            headers = {"Authorization": f"Bearer {api_key}", "X-Device-Serial": serial}
+            start = datetime.utcnow() - timedelta(days=1)
+            for b in range(args.batches):
+                body = {
+                    "device_serial": serial,
+                    "batch_id": f"{serial}-m{b}",
+                    "metrics": make_metrics(args.rows, start + timedelta(hours=b)),
+                }
+                await post("/api/v1/telemetry/metrics", headers, body)
+                if random.random() < args.retry_ratio:
+                    await post("/api/v1/telemetry/metrics", headers, body)
+            await post("/api/v1/telemetry/conversations", headers, {
+                "device_serial": serial,
+                "session_id": str(uuid.uuid4()),
+                "batch_id": f"{serial}-c0",
+                "turns": make_turns(args.turns, start),
+            })
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(device_worker(s, k) for s, k in devices))
+        accepted_time = time.perf_counter() - t0
+
+        await ingest.stop()
+        total_time = time.perf_counter() - t0
+
+        r = await client.get("/api/v1/stats")
+        stats = r.json()
+
+    expected_rows = args.devices * (args.batches * args.rows + args.turns)
+    stored_rows = stats["metrics_collected"] + stats["conversation_turns"]
+    latencies.sort()
+
+    print(f"Mode:              {args.mode}")
+    print(f"Devices:           {args.devices}")
+    print(f"Requests:          {len(latencies)}  status={statuses}")
+    print(f"Rows expected:     {expected_rows}")
+    print(f"Rows stored:       {stored_rows}" + ("" if stored_rows == expected_rows else "  <-- MISMATCH"))
+    print(f"Accept time:       {accepted_time:.2f}s")
+    print(f"Durable time:      {total_time:.2f}s")
+    print(f"Throughput:        {stored_rows / total_time:,.0f} rows/sec")
+    print(f"Latency p50/p95:   {statistics.median(latencies) * 1000:.1f} / "
+          f"{latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+
+
+def main():
+    args = parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="lelamp-hub-loadtest-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmpdir) / 'hub.db'}"
+    os.environ["UPLOAD_DIR"] = str(Path(tmpdir) / "uploads")
+    os.environ["INGEST_MODE"] = args.mode
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    print(f"Database: {os.environ['DATABASE_URL']}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+In-memory configuration store for LeLamp.
+
+config.yaml used to be re-parsed by every API load_config() and rewritten
+in full by every save_config(), including once per conversation turn for
+the token counter. The store keeps the parsed tree in memory instead:
+
+- reads (get(), snapshot()) never parse YAML; get() walks the tree and
+  coerces to the requested type
+- changes are applied to the tree immediately and written to disk after
+  a short debounce, so a burst of saves becomes one write
+- writes go to a temp file in the same directory, are fsynced, then
+  renamed over config.yaml, so a crash or power cut mid-write leaves the
+  previous file intact
+- subscribers registered for a key prefix get the dotted keys that
+  changed (old and new values), so services can hot-reload settings
+
+The tree is updated in place, so references to g.CONFIG stay valid
+after a save. Edits made to the file by hand are picked up on the next
+read (an mtime check at most every few seconds).
+"""
+
+import atexit
+import copy
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+Changes = Dict[str, Tuple[Any, Any]]  # Dotted key -> (old, new)
+
+_MISSING = object()
+
+
+def diff_config(old: Any, new: Any, prefix: str = "") -> Changes:
+    """Dotted keys whose values differ between two config trees (leaves only)."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes: Changes = {}
+        for key in list(old) + [k for k in new if k not in old]:
+            path = f"{prefix}.{key}" if prefix else str(key)
+            changes.update(diff_config(old.get(key, _MISSING), new.get(key, _MISSING), path))
+        return changes
+    if old is _MISSING and isinstance(new, dict):
+        return diff_config({}, new, prefix)
+    if new is _MISSING and isinstance(old, dict):
+        return diff_config(old, {}, prefix)
+    if old == new:
+        return {}
+    return {prefix: (None if old is _MISSING else old, None if new is _MISSING else new)}
+
+
+class ConfigStore:
+    """Parsed config kept in memory with debounced atomic persistence."""
+
+    EXTERNAL_CHECK_INTERVAL = 2.0  # Seconds between mtime checks for hand edits
+
+    def __init__(self, path: Path, debounce: float = 1.0):
+        self.path = Path(path)
+        self.debounce = debounce
+
+        self._tree: Dict[str, Any] = {}
+        self._saved: Dict[str, Any] = {}  # Deep copy of the tree as of the last change, for diffs
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self._mtime: Optional[float] = None  # Of the file as we last read/wrote it
+        self._last_external_check = 0.0
+        self._subscribers: List[Tuple[str, Callable[[Changes], None]]] = []
+
+        self.writes = 0
+        self.changes = 0
+
+        atexit.register(self.flush)
+
+    # =========================================================================
+    # Loading
+    # =========================================================================
+
+    def load(self) -> Dict[str, Any]:
+        """(Re)read the file into the tree; returns the live tree."""
+        with open(self.path, "r") as f:
+            tree = yaml.safe_load(f) or {}
+        with self._lock:
+            self._replace_tree(tree)
+            self._saved = copy.deepcopy(self._tree)
+            self._mtime = self._file_mtime()
+        return self._tree
+
+    def _replace_tree(self, tree: Dict[str, Any]):
+        if tree is not self._tree:
+            self._tree.clear()
+            self._tree.update(tree)
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def _check_external_edit(self):
+        """Reload if someone edited config.yaml by hand (rate-limited stat)."""
+        now = time.time()
+        if now - self._last_external_check < self.EXTERNAL_CHECK_INTERVAL:
+            return
+        self._last_external_check = now
+        mtime = self._file_mtime()
+        if mtime is None or mtime == self._mtime or self._dirty:
+            return
+        try:
+            with open(self.path, "r") as f:
+                tree = yaml.safe_load(f) or {}
+        except Exception as e:
+            logger.warning(f"Could not reload edited config: {e}")
+            self._mtime = mtime  # Don't retry a broken file every check
+            return
+        logger.info(f"Config file changed on disk, reloading {self.path}")
+        with self._lock:
+            changes = diff_config(self._saved, tree)
+            self._replace_tree(tree)
+            self._saved = copy.deepcopy(self._tree)
+            self._mtime = mtime
+        self._notify(changes)
+
+    # =========================================================================
+    # Reading
+    # =========================================================================
+
+    @property
+    def tree(self) -> Dict[str, Any]:
+        """The live tree (what g.CONFIG points at)."""
+        return self._tree
+
+    def get(self, key: str, default: Any = None, cast: Optional[type] = None) -> Any:
+        """
+        Read a dotted key ("vision.emotion.enabled") from memory.
+
+        With cast, the value is converted (e.g. "30" -> 30, "false" -> False);
+        values that can't be converted return the default.
+        """
+        self._check_external_edit()
+        value: Any = self._tree
+        for part in key.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return default
+            value = value[part]
+        if value is None:
+            return default
+        if cast is None or isinstance(value, cast):
+            return value
+        if cast is bool and isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        try:
+            return cast(value)
+        except (TypeError, ValueError):
+            return default
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Deep copy of the tree, for callers that edit and then update() it."""
+        self._check_external_edit()
+        with self._lock:
+            return copy.deepcopy(self._tree)
+
+    # =========================================================================
+    # Writing
+    # =========================================================================
+
+    def set(self, key: str, value: Any):
+        """Set a dotted key, creating intermediate sections."""
+        with self._lock:
+            node = self._tree
+            parts = key.split(".")
+            for part in parts[:-1]:
+                if not isinstance(node.get(part), dict):
+                    node[part] = {}
+                node = node[part]
+            node[parts[-1]] = value
+        self.update(self._tree)
+
+    def update(self, config: Dict[str, Any]):
+        """
+        Make config the current configuration (save_config semantics).
+
+        Works both for a modified copy (from snapshot()/load_config) and for
+        the live tree edited in place.
+        """
+        with self._lock:
+            changes = diff_config(self._saved, config)
+            self._replace_tree(config)
+            if not changes:
+                return
+            self._saved = copy.deepcopy(self._tree)
+            self.changes += 1
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        self._notify(changes)
+
+    def flush(self):
+        """Write pending changes now."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            try:
+                self._write()
+                self._dirty = False
+            except Exception as e:
+                logger.error(f"Could not save config to {self.path}: {e}")
+
+    def _write(self):
+        """Serialise, write to a temp file, fsync, rename over the config."""
+        data = yaml.safe_dump(self._tree, default_flow_style=False, sort_keys=False)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            if self.path.exists():
+                os.chmod(tmp_path, self.path.stat().st_mode & 0o777)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        # Persist the rename itself
+        try:
+            dir_fd = os.open(self.path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+        self._mtime = self._file_mtime()
+        self.writes += 1
+        logger.debug(f"Saved config to: {self.path}")
+
+    # =========================================================================
+    # Subscriptions
+    # =========================================================================
+
+    def subscribe(self, prefix: str, callback: Callable[[Changes], None]):
+        """Call callback(changes) when keys under prefix ("" = all) change."""
+        self._subscribers.append((prefix, callback))
+
+    def unsubscribe(self, prefix: str, callback: Callable[[Changes], None]):
+        if (prefix, callback) in self._subscribers:
+            self._subscribers.remove((prefix, callback))
+
+    def _notify(self, changes: Changes):
+        if not changes:
+            return
+        for prefix, callback in list(self._subscribers):
+            matching = {key: change for key, change in changes.items()
+                        if not prefix or key == prefix or key.startswith(prefix + ".")}
+            if not matching:
+                continue
+            try:
+                callback(matching)
+            except Exception as e:
+                logger.error(f"Config subscriber for '{prefix}' failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "changes": self.changes,
+            "writes": self.writes,
+            "pending": self._dirty,
+            "subscribers": len(self._subscribers),
+        }
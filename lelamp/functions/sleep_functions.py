@@ -158,7 +158,7 @@ class SleepFunctions:
 
                     try:
                         wake_service.start(on_wake_word)
-                        logging.info("Local Whisper wake word detection active")
+                        logging.info("Local wake word detection active")
                     except Exception as e:
                         logging.error(f"Failed to start wake word service: {e}")
 
@@ -6,6 +6,7 @@ This module contains vision-related function tools including:
 - What the agent can see
 """
 
+import asyncio
 import logging
 from lelamp.service.agent.tools import Tool
 
@@ -70,6 +71,11 @@ class VisionFunctions:
                     if desc:
                         parts.append(f"Person {i}: {desc}.")
 
+            if context.number_of_people:
+                mood = await self._dominant_emotion()
+                if mood:
+                    parts.append(f"They look {mood}.")
+
             # Animals
             if context.animals:
                 animal_descs = []
@@ -97,6 +103,17 @@ class VisionFunctions:
             logging.error(f"Error in describe_scene: {e}")
             return f"Error analyzing scene: {str(e)}"
 
+    async def _dominant_emotion(self):
+        """Mood of the closest face; loads the deferred emotion model on first use."""
+        import lelamp.globals as g
+
+        if g.boot_orchestrator is None or g.vision_service is None:
+            return None
+        # ensure() blocks while the model loads, so keep it off the event loop
+        if not await asyncio.to_thread(g.boot_orchestrator.ensure, "emotion"):
+            return None
+        return g.emotion_service.get_dominant_emotion() if g.emotion_service else None
+
     @Tool.register_tool
     async def get_scene_details(self) -> str:
         """
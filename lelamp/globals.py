@@ -6,9 +6,10 @@ triggering re-import of the main module (which would fail due to signal handlers
 """
 
 import subprocess
-import yaml
 from pathlib import Path
 
+from lelamp.config_store import ConfigStore
+
 # Import user data management
 from lelamp.user_data import (
     get_config_path,
@@ -20,6 +21,7 @@ from lelamp.user_data import (
 # Global configuration
 CONFIG = None
 CONFIG_PATH = None  # Set dynamically by load_config()
+config_store = None  # ConfigStore behind CONFIG (in-memory reads, debounced atomic saves)
 
 # Global services
 alarm_service = None
@@ -27,6 +29,7 @@ animation_service = None
 rgb_service = None
 vision_service = None
 ollama_vision_service = None  # Ollama-based scene analysis
+emotion_service = None  # Facial emotion recognition on tracked faces
 wake_service = None
 workflow_service = None
 audio_service = None
@@ -41,6 +44,9 @@ metrics_service = None
 datacollection_service = None  # Telemetry data collection service
 lelamp_agent = None  # Main agent instance
 livekit_service = None  # LiveKit Cloud connection manager
+voice_orchestrator = None  # Local Whisper + Ollama + Piper pipeline (pipeline.type: local)
+boot_orchestrator = None  # Service boot status and timings
+thermal_governor = None  # Throttles workloads under thermal/CPU pressure
 
 # Global scene context (for quick access)
 current_scene_context = None
@@ -127,29 +133,27 @@ def load_config():
                 f"Configuration file not found at {config_path} and no example template found at {example_path}"
             )
 
-    with open(config_path, "r") as f:
-        CONFIG = yaml.safe_load(f)
+    global config_store
+    if config_store is None or config_store.path != config_path:
+        config_store = ConfigStore(config_path)
+    CONFIG = config_store.load()
 
     print(f"Loaded config from: {config_path}")
     return CONFIG
 
 
 def save_config(config):
-    """Save configuration to YAML file (always saves to user directory)"""
-    global CONFIG, CONFIG_PATH
-
-    # Always save to user directory
-    from lelamp.user_data import USER_CONFIG_FILE, ensure_user_data_dir
-    ensure_user_data_dir()
-
-    CONFIG = config
-    save_path = USER_CONFIG_FILE
-    CONFIG_PATH = str(save_path)
+    """
+    Save configuration (always to the user directory).
 
-    with open(save_path, "w") as f:
-        yaml.safe_dump(config, f, default_flow_style=False, sort_keys=False)
+    The in-memory tree updates immediately and subscribers are notified;
+    the file is written shortly after, atomically (see ConfigStore).
+    """
+    global CONFIG, CONFIG_PATH
 
-    print(f"Saved config to: {save_path}")
+    CONFIG_PATH = str(config_store.path)
+    config_store.update(config)
+    CONFIG = config_store.tree
 
 
 # Initialize config on module load
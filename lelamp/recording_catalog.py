@@ -0,0 +1,399 @@
+"""
+Recording catalog for LeLamp.
+
+Recordings live in two directories (builtin ones in the repo, user ones in
+~/.lelamp/recordings/, user taking priority). Every listing and lookup
+used to glob both directories, the dashboard re-read every CSV to count
+frames, and each service parsed a recording the first time it played it.
+The catalog does that work once:
+
+- a scan stats the CSVs and keeps an index of their metadata (frames,
+  duration, joint ranges, peak velocity, checksum); only new or modified
+  files are parsed, and the index is saved to ~/.lelamp so a restart
+  doesn't parse anything
+- changes are noticed from the directory mtimes (new, deleted or renamed
+  files) and the mtime/size of the cached and warm recordings (rewritten
+  in place, e.g. by record.py in another process), checked at most every
+  few seconds on access, plus explicit invalidate() calls from the code
+  that writes or deletes recordings
+- parsed trajectories are cached, and the most played recordings (play
+  counts are kept in the index) are parsed ahead of time by prewarm(), so
+  the first play doesn't hit the SD card
+"""
+
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Frames = List[Dict[str, float]]
+
+INDEX_VERSION = 1
+PREWARM_COUNT = 8  # Most played recordings parsed ahead of time
+ALWAYS_WARM = ("idle", "sleep", "wake_up")  # Played on every boot/wake
+
+
+@dataclass
+class RecordingEntry:
+    """Indexed metadata for one recording file."""
+    name: str
+    path: str
+    source: str  # 'user' or 'builtin'
+    mtime: float
+    size: int
+    frames: int = 0
+    duration: float = 0.0
+    joint_ranges: Dict[str, List[float]] = field(default_factory=dict)  # joint -> [min, max]
+    peak_velocity: float = 0.0  # Fastest joint movement, units per second
+    checksum: str = ""  # sha1 of the file contents
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def parse_recording(data: bytes, fps: int = 30) -> Tuple[Frames, Dict[str, Any]]:
+    """Parse CSV bytes into action frames (timestamp dropped) plus their metadata."""
+    frames: Frames = []
+    for row in csv.DictReader(io.StringIO(data.decode("utf-8"))):
+        frames.append({key: float(value) for key, value in row.items() if key != "timestamp"})
+
+    joint_ranges: Dict[str, List[float]] = {}
+    peak_step = 0.0
+    previous: Optional[Dict[str, float]] = None
+    for frame in frames:
+        for joint, value in frame.items():
+            bounds = joint_ranges.get(joint)
+            if bounds is None:
+                joint_ranges[joint] = [value, value]
+            else:
+                bounds[0] = min(bounds[0], value)
+                bounds[1] = max(bounds[1], value)
+            if previous is not None and joint in previous:
+                peak_step = max(peak_step, abs(value - previous[joint]))
+        previous = frame
+
+    meta = {
+        "frames": len(frames),
+        "duration": round(len(frames) / fps, 2),
+        "joint_ranges": {joint: [round(lo, 3), round(hi, 3)] for joint, (lo, hi) in joint_ranges.items()},
+        "peak_velocity": round(peak_step * fps, 2),
+        "checksum": hashlib.sha1(data).hexdigest(),
+    }
+    return frames, meta
+
+
+class RecordingCatalog:
+    """Scan-once index of the recording directories with cached trajectories."""
+
+    CHECK_INTERVAL = 2.0  # Seconds between directory mtime checks
+    SAVE_DELAY = 5.0  # Debounce for writing play counts to the index
+
+    def __init__(
+        self,
+        directories: List[Tuple[str, Path]],
+        index_path: Optional[Path] = None,
+        fps: int = 30,
+    ):
+        # Later directories override earlier ones (builtin first, then user)
+        self.directories = [(source, Path(path)) for source, path in directories]
+        self.index_path = Path(index_path) if index_path else None
+        self.fps = fps
+
+        self._lock = threading.RLock()
+        self._entries: Dict[str, RecordingEntry] = {}  # name -> winning entry
+        self._known: Dict[str, RecordingEntry] = {}  # path -> entry (every file, for the index)
+        self._dir_mtimes: Dict[str, Optional[float]] = {}
+        self._last_check = 0.0
+        self._scanned = False
+        self._frames: Dict[str, Frames] = {}  # name -> parsed trajectory
+        self._plays: Dict[str, int] = {}
+        self._save_timer: Optional[threading.Timer] = None
+
+        self.scans = 0
+        self.parses = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._load_index()
+
+    # =========================================================================
+    # Index persistence
+    # =========================================================================
+
+    def _load_index(self):
+        if not self.index_path or not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                return
+            for item in data.get("entries", []):
+                entry = RecordingEntry(**item)
+                self._known[entry.path] = entry
+            self._plays = {name: int(count) for name, count in data.get("plays", {}).items()}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable recording index {self.index_path}: {e}")
+            self._known = {}
+            self._plays = {}
+
+    def _save_index(self):
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self.index_path:
+                return
+            data = {
+                "version": INDEX_VERSION,
+                "entries": [entry.to_dict() for entry in self._known.values()],
+                "plays": dict(self._plays),
+            }
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            logger.warning(f"Could not save recording index: {e}")
+
+    def _schedule_save(self):
+        with self._lock:
+            if self._save_timer is None and self.index_path:
+                self._save_timer = threading.Timer(self.SAVE_DELAY, self._save_index)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    # =========================================================================
+    # Scanning
+    # =========================================================================
+
+    def _directory_mtimes(self) -> Dict[str, Optional[float]]:
+        mtimes = {}
+        for _, directory in self.directories:
+            try:
+                mtimes[str(directory)] = os.stat(directory).st_mtime
+            except OSError:
+                mtimes[str(directory)] = None
+        return mtimes
+
+    def _check(self):
+        """Rescan if never scanned, or (rate-limited) if a directory changed."""
+        if not self._scanned:
+            self.refresh()
+            return
+        now = time.time()
+        if now - self._last_check < self.CHECK_INTERVAL:
+            return
+        self._last_check = now
+        if self._directory_mtimes() != self._dir_mtimes or self._warm_files_changed():
+            self.refresh()
+
+    def _warm_files_changed(self) -> bool:
+        """Whether a cached or warm recording was rewritten in place (no directory mtime change)."""
+        with self._lock:
+            entries = [self._entries[name] for name in set(self._frames) | set(self._warm_names())
+                       if name in self._entries]
+        for entry in entries:
+            try:
+                stat = os.stat(entry.path)
+            except OSError:
+                return True
+            if stat.st_mtime != entry.mtime or stat.st_size != entry.size:
+                return True
+        return False
+
+    def refresh(self) -> int:
+        """Rescan the directories; returns how many files were (re)parsed."""
+        with self._lock:
+            self._last_check = time.time()
+            self._dir_mtimes = self._directory_mtimes()
+            entries: Dict[str, RecordingEntry] = {}
+            known: Dict[str, RecordingEntry] = {}
+            fresh: Dict[str, Frames] = {}  # path -> trajectory parsed by this scan
+            parsed = 0
+            for source, directory in self.directories:
+                try:
+                    names = sorted(os.listdir(directory))
+                except OSError:
+                    continue
+                for filename in names:
+                    if not filename.endswith(".csv"):
+                        continue
+                    path = str(directory / filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entry = self._known.get(path)
+                    if entry is None or entry.mtime != stat.st_mtime or entry.size != stat.st_size:
+                        indexed = self._index_file(filename[:-4], path, source, stat)
+                        if indexed is None:
+                            continue
+                        entry, frames = indexed
+                        fresh[path] = frames
+                        parsed += 1
+                    known[path] = entry
+                    entries[entry.name] = entry
+
+            # Drop trajectories whose file changed, moved or went away
+            warm = set(self._frames) | set(self._warm_names())
+            for name in list(self._frames):
+                old, new = self._entries.get(name), entries.get(name)
+                if new is None or old is None or old.path != new.path or old.checksum != new.checksum:
+                    del self._frames[name]
+            # Already parsed, so keep the ones worth having warm
+            for name, entry in entries.items():
+                if entry.path in fresh and name in warm:
+                    self._frames[name] = fresh[entry.path]
+
+            changed = parsed or set(known) != set(self._known)
+            self._entries = entries
+            self._known = known
+            self._scanned = True
+            self.scans += 1
+        if changed:
+            logger.info(f"Recording catalog: {len(entries)} recordings ({parsed} parsed)")
+            self._save_index()
+        return parsed
+
+    def _index_file(self, name: str, path: str, source: str,
+                    stat: os.stat_result) -> Optional[Tuple[RecordingEntry, Frames]]:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            frames, meta = parse_recording(data, self.fps)
+        except Exception as e:
+            logger.warning(f"Skipping unreadable recording {path}: {e}")
+            return None
+        self.parses += 1
+        entry = RecordingEntry(name=name, path=path, source=source, mtime=stat.st_mtime, size=stat.st_size, **meta)
+        return entry, frames
+
+    def invalidate(self, name: Optional[str] = None):
+        """Forget a recording's cached trajectory and rescan (after writing or deleting it)."""
+        with self._lock:
+            if name is None:
+                self._frames.clear()
+            else:
+                self._frames.pop(name, None)
+        self.refresh()
+
+    # =========================================================================
+    # Lookups
+    # =========================================================================
+
+    def list(self) -> List[RecordingEntry]:
+        """All recordings (user overriding builtin), sorted by name."""
+        self._check()
+        with self._lock:
+            return sorted(self._entries.values(), key=lambda entry: entry.name)
+
+    def get(self, name: str) -> Optional[RecordingEntry]:
+        self._check()
+        return self._entries.get(name)
+
+    def path(self, name: str) -> Optional[Path]:
+        entry = self.get(name)
+        return Path(entry.path) if entry else None
+
+    def load(self, name: str) -> Optional[Frames]:
+        """Parsed action frames of a recording, or None if it doesn't exist."""
+        entry = self.get(name)
+        if entry is None:
+            return None
+        frames = self._frames.get(name)
+        if frames is not None:
+            self.hits += 1
+            return frames
+        self.misses += 1
+        try:
+            with open(entry.path, "rb") as f:
+                data = f.read()
+            frames, meta = parse_recording(data, self.fps)
+        except FileNotFoundError:
+            logger.warning(f"Recording {name} disappeared, rescanning")
+            self.refresh()
+            return None
+        except Exception as e:
+            logger.error(f"Error loading recording {name}: {e}")
+            return None
+        self.parses += 1
+        with self._lock:
+            if meta["checksum"] != entry.checksum:
+                # Rewritten in place since the last scan
+                self.refresh()
+            self._frames[name] = frames
+        return frames
+
+    def record_play(self, name: str):
+        """Count a play; the counts decide what prewarm() parses."""
+        with self._lock:
+            self._plays[name] = self._plays.get(name, 0) + 1
+        self._schedule_save()
+
+    # =========================================================================
+    # Prewarming
+    # =========================================================================
+
+    def _warm_names(self, limit: int = PREWARM_COUNT) -> List[str]:
+        played = sorted(self._plays, key=lambda name: self._plays[name], reverse=True)
+        names = list(ALWAYS_WARM) + [name for name in played if name not in ALWAYS_WARM]
+        return names[:len(ALWAYS_WARM) + limit]
+
+    def prewarm(self, names: Optional[List[str]] = None, limit: int = PREWARM_COUNT) -> int:
+        """Parse the given (default: most played) recordings now; returns how many were loaded."""
+        self._check()
+        warmed = 0
+        for name in names if names is not None else self._warm_names(limit):
+            if name in self._entries and name not in self._frames and self.load(name) is not None:
+                warmed += 1
+        if warmed:
+            logger.info(f"Recording catalog: prewarmed {warmed} recordings")
+        return warmed
+
+    def prewarm_async(self, names: Optional[List[str]] = None, limit: int = PREWARM_COUNT) -> threading.Thread:
+        thread = threading.Thread(target=self.prewarm, args=(names, limit), name="recording-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "recordings": len(self._entries),
+            "warm": sorted(self._frames),
+            "scans": self.scans,
+            "parses": self.parses,
+            "hits": self.hits,
+            "misses": self.misses,
+            "top_played": sorted(self._plays.items(), key=lambda item: item[1], reverse=True)[:PREWARM_COUNT],
+        }
+
+
+# Global instance
+_catalog: Optional[RecordingCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_recording_catalog() -> RecordingCatalog:
+    """Get the global RecordingCatalog (builtin and user recordings)."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                from lelamp.user_data import USER_DATA_DIR, get_recordings_paths
+                user_dir, repo_dir = get_recordings_paths()
+                _catalog = RecordingCatalog(
+                    [("builtin", repo_dir), ("user", user_dir)],
+                    index_path=USER_DATA_DIR / "recordings_index.json",
+                )
+    return _catalog
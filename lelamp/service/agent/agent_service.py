@@ -9,12 +9,13 @@ from deepgram.core.events import EventType
 
 import websockets
 import json
-import base64
 import os
 import queue
 from dotenv import load_dotenv
 from groq import Groq
 from lelamp.service.agent.tools import Tool
+from lelamp.service.agent.tool_executor import get_tool_executor
+from lelamp.service.agent.audio_uplink import AudioUplink
 
 logging.basicConfig(level=logging.INFO, force=True)
 logger = logging.getLogger("Agent_Service")
@@ -138,12 +139,12 @@ class Agent(
         except Exception:
             pass
 
-async def init_agent_service():
-    bot = LLM()
+async def init_agent_service(on_ready=None):
+    bot = LLM(on_ready=on_ready)
     await bot.start()
 
 class LLM:
-    def __init__(self):
+    def __init__(self, agent=None, on_ready=None):
         # Configuration
         self.API_KEY = os.getenv("OPENAI_API_KEY")  # Or fill in "sk-..." directly
         # Use the latest Realtime model
@@ -159,7 +160,23 @@ class LLM:
         self.input_queue = asyncio.Queue()
         self.output_queue = queue.Queue()
 
-        self.agent = Agent()
+        self.agent = agent or Agent()
+
+        # Only speech (plus pre-roll/hangover) is sent, coalesced into larger frames
+        agent_config = (g.CONFIG or {}).get("agent", {}) or {}
+        self.uplink = AudioUplink.from_config(agent_config.get("uplink"), self.SAMPLE_RATE)
+
+        # Tool calls of the response currently streaming; they start as soon as
+        # their arguments are complete and are answered together on response.done
+        self.tool_executor = get_tool_executor()
+        self._pending_tool_calls = []
+
+        # Open Realtime connection, for prompts sent from other threads (workflow triggers)
+        self.loop = None
+        self.websocket = None
+
+        # Called once the session is configured and the microphone is streaming
+        self.on_ready = on_ready
 
     def _fix_tools_format(self, original_tools):
         """Convert Chat Completion format tools to Realtime API format"""
@@ -196,18 +213,8 @@ class LLM:
             pass
 
     async def send_audio(self, websocket):
-        """Continuously read data from microphone queue and send to OpenAI"""
-        while True:
-            audio_bytes = await self.input_queue.get()
-            # Base64 encoding
-            base64_audio = base64.b64encode(audio_bytes).decode('utf-8')
-
-            # Send input_audio_buffer.append event
-            event = {
-                "type": "input_audio_buffer.append",
-                "audio": base64_audio
-            }
-            await websocket.send(json.dumps(event))
+        """Continuously read data from microphone queue and send speech to OpenAI"""
+        await self.uplink.run(self.input_queue, websocket)
 
     async def receive(self, websocket):
         """Continuously receive OpenAI responses and put into playback queue"""
@@ -226,6 +233,9 @@ class LLM:
                     if current_stream_type: print("") # Newline
                     print(f"[User Voice Transcription]: {transcript}")
                     current_stream_type = None
+                    # Keyword triggers of running workflows
+                    if g.workflow_service and g.workflow_service.trigger_engine:
+                        g.workflow_service.trigger_engine.emit("user_speech", {"text": transcript})
 
             # --- 2. AI Text Streaming Output (AI Response) ---
             # Because modalities=["text"], we listen to response.text.delta instead of audio
@@ -242,36 +252,69 @@ class LLM:
                     print(f"") # End color
                     current_stream_type = None
 
-            elif event['type'] == "response.function_call_arguments.done":
+            elif event_type == "response.function_call_arguments.done":
                 # AI has generated complete function call arguments
                 call_id = event["call_id"]
                 name = event["name"]
                 arguments = event["arguments"]
 
                 print(f"\n[System] AI requests tool call: {name}({arguments})")
-                output_str = await Tool.execute(name, arguments, self.agent)
-                # 1. Create a new conversation item (Item) consisting of tool output
-                item_create_event = {
-                    "type": "conversation.item.create",
-                    "item": {
-                        "type": "function_call_output",
-                        "call_id": call_id,  # Must correspond to the previous call_id
-                        "output": output_str
-                    }
+                # Never await the tool here: the receive loop must keep draining the socket
+                task = asyncio.create_task(self.tool_executor.run(name, arguments, self.agent))
+                self._pending_tool_calls.append((call_id, task))
+
+            if event_type == "response.done" and self._pending_tool_calls:
+                calls, self._pending_tool_calls = self._pending_tool_calls, []
+                asyncio.create_task(self._send_tool_results(websocket, calls))
+
+    async def _send_tool_results(self, websocket, calls):
+        """Wait for a response's tool calls (running concurrently), then return all results in one turn"""
+        outputs = await asyncio.gather(*(task for _, task in calls))
+        for (call_id, _), output_str in zip(calls, outputs):
+            # 1. Create a new conversation item (Item) consisting of tool output
+            item_create_event = {
+                "type": "conversation.item.create",
+                "item": {
+                    "type": "function_call_output",
+                    "call_id": call_id,  # Must correspond to the previous call_id
+                    "output": output_str
                 }
-                await websocket.send(json.dumps(item_create_event))
-
-                # 2. Tell AI: "Result given to you, now please reply to me based on this result" (triggers response.create)
-                response_create_event = {
-                    "type": "response.create",
-                    "response": {
-                        "modalities": ["text"],
-                    }
-                }
-                await websocket.send(json.dumps(response_create_event))
+            }
+            await websocket.send(json.dumps(item_create_event))
+
+        # 2. Tell AI: "Result given to you, now please reply to me based on this result" (triggers response.create)
+        response_create_event = {
+            "type": "response.create",
+            "response": {
+                "modalities": ["text"],
+            }
+        }
+        await websocket.send(json.dumps(response_create_event))
+
+    def prompt(self, instructions: str) -> bool:
+        """Have the model act on instructions without user speech (e.g. a workflow trigger), from any thread"""
+        websocket, loop = self.websocket, self.loop
+        if websocket is None or loop is None:
+            return False
+        asyncio.run_coroutine_threadsafe(self._send_prompt(websocket, instructions), loop)
+        return True
+
+    async def _send_prompt(self, websocket, instructions):
+        item_create_event = {
+            "type": "conversation.item.create",
+            "item": {
+                "type": "message",
+                "role": "system",
+                "content": [{"type": "input_text", "text": instructions}]
+            }
+        }
+        await websocket.send(json.dumps(item_create_event))
+        await websocket.send(json.dumps({"type": "response.create", "response": {"modalities": ["text"]}}))
 
     async def start(self):
         self.loop = asyncio.get_running_loop()
+        # Wake word callbacks (sleep mode) schedule wake_up on this loop
+        self.agent.event_loop = self.loop
 
         headers = {
             "Authorization": "Bearer " + self.API_KEY,
@@ -315,10 +358,18 @@ class LLM:
                 send_task = asyncio.create_task(self.send_audio(websocket))
                 receive_task = asyncio.create_task(self.receive(websocket))
 
+                # Workflow triggers prompt the model through this connection
+                self.websocket = websocket
+                if g.workflow_service:
+                    g.workflow_service.set_prompt_handler(self.prompt)
+                if self.on_ready:
+                    self.on_ready()
                 try:
                     await asyncio.gather(send_task, receive_task)
                 except KeyboardInterrupt:
                     print("Stopping conversation...")
+                finally:
+                    self.websocket = None
 
 if __name__ == "__main__":
     asyncio.run(init_agent_service())
@@ -0,0 +1,160 @@
+"""
+Speech-gated microphone uplink for the realtime agent.
+
+Sending every 1024-sample block as its own input_audio_buffer.append
+message costs a base64 encode, a JSON dump and a socket write ~23 times
+a second, and the server bills the silence as input audio. The uplink:
+
+- runs an RMS VAD on each block and only streams while speech is present
+- keeps a short pre-roll of silent blocks so word onsets aren't clipped
+- keeps streaming for a hangover after speech stops, long enough for the
+  server VAD (500 ms silence by default) to see the end of the turn
+- coalesces blocks into frames of ``frame_ms`` before sending
+
+Configured from ``agent.uplink`` in config.yaml.
+"""
+
+import base64
+import json
+import logging
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class AudioUplink:
+    """VAD gate + frame coalescer between the mic queue and the websocket."""
+
+    def __init__(
+        self,
+        sample_rate: int = 24000,
+        frame_ms: int = 100,
+        threshold: float = 0.01,
+        pre_roll_ms: int = 300,
+        hangover_ms: int = 800,
+        vad: bool = True,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_bytes = int(sample_rate * frame_ms / 1000) * 2  # int16 mono
+        self.threshold = threshold  # RMS, full scale = 1.0
+        self.pre_roll_samples = int(sample_rate * pre_roll_ms / 1000)
+        self.hangover_samples = int(sample_rate * hangover_ms / 1000)
+        self.vad = vad
+
+        self._pre_roll: deque = deque()
+        self._pre_roll_len = 0  # Samples in the pre-roll
+        self._pending = bytearray()
+        self._speaking = False
+        self._hangover_left = 0
+
+        # Stats
+        self.blocks_in = 0
+        self.frames_sent = 0
+        self.frames_suppressed = 0  # Mic blocks never sent
+        self.audio_bytes_sent = 0  # PCM
+        self.bytes_sent = 0  # On the wire (JSON + base64)
+        self.bytes_suppressed = 0
+        self.utterances = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], sample_rate: int = 24000) -> "AudioUplink":
+        config = config or {}
+        return cls(
+            sample_rate=sample_rate,
+            frame_ms=config.get("frame_ms", 100),
+            threshold=config.get("threshold", 0.01),
+            pre_roll_ms=config.get("pre_roll_ms", 300),
+            hangover_ms=config.get("hangover_ms", 800),
+            vad=config.get("vad", True),
+        )
+
+    def is_speech(self, block: bytes) -> bool:
+        samples = np.frombuffer(block, dtype=np.int16)
+        if samples.size == 0:
+            return False
+        rms = np.sqrt(np.mean(np.square(samples, dtype=np.float64))) / 32768.0
+        return rms >= self.threshold
+
+    def push(self, block: bytes) -> List[bytes]:
+        """Add one mic block; returns the frames that are ready to send."""
+        self.blocks_in += 1
+        samples = len(block) // 2
+
+        if not self.vad:
+            self._pending += block
+            return self._take()
+
+        if self.is_speech(block):
+            if not self._speaking:
+                self._speaking = True
+                self.utterances += 1
+                for held in self._pre_roll:
+                    self._pending += held
+                self._pre_roll.clear()
+                self._pre_roll_len = 0
+            self._hangover_left = self.hangover_samples
+            self._pending += block
+            return self._take()
+
+        if self._speaking:
+            self._pending += block
+            self._hangover_left -= samples
+            if self._hangover_left <= 0:
+                self._speaking = False
+                return self._take(flush=True)
+            return self._take()
+
+        # Silence: hold the most recent blocks as pre-roll, drop the rest
+        self._pre_roll.append(block)
+        self._pre_roll_len += samples
+        while self._pre_roll and self._pre_roll_len - len(self._pre_roll[0]) // 2 >= self.pre_roll_samples:
+            dropped = self._pre_roll.popleft()
+            self._pre_roll_len -= len(dropped) // 2
+            self.frames_suppressed += 1
+            self.bytes_suppressed += len(dropped)
+        return []
+
+    def _take(self, flush: bool = False) -> List[bytes]:
+        frames = []
+        while len(self._pending) >= self.frame_bytes:
+            frames.append(bytes(self._pending[:self.frame_bytes]))
+            del self._pending[:self.frame_bytes]
+        if flush and self._pending:
+            frames.append(bytes(self._pending))
+            self._pending.clear()
+        return frames
+
+    async def send(self, websocket, frame: bytes):
+        message = json.dumps({
+            "type": "input_audio_buffer.append",
+            "audio": base64.b64encode(frame).decode("utf-8"),
+        })
+        await websocket.send(message)
+        self.frames_sent += 1
+        self.audio_bytes_sent += len(frame)
+        self.bytes_sent += len(message)
+
+    async def run(self, queue, websocket):
+        """Forward mic blocks from an asyncio queue to the websocket."""
+        while True:
+            block = await queue.get()
+            for frame in self.push(block):
+                await self.send(websocket, frame)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.audio_bytes_sent + self.bytes_suppressed
+        return {
+            "vad": self.vad,
+            "speaking": self._speaking,
+            "blocks_in": self.blocks_in,
+            "frames_sent": self.frames_sent,
+            "frames_suppressed": self.frames_suppressed,
+            "bytes_sent": self.bytes_sent,
+            "audio_bytes_sent": self.audio_bytes_sent,
+            "bytes_suppressed": self.bytes_suppressed,
+            "suppressed_ratio": round(self.bytes_suppressed / total, 3) if total else 0.0,
+            "utterances": self.utterances,
+        }
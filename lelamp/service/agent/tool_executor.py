@@ -0,0 +1,158 @@
+"""
+Tool executor for the realtime agent.
+
+Tool calls must never run on the loop that streams microphone audio:
+- sync tools run in a bounded thread pool
+- async tools run as tasks on a dedicated tool loop thread, so tools that
+  block inside a coroutine (feedparser, subprocess, time.sleep sequences)
+  only stall other tools, not the audio send/receive loops
+- async tools that create or bind loop-affine objects (``wake_up`` hands
+  its running loop to the Ollama vision service) run as tasks on the
+  caller's loop instead (``agent.caller_loop_tools`` adds more); they must
+  not block
+
+Every call gets a timeout (per-tool overrides via ``agent.tool_timeouts``
+in config.yaml) and its latency is recorded in MetricsService.
+
+A timed-out sync tool cannot be interrupted; its worker thread stays busy
+until the function returns, which is why the pool is bounded.
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+from lelamp.service.agent.tools import Tool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_WORKERS = 4
+
+# Tools that legitimately take longer than the default
+DEFAULT_TOOL_TIMEOUTS: Dict[str, float] = {
+    "describe_scene": 60.0,
+    "get_scene_details": 60.0,
+    "go_to_sleep": 60.0,
+    "wake_up": 60.0,
+}
+
+# Async tools that must run on the agent's own loop
+DEFAULT_CALLER_LOOP_TOOLS = frozenset({"wake_up"})
+
+
+class ToolExecutor:
+    """Runs registered tools off the caller's event loop with timeouts and metrics."""
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        default_timeout: float = DEFAULT_TIMEOUT,
+        timeouts: Optional[Dict[str, float]] = None,
+        caller_loop_tools: Optional[Iterable[str]] = None,
+    ):
+        self.default_timeout = default_timeout
+        self.timeouts = dict(DEFAULT_TOOL_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+        self.caller_loop_tools = set(DEFAULT_CALLER_LOOP_TOOLS) | set(caller_loop_tools or ())
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def timeout_for(self, name: str) -> float:
+        return self.timeouts.get(name, self.default_timeout)
+
+    def _tool_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the tool loop thread on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="tool-loop", daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def _resolve(self, name: str, instance):
+        # Prefer the bound method so mixin tools get their agent instance
+        if instance is not None and hasattr(instance, name):
+            return getattr(instance, name)
+        return Tool.tool_registry[name]
+
+    async def run(self, name: str, args_json: str, instance) -> str:
+        """Execute one tool and return its result as a string (errors included)."""
+        if name not in Tool.tool_registry:
+            return f"Error: Tool {name} not found"
+
+        timeout = self.timeout_for(name)
+        status = "ok"
+        start = time.perf_counter()
+        try:
+            func = self._resolve(name, instance)
+            args = json.loads(args_json) if args_json else {}
+
+            if inspect.iscoroutinefunction(func) and name in self.caller_loop_tools:
+                future = asyncio.ensure_future(func(**args))
+            elif inspect.iscoroutinefunction(func):
+                future = asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(func(**args), self._tool_loop())
+                )
+            else:
+                future = asyncio.get_running_loop().run_in_executor(
+                    self._pool, functools.partial(func, **args)
+                )
+
+            result = await asyncio.wait_for(future, timeout)
+            return str(result)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            logger.warning(f"Tool {name} timed out after {timeout:g}s")
+            return f"Error: {name} timed out after {timeout:g}s"
+        except Exception as e:
+            status = "error"
+            return f"Error executing {name}: {str(e)}"
+        finally:
+            _record_latency(name, (time.perf_counter() - start) * 1000, status)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
+                self._loop_thread = None
+
+
+def _record_latency(name: str, duration_ms: float, status: str):
+    try:
+        from lelamp.service.metrics_service import get_metrics_service
+        get_metrics_service().record_tool_call(name, duration_ms, status)
+    except Exception as e:
+        logger.debug(f"Could not record tool latency: {e}")
+
+
+# Global singleton instance
+_tool_executor: Optional[ToolExecutor] = None
+
+
+def get_tool_executor() -> ToolExecutor:
+    """Get the global tool executor, configured from agent.* in config.yaml"""
+    global _tool_executor
+    if _tool_executor is None:
+        import lelamp.globals as g
+        agent_config = (g.CONFIG or {}).get("agent", {}) or {}
+        _tool_executor = ToolExecutor(
+            max_workers=agent_config.get("tool_workers", DEFAULT_MAX_WORKERS),
+            default_timeout=agent_config.get("tool_timeout", DEFAULT_TIMEOUT),
+            timeouts=agent_config.get("tool_timeouts"),
+            caller_loop_tools=agent_config.get("caller_loop_tools"),
+        )
+    return _tool_executor
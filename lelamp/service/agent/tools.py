@@ -1,5 +1,4 @@
 import inspect
-import json
 class Tool:
     tool_registry = dict()
     tools_schema = list()
@@ -37,25 +36,6 @@ class Tool:
         return tool
     @classmethod
     async def execute(cls, name, args_json, instance):
-        """Execute tool and return string result"""
-        if name not in cls.tool_registry:
-            return f"Error: Tool {name} not found"
-        try:
-            func = cls.tool_registry[name]
-            args = json.loads(args_json)
-            if hasattr(instance, name):
-                bound_method = getattr(instance, name)
-                # Check if it is a coroutine (async)
-                if inspect.iscoroutinefunction(bound_method):
-                    result = await bound_method(**args)
-                else:
-                    result = bound_method(**args)
-            else:
-                # Case of static function or normal function
-                if inspect.iscoroutinefunction(func):
-                    result = await func(**args)
-                else:
-                    result = func(**args)
-            return str(result)
-        except Exception as e:
-            return f"Error executing {name}: {str(e)}"
+        """Execute tool off the calling loop and return string result"""
+        from lelamp.service.agent.tool_executor import get_tool_executor
+        return await get_tool_executor().run(name, args_json, instance)
@@ -1,5 +1,9 @@
 from .audio_service import AudioService
 from .microphone_service import MicrophoneService
 from .audio_router import AudioRouter
+from .audio_mixer import AudioMixer, get_audio_mixer
+from .beat_tracker import BeatTracker, BeatState, get_beat_tracker
+from .level_meter import LevelMeter, LevelSnapshot, get_level_meter
 
-__all__ = ['AudioService', 'MicrophoneService', 'AudioRouter']
+__all__ = ['AudioService', 'MicrophoneService', 'AudioRouter', 'AudioMixer', 'get_audio_mixer',
+           'BeatTracker', 'BeatState', 'get_beat_tracker', 'LevelMeter', 'LevelSnapshot', 'get_level_meter']
@@ -0,0 +1,361 @@
+"""
+In-process audio mixer for LeLamp.
+
+One long-lived sounddevice output stream mixes any number of voices, so
+effects and theme sounds overlap instead of cutting each other off (sd.play
+is global and stops whatever was playing).
+
+- PCMCache: LRU of decoded, resampled PCM keyed by file path + mtime, so
+  repeated effects skip disk I/O and decoding
+- Per-voice gain, plus ducking: ``set_ducking(True)`` (the local voice
+  pipeline while it speaks through its own output) pulls every voice down
+  to ``duck_gain`` with a short ramp
+- The mono mixdown of every block is passed to a reference sink, normally
+  ``AudioService.write_reference_audio``, as the echo reference for AEC
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from itertools import count
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import sounddevice as sd
+except ImportError:
+    sd = None
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+try:
+    import soxr
+except ImportError:
+    soxr = None
+
+logger = logging.getLogger(__name__)
+
+
+class PCMCache:
+    """Size-bounded LRU of decoded PCM (float32, frames x channels). Thread-safe."""
+
+    def __init__(self, sample_rate: int, channels: int, max_bytes: int = 32 * 1024 * 1024):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, int], np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> np.ndarray:
+        """Return PCM for a file, decoding and resampling it on a miss."""
+        path = os.path.abspath(path)
+        key = (path, os.stat(path).st_mtime_ns)
+        with self._lock:
+            pcm = self._entries.get(key)
+            if pcm is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pcm
+            self.misses += 1
+
+        # Decode outside the lock so hits are never stuck behind a slow file
+        pcm = self._decode(path)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = pcm
+                self._bytes += pcm.nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+        return pcm
+
+    def _decode(self, path: str) -> np.ndarray:
+        data, fs = sf.read(path, dtype="float32", always_2d=True)
+
+        if data.shape[1] != self.channels:
+            mono = data.mean(axis=1, keepdims=True)
+            data = np.repeat(mono, self.channels, axis=1)
+
+        if fs != self.sample_rate:
+            data = soxr.resample(data, fs, self.sample_rate)
+
+        return np.ascontiguousarray(data, dtype=np.float32)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class Voice:
+    """A sound playing (or queued to play) in the mixer."""
+
+    def __init__(self, voice_id: int, pcm: np.ndarray, gain: float, sample_rate: int):
+        self.id = voice_id
+        self.pcm = pcm
+        self.gain = gain
+        self.duration = len(pcm) / sample_rate  # Seconds
+        self.position = 0
+        self.done = threading.Event()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the voice finished or was stopped."""
+        return self.done.wait(timeout)
+
+
+class AudioMixer:
+    """
+    Mixes voices into one output stream.
+
+    play() only appends a voice to the mix; with a cache hit no I/O happens
+    before the next audio callback picks it up.
+    """
+
+    SAMPLE_RATE = 24000  # Same rate as AudioService's reference buffer
+    CHANNELS = 2
+    BLOCK_SIZE = 1024  # ~42ms at 24kHz
+    LATENCY = "high"  # More stable on Pi
+
+    def __init__(
+        self,
+        device=None,
+        cache_bytes: int = 32 * 1024 * 1024,
+        duck_gain: float = 0.3,
+        duck_ramp_ms: float = 80.0,
+    ):
+        """
+        Initialize the mixer.
+
+        Args:
+            device: sounddevice output device (default device if None)
+            cache_bytes: Maximum size of decoded PCM kept in the cache
+            duck_gain: Gain applied to other voices while ducking (0-1)
+            duck_ramp_ms: Time constant of the ducking ramp
+        """
+        self.device = device
+        self.duck_gain = duck_gain
+        self.duck_ramp_ms = duck_ramp_ms
+        self.cache = PCMCache(self.SAMPLE_RATE, self.CHANNELS, cache_bytes)
+
+        self._voices: List[Voice] = []
+        self._lock = threading.Lock()
+        self._ids = count(1)
+        self._stream = None
+        self._manual_duck = False
+        self._duck_level = 1.0
+        self._reference_sink: Optional[Callable[[np.ndarray], None]] = None
+        self._reference_active = False
+        self._underflows = 0
+
+    # =========================================================================
+    # Stream lifecycle
+    # =========================================================================
+
+    def start(self) -> bool:
+        """Open the output stream (idempotent). Returns False if no output is available."""
+        with self._lock:
+            if self._stream is not None:
+                return True
+            if sd is None or sf is None or soxr is None:
+                logger.error("AudioMixer needs sounddevice, soundfile and soxr")
+                return False
+
+            try:
+                self._stream = self._open_stream(np.float32, self._callback)
+            except sd.PortAudioError as e:
+                # Same fallback as LocalAudioIO: some HDMI outputs only take int16
+                logger.warning(f"float32 output not supported, trying int16: {e}")
+                try:
+                    self._stream = self._open_stream(np.int16, self._callback_int16)
+                except Exception as e:
+                    logger.error(f"AudioMixer could not open output stream: {e}")
+                    return False
+            except Exception as e:
+                logger.error(f"AudioMixer could not open output stream: {e}")
+                return False
+
+            self._stream.start()
+            logger.info(f"AudioMixer started ({self.SAMPLE_RATE}Hz, {self.CHANNELS}ch)")
+            return True
+
+    def _open_stream(self, dtype, callback):
+        return sd.OutputStream(
+            samplerate=self.SAMPLE_RATE,
+            blocksize=self.BLOCK_SIZE,
+            device=self.device,
+            channels=self.CHANNELS,
+            dtype=dtype,
+            latency=self.LATENCY,
+            callback=callback,
+        )
+
+    def stop(self):
+        """Stop all voices and close the output stream."""
+        self.stop_all()
+        with self._lock:
+            stream, self._stream = self._stream, None
+        if stream is not None:
+            stream.stop()
+            stream.close()
+            logger.info("AudioMixer stopped")
+
+    # =========================================================================
+    # Playback
+    # =========================================================================
+
+    def play(self, file_path: str, gain: float = 1.0) -> Optional[Voice]:
+        """
+        Start playing a file and return its Voice (None on failure).
+
+        Args:
+            file_path: Path to an audio file soundfile can read
+            gain: Linear gain for this voice (0-1, above 1 amplifies)
+        """
+        if not self.start():
+            return None
+        try:
+            pcm = self.cache.get(file_path)
+        except Exception as e:
+            logger.error(f"Error decoding sound {file_path}: {e}")
+            return None
+
+        voice = Voice(next(self._ids), pcm, max(0.0, gain), self.SAMPLE_RATE)
+        with self._lock:
+            self._voices.append(voice)
+        return voice
+
+    def preload(self, paths) -> int:
+        """Decode files into the cache ahead of time. Returns how many were loaded."""
+        loaded = 0
+        for path in paths:
+            try:
+                self.cache.get(str(path))
+                loaded += 1
+            except Exception as e:
+                logger.debug(f"Could not preload {path}: {e}")
+        return loaded
+
+    def stop_voice(self, voice: Voice):
+        with self._lock:
+            if voice in self._voices:
+                self._voices.remove(voice)
+        voice.done.set()
+
+    def stop_all(self):
+        with self._lock:
+            voices, self._voices = self._voices, []
+        for voice in voices:
+            voice.done.set()
+
+    def set_ducking(self, active: bool):
+        """Duck all voices (while the agent is speaking through another output)."""
+        self._manual_duck = active
+
+    def set_reference_sink(self, sink: Optional[Callable[[np.ndarray], None]]):
+        """Receive the mono float32 mixdown of each block while voices play."""
+        self._reference_sink = sink
+
+    def is_playing(self) -> bool:
+        with self._lock:
+            return bool(self._voices)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            active = len(self._voices)
+        return {
+            "running": self._stream is not None,
+            "active_voices": active,
+            "underflows": self._underflows,
+            "cache": self.cache.stats(),
+        }
+
+    # =========================================================================
+    # Audio callback
+    # =========================================================================
+
+    def _mix(self, frames: int) -> np.ndarray:
+        mix = np.zeros((frames, self.CHANNELS), dtype=np.float32)
+        with self._lock:
+            voices = list(self._voices)
+
+        # Ramp the duck level towards its target across the block (no clicks)
+        target = self.duck_gain if self._manual_duck else 1.0
+        block_ms = frames * 1000.0 / self.SAMPLE_RATE
+        start = self._duck_level
+        end = target + (start - target) * float(np.exp(-block_ms / max(self.duck_ramp_ms, 1e-3)))
+        if abs(end - target) < 1e-3:
+            end = target
+        self._duck_level = end
+        envelope = np.linspace(start, end, frames, dtype=np.float32)[:, None] if start != end or end != 1.0 else None
+
+        finished = []
+        for voice in voices:
+            chunk = voice.pcm[voice.position:voice.position + frames]
+            n = len(chunk)
+            if envelope is None:
+                mix[:n] += chunk * voice.gain
+            else:
+                mix[:n] += chunk * voice.gain * envelope[:n]
+            voice.position += n
+            if voice.position >= len(voice.pcm):
+                finished.append(voice)
+
+        if finished:
+            with self._lock:
+                self._voices = [v for v in self._voices if v not in finished]
+            for voice in finished:
+                voice.done.set()
+
+        np.clip(mix, -1.0, 1.0, out=mix)
+
+        # Feed the echo reference while anything plays, plus one silent block
+        # afterwards so the reference buffer reports playback as stopped
+        sink = self._reference_sink
+        if sink is not None and (voices or self._reference_active):
+            self._reference_active = bool(voices)
+            try:
+                sink(mix.mean(axis=1))
+            except Exception as e:
+                logger.debug(f"Reference sink error: {e}")
+
+        return mix
+
+    def _callback(self, outdata, frames, time_info, status):
+        if status.output_underflow:
+            self._underflows += 1
+        outdata[:] = self._mix(frames)
+
+    def _callback_int16(self, outdata, frames, time_info, status):
+        if status.output_underflow:
+            self._underflows += 1
+        outdata[:] = (self._mix(frames) * 32767.0).astype(np.int16)
+
+
+# Global instance
+_audio_mixer: Optional[AudioMixer] = None
+_audio_mixer_lock = threading.Lock()
+
+
+def get_audio_mixer() -> AudioMixer:
+    """Get the global AudioMixer instance (created on first use)"""
+    global _audio_mixer
+    with _audio_mixer_lock:
+        if _audio_mixer is None:
+            _audio_mixer = AudioMixer()
+        return _audio_mixer
@@ -24,6 +24,8 @@ import numpy as np
 
 if TYPE_CHECKING:
     from .audio_service import AudioService
+    from .beat_tracker import BeatTracker
+    from .level_meter import LevelMeter
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +51,7 @@ class AudioRouter:
         gate_during_playback: bool = True,
         gate_release_delay: float = 0.3,
         pass_through_threshold: float = 0.02,
+        beat_tracker: Optional["BeatTracker"] = None,
     ):
         """
         Initialize the audio router.
@@ -60,6 +63,7 @@ class AudioRouter:
             gate_during_playback: If True, mute mic during AI playback
             gate_release_delay: Seconds to wait after playback before unmuting
             pass_through_threshold: RMS below this is considered silence (zero it)
+            beat_tracker: BeatTracker fed with every captured block (before gating)
         """
         self._audio_service = audio_service
         self._input_device = input_device
@@ -67,6 +71,8 @@ class AudioRouter:
         self._gate_during_playback = gate_during_playback
         self._gate_release_delay = gate_release_delay
         self._pass_through_threshold = pass_through_threshold
+        self._beat_tracker = beat_tracker
+        self._level_meter: Optional["LevelMeter"] = None
 
         # State
         self._running = False
@@ -230,6 +236,12 @@ class AudioRouter:
         self._current_rms = rms
         self._samples_processed += len(samples)
 
+        # Beat tracking wants the room audio, gated or not
+        if self._beat_tracker is not None:
+            self._beat_tracker.feed(samples)
+        if self._level_meter is not None:
+            self._level_meter.feed(samples, source="audio_router")
+
         # Update gate state
         self._update_gate_state()
 
@@ -289,6 +301,14 @@ class AudioRouter:
         """Set gate release delay."""
         self._gate_release_delay = max(0.0, seconds)
 
+    def set_beat_tracker(self, tracker: Optional["BeatTracker"]):
+        """Feed captured audio to a BeatTracker (None to stop)."""
+        self._beat_tracker = tracker
+
+    def set_level_meter(self, meter: Optional["LevelMeter"]):
+        """Feed captured audio to the shared LevelMeter (None to stop)."""
+        self._level_meter = meter
+
     def set_gate_enabled(self, enabled: bool):
         """Enable/disable gating during playback."""
         self._gate_during_playback = enabled
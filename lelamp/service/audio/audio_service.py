@@ -9,13 +9,15 @@ from typing import Dict, List, Optional, Tuple
 import subprocess
 import numpy as np
 
+from .audio_mixer import get_audio_mixer
+
 
 class AudioService:
     """
     Unified audio service for LeLamp.
 
     Features:
-    - Sound effect playback (via aplay/mpg123 to lelamp_playback dmix)
+    - Sound effect playback through the shared AudioMixer (cached PCM)
     - Real-time microphone level monitoring (via lelamp_capture dsnoop)
     - Auto-discovery of audio files in assets/AudioFX/
     - Non-blocking playback with queueing
@@ -26,6 +28,7 @@ class AudioService:
     SAMPLE_RATE = 24000  # Standardized to match OpenAI Realtime API
     BLOCK_SIZE = 1024
     NUM_BARS = 16  # Frequency bands for visualization
+    PLAYBACK_TIMEOUT_MARGIN = 2.0  # Seconds past a clip's length before a blocking play gives up
 
     def __init__(self, assets_dir: str = "assets/AudioFX", silence_threshold: float = 0.01, volume: int = 50):
         """
@@ -70,6 +73,9 @@ class AudioService:
         self._is_playing = False  # Flag to indicate active playback
         self._playback_rms: float = 0.0  # RMS of recent playback for ducking
 
+        # Shared output mixer; its mixdown feeds the AEC reference buffer
+        self._mixer = get_audio_mixer()
+
         # Discover all audio files
         self._discover_sounds()
 
@@ -152,6 +158,9 @@ class AudioService:
         self.set_system_volume(0)
         time.sleep(0.1)  # Brief delay to let audio settle
 
+        self._mixer.set_reference_sink(self.write_reference_audio)
+        self._mixer.start()
+
         self._running = True
         self.playback_thread = threading.Thread(target=self._playback_worker, daemon=True)
         self.playback_thread.start()
@@ -168,6 +177,8 @@ class AudioService:
         self._running = False
         if self.playback_thread:
             self.playback_thread.join(timeout=2)
+        self._mixer.stop_all()
+        self._mixer.set_reference_sink(None)
         self.logger.info("AudioService stopped (volume muted)")
 
     def clear_queue(self):
@@ -200,29 +211,22 @@ class AudioService:
 
     def _play_sound_blocking(self, file_path: str, volume: int = 100):
         """
-        Play a sound file using subprocess (blocking).
-        Uses lelamp_playback abstract device for hardware independence.
+        Play a sound file through the mixer and wait for it to finish.
 
         Args:
             file_path: Path to audio file
             volume: Volume percentage (0-100)
         """
-        print("sound path:", file_path)
-        import sounddevice as sd
-        import soundfile as sf
-        # import librosa
-        # target_fs = sd.query_devices(kind='output')['default_samplerate']
-        try:
-            # data, fs = librosa.load(file_path, sr=target_fs)
-            data, fs = sf.read(file_path, always_2d=True)
-            sd.play(data, fs, latency="high")
-            sd.wait()
-            self.logger.debug(f"Played sound: {file_path}")
-
-        except FileNotFoundError as e:
-            self.logger.error(f"Audio player not found: {e}")
-        except Exception as e:
-            self.logger.error(f"Error playing sound {file_path}: {e}")
+        voice = self._mixer.play(file_path, gain=max(0, min(100, volume)) / 100.0)
+        if voice is None:
+            self.logger.error(f"Error playing sound {file_path}")
+            return
+        # Bounded by the clip length, so a stalled output stream can't hang the worker
+        if not voice.wait(timeout=voice.duration + self.PLAYBACK_TIMEOUT_MARGIN):
+            self.logger.warning(f"Sound {file_path} did not finish within {voice.duration:.1f}s, stopping it")
+            self._mixer.stop_voice(voice)
+            return
+        self.logger.debug(f"Played sound: {file_path}")
 
     def play(self, sound_id: str, volume: int = 100, blocking: bool = False) -> bool:
         """
@@ -573,9 +577,8 @@ class AudioService:
             samples: Numpy array of float32 samples (-1.0 to 1.0)
         """
         with self._ref_buffer_lock:
-            # Add samples to ring buffer
-            for sample in samples:
-                self._reference_buffer.append(sample)
+            # Add samples to ring buffer (called from the mixer's audio callback)
+            self._reference_buffer.extend(samples.tolist())
 
             # Calculate RMS of this chunk for playback detection
             if len(samples) > 0:
@@ -0,0 +1,539 @@
+"""
+On-device beat and tempo tracker for LeLamp.
+
+Listens to the capture path (AudioRouter / MicrophoneService feed it their
+24kHz blocks, or the tracker runs its own arecord capture) and publishes a
+beat phase and energy envelope that motion and lighting can lock to:
+
+- Onset strength: band-wise log spectral flux at a 512-sample hop (~47 fps)
+- Tempo: autocorrelation of the last few seconds of onset strength every
+  ~0.5s, 60-180 BPM with a prior around 120 BPM and octave hysteresis
+- Phase: comb correlation against the onset history, feeding a free-running
+  oscillator that is nudged towards each new estimate, so phase_at() can be
+  extrapolated to any moment without waiting for the next block
+- Energy: attack/release RMS envelope scaled by loudness, 0-1
+
+Readers never block the capture thread: the published state is replaced
+wholesale and phase is computed from it on demand.
+"""
+
+import logging
+import math
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 24000  # Same rate as the rest of the capture path
+N_FFT = 1024
+HOP_LENGTH = 512
+FRAME_RATE = SAMPLE_RATE / HOP_LENGTH  # ~46.9 onset frames per second
+
+
+@dataclass(frozen=True)
+class BeatState:
+    """Snapshot of the tracker output."""
+    timestamp: float  # Wall time of the newest analysed audio
+    bpm: float
+    phase: float  # 0-1, 0 = on the beat
+    beat_count: int  # Beats since the tracker locked
+    energy: float  # 0-1 loudness-scaled envelope
+    onset: float  # Onset strength of the newest frame (normalized)
+    confidence: float  # 0-1 tempo periodicity
+    active: bool  # Music with a usable pulse is playing
+
+
+class BeatTracker:
+    """
+    Streaming onset/tempo/beat-phase tracker.
+
+    feed() is called from a capture thread with float32 mono blocks;
+    everything else is safe to call from any thread.
+    """
+
+    MIN_BPM = 60.0
+    MAX_BPM = 180.0
+    PRIOR_BPM = 120.0
+    HISTORY_SECONDS = 6.0
+    MIN_HISTORY_SECONDS = 2.5
+    ANALYSIS_INTERVAL = 0.5  # Seconds between tempo/phase estimates
+    PHASE_GAIN = 0.35  # Fraction of the measured phase error corrected per estimate
+    TEMPO_SWITCH_ESTIMATES = 3  # Consistent estimates needed to jump tempo
+    MIN_CONFIDENCE = 0.15
+    SILENCE_DB = -50.0
+    LOUD_DB = -20.0
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        if sample_rate != SAMPLE_RATE:
+            raise ValueError(f"BeatTracker expects {SAMPLE_RATE}Hz audio, got {sample_rate}")
+
+        self._window = np.hanning(N_FFT).astype(np.float32)
+        self._bands = self._band_matrix(n_bands=12, fmin=30.0, fmax=8000.0)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._prev_bands: Optional[np.ndarray] = None
+
+        history = int(self.HISTORY_SECONDS * FRAME_RATE)
+        self._onsets: deque = deque(maxlen=history)
+        self._frames = 0  # Onset frames since reset
+        self._frames_since_analysis = 0
+        self._onset_peak = 1e-3
+        self._smoothing = np.hanning(5)[1:-1] / np.hanning(5)[1:-1].sum()
+
+        # Stream clock -> wall clock, smoothed against block delivery jitter
+        self._samples_in = 0
+        self._clock_offset: Optional[float] = None
+
+        # Tempo / oscillator
+        self._bpm = 0.0
+        self._pending_bpm = 0.0
+        self._pending_count = 0
+        self._confidence = 0.0
+        self._beat_ref: Optional[float] = None  # Wall time of a beat
+        self._beat_ref_index = 0  # Beat number of _beat_ref
+        self._last_beat_index: Optional[int] = None
+        self._beat_count = 0
+
+        # Energy envelope
+        self._envelope = 0.0
+        self._envelope_peak = 1e-3
+        self._slow_db = -100.0
+
+        self._state = BeatState(0.0, 0.0, 0.0, 0, 0.0, 0.0, 0.0, False)
+        self._listeners: List[Callable[[BeatState], None]] = []
+        self._listeners_lock = threading.Lock()
+
+        # Own capture (only used when no capture service feeds us)
+        self._capture_thread: Optional[threading.Thread] = None
+        self._capture_process: Optional[subprocess.Popen] = None
+        self._capture_running = False
+        self._level_meter = None  # Shares our capture when nothing else captures
+
+        # Stats
+        self._process_time = 0.0
+        self._audio_time = 0.0
+        self._beats_fired = 0
+
+    @staticmethod
+    def _band_matrix(n_bands: int, fmin: float, fmax: float) -> np.ndarray:
+        """Log-spaced rectangular bands over the rfft bins, shape (n_bands, N_FFT // 2 + 1)."""
+        freqs = np.fft.rfftfreq(N_FFT, 1.0 / SAMPLE_RATE)
+        edges = np.geomspace(fmin, fmax, n_bands + 1)
+        bands = np.zeros((n_bands, len(freqs)), dtype=np.float32)
+        for b in range(n_bands):
+            mask = (freqs >= edges[b]) & (freqs < edges[b + 1])
+            if not mask.any():
+                mask[np.argmin(np.abs(freqs - edges[b]))] = True
+            bands[b, mask] = 1.0
+        return bands
+
+    # =========================================================================
+    # Input
+    # =========================================================================
+
+    def feed(self, samples: np.ndarray, timestamp: Optional[float] = None):
+        """
+        Consume a block of 24kHz mono float32 audio.
+
+        Args:
+            samples: Audio in -1..1 (int16 arrays are rescaled)
+            timestamp: Wall time at which the block's last sample was captured
+                (defaults to now; only tests and replays need to pass it)
+        """
+        start = time.perf_counter()
+        samples = np.asarray(samples)
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+        samples = samples.astype(np.float32, copy=False)
+
+        self._samples_in += len(samples)
+        now = time.time() if timestamp is None else timestamp
+        offset = now - self._samples_in / SAMPLE_RATE
+        if self._clock_offset is None or abs(offset - self._clock_offset) > 0.5:
+            self._clock_offset = offset  # First block, or the stream stalled
+        else:
+            self._clock_offset += 0.02 * (offset - self._clock_offset)
+
+        self._buffer = np.concatenate([self._buffer, samples])
+        n = (len(self._buffer) - N_FFT) // HOP_LENGTH + 1
+        if n > 0:
+            first_sample = self._samples_in - len(self._buffer)
+            idx = np.arange(N_FFT)[None, :] + HOP_LENGTH * np.arange(n)[:, None]
+            frames = self._buffer[idx]
+            self._buffer = self._buffer[n * HOP_LENGTH:]
+            for i in range(n):
+                center = first_sample + i * HOP_LENGTH + N_FFT // 2
+                self._process_frame(frames[i], self._clock_offset + center / SAMPLE_RATE)
+
+        self._process_time += time.perf_counter() - start
+        self._audio_time += len(samples) / SAMPLE_RATE
+
+    def _process_frame(self, frame: np.ndarray, frame_time: float):
+        spectrum = np.abs(np.fft.rfft(frame * self._window))
+        bands = np.log1p(100.0 * (self._bands @ spectrum))
+        flux = 0.0
+        if self._prev_bands is not None:
+            flux = float(np.maximum(bands - self._prev_bands, 0.0).sum())
+        self._prev_bands = bands
+        self._onsets.append(flux)
+        self._frames += 1
+
+        # Normalized onset for consumers (slowly decaying peak)
+        self._onset_peak = max(flux, self._onset_peak * 0.999, 1e-3)
+
+        self._update_energy(frame[N_FFT // 2 - HOP_LENGTH // 2:N_FFT // 2 + HOP_LENGTH // 2])
+
+        self._frames_since_analysis += 1
+        if (self._frames_since_analysis >= self.ANALYSIS_INTERVAL * FRAME_RATE
+                and len(self._onsets) >= self.MIN_HISTORY_SECONDS * FRAME_RATE):
+            self._frames_since_analysis = 0
+            self._analyse(frame_time)
+
+        self._publish(frame_time, flux / self._onset_peak)
+
+    def _update_energy(self, hop: np.ndarray):
+        rms = float(np.sqrt(np.mean(hop * hop)) + 1e-9)
+        dt = HOP_LENGTH / SAMPLE_RATE
+        coeff = 1.0 - math.exp(-dt / (0.02 if rms > self._envelope else 0.25))
+        self._envelope += coeff * (rms - self._envelope)
+        self._envelope_peak = max(self._envelope, self._envelope_peak * math.exp(-dt / 10.0), 1e-4)
+
+        db = 20.0 * math.log10(self._envelope + 1e-9)
+        self._slow_db += (1.0 - math.exp(-dt / 1.0)) * (db - self._slow_db)
+
+    # =========================================================================
+    # Tempo and phase
+    # =========================================================================
+
+    def _analyse(self, frame_time: float):
+        env = np.fromiter(self._onsets, dtype=np.float32, count=len(self._onsets))
+        # Widen the onset spikes a little so a fractional-frame period still lines up
+        env = np.convolve(env - env.mean(), self._smoothing, mode="same")
+        n = len(env)
+
+        spectrum = np.fft.rfft(env, 2 * n)
+        ac = np.fft.irfft(spectrum * np.conj(spectrum))[:n]
+        if ac[0] <= 0:
+            return
+        ac = ac / (n - np.arange(n)) * n / ac[0]  # Unbiased, ac[0] = 1
+        positive = np.maximum(ac, 0.0)
+        frames = np.arange(n)
+
+        lag_min = 60.0 * FRAME_RATE / self.MAX_BPM
+        lag_max = min(60.0 * FRAME_RATE / self.MIN_BPM, n / 2 - 1)
+        lags = np.arange(lag_min, lag_max, 0.25)
+        bpms = 60.0 * FRAME_RATE / lags
+        prior = np.exp(-0.5 * (np.log2(bpms / self.PRIOR_BPM) / 0.9) ** 2)
+
+        # Comb over the first few multiples of each lag: the true pulse repeats
+        # at every multiple, an off-beat pattern only at some of them
+        score = np.zeros(len(lags))
+        for k in range(1, 5):
+            multiple = k * lags
+            usable = multiple < 0.75 * n
+            score[usable] += np.interp(multiple[usable], frames, positive) / k
+        score *= prior
+        best = int(np.argmax(score))
+        lag = float(lags[best])
+
+        # Parabolic refinement on the score grid
+        if 0 < best < len(lags) - 1:
+            a, b, c = score[best - 1], score[best], score[best + 1]
+            denom = a - 2 * b + c
+            if denom < 0:
+                lag += 0.25 * float(np.clip(0.5 * (a - c) / denom, -0.5, 0.5))
+
+        self._confidence = float(np.clip(np.interp(lag, frames, ac), 0.0, 1.0))
+        self._update_tempo(60.0 * FRAME_RATE / lag, frame_time)
+        if self._bpm > 0:
+            self._update_phase(env, frame_time)
+
+    def _update_tempo(self, bpm: float, now: float):
+        if self._bpm <= 0:
+            self._set_bpm(bpm, now)
+            return
+
+        if abs(math.log2(bpm / self._bpm)) < 0.06:
+            self._set_bpm(0.7 * self._bpm + 0.3 * bpm, now)
+            self._pending_count = 0
+            return
+
+        # A different tempo has to persist before we jump (hysteresis)
+        if self._pending_count and abs(math.log2(bpm / self._pending_bpm)) < 0.06:
+            self._pending_count += 1
+        else:
+            self._pending_bpm, self._pending_count = bpm, 1
+        if self._pending_count >= self.TEMPO_SWITCH_ESTIMATES:
+            self._set_bpm(bpm, now)
+            self._pending_count = 0
+
+    def _set_bpm(self, bpm: float, now: float):
+        # Re-anchor on the most recent beat so the phase stays continuous
+        if self._beat_ref is not None and self._bpm > 0:
+            period = 60.0 / self._bpm
+            beats = math.floor((now - self._beat_ref) / period)
+            self._beat_ref += beats * period
+            self._beat_ref_index += beats
+        self._bpm = bpm
+
+    def _update_phase(self, env: np.ndarray, now: float):
+        period_frames = 60.0 * FRAME_RATE / self._bpm
+        n = len(env)
+        beats = int(n // period_frames)
+        if beats < 2:
+            return
+
+        # Comb correlation: for each candidate offset of the last beat,
+        # sum onset strength at that offset and every period before it
+        offsets = np.arange(int(math.ceil(period_frames)))
+        positions = n - 1 - (offsets[:, None] + period_frames * np.arange(beats)[None, :])
+        valid = positions >= 0
+        weights = 0.85 ** np.arange(beats)
+        values = np.where(valid, env[np.clip(np.round(positions).astype(int), 0, n - 1)], 0.0)
+        scores = (values * weights).sum(axis=1)
+        best = int(np.argmax(scores))
+
+        measured = now - best / FRAME_RATE
+        period = 60.0 / self._bpm
+        if self._beat_ref is None:
+            self._beat_ref = measured
+            return
+
+        error = (measured - self._beat_ref) / period
+        error -= round(error)  # -0.5..0.5 beats
+        self._beat_ref += self.PHASE_GAIN * error * period
+
+    # =========================================================================
+    # Output
+    # =========================================================================
+
+    def _publish(self, frame_time: float, onset: float):
+        loudness = float(np.clip((self._slow_db - self.SILENCE_DB) / (self.LOUD_DB - self.SILENCE_DB), 0.0, 1.0))
+        energy = float(np.clip(self._envelope / self._envelope_peak, 0.0, 1.0)) * loudness
+        active = (
+            self._beat_ref is not None
+            and self._confidence >= self.MIN_CONFIDENCE
+            and self._slow_db > self.SILENCE_DB
+        )
+
+        phase, beat_index = 0.0, None
+        if self._beat_ref is not None and self._bpm > 0:
+            position = self._beat_ref_index + (frame_time - self._beat_ref) * self._bpm / 60.0
+            beat_index = math.floor(position)
+            phase = position - beat_index
+
+        fire = (
+            active
+            and beat_index is not None
+            and self._last_beat_index is not None
+            and beat_index > self._last_beat_index
+        )
+        if beat_index is not None:
+            # Only move forward, so re-anchoring never replays a beat
+            if self._last_beat_index is None or beat_index > self._last_beat_index:
+                self._last_beat_index = beat_index
+        if fire:
+            self._beat_count += 1
+
+        state = BeatState(
+            timestamp=frame_time,
+            bpm=self._bpm,
+            phase=phase,
+            beat_count=self._beat_count,
+            energy=energy,
+            onset=float(min(onset, 1.0)),
+            confidence=self._confidence,
+            active=active,
+        )
+        self._state = state
+
+        if fire:
+            self._beats_fired += 1
+            with self._listeners_lock:
+                listeners = list(self._listeners)
+            for listener in listeners:
+                try:
+                    listener(state)
+                except Exception as e:
+                    logger.debug(f"Beat listener error: {e}")
+
+    def get_state(self) -> BeatState:
+        """Latest published state (phase as of the newest analysed audio)."""
+        return self._state
+
+    def is_active(self) -> bool:
+        return self._state.active
+
+    def get_bpm(self) -> float:
+        return self._bpm
+
+    def get_energy(self) -> float:
+        return self._state.energy
+
+    def beat_position(self, t: Optional[float] = None) -> Optional[float]:
+        """Continuous beat count at wall time t (now by default), None before lock."""
+        ref, bpm = self._beat_ref, self._bpm
+        if ref is None or bpm <= 0:
+            return None
+        t = time.time() if t is None else t
+        return self._beat_ref_index + (t - ref) * bpm / 60.0
+
+    def phase_at(self, t: Optional[float] = None) -> float:
+        """Beat phase (0-1, 0 = on the beat) extrapolated to wall time t."""
+        position = self.beat_position(t)
+        return 0.0 if position is None else position % 1.0
+
+    def next_beat_time(self, after: Optional[float] = None) -> Optional[float]:
+        """Wall time of the next predicted beat, for scheduling accents ahead of time."""
+        position = self.beat_position(after)
+        if position is None:
+            return None
+        return self._beat_ref + (math.floor(position + 1.0) - self._beat_ref_index) * 60.0 / self._bpm
+
+    def add_beat_listener(self, callback: Callable[[BeatState], None]):
+        """
+        Call `callback(state)` on every detected beat while music is active.
+
+        Listeners run on the capture thread and must return quickly; use
+        next_beat_time() to schedule anything that needs to land exactly on
+        the beat.
+        """
+        with self._listeners_lock:
+            if callback not in self._listeners:
+                self._listeners.append(callback)
+
+    def remove_beat_listener(self, callback: Callable[[BeatState], None]):
+        with self._listeners_lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def reset(self):
+        """Forget tempo and phase (e.g. when the audio source changes)."""
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._prev_bands = None
+        self._onsets.clear()
+        self._frames = self._frames_since_analysis = 0
+        self._samples_in = 0
+        self._clock_offset = None
+        self._bpm = self._pending_bpm = 0.0
+        self._pending_count = 0
+        self._confidence = 0.0
+        self._beat_ref = None
+        self._beat_ref_index = 0
+        self._last_beat_index = None
+        self._envelope = 0.0
+        self._slow_db = -100.0
+        self._state = BeatState(0.0, 0.0, 0.0, self._beat_count, 0.0, 0.0, 0.0, False)
+
+    def get_stats(self) -> dict:
+        state = self._state
+        return {
+            "capturing": self._capture_running,
+            "active": state.active,
+            "bpm": round(state.bpm, 1),
+            "confidence": round(state.confidence, 3),
+            "energy": round(state.energy, 3),
+            "beats": self._beats_fired,
+            "frames": self._frames,
+            "cpu_percent": round(100.0 * self._process_time / max(self._audio_time, 1e-9), 2),
+            # Beat events fire on the block that crosses the beat; phase_at() has no such lag
+            "max_event_latency_ms": round(1000.0 * (N_FFT / 2 + HOP_LENGTH) / SAMPLE_RATE, 1),
+        }
+
+    # =========================================================================
+    # Own capture
+    # =========================================================================
+
+    def start_capture(self, device: str = "lelamp_capture", block_size: int = 1024):
+        """
+        Capture audio with arecord and feed it to the tracker.
+
+        Only needed when neither AudioRouter nor MicrophoneService is running;
+        those feed the tracker from their own capture loops.
+        """
+        if self._capture_running:
+            return
+        self._capture_running = True
+        self._capture_thread = threading.Thread(
+            target=self._capture_worker, args=(device, block_size), name="beat-capture", daemon=True
+        )
+        self._capture_thread.start()
+        logger.info(f"BeatTracker capturing from {device}")
+
+    @property
+    def capturing(self) -> bool:
+        return self._capture_running
+
+    def set_level_meter(self, meter):
+        """Feed our own capture's blocks to the shared LevelMeter (None to stop)."""
+        self._level_meter = meter
+
+    def stop_capture(self):
+        self._capture_running = False
+        process = self._capture_process
+        if process:
+            process.terminate()
+        if self._capture_thread:
+            self._capture_thread.join(timeout=2)
+            self._capture_thread = None
+
+    def _capture_worker(self, device: str, block_size: int):
+        bytes_to_read = block_size * 2
+        retries = 0
+        while self._capture_running and retries < 5:
+            try:
+                self._capture_process = subprocess.Popen(
+                    ['arecord', '-D', device, '-f', 'S16_LE', '-r', str(SAMPLE_RATE),
+                     '-c', '1', '-t', 'raw', '--buffer-size', '4096', '-'],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    bufsize=bytes_to_read,
+                )
+                retries = 0
+                while self._capture_running:
+                    raw = self._capture_process.stdout.read(bytes_to_read)
+                    if not raw or len(raw) < bytes_to_read:
+                        if self._capture_process.poll() is not None:
+                            break
+                        continue
+                    block = np.frombuffer(raw, dtype=np.int16)
+                    self.feed(block)
+                    if self._level_meter is not None:
+                        self._level_meter.feed(block, source="beat_tracker")
+            except FileNotFoundError:
+                logger.error("arecord not found, beat tracking disabled")
+                break
+            except Exception as e:
+                logger.error(f"Beat capture error: {e}")
+                retries += 1
+                time.sleep(1.0)
+            finally:
+                if self._capture_process:
+                    self._capture_process.terminate()
+                    try:
+                        self._capture_process.wait(timeout=1)
+                    except subprocess.TimeoutExpired:
+                        self._capture_process.kill()
+                    self._capture_process = None
+        self._capture_running = False
+
+
+# Global instance
+_beat_tracker: Optional[BeatTracker] = None
+_beat_tracker_lock = threading.Lock()
+
+
+def get_beat_tracker() -> BeatTracker:
+    """Get the global BeatTracker instance (created on first use)"""
+    global _beat_tracker
+    with _beat_tracker_lock:
+        if _beat_tracker is None:
+            _beat_tracker = BeatTracker()
+        return _beat_tracker
@@ -0,0 +1,257 @@
+"""
+Shared microphone level meter for LeLamp.
+
+Setup and dashboard clients (mic-level polling, waveform websockets) read
+one shared snapshot instead of each opening the capture device:
+
+- The capture path that is already running (AudioRouter, MicrophoneService
+  or the BeatTracker's own capture) calls feed() with every block
+- Each block updates RMS and peak; while anyone is reading, it also
+  produces a 128-point waveform and a 32-band log spectrum
+- If nothing is feeding the meter when a client reads, the meter starts
+  its own arecord capture, and stops it again once clients go away or a
+  capture service starts feeding it
+
+Readers never block the capture thread: the snapshot is replaced
+wholesale, and get_snapshot() is a lock-free reference read.
+"""
+
+import asyncio
+import logging
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 24000  # Same rate as the rest of the capture path
+WAVEFORM_POINTS = 128
+SPECTRUM_BANDS = 32
+SPECTRUM_MIN_HZ = 60.0
+SPECTRUM_FLOOR_DB = -80.0
+
+STALE_AFTER = 0.5  # Seconds without a block before the meter captures itself
+IDLE_AFTER = 10.0  # Seconds without a reader before analysis/own capture stop
+CAPTURE_RETRY = 5.0  # Seconds before retrying a capture that failed to start
+
+
+@dataclass(frozen=True)
+class LevelSnapshot:
+    """Levels of the newest captured block."""
+    seq: int  # Increments per block, so readers can skip repeats
+    timestamp: float
+    rms: float  # 0-1 (full scale)
+    peak: float  # 0-1
+    waveform: Tuple[float, ...]  # -1 to 1, peak-preserving decimation
+    spectrum: Tuple[float, ...]  # 0-1 per log-spaced band (dB scaled)
+    source: str  # Capture path that produced the block
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class LevelMeter:
+    """
+    Computes levels once per captured block for any number of readers.
+
+    feed() is called from a capture thread; everything else is safe to
+    call from any thread or the event loop.
+    """
+
+    def __init__(self, device: str = "lelamp_capture", block_size: int = 1024):
+        self.device = device
+        self.block_size = block_size
+
+        self._snapshot: Optional[LevelSnapshot] = None
+        self._seq = 0
+        self._last_read = 0.0
+        self._last_tap_feed = 0.0  # Last block from a capture service (not our own capture)
+        self._bands: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}  # Block length -> band bins
+
+        self._capture_lock = threading.Lock()
+        self._capture_running = False
+        self._capture_thread: Optional[threading.Thread] = None
+        self._capture_process: Optional[subprocess.Popen] = None
+        self._capture_failed_at = 0.0
+
+        self.blocks = 0
+        self.analysed_blocks = 0
+
+    # =========================================================================
+    # Capture side
+    # =========================================================================
+
+    def feed(self, samples: np.ndarray, source: str = "capture"):
+        """Update the snapshot from one mono block (float32 -1..1 or int16)."""
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+        if samples.size == 0:
+            return
+        now = time.time()
+        if source != "meter":
+            self._last_tap_feed = now
+
+        rms = float(np.sqrt(np.mean(np.square(samples))))
+        peak = float(np.max(np.abs(samples)))
+        self.blocks += 1
+        self._seq += 1
+
+        # Waveform and spectrum only while someone is looking
+        waveform: Tuple[float, ...] = ()
+        spectrum: Tuple[float, ...] = ()
+        if now - self._last_read < IDLE_AFTER:
+            waveform = self._waveform(samples)
+            spectrum = self._spectrum(samples)
+            self.analysed_blocks += 1
+
+        self._snapshot = LevelSnapshot(
+            seq=self._seq, timestamp=now, rms=rms, peak=peak,
+            waveform=waveform, spectrum=spectrum, source=source,
+        )
+
+    def _waveform(self, samples: np.ndarray) -> Tuple[float, ...]:
+        """Decimate to WAVEFORM_POINTS, keeping the largest excursion per bucket."""
+        if samples.size <= WAVEFORM_POINTS:
+            return tuple(np.round(samples, 4).tolist())
+        per_bucket = samples.size // WAVEFORM_POINTS
+        buckets = samples[:per_bucket * WAVEFORM_POINTS].reshape(WAVEFORM_POINTS, per_bucket)
+        picks = buckets[np.arange(WAVEFORM_POINTS), np.argmax(np.abs(buckets), axis=1)]
+        return tuple(np.round(picks, 4).tolist())
+
+    def _spectrum(self, samples: np.ndarray) -> Tuple[float, ...]:
+        window, edges = self._band_layout(samples.size)
+        power = np.abs(np.fft.rfft(samples * window)) ** 2
+        # Sum power per band (cumsum makes every band one subtraction)
+        cumulative = np.concatenate(([0.0], np.cumsum(power)))
+        band_power = (cumulative[edges[1:]] - cumulative[edges[:-1]]) / np.maximum(edges[1:] - edges[:-1], 1)
+        db = 10 * np.log10(band_power / (samples.size / 4) ** 2 + 1e-12)  # Full-scale sine ~ 0 dB
+        levels = np.clip((db - SPECTRUM_FLOOR_DB) / -SPECTRUM_FLOOR_DB, 0.0, 1.0)
+        return tuple(np.round(levels, 3).tolist())
+
+    def _band_layout(self, length: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Hann window and log-spaced rfft bin edges for a block length (cached)."""
+        layout = self._bands.get(length)
+        if layout is None:
+            nyquist_bin = length // 2
+            min_bin = max(1, int(SPECTRUM_MIN_HZ * length / SAMPLE_RATE))
+            edges = np.unique(np.geomspace(min_bin, nyquist_bin + 1, SPECTRUM_BANDS + 1).astype(int))
+            # Short blocks can't resolve every low band; pad so there are always SPECTRUM_BANDS
+            while edges.size < SPECTRUM_BANDS + 1:
+                edges = np.append(edges, edges[-1])
+            layout = (np.hanning(length).astype(np.float32), edges)
+            self._bands[length] = layout
+        return layout
+
+    # =========================================================================
+    # Reader side
+    # =========================================================================
+
+    def get_snapshot(self) -> Optional[LevelSnapshot]:
+        """Newest levels; starts the meter's own capture if nothing is feeding it."""
+        now = time.time()
+        self._last_read = now
+        snapshot = self._snapshot
+        if (snapshot is None or now - snapshot.timestamp > STALE_AFTER) and not self._capture_running \
+                and now - self._capture_failed_at > CAPTURE_RETRY:
+            self.start_capture()
+        return snapshot
+
+    async def wait_for_snapshot(self, after_seq: int = 0, timeout: float = 0.5) -> Optional[LevelSnapshot]:
+        """Wait (without blocking the loop) for a snapshot newer than after_seq."""
+        deadline = time.time() + timeout
+        snapshot = self.get_snapshot()
+        while (snapshot is None or snapshot.seq <= after_seq) and time.time() < deadline:
+            await asyncio.sleep(0.02)
+            snapshot = self.get_snapshot()
+        return snapshot
+
+    def get_stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            "blocks": self.blocks,
+            "analysed_blocks": self.analysed_blocks,
+            "capturing": self._capture_running,
+            "source": snapshot.source if snapshot else None,
+            "age": round(time.time() - snapshot.timestamp, 3) if snapshot else None,
+        }
+
+    # =========================================================================
+    # Own capture (only when no capture service is feeding the meter)
+    # =========================================================================
+
+    def start_capture(self):
+        with self._capture_lock:
+            if self._capture_running:
+                return
+            self._capture_running = True
+            self._capture_thread = threading.Thread(target=self._capture_worker, name="level-meter", daemon=True)
+            self._capture_thread.start()
+        logger.info(f"LevelMeter capturing from {self.device}")
+
+    def stop_capture(self):
+        self._capture_running = False
+        process = self._capture_process
+        if process:
+            process.terminate()
+        if self._capture_thread and self._capture_thread is not threading.current_thread():
+            self._capture_thread.join(timeout=2)
+            self._capture_thread = None
+
+    def _should_capture(self) -> bool:
+        now = time.time()
+        if now - self._last_read > IDLE_AFTER:
+            return False  # Nobody is reading
+        return now - self._last_tap_feed > STALE_AFTER  # A capture service took over
+
+    def _capture_worker(self):
+        bytes_to_read = self.block_size * 2
+        blocks = self.blocks
+        try:
+            self._capture_process = subprocess.Popen(
+                ['arecord', '-D', self.device, '-f', 'S16_LE', '-r', str(SAMPLE_RATE),
+                 '-c', '1', '-t', 'raw', '--buffer-size', '4096', '-'],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=bytes_to_read,
+            )
+            while self._capture_running and self._should_capture():
+                raw = self._capture_process.stdout.read(bytes_to_read)
+                if not raw or len(raw) < bytes_to_read:
+                    if self._capture_process.poll() is not None:
+                        break
+                    continue
+                self.feed(np.frombuffer(raw, dtype=np.int16), source="meter")
+        except FileNotFoundError:
+            logger.error("arecord not found, level meter has no capture")
+        except Exception as e:
+            logger.error(f"Level meter capture error: {e}")
+        finally:
+            if self._capture_process:
+                self._capture_process.terminate()
+                try:
+                    self._capture_process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    self._capture_process.kill()
+                self._capture_process = None
+            if self.blocks == blocks:
+                self._capture_failed_at = time.time()  # Don't respawn arecord on every poll
+            self._capture_running = False
+            logger.info("LevelMeter capture stopped")
+
+
+# Global instance
+_level_meter: Optional[LevelMeter] = None
+_level_meter_lock = threading.Lock()
+
+
+def get_level_meter() -> LevelMeter:
+    """Get the global LevelMeter instance (created on first use)"""
+    global _level_meter
+    with _level_meter_lock:
+        if _level_meter is None:
+            _level_meter = LevelMeter()
+        return _level_meter
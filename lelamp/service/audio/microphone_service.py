@@ -24,6 +24,8 @@ import numpy as np
 
 if TYPE_CHECKING:
     from .audio_service import AudioService
+    from .beat_tracker import BeatTracker
+    from .level_meter import LevelMeter
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +69,7 @@ class MicrophoneService:
         min_speech_duration: float = 0.1,
         min_silence_duration: float = 0.3,
         debug_logging: bool = False,
+        beat_tracker: Optional["BeatTracker"] = None,
     ):
         """
         Initialize the microphone service.
@@ -81,6 +84,7 @@ class MicrophoneService:
             min_speech_duration: Minimum speech duration to trigger speech start (seconds)
             min_silence_duration: Minimum silence duration to trigger speech end (seconds)
             debug_logging: Enable verbose debug logging for tuning
+            beat_tracker: BeatTracker fed with every captured block (before gating)
         """
         self._audio_service = audio_service
         self._device = device
@@ -91,6 +95,8 @@ class MicrophoneService:
         self._min_speech_duration = min_speech_duration
         self._min_silence_duration = min_silence_duration
         self._debug_logging = debug_logging
+        self._beat_tracker = beat_tracker
+        self._level_meter: Optional["LevelMeter"] = None
 
         # State
         self._running = False
@@ -287,6 +293,12 @@ class MicrophoneService:
             if rms > self._peak_rms:
                 self._peak_rms = rms
 
+        # Beat tracking wants the room audio, gated or not
+        if self._beat_tracker is not None:
+            self._beat_tracker.feed(samples)
+        if self._level_meter is not None:
+            self._level_meter.feed(samples, source="microphone_service")
+
         # Get playback state from AudioService
         is_playing = False
         playback_rms = 0.0
@@ -464,6 +476,14 @@ class MicrophoneService:
         self._on_speech_end = on_speech_end
         self._on_barge_in = on_barge_in
 
+    def set_beat_tracker(self, tracker: Optional["BeatTracker"]):
+        """Feed captured audio to a BeatTracker (None to stop)."""
+        self._beat_tracker = tracker
+
+    def set_level_meter(self, meter: Optional["LevelMeter"]):
+        """Feed captured audio to the shared LevelMeter (None to stop)."""
+        self._level_meter = meter
+
     def is_speech_active(self) -> bool:
         """Check if speech is currently detected."""
         return self._speech_active
@@ -0,0 +1,76 @@
+"""
+The lamp's boot graph.
+
+Which services exist, what each one waits for and which of them the lamp
+needs before it can respond. The webui server registers these steps with
+its real _init_* helpers; the boot orchestrator tests register the same
+graph with simulated ones, so the two can't drift apart.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from lelamp.service.boot_orchestrator import BootOrchestrator
+
+
+@dataclass(frozen=True)
+class StepSpec:
+    """Shape of one boot step; the init/enabled/check callables are supplied by the caller."""
+    name: str
+    depends: Tuple[str, ...] = ()
+    interactive: bool = False
+    deferred: bool = False
+    background: bool = False
+
+
+LAMP_BOOT_GRAPH: Tuple[StepSpec, ...] = (
+    # Auto-detect hardware and update config if needed
+    # This handles missing USB camera gracefully
+    StepSpec("hardware_detection"),
+    StepSpec("rgb", interactive=True),
+    # Recording catalog - index the animations and parse the most played ones
+    # alongside the motor bring-up, so the first play doesn't read the SD card
+    StepSpec("recordings"),
+    StepSpec("motors"),
+    # Audio Service - always start (needed for playing system sounds)
+    StepSpec("audio", depends=("hardware_detection",), interactive=True),
+    StepSpec("theme", depends=("audio",), interactive=True),
+    # Beat tracker - drives music modifier / dance mode from room audio
+    StepSpec("beat_tracker", depends=("hardware_detection", "audio", "motors")),
+    # Level meter - setup/dashboard mic levels tap the running capture
+    StepSpec("level_meter", depends=("beat_tracker",)),
+    StepSpec("vision", depends=("hardware_detection",)),
+    # Emotion model load is heavy (TensorFlow) and nothing needs it to respond,
+    # so it runs once boot is idle, or earlier when describe_scene first needs a
+    # mood (g.boot_orchestrator.ensure)
+    StepSpec("emotion", depends=("vision", "rgb", "motors"), deferred=True),
+    StepSpec("workflows"),
+    StepSpec("workflow_triggers", depends=("workflows", "vision", "beat_tracker")),
+    # Thermal governor - sheds vision/LED/analysis load before the firmware throttles
+    StepSpec("thermal_governor", depends=("rgb", "motors", "vision")),
+    # Wake word service - created here, listening only while the lamp sleeps
+    StepSpec("wake", depends=("hardware_detection",)),
+    # Agent consumes the services above, so it starts once they are up; it runs
+    # on its own thread and reports ready once its session is live
+    StepSpec("agent", depends=("rgb", "motors", "audio", "theme", "workflows"),
+             interactive=True, background=True),
+)
+
+
+def add_lamp_steps(
+    boot: BootOrchestrator,
+    init: Dict[str, Callable],
+    enabled: Optional[Dict[str, Callable[[], bool]]] = None,
+    check: Optional[Dict[str, Callable[[], bool]]] = None,
+) -> BootOrchestrator:
+    """Register LAMP_BOOT_GRAPH on boot; init must cover every step, enabled/check are optional per step."""
+    enabled = enabled or {}
+    check = check or {}
+    missing = [spec.name for spec in LAMP_BOOT_GRAPH if spec.name not in init]
+    if missing:
+        raise ValueError(f"No init for boot steps: {', '.join(missing)}")
+    for spec in LAMP_BOOT_GRAPH:
+        boot.add(spec.name, init[spec.name], depends=spec.depends,
+                 enabled=enabled.get(spec.name, True), check=check.get(spec.name),
+                 deferred=spec.deferred, interactive=spec.interactive, background=spec.background)
+    return boot
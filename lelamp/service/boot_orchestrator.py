@@ -0,0 +1,293 @@
+"""
+Dependency-aware parallel service boot for LeLamp.
+
+Services used to come up one after another, so camera probing, the servo
+bus scan and model loads all sat in front of the first interaction. The
+boot orchestrator:
+
+- takes each service as a step with the steps it depends on
+- runs every step whose dependencies have finished on a small thread
+  pool, so independent hardware comes up concurrently
+- keeps deferred steps (heavy model loads) off the critical path: they run
+  once boot has been idle for a while, or earlier on first use via ensure()
+- lets background steps (the voice agent) start a service and report
+  readiness later via finish(), so they count as ready when they are and
+  not when their thread was spawned
+- records per-step status and timings, and the time until every
+  "interactive" step (what the lamp needs to respond) has finished
+
+A failed step does not stop its dependents: the existing _init_* helpers
+already leave their g.* service as None on failure and dependents check
+for that, so the orchestrator only reports it.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Step statuses
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"  # Init finished and the service is available
+UNAVAILABLE = "unavailable"  # Init finished but the service isn't there (no hardware, init error logged)
+FAILED = "failed"  # Init raised
+SKIPPED = "skipped"  # Disabled in config
+DEFERRED = "deferred"  # Waiting for idle time or first use
+
+FINISHED = {READY, UNAVAILABLE, FAILED, SKIPPED}
+
+
+@dataclass
+class BootStep:
+    """One service in the boot graph."""
+    name: str
+    init: Callable[[], Any]
+    depends: Tuple[str, ...] = ()
+    enabled: Union[bool, Callable[[], bool]] = True  # Callables are evaluated when the step is due
+    check: Optional[Callable[[], bool]] = None  # Whether the service came up
+    deferred: bool = False
+    interactive: bool = False  # Needed before the lamp can respond
+    background: bool = False  # init() only starts the service; finish() reports the outcome
+    status: str = PENDING
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return (self.finished_at - self.started_at) * 1000
+
+    def to_dict(self, boot_started: Optional[float]) -> Dict[str, Any]:
+        def offset(t):
+            return round((t - boot_started) * 1000, 1) if t is not None and boot_started is not None else None
+        return {
+            "status": self.status,
+            "depends": list(self.depends),
+            "deferred": self.deferred,
+            "interactive": self.interactive,
+            "background": self.background,
+            "started_ms": offset(self.started_at),
+            "finished_ms": offset(self.finished_at),
+            "duration_ms": round(self.duration_ms, 1) if self.duration_ms is not None else None,
+            "error": self.error,
+        }
+
+
+class BootOrchestrator:
+    """Boots registered steps concurrently in dependency order."""
+
+    def __init__(self, max_workers: int = 4, idle_delay: float = 5.0, time_fn: Callable[[], float] = time.time):
+        self.max_workers = max_workers
+        self.idle_delay = idle_delay  # Seconds after boot before deferred steps run
+        self.time_fn = time_fn
+
+        self.steps: Dict[str, BootStep] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.first_interaction_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._deferred_thread: Optional[threading.Thread] = None
+
+    def add(
+        self,
+        name: str,
+        init: Callable[[], Any],
+        depends: Tuple[str, ...] = (),
+        enabled: Union[bool, Callable[[], bool]] = True,
+        check: Optional[Callable[[], bool]] = None,
+        deferred: bool = False,
+        interactive: bool = False,
+        background: bool = False,
+    ) -> BootStep:
+        if name in self.steps:
+            raise ValueError(f"Duplicate boot step: {name}")
+        step = BootStep(name, init, tuple(depends), enabled, check, deferred, interactive, background)
+        if deferred:
+            step.status = DEFERRED
+        self.steps[name] = step
+        return step
+
+    # =========================================================================
+    # Boot
+    # =========================================================================
+
+    def run(self):
+        """Run all non-deferred steps; returns once they have all finished."""
+        self._validate()
+        self.started_at = self.time_fn()
+        eager = [s for s in self.steps.values() if not s.deferred]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="boot") as pool:
+            running = {}
+            while True:
+                for step in eager:
+                    if step.status == PENDING and all(self.steps[d].status in FINISHED for d in step.depends):
+                        step.status = RUNNING
+                        running[pool.submit(self._run_locked, step)] = step
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+
+        self.finished_at = self.time_fn()
+        self._update_first_interaction()
+        logger.info(f"Boot finished in {(self.finished_at - self.started_at) * 1000:.0f}ms "
+                    f"({sum(s.status == READY for s in eager)}/{len(eager)} services ready)")
+
+        if any(s.deferred for s in self.steps.values()):
+            self._deferred_thread = threading.Thread(target=self._run_deferred, name="boot-deferred", daemon=True)
+            self._deferred_thread.start()
+
+    def _validate(self):
+        """Unknown dependencies, eager-on-deferred dependencies and cycles are programming errors."""
+        for step in self.steps.values():
+            for dep in step.depends:
+                if dep not in self.steps:
+                    raise ValueError(f"Boot step {step.name} depends on unknown step {dep}")
+                if self.steps[dep].deferred and not step.deferred:
+                    raise ValueError(f"Boot step {step.name} can't depend on deferred step {dep}")
+                if self.steps[dep].background:
+                    raise ValueError(f"Boot step {step.name} can't depend on background step {dep}")
+
+        visiting, done = set(), set()
+
+        def visit(name, path):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Boot dependency cycle: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dep in self.steps[name].depends:
+                visit(dep, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.steps:
+            visit(name, [])
+
+    def _run_locked(self, step: BootStep):
+        with step.lock:
+            self._run_step(step)
+
+    def _run_step(self, step: BootStep):
+        enabled = step.enabled() if callable(step.enabled) else step.enabled
+        step.started_at = self.time_fn()
+        if not enabled:
+            step.status = SKIPPED
+            step.finished_at = step.started_at
+            logger.info(f"{step.name} disabled in config")
+        else:
+            try:
+                step.init()
+                if step.background:
+                    return  # Still running until the service calls finish()
+                step.status = READY if step.check is None or step.check() else UNAVAILABLE
+            except Exception as e:
+                step.status = FAILED
+                step.error = str(e)
+                logger.warning(f"Boot step {step.name} failed: {e}")
+            step.finished_at = self.time_fn()
+            logger.debug(f"Boot step {step.name}: {step.status} in {step.duration_ms:.0f}ms")
+        if step.interactive:
+            self._update_first_interaction()
+
+    def finish(self, name: str, ready: bool, error: Optional[str] = None):
+        """
+        Report the outcome of a background step (from any thread).
+
+        Only the first report counts; a service that stops after it was
+        ready doesn't rewrite its boot status.
+        """
+        step = self.steps[name]
+        if not step.background or step.status != RUNNING:
+            return
+        step.status = READY if ready else (FAILED if error else UNAVAILABLE)
+        step.error = error
+        step.finished_at = self.time_fn()
+        logger.info(f"Boot step {name}: {step.status} after {step.duration_ms:.0f}ms")
+        if step.interactive:
+            self._update_first_interaction()
+
+    def _update_first_interaction(self):
+        with self._lock:
+            if self.first_interaction_at is not None:
+                return
+            interactive = [s for s in self.steps.values() if s.interactive]
+            if interactive and all(s.status in FINISHED for s in interactive):
+                self.first_interaction_at = max(s.finished_at for s in interactive)
+                logger.info(f"Ready for interaction after {(self.first_interaction_at - self.started_at) * 1000:.0f}ms")
+
+    # =========================================================================
+    # Deferred steps
+    # =========================================================================
+
+    def ensure(self, name: str) -> bool:
+        """
+        Make sure a step has run (first use of a deferred service).
+
+        Runs it now, on the caller's thread, if it hasn't yet; waits if it
+        is running elsewhere. Returns True if the service is ready.
+        """
+        step = self.steps[name]
+        for dep in step.depends:
+            self.ensure(dep)
+        with step.lock:
+            if step.status in (DEFERRED, PENDING):
+                step.status = RUNNING
+                self._run_step(step)
+        return step.status == READY
+
+    def _run_deferred(self):
+        if self._stop.wait(self.idle_delay):
+            return
+        for step in self.steps.values():
+            if self._stop.is_set():
+                return
+            if step.deferred:
+                self.ensure(step.name)
+
+    def stop(self):
+        """Stop running deferred steps (shutdown before they were reached)."""
+        self._stop.set()
+
+    # =========================================================================
+    # Status
+    # =========================================================================
+
+    def is_ready(self, name: str) -> bool:
+        step = self.steps.get(name)
+        return step is not None and step.status == READY
+
+    def get_status(self) -> Dict[str, Any]:
+        def ms(t):
+            return round((t - self.started_at) * 1000, 1) if t is not None and self.started_at is not None else None
+
+        return {
+            "booting": self.started_at is not None and self.finished_at is None,
+            "boot_ms": ms(self.finished_at),
+            "time_to_first_interaction_ms": ms(self.first_interaction_at),
+            "pending_deferred": [s.name for s in self.steps.values() if s.status == DEFERRED],
+            "services": {name: step.to_dict(self.started_at) for name, step in self.steps.items()},
+        }
+
+    def critical_path(self) -> List[str]:
+        """Chain of steps that determined the boot time (for tuning)."""
+        finished = [s for s in self.steps.values() if not s.deferred and s.finished_at is not None]
+        if not finished:
+            return []
+        step = max(finished, key=lambda s: s.finished_at)
+        path = [step.name]
+        while step.depends:
+            step = max((self.steps[d] for d in step.depends), key=lambda s: s.finished_at or 0)
+            path.append(step.name)
+        return list(reversed(path))
@@ -13,7 +13,6 @@ Sysfs paths:
 
 import asyncio
 import logging
-import subprocess
 from pathlib import Path
 from typing import Optional, Dict, Any
 from enum import IntEnum
@@ -164,33 +163,15 @@ class FanService:
         return self.set_mode(FanMode.AUTO)
 
     def get_temperature(self) -> Optional[float]:
-        """Get CPU temperature in Celsius."""
-        try:
-            result = subprocess.run(
-                ["vcgencmd", "measure_temp"],
-                capture_output=True,
-                text=True,
-                timeout=2
-            )
-            if result.returncode == 0:
-                # Parse "temp=49.9'C"
-                temp_str = result.stdout.strip()
-                if "=" in temp_str:
-                    temp_val = temp_str.split("=")[1].replace("'C", "")
-                    return float(temp_val)
-        except Exception as e:
-            logger.error(f"Error reading temperature: {e}")
-
-        # Fallback: read from thermal zone
-        try:
-            temp_path = Path("/sys/class/thermal/thermal_zone0/temp")
-            if temp_path.exists():
-                temp_milli = int(temp_path.read_text().strip())
-                return temp_milli / 1000.0
-        except Exception as e:
-            logger.error(f"Error reading thermal zone: {e}")
-
-        return None
+        """Get CPU temperature in Celsius (sampled by the system status collector)."""
+        from lelamp.service.system_status import get_status_collector
+
+        collector = get_status_collector()
+        sample = collector.get("temperature")
+        if sample is None:
+            collector.sample("temperature")  # First read before the collector's first round
+            sample = collector.get("temperature")
+        return sample.value if sample else None
 
     def get_status(self) -> Dict[str, Any]:
         """Get complete fan status."""
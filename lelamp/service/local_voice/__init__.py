@@ -8,5 +8,6 @@ from .audio_io import LocalAudioIO
 from .stt_service import LocalSTTService
 from .llm_service import LocalLLMService
 from .tts_service import LocalTTSService
+from .orchestrator import VoiceOrchestrator
 
-__all__ = ["LocalAudioIO", "LocalSTTService", "LocalLLMService", "LocalTTSService"]
+__all__ = ["LocalAudioIO", "LocalSTTService", "LocalLLMService", "LocalTTSService", "VoiceOrchestrator"]
@@ -278,6 +278,16 @@ class LocalAudioIO:
         """Signal end of current playback sequence."""
         self.output_queue.put("__END__")
 
+    def stop_playback(self):
+        """Drop all queued and buffered output (barge-in); silent from the next block."""
+        with self._playback_lock:
+            while not self.output_queue.empty():
+                try:
+                    self.output_queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._playback_buffer = np.zeros(0, dtype=np.float32)
+
     def on_playback_complete(self, callback: Callable):
         """Register callback for when playback completes."""
         self._on_playback_complete = callback
@@ -0,0 +1,207 @@
+"""
+Token-budgeted conversation context for the local LLM.
+
+Prompt processing on the Pi grows with every token sent, so the history
+sent to Ollama is kept within a fixed token budget instead of a message
+count:
+
+- Every message is counted once when it is added (character estimate)
+- The budget is num_ctx minus the reply reserve, the fixed prefix
+  (system prompt + tool schemas) and room for the summary
+- When history goes over budget, the oldest whole turns are folded into a
+  rolling summary until history is back under a low watermark, so
+  folding happens every few turns rather than on every turn
+
+The system prompt and tool block are never modified, and the summary goes
+in its own message after them, so the prompt prefix stays byte-identical
+and Ollama can keep reusing its cached evaluation of it.
+"""
+
+import json
+import logging
+import math
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+MESSAGE_OVERHEAD_TOKENS = 4  # Role markers / separators per message
+
+
+class ConversationContext:
+    """Chat history kept within a token budget, with a rolling summary."""
+
+    def __init__(
+        self,
+        context_length: int = 2048,
+        reserve_tokens: int = 384,
+        summary_tokens: int = 160,
+        low_watermark: float = 0.6,
+        max_messages: int = 0,
+        chars_per_token: float = 3.5,
+    ):
+        self.context_length = context_length  # Ollama num_ctx
+        self.reserve_tokens = reserve_tokens  # Left free for the reply
+        self.summary_tokens = summary_tokens  # Maximum summary length
+        self.low_watermark = low_watermark  # Fold down to this fraction of the budget
+        self.max_messages = max_messages  # Optional cap on retained messages (0 = none)
+        self.chars_per_token = chars_per_token  # Conservative for English with llama tokenizers
+
+        self.messages: List[Dict[str, Any]] = []
+        self._tokens: List[int] = []  # Parallel to messages
+        self.summary = ""
+        self.prefix_tokens = 0
+        self.folds = 0
+        self.folded_messages = 0
+
+    # =========================================================================
+    # Counting
+    # =========================================================================
+
+    def count_tokens(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token) if text else 0
+
+    def message_tokens(self, message: Dict[str, Any]) -> int:
+        tokens = self.count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+        if message.get("tool_calls"):
+            tokens += self.count_tokens(json.dumps(message["tool_calls"]))
+        return tokens
+
+    def set_prefix(self, system_prompt: str, tools: Optional[List[Dict[str, Any]]] = None):
+        """Account for the fixed system prompt and tool schemas."""
+        self.prefix_tokens = self.count_tokens(system_prompt) + MESSAGE_OVERHEAD_TOKENS
+        if tools:
+            self.prefix_tokens += self.count_tokens(json.dumps(tools))
+
+    @property
+    def history_budget(self) -> int:
+        budget = self.context_length - self.reserve_tokens - self.prefix_tokens - self.summary_tokens
+        return max(budget, 128)
+
+    @property
+    def history_tokens(self) -> int:
+        return sum(self._tokens)
+
+    # =========================================================================
+    # History
+    # =========================================================================
+
+    def append(self, message: Dict[str, Any]):
+        self.messages.append(message)
+        self._tokens.append(self.message_tokens(message))
+
+    def clear(self):
+        self.messages = []
+        self._tokens = []
+        self.summary = ""
+
+    def build(self, system_prompt: str) -> List[Dict[str, Any]]:
+        """Messages to send: system prompt, summary (if any), retained history."""
+        messages = [{"role": "system", "content": system_prompt}]
+        if self.summary:
+            messages.append({"role": "system", "content": SUMMARY_PREFIX + self.summary})
+        messages.extend(self.messages)
+        return messages
+
+    def needs_folding(self) -> bool:
+        if self.max_messages and len(self.messages) > self.max_messages:
+            return True
+        return self.history_tokens > self.history_budget
+
+    def fold_candidates(self) -> List[Dict[str, Any]]:
+        """
+        Oldest whole turns to fold so history drops under the low watermark.
+
+        A turn starts at a user message, so the history sent never begins
+        with a dangling assistant or tool message.
+        """
+        target_tokens = int(self.history_budget * self.low_watermark)
+        target_messages = int(self.max_messages * self.low_watermark) if self.max_messages else 0
+        starts = [i for i, m in enumerate(self.messages) if m.get("role") == "user"]
+
+        cut = 0
+        for start in (s for s in starts if s > 0):  # The latest turn is always kept
+            cut = start
+            remaining_tokens = sum(self._tokens[cut:])
+            remaining_messages = len(self.messages) - cut
+            if remaining_tokens <= target_tokens and (not target_messages or remaining_messages <= target_messages):
+                break
+        return self.messages[:cut]
+
+    async def fold(self, summarize: Callable[[str, List[Dict[str, Any]]], Awaitable[str]]) -> bool:
+        """
+        Fold the oldest turns into the rolling summary.
+
+        `summarize(previous_summary, messages)` returns the new summary; the
+        turns stay in the history until it has, so nothing is lost while
+        summarizing and a failed summary falls back to an extractive one.
+        """
+        folded = self.fold_candidates()
+        if not folded:
+            return False
+
+        try:
+            summary = (await summarize(self.summary, folded)).strip()
+        except Exception as e:
+            logger.warning(f"Summarization failed, using extractive summary: {e}")
+            summary = ""
+        if not summary:
+            summary = self.extractive_summary(self.summary, folded)
+
+        # Only the head is removed; new messages may have been appended meanwhile
+        count = len(folded)
+        if self.messages[:count] != folded:
+            return False
+        self.messages = self.messages[count:]
+        self._tokens = self._tokens[count:]
+        self.summary = self._truncate(summary, self.summary_tokens)
+        self.folds += 1
+        self.folded_messages += count
+        logger.info(f"Folded {count} messages into summary ({self.count_tokens(self.summary)} tokens), "
+                    f"history now {self.history_tokens}/{self.history_budget} tokens")
+        return True
+
+    def extractive_summary(self, previous: str, messages: List[Dict[str, Any]]) -> str:
+        """Fallback summary: the gist of each folded message, newest kept."""
+        lines = [previous] if previous else []
+        for message in messages:
+            content = " ".join(message.get("content", "").split())
+            if not content:
+                continue
+            speaker = {"user": "User", "assistant": "Lamp", "tool": f"Tool {message.get('name', '')}".strip()}.get(
+                message.get("role"), message.get("role", ""))
+            lines.append(f"{speaker}: {content[:120]}")
+        # Keep the most recent lines when over the limit
+        limit = int(self.summary_tokens * self.chars_per_token)
+        while len(lines) > 1 and len("\n".join(lines)) > limit:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def _truncate(self, text: str, tokens: int) -> str:
+        limit = int(tokens * self.chars_per_token)
+        return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "messages": len(self.messages),
+            "history_tokens": self.history_tokens,
+            "history_budget": self.history_budget,
+            "prefix_tokens": self.prefix_tokens,
+            "summary_tokens": self.count_tokens(self.summary),
+            "folds": self.folds,
+            "folded_messages": self.folded_messages,
+        }
+
+
+def format_for_summary(messages: List[Dict[str, Any]]) -> str:
+    """Transcript of messages for the summarization prompt."""
+    lines = []
+    for message in messages:
+        role = message.get("role", "")
+        if role == "tool":
+            role = f"tool {message.get('name', '')}".strip()
+        content = " ".join(message.get("content", "").split())
+        if content:
+            lines.append(f"{role}: {content}")
+    return "\n".join(lines)
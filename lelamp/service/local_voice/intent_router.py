@@ -0,0 +1,452 @@
+"""
+Fast-path intent router for the local voice pipeline.
+
+Short commands ("turn the light blue", "set a timer for five minutes",
+"be quiet") don't need the LLM: a round trip through Ollama with the tool
+schemas costs seconds on the Pi, while the tool itself takes milliseconds.
+The router runs on the STT transcript before the LLM call:
+
+- The transcript is normalised (fillers like "hey lamp", "please" and
+  "can you" are dropped) and slot values (colors, numbers, durations,
+  recording names) are tagged
+- A compiled grammar must match the whole utterance, so anything with
+  extra content ("...and tell me a joke") goes to the LLM
+- A tiny naive Bayes classifier over the slot-tagged words, trained on
+  seed phrases plus a "chat" class, scores the matched intent against
+  conversation; only matches above min_confidence are routed
+
+A routed intent calls the same registered tool handler the LLM would have
+called. Hit rate and the estimated latency saved (measured LLM tool turn
+time minus fast-path time) are kept in get_stats().
+"""
+
+import asyncio
+import logging
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+COLORS = {
+    "red": (255, 0, 0),
+    "orange": (255, 100, 0),
+    "yellow": (255, 200, 0),
+    "green": (0, 255, 0),
+    "cyan": (0, 255, 255),
+    "teal": (0, 160, 140),
+    "blue": (0, 0, 255),
+    "purple": (140, 0, 255),
+    "violet": (140, 0, 255),
+    "magenta": (255, 0, 255),
+    "pink": (255, 80, 160),
+    "white": (255, 255, 255),
+    "warm white": (255, 180, 120),
+    "cool white": (200, 220, 255),
+}
+
+NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16,
+    "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20,
+    "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70,
+    "eighty": 80, "ninety": 90, "a": 1, "an": 1,
+}
+
+UNIT_SECONDS = {"second": 1, "sec": 1, "minute": 60, "min": 60, "hour": 3600}
+
+# Dropped before matching; they carry no intent
+FILLERS = re.compile(
+    r"^(?:(?:hey|hi|ok|okay|yo) (?:lamp|lelamp|halo|halox)\b,? ?)?"
+    r"(?:(?:can|could|would|will) you (?:please )?|please |i want you to |go ahead and )?"
+    r"|(?: (?:please|thanks|thank you|now|for me))+$"
+)
+
+# Seed phrases for the classifier, after slot tagging
+SEED_PHRASES = {
+    "set_color": [
+        "turn the light <color>", "make the light <color>", "set the light to <color>",
+        "change the color to <color>", "make it <color>", "turn the lights <color>",
+        "<color> light", "change your color to <color>", "go <color>", "turn <color>",
+    ],
+    "lights_off": [
+        "turn off the light", "turn the lights off", "lights off", "turn off your light",
+        "switch off the lights", "lights out",
+    ],
+    "set_timer": [
+        "set a timer for <duration>", "timer for <duration>", "<duration> timer",
+        "start a timer for <duration>", "set a <duration> timer",
+        "set a timer for <duration> for <label>", "remind me in <duration>",
+    ],
+    "set_volume": [
+        "set the volume to <num>", "volume <num>", "volume to <num> percent",
+        "turn the volume to <num>", "change the volume to <num> percent",
+        "mute", "mute yourself", "max volume", "full volume",
+    ],
+    "quiet": [
+        "be quiet", "shut up", "stop talking", "quiet", "hush", "silence", "that is enough",
+        "never mind", "stop",
+    ],
+    "play_recording": [
+        "do a <recording>", "play <recording>", "do the <recording> animation",
+        "show me <recording>", "nod", "look up", "look left", "look right", "do your <recording>",
+    ],
+    "start_dancing": ["dance", "start dancing", "dance for me", "let's dance", "show me your moves"],
+    "stop_dancing": ["stop dancing", "stop the dance", "enough dancing", "stop moving"],
+    "go_to_sleep": ["go to sleep", "goodnight", "good night", "time to sleep", "sleep"],
+    # Everything the LLM should handle; keeps conversational phrasing away from the fast path
+    "chat": [
+        "what is the weather like", "tell me a joke", "how are you", "what color is the light",
+        "what time is it", "why is the sky blue", "can you help me with something",
+        "what do you think about <color>", "how long is the timer", "who are you",
+        "do you like music", "what can you do", "i feel sad today", "turn the light on when i come home",
+        "remind me to call mom tomorrow", "play some music", "what is my volume",
+        "set an alarm for seven", "is it going to rain", "let me think about it",
+        "how much time is left on my timer", "tell me about the <color> planet",
+        "what is your favorite color", "do you know any songs", "talk to me",
+    ],
+}
+
+@dataclass
+class IntentMatch:
+    """A routed utterance: the tool to call and what to say."""
+
+    intent: str
+    tool: Optional[str]  # None: handled without a tool (e.g. "be quiet")
+    args: Dict[str, Any] = field(default_factory=dict)
+    confidence: float = 0.0
+    reply: str = ""
+
+
+class NaiveBayesClassifier:
+    """Multinomial naive Bayes over word unigrams and bigrams."""
+
+    def __init__(self, phrases: Dict[str, List[str]], alpha: float = 0.5):
+        self.alpha = alpha
+        self.word_counts: Dict[str, Counter] = {}
+        self.totals: Dict[str, int] = {}
+        self.vocabulary = set()
+        for label, examples in phrases.items():
+            counts = Counter()
+            for example in examples:
+                counts.update(self.features(example))
+            self.word_counts[label] = counts
+            self.totals[label] = sum(counts.values())
+            self.vocabulary.update(counts)
+        self.labels = list(phrases)
+
+    @staticmethod
+    def features(text: str) -> List[str]:
+        words = text.split()
+        return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+    def predict(self, text: str) -> Dict[str, float]:
+        """Posterior probability per label (uniform prior)."""
+        features = [f for f in self.features(text) if f in self.vocabulary]
+        vocab_size = len(self.vocabulary)
+        scores = {}
+        for label in self.labels:
+            counts, total = self.word_counts[label], self.totals[label]
+            scores[label] = sum(
+                math.log((counts[f] + self.alpha) / (total + self.alpha * vocab_size)) for f in features
+            )
+        peak = max(scores.values())
+        exp = {label: math.exp(score - peak) for label, score in scores.items()}
+        norm = sum(exp.values())
+        return {label: value / norm for label, value in exp.items()}
+
+
+def parse_number(text: str) -> Optional[float]:
+    """'5', '2.5', 'five', 'twenty five', 'a hundred' -> number."""
+    text = text.strip().replace("-", " ")
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    total = 0
+    words = text.split()
+    if not words:
+        return None
+    for word in words:
+        if word == "hundred":
+            total = max(total, 1) * 100
+        elif word in NUMBER_WORDS:
+            total += NUMBER_WORDS[word]
+        elif word != "and":
+            return None
+    return float(total)
+
+
+def format_duration(seconds: float) -> str:
+    parts = []
+    for name, size in (("hour", 3600), ("minute", 60), ("second", 1)):
+        count = int(seconds // size)
+        if count:
+            parts.append(f"{count} {name}{'s' if count != 1 else ''}")
+            seconds -= count * size
+    return " and ".join(parts) if parts else "0 seconds"
+
+
+class IntentRouter:
+    """Routes high-confidence commands straight to tool handlers."""
+
+    NUMBER = r"(?:\d+(?:\.\d+)?|(?:(?:a|an|zero|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|" \
+             r"thirteen|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty|thirty|forty|fifty|sixty|" \
+             r"seventy|eighty|ninety|hundred|and)(?:[ -]|(?=\b)))+)"
+    UNIT = r"(?:seconds?|secs?|minutes?|mins?|hours?)"
+
+    def __init__(
+        self,
+        min_confidence: float = 0.75,
+        recordings: Optional[Iterable[str]] = None,
+        default_llm_ms: float = 2500.0,
+    ):
+        self.min_confidence = min_confidence
+        self.default_llm_ms = default_llm_ms  # Until an LLM tool turn has been measured
+        self.classifier = NaiveBayesClassifier(SEED_PHRASES)
+        self._recordings: Dict[str, str] = {}
+        self._recording_pattern = None
+        self.set_recordings(recordings or [])
+
+        color = "|".join(sorted((re.escape(c) for c in COLORS), key=len, reverse=True))
+        number = self.NUMBER
+        duration = rf"(?P<duration>(?:{number}\s*{self.UNIT}(?:\s*(?:and|,)\s*)?)+(?:\s*and a half)?|half an hour)"
+        light = r"(?:the |your )?(?:lights?|lamp|color|colour|leds?)"
+
+        self.grammar: List[Tuple[str, re.Pattern]] = [
+            ("lights_off", re.compile(rf"(?:turn|switch) (?:off|out) {light}|(?:turn|switch) {light} (?:off|out)|"
+                                      rf"lights? (?:off|out)")),
+            ("set_color", re.compile(rf"(?:(?:turn|make|set|change|switch) (?:{light}|it|yourself)(?: to| into)? |"
+                                     rf"(?:change|set|switch) (?:to )?|go |turn )(?P<color>{color})|"
+                                     rf"(?P<color2>{color}) (?:lights?|color|colour)")),
+            ("set_timer", re.compile(rf"(?:(?:set|start|make) (?:a |an |me a )?)?timer (?:for |of )?{duration}"
+                                     rf"(?: (?:for|called|named) (?:the |my )?(?P<label>[a-z ]{{1,30}}))?|"
+                                     rf"(?:(?:set|start) (?:a |an )?)?{duration.replace('duration', 'duration2')}"
+                                     rf" timer(?: for (?:the |my )?(?P<label2>[a-z ]{{1,30}}))?|"
+                                     rf"remind me in {duration.replace('duration', 'duration3')}")),
+            ("set_volume", re.compile(rf"(?:(?:set|turn|change|put) (?:the |your )?)?volume (?:to |at )?"
+                                      rf"(?P<volume>{number})(?: ?(?:percent|%))?|"
+                                      rf"(?P<mute>mute)(?: yourself| the (?:volume|sound))?|"
+                                      rf"(?P<max>max|maximum|full) volume")),
+            ("stop_dancing", re.compile(r"stop (?:dancing|the dance|moving)|enough dancing")),
+            ("quiet", re.compile(r"be quiet|shut up|stop talking|(?:be )?(?:quiet|hush|silence)|"
+                                 r"that'?s enough|that is enough|never mind|stop")),
+            ("start_dancing", re.compile(r"(?:start |let'?s )?danc(?:e|ing)(?: for me)?|show me your moves")),
+            ("go_to_sleep", re.compile(r"go to sleep|good ?night|time to sleep|sleep")),
+        ]
+
+        # Stats
+        self.routed = 0
+        self.fallbacks = 0
+        self.rejected = 0  # Grammar matched but classifier disagreed
+        self.fast_path_ms_total = 0.0
+        self.saved_ms_total = 0.0
+        self.llm_turn_ms: Optional[float] = None  # EMA of measured LLM tool turns
+        self.by_intent: Counter = Counter()
+
+    # =========================================================================
+    # Configuration
+    # =========================================================================
+
+    def set_recordings(self, recordings: Iterable[str]):
+        """Recording names the router may play; 'happy_wiggle' is matched as 'happy wiggle'."""
+        self._recordings = {self._spoken_name(name): name for name in recordings}
+        if self._recordings:
+            names = "|".join(sorted((re.escape(n) for n in self._recordings), key=len, reverse=True))
+            self._recording_pattern = re.compile(
+                rf"(?:(?:do|play|show me) (?:a |an |the |your |some )?(?P<recording>{names})"
+                rf"(?: animation| move| dance)?|(?P<bare>nod|look (?:up|left|right)))"
+            )
+        else:
+            self._recording_pattern = None
+
+    @staticmethod
+    def _spoken_name(name: str) -> str:
+        return re.sub(r"[_\-]+", " ", name).lower().strip()
+
+    # =========================================================================
+    # Routing
+    # =========================================================================
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        text = text.lower().strip()
+        text = re.sub(r"[^\w\s%'.-]", " ", text)
+        text = re.sub(r"(?<!\d)\.|\.(?!\d)", " ", text)  # Keep decimal points only
+        text = re.sub(r"\s+", " ", text).strip()
+        previous = None
+        while previous != text:
+            previous = text
+            text = FILLERS.sub("", text).strip()
+        return text
+
+    def route(self, text: str, available: Optional[Iterable[str]] = None) -> Optional[IntentMatch]:
+        """
+        Match an utterance to a tool call.
+
+        Args:
+            text: STT transcript
+            available: Registered tool names; intents whose tool isn't
+                registered fall back to the LLM
+
+        Returns:
+            IntentMatch, or None to send the utterance to the LLM
+        """
+        match = self.match(text)
+        if match is not None and match.tool is not None and available is not None and match.tool not in available:
+            match = None
+        if match is None:
+            self.fallbacks += 1
+        return match
+
+    def match(self, text: str) -> Optional[IntentMatch]:
+        normalized = self.normalize(text)
+        if not normalized or len(normalized.split()) > 12:
+            return None
+
+        parsed = self._parse(normalized)
+        if parsed is None:
+            return None
+        intent, slots, tagged = parsed
+
+        # The grammar picks the intent; the classifier decides command vs. conversation
+        posterior = self.classifier.predict(tagged)
+        confidence = posterior[intent] / (posterior[intent] + posterior["chat"])
+        if confidence < self.min_confidence:
+            self.rejected += 1
+            logger.debug(f"Intent '{intent}' rejected ({confidence:.2f}): {normalized!r}")
+            return None
+
+        match = self._build(intent, slots)
+        if match is not None:
+            match.confidence = confidence
+        return match
+
+    def _parse(self, text: str) -> Optional[Tuple[str, Dict[str, str], str]]:
+        """First grammar rule matching the whole utterance, with its slots and tagged text."""
+        rules = list(self.grammar)
+        if self._recording_pattern is not None:
+            rules.insert(len(rules) - 3, ("play_recording", self._recording_pattern))
+        for intent, pattern in rules:
+            found = pattern.fullmatch(text)
+            if not found:
+                continue
+            slots = {k.rstrip("0123456789"): v.strip() for k, v in found.groupdict().items() if v}
+            tagged = text
+            for name, value in sorted(found.groupdict().items(), key=lambda kv: -len(kv[1] or "")):
+                slot = name.rstrip("0123456789")
+                if value and slot in ("color", "duration", "volume", "recording", "label"):
+                    tag = "<num>" if slot == "volume" else f"<{slot}>"
+                    tagged = tagged.replace(value.strip(), tag, 1)
+            return intent, slots, tagged
+        return None
+
+    def _build(self, intent: str, slots: Dict[str, str]) -> Optional[IntentMatch]:
+        if intent == "set_color":
+            name = slots["color"]
+            red, green, blue = COLORS[name]
+            return IntentMatch(intent, "set_rgb_solid", {"red": red, "green": green, "blue": blue},
+                               reply=f"Okay, {name}.")
+        if intent == "lights_off":
+            return IntentMatch(intent, "set_rgb_solid", {"red": 0, "green": 0, "blue": 0}, reply="Lights off.")
+        if intent == "set_timer":
+            seconds = self.parse_duration(slots["duration"])
+            if not seconds:
+                return None
+            args = {"duration_seconds": int(seconds) if float(seconds).is_integer() else seconds}
+            if slots.get("label"):
+                args["label"] = slots["label"]
+            return IntentMatch(intent, "set_timer", args, reply=f"Timer set for {format_duration(seconds)}.")
+        if intent == "set_volume":
+            if slots.get("mute"):
+                volume = 0
+            elif slots.get("max"):
+                volume = 100
+            else:
+                volume = parse_number(slots.get("volume", ""))
+                if volume is None or not 0 <= volume <= 100:
+                    return None
+                volume = int(volume)
+            reply = "Muted." if volume == 0 else f"Volume {volume} percent."
+            return IntentMatch(intent, "set_volume", {"volume_percent": volume}, reply=reply)
+        if intent == "play_recording":
+            spoken = slots.get("recording") or slots.get("bare")
+            recording = self._recordings.get(spoken)
+            if recording is None:
+                return None
+            return IntentMatch(intent, "play_recording", {"recording_name": recording})
+        if intent == "quiet":
+            return IntentMatch(intent, None)
+        if intent in ("start_dancing", "stop_dancing", "go_to_sleep"):
+            return IntentMatch(intent, intent)
+        return None
+
+    def parse_duration(self, text: str) -> Optional[float]:
+        """'five minutes', '1 hour and 30 minutes', 'an hour and a half' -> seconds."""
+        if text == "half an hour":
+            return 1800.0
+        half = text.endswith("and a half")
+        if half:
+            text = text[: -len("and a half")].strip()
+        total = 0.0
+        last_unit = 0
+        for value, unit in re.findall(rf"({self.NUMBER})\s*({self.UNIT})", text):
+            number = parse_number(re.sub(r"\band$", "", value.strip()).strip())
+            if number is None:
+                return None
+            last_unit = UNIT_SECONDS[unit.rstrip("s")]
+            total += number * last_unit
+        if half:
+            total += last_unit / 2
+        return total or None
+
+    # =========================================================================
+    # Stats
+    # =========================================================================
+
+    def record_fast_path(self, match: IntentMatch, elapsed_ms: float):
+        """A routed command finished in elapsed_ms (tool call included)."""
+        self.routed += 1
+        self.by_intent[match.intent] += 1
+        self.fast_path_ms_total += elapsed_ms
+        baseline = self.llm_turn_ms if self.llm_turn_ms is not None else self.default_llm_ms
+        self.saved_ms_total += max(0.0, baseline - elapsed_ms)
+
+    def record_llm_turn(self, elapsed_ms: float, alpha: float = 0.3):
+        """An LLM turn that called a tool took elapsed_ms; the baseline for savings."""
+        if self.llm_turn_ms is None:
+            self.llm_turn_ms = elapsed_ms
+        else:
+            self.llm_turn_ms += alpha * (elapsed_ms - self.llm_turn_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.routed + self.fallbacks
+        return {
+            "utterances": total,
+            "routed": self.routed,
+            "fallbacks": self.fallbacks,
+            "rejected": self.rejected,
+            "hit_rate": round(self.routed / total, 3) if total else 0.0,
+            "avg_fast_path_ms": round(self.fast_path_ms_total / self.routed, 1) if self.routed else 0.0,
+            "llm_tool_turn_ms": round(self.llm_turn_ms, 1) if self.llm_turn_ms is not None else None,
+            "saved_ms": round(self.saved_ms_total, 1),
+            "by_intent": dict(self.by_intent),
+        }
+
+
+async def run_intent(match: IntentMatch, handlers: Dict[str, Callable]) -> str:
+    """Call the tool handler for a match; returns the tool result ('' if no tool)."""
+    if match.tool is None:
+        return ""
+    handler = handlers[match.tool]
+    start = time.time()
+    if asyncio.iscoroutinefunction(handler):
+        result = await handler(**match.args)
+    else:
+        result = handler(**match.args)
+    logger.info(f"Fast path: {match.tool}({match.args}) in {(time.time() - start) * 1000:.0f}ms")
+    return str(result)
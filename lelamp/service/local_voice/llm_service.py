@@ -2,6 +2,14 @@
 Local LLM service using Ollama with tool calling support.
 
 Adapted from ~/Faster-Local-Voice-AI-Whisper/server.py with tool calling added.
+
+History is kept within a token budget by ConversationContext; older turns
+are folded into a rolling summary in the background. The system prompt
+and tool schemas are sent identically on every request (including tool
+follow-ups and summarization) so Ollama can reuse the cached prefix.
+
+An optional IntentRouter handles short commands ("turn the light blue")
+by calling the tool handler directly, before any request to Ollama.
 """
 
 import asyncio
@@ -10,6 +18,9 @@ import re
 import logging
 from typing import List, Dict, Any, Optional, AsyncGenerator, Callable
 
+from .conversation_context import ConversationContext, format_for_summary
+from .intent_router import IntentRouter, IntentMatch, run_intent
+
 try:
     import aiohttp
 except ImportError:
@@ -17,6 +28,14 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_INSTRUCTIONS = (
+    "Update the running summary of this conversation. Keep names, facts, "
+    "preferences, open requests and what the lamp did. Reply with the "
+    "summary only, in a few short sentences."
+)
+
+MAX_TOOL_ROUNDS = 3  # Tool call -> follow-up rounds per user turn
+
 
 def clean_response(text: str) -> str:
     """Clean LLM response for TTS."""
@@ -75,7 +94,10 @@ class LocalLLMService:
         ollama_url: str = "http://localhost:11434",
         context_length: int = 2048,
         temperature: float = 0.7,
-        history_length: int = 10,
+        history_length: int = 0,
+        reserve_tokens: int = 384,
+        summary_tokens: int = 160,
+        intent_router: Optional[IntentRouter] = None,
     ):
         if aiohttp is None:
             raise ImportError("aiohttp not installed. Run: pip install aiohttp")
@@ -84,10 +106,18 @@ class LocalLLMService:
         self.ollama_url = ollama_url
         self.context_length = context_length
         self.temperature = temperature
-        self.history_length = history_length
+        self.history_length = history_length  # Optional message cap on top of the token budget
 
-        self.chat_history: List[Dict[str, str]] = []
+        self.context = ConversationContext(
+            context_length=context_length,
+            reserve_tokens=reserve_tokens,
+            summary_tokens=summary_tokens,
+            max_messages=history_length,
+        )
+        self._fold_task: Optional[asyncio.Task] = None
         self.system_prompt = ""
+        self.intent_router = intent_router  # Fast path for simple commands
+        self.last_intent: Optional[IntentMatch] = None
 
         # Tool registry
         self.tools: List[Dict[str, Any]] = []
@@ -96,10 +126,17 @@ class LocalLLMService:
         # Metrics
         self.last_ttft: float = 0  # Time to first token
         self.last_total_time: float = 0
+        self.last_prompt_tokens: int = 0  # Tokens Ollama evaluated (cached prefix excluded)
+        self.last_prompt_eval_ms: float = 0
+
+    @property
+    def chat_history(self) -> List[Dict[str, Any]]:
+        return self.context.messages
 
     def set_system_prompt(self, prompt: str):
         """Set the system prompt."""
         self.system_prompt = prompt
+        self.context.set_prefix(self.system_prompt, self.tools)
 
     def register_tool(
         self,
@@ -128,6 +165,7 @@ class LocalLLMService:
             }
         )
         self.tool_handlers[name] = handler
+        self.context.set_prefix(self.system_prompt, self.tools)
         logger.debug(f"Registered tool: {name}")
 
     def register_tools_from_list(self, tools: List[Dict[str, Any]]):
@@ -169,7 +207,7 @@ class LocalLLMService:
             logger.warning(f"Ollama warm-up failed: {e}")
 
     async def generate_response(
-        self, user_text: str, include_tools: bool = True
+        self, user_text: str, include_tools: bool = True, _tool_round: int = 0
     ) -> AsyncGenerator[str, None]:
         """
         Generate streaming response from Ollama.
@@ -185,15 +223,21 @@ class LocalLLMService:
         """
         import time
 
+        turn_start = time.time()
+        if user_text and _tool_round == 0:
+            self.last_intent = None
+            if include_tools and self.intent_router is not None:
+                match = self.intent_router.route(user_text, self.tool_handlers)
+                if match is not None and await self._run_fast_path(user_text, match, turn_start):
+                    if match.reply:
+                        yield match.reply
+                    return
+
         if user_text:
-            self.chat_history.append({"role": "user", "content": user_text})
+            self.context.append({"role": "user", "content": user_text})
 
-        # Build messages with history limit
-        messages = [{"role": "system", "content": self.system_prompt}]
-        if self.history_length > 0:
-            messages.extend(self.chat_history[-self.history_length :])
-        else:
-            messages.extend(self.chat_history)
+        # System prompt, rolling summary, then the budgeted history
+        messages = self.context.build(self.system_prompt)
 
         payload = {
             "model": self.model,
@@ -231,6 +275,10 @@ class LocalLLMService:
                         except json.JSONDecodeError:
                             continue
 
+                        if chunk.get("done"):
+                            self.last_prompt_tokens = chunk.get("prompt_eval_count", 0)
+                            self.last_prompt_eval_ms = chunk.get("prompt_eval_duration", 0) / 1e6
+
                         # Check for tool calls
                         message = chunk.get("message", {})
                         if "tool_calls" in message:
@@ -253,6 +301,9 @@ class LocalLLMService:
                     self.last_total_time = (time.time() - llm_start) * 1000
 
                     # Handle tool calls
+                    if tool_calls and _tool_round >= MAX_TOOL_ROUNDS:
+                        logger.warning(f"Ignoring tool calls after {MAX_TOOL_ROUNDS} rounds")
+                        tool_calls = []
                     if tool_calls:
                         for tool_call in tool_calls:
                             func_name = tool_call.get("function", {}).get("name")
@@ -271,7 +322,7 @@ class LocalLLMService:
                                         result = handler(**func_args)
 
                                     # Add tool result to history
-                                    self.chat_history.append(
+                                    self.context.append(
                                         {
                                             "role": "tool",
                                             "content": str(result),
@@ -282,16 +333,19 @@ class LocalLLMService:
                                     logger.info(f"Tool result: {str(result)[:100]}")
 
                                     # Generate follow-up response with tool result
+                                    # (same tool block, so the cached prefix still matches)
                                     async for token in self.generate_response(
-                                        "", include_tools=False
+                                        "", include_tools=True, _tool_round=_tool_round + 1
                                     ):
                                         yield token
+                                    if _tool_round == 0 and self.intent_router is not None:
+                                        self.intent_router.record_llm_turn((time.time() - turn_start) * 1000)
                                     return
 
                                 except Exception as e:
                                     logger.error(f"Tool execution error: {e}")
                                     # Add error to history
-                                    self.chat_history.append(
+                                    self.context.append(
                                         {
                                             "role": "tool",
                                             "content": f"Error: {str(e)}",
@@ -303,9 +357,10 @@ class LocalLLMService:
 
                     # Add assistant response to history
                     if full_response:
-                        self.chat_history.append(
+                        self.context.append(
                             {"role": "assistant", "content": full_response}
                         )
+                    self._schedule_fold()
 
         except asyncio.TimeoutError:
             logger.error("Ollama request timed out")
@@ -342,6 +397,105 @@ class LocalLLMService:
                 result = await response.json()
                 return result.get("message", {}).get("content", "")
 
+    async def _run_fast_path(self, user_text: str, match: IntentMatch, turn_start: float) -> bool:
+        """
+        Run a routed command's tool without the LLM.
+
+        The turn is recorded in the history like an LLM tool turn so later
+        questions ("what color are you?") still have the context. Returns
+        False if the tool failed, so the utterance goes to the LLM instead.
+        """
+        import time
+
+        try:
+            result = await run_intent(match, self.tool_handlers)
+        except Exception as e:
+            logger.warning(f"Fast path {match.tool} failed, falling back to LLM: {e}")
+            self.intent_router.fallbacks += 1
+            return False
+        if result.startswith("Error"):
+            match.reply = clean_response(result)
+
+        self.context.append({"role": "user", "content": user_text})
+        if match.tool is not None:
+            self.context.append({"role": "tool", "content": result, "name": match.tool})
+        if match.reply:
+            self.context.append({"role": "assistant", "content": match.reply})
+        self._schedule_fold()
+
+        self.last_intent = match
+        self.last_ttft = self.last_total_time = (time.time() - turn_start) * 1000
+        self.intent_router.record_fast_path(match, self.last_total_time)
+        logger.info(f"Intent '{match.intent}' ({match.confidence:.2f}) handled in {self.last_total_time:.0f}ms")
+        return True
+
+    def record_interrupted_reply(self, spoken_text: str):
+        """
+        Record the part of a reply the user heard before interrupting.
+
+        A cancelled generate_response() never appends its assistant message,
+        so without this the next request would show two user messages in a
+        row and the model would not know what it had already said.
+        """
+        if self.context.messages and self.context.messages[-1].get("role") == "assistant":
+            return  # Reply finished generating; only playback was cut
+        if spoken_text.strip():
+            self.context.append({"role": "assistant", "content": spoken_text.strip() + " —"})
+
+    def _schedule_fold(self):
+        """Fold old turns into the summary in the background once over budget."""
+        if not self.context.needs_folding():
+            return
+        if self._fold_task is not None and not self._fold_task.done():
+            return
+        self._fold_task = asyncio.create_task(self.context.fold(self._summarize))
+
+    async def _summarize(self, previous: str, messages: List[Dict[str, Any]]) -> str:
+        """Ask the model for an updated rolling summary."""
+        request = SUMMARY_INSTRUCTIONS
+        if previous:
+            request += f"\n\nCurrent summary:\n{previous}"
+        request += f"\n\nConversation to add:\n{format_for_summary(messages)}"
+
+        # Same system prompt and tools as chat requests, so this request
+        # reuses (and leaves behind) the cached prefix
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": request},
+            ],
+            "stream": False,
+            "options": {
+                "num_ctx": self.context_length,
+                "temperature": 0.2,
+                "num_predict": self.context.summary_tokens,
+            },
+        }
+        if self.tools:
+            payload["tools"] = self.tools
+
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                f"{self.ollama_url}/api/chat",
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=60),
+            ) as response:
+                result = await response.json()
+                return result.get("message", {}).get("content", "")
+
+    def get_context_stats(self) -> Dict[str, Any]:
+        """Token budget usage and the prompt cost of the last request."""
+        stats = self.context.get_stats()
+        stats["last_prompt_tokens"] = self.last_prompt_tokens
+        stats["last_prompt_eval_ms"] = round(self.last_prompt_eval_ms, 1)
+        stats["last_ttft_ms"] = round(self.last_ttft, 1)
+        return stats
+
+    def get_intent_stats(self) -> Optional[Dict[str, Any]]:
+        """Fast-path hit rate and latency saved, or None without a router."""
+        return self.intent_router.get_stats() if self.intent_router is not None else None
+
     def clear_history(self):
         """Clear chat history."""
-        self.chat_history = []
+        self.context.clear()
@@ -0,0 +1,561 @@
+"""
+Streaming orchestrator for the local Whisper + Ollama + Piper pipeline.
+
+The stages overlap instead of each waiting for the previous one:
+
+- Mic blocks go through an RMS VAD; at every pause a partial transcript
+  is taken in a worker thread while the user may still continue
+- The Endpointer ends the turn after endpointing.min_delay of silence
+  when the partial reads as finished, and waits up to max_delay when it
+  trails off ("turn the light, uh..."); a partial that is still current
+  at end of turn is used as the final transcript
+- The LLM request starts as soon as the turn ends, streamed tokens are
+  cut into sentences as they arrive, and each sentence is synthesized
+  and queued for playback while the model keeps generating
+- Loud speech while the lamp is answering (barge-in) stops playback and
+  cancels the LLM and TTS on the same audio block that detected it
+
+Each turn's stage timestamps are kept in a PipelineMetrics and passed
+to MetricsService.record_turn when a metrics service is given.
+"""
+
+import asyncio
+import itertools
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from lelamp.service.metrics_service import PipelineMetrics, PipelineStage
+from .llm_service import split_sentences
+
+logger = logging.getLogger(__name__)
+
+# Endpointer events
+SPEECH_START = "speech_start"
+PAUSE = "pause"  # Speech stopped; take a partial transcript
+END_OF_TURN = "end_of_turn"
+NOISE = "noise"  # Burst too short to be speech; discard the buffer
+
+# Words a finished sentence rarely ends on
+TRAILING_WORDS = {
+    "and", "or", "but", "so", "because", "if", "then", "than", "the", "a", "an",
+    "to", "of", "for", "with", "in", "on", "at", "my", "your", "is", "are",
+    "um", "uh", "er", "erm", "like", "maybe", "what", "how", "can", "could",
+}
+
+# A sentence end that has been followed by more text, so it is final
+SENTENCE_END = re.compile(r"(?<!\bMr)(?<!\bMs)(?<!\bDr)(?<!\bSt)(?<!\bJr)(?<!\bSr)(?<!\bMrs)(?<!\bProf)[.!?](?=\s)")
+
+MAX_CLAUSE_CHARS = 80  # Flush at a comma once a sentence runs this long
+
+
+def looks_complete(text: str) -> bool:
+    """Whether a partial transcript reads as a finished utterance."""
+    text = text.strip()
+    if not text:
+        return True  # Nothing recognisable; no point waiting for more
+    if text.endswith((",", "-", "—", "...", "…")):
+        return False
+    words = re.findall(r"[a-z']+", text.lower())
+    return not words or words[-1] not in TRAILING_WORDS
+
+
+def take_sentences(buffer: str) -> Tuple[List[str], str]:
+    """
+    Split complete sentences off the front of a streaming token buffer.
+
+    A sentence counts as complete once text follows its end mark, so
+    "3.5" or a reply still being generated are never cut early. Long
+    clauses are flushed at a comma so TTS can start sooner.
+    """
+    sentences, start = [], 0
+    for end in SENTENCE_END.finditer(buffer):
+        sentence = buffer[start:end.end()].strip()
+        if len(sentence) > MAX_CLAUSE_CHARS and ", " in sentence:
+            parts = sentence.split(", ")
+            sentences.extend([part + "," for part in parts[:-1]] + parts[-1:])
+        elif sentence:
+            sentences.append(sentence)
+        start = end.end()
+    if sentences:
+        return sentences, buffer[start:]
+    if len(buffer) > MAX_CLAUSE_CHARS and ", " in buffer:
+        head, rest = buffer.rsplit(", ", 1)
+        return [head.strip() + ","], rest
+    return [], buffer
+
+
+class Endpointer:
+    """
+    Decides when the user's turn has ended, from VAD and partial transcripts.
+
+    update() is called once per audio block and returns one of the event
+    constants (or None). The caller supplies a partial transcript after
+    each PAUSE via set_partial(); until it arrives the turn is held open
+    for max_delay.
+    """
+
+    def __init__(self, min_delay: float = 0.8, max_delay: float = 6.0, min_speech: float = 0.15):
+        self.min_delay = min_delay
+        self.max_delay = max(max_delay, min_delay)
+        self.min_speech = min_speech
+        self.reset()
+
+    def reset(self):
+        self.in_turn = False
+        self.paused = False
+        self.speech_start: Optional[float] = None
+        self.last_speech: Optional[float] = None
+        self.partial: Optional[str] = None
+
+    def set_partial(self, text: str):
+        self.partial = text
+
+    @property
+    def delay(self) -> float:
+        """Silence needed to end the turn given the current partial."""
+        if self.partial is not None and looks_complete(self.partial):
+            return self.min_delay
+        return self.max_delay
+
+    def update(self, is_speech: bool, now: float) -> Optional[str]:
+        if is_speech:
+            if not self.in_turn:
+                self.reset()
+                self.in_turn = True
+                self.speech_start = self.last_speech = now
+                return SPEECH_START
+            self.last_speech = now
+            if self.paused:
+                self.paused = False
+                self.partial = None  # Superseded by the new speech
+            return None
+
+        if not self.in_turn:
+            return None
+        if not self.paused:
+            if self.last_speech - self.speech_start < self.min_speech:
+                self.reset()
+                return NOISE
+            self.paused = True
+            return PAUSE
+        if now - self.last_speech >= self.delay:
+            self.in_turn = False
+            return END_OF_TURN
+        return None
+
+
+class VoiceOrchestrator:
+    """Runs the local voice pipeline with overlapped stages and barge-in."""
+
+    def __init__(
+        self,
+        audio_io,
+        stt,
+        llm,
+        tts,
+        min_delay: float = 0.8,
+        max_delay: float = 6.0,
+        barge_in: bool = True,
+        barge_in_threshold: Optional[float] = None,
+        mute_mic_during_playback: bool = True,
+        metrics_service=None,
+        ducking: Optional[Callable[[bool], None]] = None,
+        time_fn: Callable[[], float] = time.time,
+    ):
+        self.audio_io = audio_io
+        self.stt = stt
+        self.llm = llm
+        self.tts = tts
+        self.metrics_service = metrics_service
+        self.ducking = ducking  # Ducks effects/theme sounds while the lamp speaks
+        self.time_fn = time_fn
+
+        self.silence_threshold = stt.silence_threshold
+        self.barge_in = barge_in
+        # Well above the speech threshold so the lamp's own voice doesn't trigger it
+        self.barge_in_threshold = barge_in_threshold or self.silence_threshold * 4
+        # Muting the mic would make barge-in impossible, so it only applies without it
+        self.mute_mic = mute_mic_during_playback and not barge_in
+
+        self.endpointer = Endpointer(min_delay, max_delay, stt.MIN_SPEECH_DURATION)
+        self._running = False
+        self._shutdown = threading.Event()
+        self._buffer: List[np.ndarray] = []
+        self._samples = 0
+        self._speech_samples = 0  # Buffered samples up to the last speech block
+        self._turn_ids = itertools.count(1)
+        self._turn: Optional[PipelineMetrics] = None
+        self._partial_task: Optional[asyncio.Task] = None
+        self._partial: Optional[Tuple[int, str, float, float]] = None  # (samples, text, start, end)
+        self._response_task: Optional[asyncio.Task] = None
+        self._responding_turn: Optional[PipelineMetrics] = None
+        self._spoken: List[str] = []
+        self._tts_drain: Optional[asyncio.Task] = None
+
+        # Stats
+        self.turns = 0
+        self.barge_ins = 0
+        self.partials = 0
+        self.partials_reused = 0
+        self.last_turn: Optional[PipelineMetrics] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], metrics_service=None) -> "VoiceOrchestrator":
+        """Build the pipeline from pipeline.local and endpointing settings."""
+        from .audio_io import LocalAudioIO
+        from .stt_service import LocalSTTService
+        from .llm_service import LocalLLMService
+        from .tts_service import LocalTTSService
+        from .intent_router import IntentRouter
+
+        local = config.get("pipeline", {}).get("local", {})
+        endpointing = config.get("endpointing", {})
+        router = None
+        if local.get("fast_path", True):
+            router = IntentRouter(min_confidence=local.get("fast_path_confidence", 0.75))
+            try:
+                from lelamp.recording_catalog import get_recording_catalog
+                router.set_recordings(entry.name for entry in get_recording_catalog().list())
+            except Exception as e:
+                logger.warning(f"Fast path has no recordings, play_recording disabled: {e}")
+        ducking = None
+        if local.get("duck_effects", True):
+            try:
+                from lelamp.service.audio.audio_mixer import get_audio_mixer
+                ducking = get_audio_mixer().set_ducking
+            except Exception as e:
+                logger.warning(f"Effects won't duck under speech: {e}")
+
+        return cls(
+            audio_io=LocalAudioIO(),
+            stt=LocalSTTService(
+                model_size=local.get("whisper_model", "tiny"),
+                compute_type=local.get("whisper_compute", "int8"),
+                silence_threshold=local.get("silence_threshold"),
+                silence_duration=local.get("silence_duration"),
+                min_audio_length=local.get("min_audio_length"),
+            ),
+            llm=LocalLLMService(
+                model=local.get("ollama_model", "llama3.2:3b"),
+                ollama_url=local.get("ollama_url", "http://localhost:11434"),
+                context_length=local.get("context_length", 2048),
+                history_length=local.get("history_length", 0),
+                reserve_tokens=local.get("reserve_tokens", 384),
+                summary_tokens=local.get("summary_tokens", 160),
+                intent_router=router,
+            ),
+            tts=LocalTTSService(
+                piper_path=local.get("piper_path"),
+                voices_dir=local.get("voices_dir"),
+                voice=local.get("voice", "ryan-medium.onnx"),
+            ),
+            min_delay=endpointing.get("min_delay", 0.8),
+            max_delay=endpointing.get("max_delay", 6.0),
+            barge_in=local.get("barge_in", True),
+            barge_in_threshold=local.get("barge_in_threshold"),
+            mute_mic_during_playback=local.get("mute_mic_during_playback", True),
+            metrics_service=metrics_service,
+            ducking=ducking,
+        )
+
+    @property
+    def responding(self) -> bool:
+        return self._response_task is not None and not self._response_task.done()
+
+    # =========================================================================
+    # Main loop
+    # =========================================================================
+
+    async def run(self, on_ready: Optional[Callable[[], None]] = None):
+        """Start audio and process mic blocks until stop() is called; on_ready fires once models are warm."""
+        self.audio_io.start()
+        await self.tts.start()
+        await self.llm.warm_up()
+        self._running = True
+        logger.info("Local voice orchestrator running")
+        if on_ready:
+            on_ready()
+        try:
+            while self._running and not self._shutdown.is_set():
+                chunk = await asyncio.to_thread(self.audio_io.get_audio_chunk, 0.1)
+                if chunk is not None:
+                    await self.feed(chunk)
+        finally:
+            await self.stop()
+
+    def start_thread(
+        self,
+        on_ready: Optional[Callable[[], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> threading.Thread:
+        """Run the pipeline on its own event loop (the agent thread for pipeline.type local)."""
+        def target():
+            try:
+                asyncio.run(self.run(on_ready))
+            except Exception as e:
+                logger.error(f"Local voice pipeline stopped: {e}")
+                if on_error:
+                    on_error(e)
+
+        thread = threading.Thread(target=target, name="local-voice", daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        """Stop run() from another thread; it exits within one mic poll."""
+        self._shutdown.set()
+
+    async def stop(self):
+        self._running = False
+        self.interrupt()
+        self.audio_io.stop()
+        await self.tts.stop()
+
+    async def feed(self, chunk: np.ndarray, now: Optional[float] = None):
+        """Process one mic block (float32, 16kHz)."""
+        now = self.time_fn() if now is None else now
+        rms = float(np.sqrt(np.mean(np.square(chunk)))) if len(chunk) else 0.0
+
+        if self.responding:
+            if not (self.barge_in and rms >= self.barge_in_threshold):
+                return  # The lamp's own voice or background noise
+            self.interrupt(now)
+
+        is_speech = rms >= self.silence_threshold
+        if is_speech or self.endpointer.in_turn:
+            self._buffer.append(chunk)
+            self._samples += len(chunk)
+            if is_speech:
+                self._speech_samples = self._samples
+
+        event = self.endpointer.update(is_speech, now)
+        if event == SPEECH_START:
+            self._turn = PipelineMetrics(turn_id=f"local_{next(self._turn_ids)}")
+            self._turn.timestamps[PipelineStage.VAD_START.value] = now
+            if self.metrics_service:
+                self.metrics_service.set_user_speaking(True)
+        elif event == PAUSE:
+            self._start_partial()
+        elif event == NOISE:
+            self._discard_turn()
+        elif event == END_OF_TURN:
+            self._end_turn()
+
+    # =========================================================================
+    # User turn
+    # =========================================================================
+
+    def _audio(self) -> np.ndarray:
+        return np.concatenate(self._buffer) if self._buffer else np.zeros(0, dtype=np.float32)
+
+    def _start_partial(self):
+        """Transcribe what has been said so far while the user pauses."""
+        if self._partial_task is not None and not self._partial_task.done():
+            self._partial_task.cancel()  # Result would be stale; the thread finishes unobserved
+        self._partial = None
+        self._partial_task = asyncio.create_task(self._transcribe_partial(self._audio()))
+
+    async def _transcribe_partial(self, audio: np.ndarray) -> Tuple[int, str, float, float]:
+        start = self.time_fn()
+        text, _ = await asyncio.to_thread(self.stt.transcribe_buffer, audio)
+        partial = (len(audio), text, start, self.time_fn())
+        self.partials += 1
+        if self._partial_task is asyncio.current_task():
+            self._partial = partial
+            if self.endpointer.paused:
+                self.endpointer.set_partial(text)
+        return partial
+
+    def _discard_turn(self):
+        self._buffer = []
+        self._samples = self._speech_samples = 0
+        self._turn = None
+        self._partial = None
+        if self._partial_task is not None:
+            self._partial_task.cancel()
+            self._partial_task = None
+        if self.metrics_service:
+            self.metrics_service.set_user_speaking(False)
+
+    def _end_turn(self):
+        """Start the response as soon as the end of turn is detected."""
+        turn = self._turn or PipelineMetrics(turn_id=f"local_{next(self._turn_ids)}")
+        turn.timestamps[PipelineStage.VAD_END.value] = self.endpointer.last_speech
+        audio, speech_samples = self._audio(), self._speech_samples
+        partial, partial_task = self._partial, self._partial_task
+        self._buffer, self._turn, self._partial, self._partial_task = [], None, None, None
+        self._samples = self._speech_samples = 0
+        self.endpointer.reset()
+        if self.metrics_service:
+            self.metrics_service.set_user_speaking(False)
+
+        self._responding_turn = turn
+        self._response_task = asyncio.create_task(
+            self._respond(turn, audio, speech_samples, partial, partial_task)
+        )
+
+    async def _final_transcript(
+        self, turn: PipelineMetrics, audio: np.ndarray, speech_samples: int, partial, partial_task
+    ) -> str:
+        """The partial transcript if nobody spoke since, else a fresh one."""
+        if partial is None and partial_task is not None and not partial_task.cancelled():
+            try:
+                partial = await partial_task  # Covers the whole utterance; let it finish
+            except Exception as e:
+                logger.warning(f"Partial transcription failed: {e}")
+
+        # Trailing silence after the partial doesn't change what was said
+        if partial is not None and partial[0] >= speech_samples:
+            _, text, start, end = partial
+            self.partials_reused += 1
+        else:
+            start = self.time_fn()
+            text, _ = await asyncio.to_thread(self.stt.transcribe_buffer, audio)
+            end = self.time_fn()
+        turn.timestamps[PipelineStage.STT_START.value] = start
+        turn.timestamps[PipelineStage.STT_END.value] = end
+        return text
+
+    # =========================================================================
+    # Response
+    # =========================================================================
+
+    async def _respond(self, turn: PipelineMetrics, audio: np.ndarray, speech_samples: int, partial, partial_task):
+        self._spoken = []
+        producer = None
+        try:
+            text = await self._final_transcript(turn, audio, speech_samples, partial, partial_task)
+            if self.stt.is_garbage(text):
+                logger.debug(f"Filtered garbage transcription: {text[:50]}")
+                return
+            logger.info(f"Transcribed: {text}")
+            turn.user_text = text
+            if self.metrics_service:
+                self.metrics_service.set_agent_state("thinking")
+
+            sentences: asyncio.Queue = asyncio.Queue()
+            producer = asyncio.create_task(self._generate(turn, text, sentences))
+            await self._speak(turn, sentences)
+            await producer
+
+            if self._spoken:
+                await self.audio_io.wait_for_playback()
+                turn.timestamps[PipelineStage.AUDIO_PLAY_END.value] = self.time_fn()
+            self._finish_turn(turn)
+        finally:
+            if producer is not None and not producer.done():
+                producer.cancel()
+            if self.mute_mic:
+                self.audio_io.clear_input_queue()
+                self.audio_io.mute_mic(False)
+            if self.ducking:
+                self.ducking(False)
+            if self.metrics_service:
+                self.metrics_service.set_agent_state("listening")
+
+    async def _generate(self, turn: PipelineMetrics, text: str, sentences: asyncio.Queue):
+        """Stream LLM tokens into the sentence queue."""
+        turn.timestamps[PipelineStage.LLM_START.value] = self.time_fn()
+        buffer = ""
+        try:
+            async for token in self.llm.generate_response(text):
+                if PipelineStage.LLM_FIRST_TOKEN.value not in turn.timestamps:
+                    turn.timestamps[PipelineStage.LLM_FIRST_TOKEN.value] = self.time_fn()
+                turn.agent_text += token
+                buffer += token
+                ready, buffer = take_sentences(buffer)
+                for sentence in ready:
+                    sentences.put_nowait(sentence)
+            turn.timestamps[PipelineStage.LLM_END.value] = self.time_fn()
+            for sentence in split_sentences(buffer):
+                sentences.put_nowait(sentence)
+        finally:
+            sentences.put_nowait(None)
+
+    async def _speak(self, turn: PipelineMetrics, sentences: asyncio.Queue):
+        """Synthesize and queue each sentence as soon as it is complete."""
+        if self._tts_drain is not None:
+            await self._tts_drain  # Tail of an interrupted sentence
+            self._tts_drain = None
+
+        while True:
+            sentence = await sentences.get()
+            if sentence is None:
+                break
+            if PipelineStage.TTS_START.value not in turn.timestamps:
+                turn.timestamps[PipelineStage.TTS_START.value] = self.time_fn()
+            async for audio in self.tts.synthesize(sentence):
+                if PipelineStage.TTS_FIRST_AUDIO.value not in turn.timestamps:
+                    now = self.time_fn()
+                    turn.timestamps[PipelineStage.TTS_FIRST_AUDIO.value] = now
+                    turn.timestamps[PipelineStage.AUDIO_PLAY_START.value] = now
+                    if self.mute_mic:
+                        self.audio_io.mute_mic(True)
+                    if self.ducking:
+                        self.ducking(True)
+                    if self.metrics_service:
+                        self.metrics_service.set_agent_state("speaking")
+                self.audio_io.play_audio(audio)
+            self._spoken.append(sentence)
+
+        if PipelineStage.TTS_START.value in turn.timestamps:
+            turn.timestamps[PipelineStage.TTS_END.value] = self.time_fn()
+            self.audio_io.signal_playback_end()
+
+    def interrupt(self, now: Optional[float] = None):
+        """
+        Barge-in: silence the lamp and cancel every in-flight stage.
+
+        Runs synchronously on the audio block that detected the speech, so
+        playback stops on the next output block and the LLM stream and
+        Piper are cancelled before the next mic block is processed.
+        """
+        if not self.responding:
+            return
+        now = self.time_fn() if now is None else now
+        self.audio_io.stop_playback()
+        self._response_task.cancel()
+        self._response_task = None
+        self.barge_ins += 1
+
+        self.llm.record_interrupted_reply(" ".join(self._spoken))
+        self._tts_drain = asyncio.create_task(self.tts.discard_pending())
+        if self.mute_mic:
+            self.audio_io.mute_mic(False)
+
+        turn = self._responding_turn
+        if turn is not None:
+            turn.timestamps.setdefault(PipelineStage.AUDIO_PLAY_END.value, now)
+            turn.agent_text = " ".join(self._spoken)
+            self._finish_turn(turn)
+        logger.info("Barge-in: reply interrupted")
+
+    def _finish_turn(self, turn: PipelineMetrics):
+        turn.agent_text = turn.agent_text.strip()
+        turn.compute_latencies()
+        self.turns += 1
+        self.last_turn = turn
+        self._responding_turn = None
+        if self.metrics_service:
+            self.metrics_service.record_turn(turn)
+        logger.info(
+            f"Turn {turn.turn_id}: STT {turn.stt_latency_ms:.0f}ms, "
+            f"LLM TTFT {turn.llm_time_to_first_token_ms:.0f}ms, "
+            f"TTS TTFA {turn.tts_time_to_first_audio_ms:.0f}ms, "
+            f"E2E {turn.end_to_end_latency_ms:.0f}ms"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "turns": self.turns,
+            "barge_ins": self.barge_ins,
+            "partials": self.partials,
+            "partials_reused": self.partials_reused,
+            "responding": self.responding,
+            "last_turn": self.last_turn.to_dict() if self.last_turn else None,
+        }
@@ -97,7 +97,7 @@ class LocalSTTService:
             print(f"[STT] RMS: {rms:.4f}, threshold: {self.silence_threshold}, silence: {is_silence}, speaking: {self.is_speaking}")
         return is_silence
 
-    def _is_garbage(self, text: str) -> bool:
+    def is_garbage(self, text: str) -> bool:
         """Check if transcription is garbage/hallucination."""
         if not text or len(text.strip()) < 2:
             return True
@@ -210,7 +210,7 @@ class LocalSTTService:
                     self.speech_start_time = None
 
                     # Filter garbage
-                    if self._is_garbage(text):
+                    if self.is_garbage(text):
                         logger.debug(f"Filtered garbage transcription: {text[:50]}")
                         return None
 
@@ -70,6 +70,7 @@ class LocalTTSService:
         self.voice = voice
         self.piper_proc: Optional[asyncio.subprocess.Process] = None
         self._sample_rate: Optional[int] = None
+        self._pending: Optional[int] = None  # Bytes read so far while Piper is mid-sentence
 
     def get_voice_sample_rate(self) -> int:
         """Get sample rate for current voice from JSON metadata."""
@@ -187,6 +188,7 @@ class LocalTTSService:
         # Read raw PCM output
         # Piper can take 2-3 seconds to generate audio on first request
         raw_pcm = b""
+        self._pending = 0
         start_time = asyncio.get_event_loop().time()
         last_data_time = start_time
         initial_timeout = 5.0  # Wait up to 5s for first audio
@@ -201,6 +203,7 @@ class LocalTTSService:
                 )
                 if chunk:
                     raw_pcm += chunk
+                    self._pending = len(raw_pcm)
                     last_data_time = asyncio.get_event_loop().time()
                 else:
                     break
@@ -212,6 +215,7 @@ class LocalTTSService:
                 if not raw_pcm and (asyncio.get_event_loop().time() - start_time > initial_timeout):
                     logger.warning("Piper timeout - no audio generated")
                     break
+        self._pending = None
 
         if not raw_pcm:
             return
@@ -239,6 +243,29 @@ class LocalTTSService:
         for i in range(0, len(resampled), chunk_size):
             yield resampled[i : i + chunk_size]
 
+    async def discard_pending(self):
+        """
+        Drop output Piper is still producing for a cancelled synthesize().
+
+        Without this the next sentence would start with the tail of the
+        interrupted one. Reads until Piper has gone quiet, using the same
+        timeouts as synthesize().
+        """
+        if self._pending is None or not self.piper_proc or self.piper_proc.returncode is not None:
+            return
+        started = self._pending > 0
+        self._pending = None
+        while True:
+            try:
+                chunk = await asyncio.wait_for(
+                    self.piper_proc.stdout.read(4096), timeout=1.0 if started else 5.0
+                )
+            except asyncio.TimeoutError:
+                return
+            if not chunk:
+                return
+            started = True
+
     async def _resample_audio(self, raw_pcm: bytes, input_rate: int) -> bytes:
         """Resample audio to 24kHz stereo using sox (matches OpenAI Realtime API rate)."""
         sox_cmd = [
@@ -7,6 +7,7 @@ Collects and exposes metrics for:
 - LLM response time
 - Text-to-speech timing
 - End-to-end latency
+- Agent tool call latency
 - Conversation history
 """
 
@@ -159,6 +160,9 @@ class MetricsService:
         self._last_vad_metrics = {}
         self._last_eou_metrics = {}
 
+        # Per-tool call stats: name -> {calls, errors, timeouts, total_ms, max_ms, last_ms}
+        self._tool_stats: Dict[str, Dict[str, float]] = {}
+
         # Session start time
         self._session_start = time.time()
 
@@ -174,21 +178,18 @@ class MetricsService:
         """Load total tokens from config"""
         try:
             import lelamp.globals as g
-            if g.CONFIG and "metrics" in g.CONFIG:
-                self._total_tokens_all_time = g.CONFIG["metrics"].get("total_tokens", 0)
+            if g.config_store is not None:
+                self._total_tokens_all_time = g.config_store.get("metrics.total_tokens", 0, int)
                 logging.info(f"Loaded total tokens from config: {self._total_tokens_all_time}")
         except Exception as e:
             logging.warning(f"Could not load total tokens from config: {e}")
 
     def _save_total_tokens(self):
-        """Save total tokens to config"""
+        """Save total tokens to config (debounced, so per-turn saves coalesce)"""
         try:
             import lelamp.globals as g
-            if g.CONFIG is not None:
-                if "metrics" not in g.CONFIG:
-                    g.CONFIG["metrics"] = {}
-                g.CONFIG["metrics"]["total_tokens"] = self._total_tokens_all_time
-                g.save_config(g.CONFIG)
+            if g.config_store is not None:
+                g.config_store.set("metrics.total_tokens", self._total_tokens_all_time)
         except Exception as e:
             logging.warning(f"Could not save total tokens to config: {e}")
 
@@ -327,6 +328,24 @@ class MetricsService:
                 logging.debug(f"Turn {self._current_turn.turn_id} completed: E2E={self._current_turn.end_to_end_latency_ms:.1f}ms")
                 self._current_turn = None
 
+    def record_turn(self, turn: PipelineMetrics):
+        """Add a turn timed elsewhere (local voice orchestrator)"""
+        with self._lock:
+            turn.compute_latencies()
+            if turn.user_text:
+                self._conversation_history.append(ConversationTurn(
+                    turn_id=turn.turn_id, role="user", text=turn.user_text,
+                    timestamp=turn.timestamps.get(PipelineStage.VAD_END.value, time.time())
+                ))
+            if turn.agent_text:
+                self._conversation_history.append(ConversationTurn(
+                    turn_id=turn.turn_id, role="agent", text=turn.agent_text,
+                    timestamp=turn.timestamps.get(PipelineStage.AUDIO_PLAY_START.value, time.time())
+                ))
+            self._turn_history.append(turn)
+            self._total_turns += 1
+            self._update_aggregates()
+
     def _update_aggregates(self):
         """Update aggregate metrics"""
         if not self._turn_history:
@@ -354,6 +373,42 @@ class MetricsService:
         with self._lock:
             self._is_user_speaking = is_speaking
 
+    def record_tool_call(self, name: str, duration_ms: float, status: str = "ok"):
+        """Record one agent tool call (status: ok, error or timeout)"""
+        with self._lock:
+            stats = self._tool_stats.get(name)
+            if stats is None:
+                stats = self._tool_stats[name] = {
+                    "calls": 0, "errors": 0, "timeouts": 0,
+                    "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0,
+                }
+            stats["calls"] += 1
+            if status == "error":
+                stats["errors"] += 1
+            elif status == "timeout":
+                stats["timeouts"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            stats["last_ms"] = duration_ms
+
+    def get_tool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-tool latency statistics"""
+        with self._lock:
+            return self._tool_stats_dict()
+
+    def _tool_stats_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "calls": s["calls"],
+                "errors": s["errors"],
+                "timeouts": s["timeouts"],
+                "avg_ms": round(s["total_ms"] / s["calls"], 2) if s["calls"] else 0,
+                "max_ms": round(s["max_ms"], 2),
+                "last_ms": round(s["last_ms"], 2),
+            }
+            for name, s in self._tool_stats.items()
+        }
+
     def reset_session(self):
         """Reset session metrics (called when a new session starts)"""
         with self._lock:
@@ -367,6 +422,7 @@ class MetricsService:
             self._avg_e2e_latency_ms = 0
             self._avg_llm_ttft_ms = 0
             self._avg_tts_ttfa_ms = 0
+            self._tool_stats.clear()
             logging.info("Session metrics reset")
 
     def get_token_stats(self) -> Dict[str, int]:
@@ -411,6 +467,7 @@ class MetricsService:
                     "tts_time_to_first_audio_ms": round(self._avg_tts_ttfa_ms, 2)
                 },
                 "recent_turns": [t.to_dict() for t in recent_turns],
+                "tools": self._tool_stats_dict(),
                 "conversation": [
                     {
                         "role": c.role,
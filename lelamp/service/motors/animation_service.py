@@ -1,5 +1,5 @@
 import os
-import csv
+import math
 import time
 import random
 import threading
@@ -12,35 +12,53 @@ from lelamp.service.motors.modifiers import (
     TwitchModifier, TwitchConfig,
     SwayModifier, SwayConfig,
 )
+from lelamp.service.motors.time_warp import TimeWarper, WarpedRecording
+from lelamp.service.motors.transition_planner import TransitionPlanner, load_joint_limits, blend_weight
+from lelamp.recording_catalog import get_recording_catalog
 from lelamp.user_data import (
-    get_recording_path,
     save_recording_path,
-    list_all_recordings,
     get_recordings_paths,
     USER_RECORDINGS_DIR,
 )
 
 LAMP_ID = "lelamp"
+WARP_MAX_CORRECTION = 3  # Max frames per tick a beat-locked recording is pulled ahead or held back
+
+# Recordings played in reaction to a detected facial emotion
+EMOTION_RECORDINGS = {
+    "happy": "happy_wiggle",
+    "sad": "sad",
+    "surprise": "curious",
+}
 
 
 class AnimationService:
     def __init__(self, port: str, fps: int = 30, duration: float = 5.0, idle_recording: str = "idle", config: Dict = None):
         self.port = port
         self.fps = fps
-        self.duration = duration
+        self.duration = duration  # Longest crossfade between two running recordings
         self.idle_recording = idle_recording
         self.robot_config = LeLampFollowerConfig(port=port, id=LAMP_ID)
         self.robot: LeLampFollower = None
         self.recordings_dir = os.path.join(os.path.dirname(__file__), "..", "..", "recordings")
 
         # State management
-        self._recording_cache: Dict[str, List[Dict[str, float]]] = {}
         self._current_state: Optional[Dict[str, float]] = None
         self._current_recording: Optional[str] = None
         self._current_frame_index: int = 0
         self._current_actions: List[Dict[str, float]] = []
-        self._interpolation_frames: int = 0
-        self._interpolation_target: Optional[Dict[str, float]] = None
+        self._loop_frames = 0
+        self._loop_overruns = 0  # Iterations longer than one frame
+
+        # Transitions: jerk-limited moves from a still pose, or crossfades
+        # from a recording that is still running
+        self._config = config or {}
+        self._planner = TransitionPlanner.from_config(self._config, fps)
+        self._transition_frames: List[Dict[str, float]] = []
+        self._transition_index: int = 0
+        self._crossfade_source: List[Dict[str, float]] = []
+        self._crossfade_length: int = 0
+        self._crossfade_step: int = 0
 
         # Custom event handling
         self._running = threading.Event()
@@ -79,11 +97,18 @@ class AnimationService:
         music_cfg = modifiers_config.get("music", {})
         self._dance_mode = False
         self._dance_energy_callback: Optional[Callable[[], float]] = None
+        self._beat_tracker = None  # On-device BeatTracker, preferred over Spotify energy
         self._dance_threshold = music_cfg.get("dance_threshold", 0.25)  # Energy above this triggers dancing animations
         self._excited_threshold = music_cfg.get("excited_threshold", 0.6)  # Energy above this triggers excited dancing
         self._dance_animations = ["dancing1", "dancing2", "dancing3"]
         self._excited_animations = ["dancing-excited1", "dancing-excited2", "dancing-excited3", "dancing-excited4", "dancing-excited5"]
         self._last_dance_animation: Optional[str] = None  # Track last played to avoid repeats
+
+        # Tempo-aware time warping of dance recordings (cached per recording + BPM)
+        self._time_warp_enabled = music_cfg.get("time_warp", True)
+        self._time_warper = TimeWarper(fps=fps)
+        self._current_warp: Optional[WarpedRecording] = None
+        self._warp_start_beat: Optional[float] = None  # Beat position of warped frame 0
         print(f"💃 ANIMATION SERVICE: Dance thresholds loaded - dance={self._dance_threshold}, excited={self._excited_threshold}")
 
     def _init_modifiers(self, modifiers_config: Dict):
@@ -105,6 +130,7 @@ class AnimationService:
                 groove=music_cfg.get("groove", 0.3),
                 wave_spread=music_cfg.get("wave_spread", 0.08),
                 energy_threshold=music_cfg.get("energy_threshold", 0.25),
+                beat_lead=music_cfg.get("beat_lead", 0.06),
                 joint=default_joint,
             )
         )
@@ -172,6 +198,53 @@ class AnimationService:
             else:
                 print("🎵 ANIMATION SERVICE: Connected music modifier to Spotify (BPM only)")
 
+    def connect_beat_tracker(self, beat_tracker):
+        """
+        Connect to the on-device BeatTracker for beat-locked motion.
+
+        While the tracker hears music it drives the music modifier's phase,
+        BPM and energy and the dance mode energy; Spotify stays the fallback.
+
+        Args:
+            beat_tracker: BeatTracker instance
+        """
+        self._beat_tracker = beat_tracker
+        music_mod = self._modifiers.get("music")
+        if music_mod:
+            music_mod.set_beat_source(beat_tracker)
+        print("🎵 ANIMATION SERVICE: Connected music modifier to beat tracker")
+
+    def connect_emotion_service(self, emotion_service, cooldown: float = 30.0):
+        """
+        React to the emotions of people in front of the lamp.
+
+        A matching recording plays when a face's emotion changes, but only
+        while the lamp is idling (no other animation, sleep, dance or face
+        tracking) and at most once per cooldown.
+
+        Args:
+            emotion_service: EmotionService instance
+            cooldown: Minimum seconds between emotion reactions
+        """
+        self._emotion_cooldown = cooldown
+        self._last_emotion_reaction = 0.0
+        emotion_service.subscribe(self._on_emotion)
+        print("😊 ANIMATION SERVICE: Connected to emotion service")
+
+    def _on_emotion(self, event):
+        recording = EMOTION_RECORDINGS.get(event.emotion)
+        if recording is None:
+            return
+        now = time.time()
+        if now - self._last_emotion_reaction < self._emotion_cooldown:
+            return
+        if (self._sleep_mode or self._dance_mode or self._face_tracking_mode or self._pushable_mode
+                or self._current_recording not in (None, self.idle_recording)):
+            return
+        self._last_emotion_reaction = now
+        print(f"😊 ANIMATION SERVICE: Face looks {event.emotion}, playing '{recording}'")
+        self.dispatch("play", recording)
+
     # ==================== Energy-Based Dance Mode ====================
 
     def set_dance_thresholds(self, dance_threshold: float = 0.25, excited_threshold: float = 0.6):
@@ -191,6 +264,14 @@ class AnimationService:
         self._dance_mode = True
         self._last_dance_animation = None
 
+        # Warp the dance recordings for the current tempo up front
+        bpm = self._get_music_bpm()
+        if bpm and self._time_warp_enabled:
+            for name in self._dance_animations + self._excited_animations:
+                actions = self._load_recording(name)
+                if actions is not None:
+                    self._time_warper.warp(name, actions, bpm)
+
         # Check energy and start appropriate animation
         energy = self._get_current_energy()
         print(f"💃 ANIMATION SERVICE: Starting dance mode (energy={energy:.2f})")
@@ -217,7 +298,11 @@ class AnimationService:
         return self._dance_mode
 
     def _get_current_energy(self) -> float:
-        """Get current energy level from Spotify callback."""
+        """Get current energy level from the beat tracker, else the Spotify callback."""
+        if self._beat_tracker is not None:
+            state = self._beat_tracker.get_state()
+            if state.active:
+                return state.energy
         if self._dance_energy_callback:
             try:
                 return self._dance_energy_callback()
@@ -439,9 +524,14 @@ class AnimationService:
         # Keep for backwards compatibility
         pass
     
+    def get_loop_stats(self) -> Dict:
+        """Loop iterations and overruns, for load monitoring"""
+        return {"frames": self._loop_frames, "overruns": self._loop_overruns}
+
     def _event_loop(self):
         """Custom event loop that supports interruption"""
         while self._running.is_set():
+            started = time.time()
             # Check for events
             with self._event_lock:
                 if self._event_queue:
@@ -457,7 +547,12 @@ class AnimationService:
             
             # Continue current playback
             self._continue_playback()
-            
+
+            # Overruns feed the thermal governor's load estimate
+            self._loop_frames += 1
+            if time.time() - started > 1.0 / self.fps:
+                self._loop_overruns += 1
+
             time.sleep(1.0 / self.fps)  # Frame rate timing
     
     def handle_event(self, event_type: str, payload: Any):
@@ -481,8 +576,24 @@ class AnimationService:
         actions = self._load_recording(recording_name)
         if actions is None:
             return
+        get_recording_catalog().record_play(recording_name)
 
-        print(f"Starting {recording_name} with interpolation")
+        # Dance recordings follow the music: resample onto the current tempo
+        self._current_warp = None
+        self._warp_start_beat = None
+        bpm = self._get_music_bpm() if self._should_warp(recording_name) else None
+        if bpm:
+            warped = self._time_warper.warp(recording_name, actions, bpm)
+            if warped is not None:
+                self._current_warp = warped
+                actions = warped.frames
+                print(f"🎵 ANIMATION SERVICE: Warped '{recording_name}' to {warped.bpm:.0f} BPM "
+                      f"(x{warped.scale:.2f}, {warped.anchors} accents on the beat)")
+
+        print(f"Starting {recording_name} with transition")
+
+        # What the motors are doing right now, captured before it is replaced
+        crossfade_source = self._running_frames()
 
         # Set up new playback
         self._current_recording = recording_name
@@ -500,13 +611,57 @@ class AnimationService:
             except Exception as e:
                 print(f"⚠️ ANIMATION SERVICE: Could not read motor positions: {e}")
 
-        # Set up interpolation to the first frame
-        if self._current_state is not None:
-            self._interpolation_frames = int(self.duration * self.fps)
-            self._interpolation_target = actions[0]
+        self._start_transition(actions[0], crossfade_source)
+
+    def _running_frames(self) -> List[Dict[str, float]]:
+        """Upcoming frames of whatever is playing now (empty if the lamp is still)."""
+        if not self._current_recording or self._current_state is None:
+            return []
+        if self._transition_index < len(self._transition_frames):
+            return self._transition_frames[self._transition_index:]
+        if self._crossfade_step < self._crossfade_length:
+            return [self._current_state.copy()]  # Mid-crossfade: fade out from the blended pose
+        if self._current_frame_index < len(self._current_actions):
+            return self._current_actions[self._current_frame_index:]
+        return []
+
+    def _start_transition(self, target: Dict[str, float], crossfade_source: List[Dict[str, float]]):
+        """
+        Move into a recording's first frame.
+
+        From a still pose this is a time-optimal, jerk-limited move; if
+        something is still running it keeps playing underneath and is
+        crossfaded into the new recording instead of stopping first.
+        """
+        self._clear_transition()
+        if self._current_state is None:
+            return
+
+        if crossfade_source:
+            self._crossfade_source = crossfade_source
+            self._crossfade_length = self._planner.crossfade_frames(
+                self._current_state, target, max_seconds=self.duration
+            )
+            print(f"🔀 ANIMATION SERVICE: Crossfading over {self._crossfade_length} frames")
         else:
-            self._interpolation_frames = 0
-            self._interpolation_target = None
+            self._transition_frames = self._planner.plan(self._current_state, target)
+            print(f"📐 ANIMATION SERVICE: Transition takes {len(self._transition_frames)} frames")
+
+    def _clear_transition(self):
+        self._transition_frames = []
+        self._transition_index = 0
+        self._crossfade_source = []
+        self._crossfade_length = 0
+        self._crossfade_step = 0
+
+    def _crossfade(self, action: Dict[str, float]) -> Dict[str, float]:
+        """Blend the outgoing recording into `action` while a crossfade runs."""
+        if self._crossfade_step >= self._crossfade_length:
+            return action
+        source = self._crossfade_source[min(self._crossfade_step, len(self._crossfade_source) - 1)]
+        self._crossfade_step += 1
+        weight = blend_weight(self._crossfade_step / self._crossfade_length)
+        return {j: source.get(j, v) + (v - source.get(j, v)) * weight for j, v in action.items()}
     
     def _continue_playback(self):
         """Continue current playback - called every frame"""
@@ -586,29 +741,24 @@ class AnimationService:
             return
 
         try:
-            # Handle interpolation to first frame
-            if self._interpolation_frames > 0 and self._interpolation_target is not None:
-                # Calculate interpolation progress
-                progress = 1.0 - (self._interpolation_frames / (self.duration * self.fps))
-                progress = max(0.0, min(1.0, progress))
-
-                # Interpolate between current state and target
-                interpolated_action = {}
-                for joint in self._interpolation_target.keys():
-                    current_val = self._current_state.get(joint, 0)
-                    target_val = self._interpolation_target[joint]
-                    interpolated_action[joint] = current_val + (target_val - current_val) * progress
+            # Handle the planned move to the first frame
+            if self._transition_index < len(self._transition_frames):
+                transition_action = self._transition_frames[self._transition_index]
 
                 # Apply modifiers (music bob, breathing, etc.)
-                modified_action = self._modifiers.apply(interpolated_action)
+                modified_action = self._modifiers.apply(transition_action)
                 self.robot.send_action(modified_action)
-                self._current_state = interpolated_action.copy()  # Store unmodified for smooth transitions
-                self._interpolation_frames -= 1
+                self._current_state = transition_action.copy()  # Store unmodified for smooth transitions
+                self._transition_index += 1
                 return
 
+            # Beat-locked warped recordings pick their frame from the beat position
+            if self._current_warp is not None:
+                self._current_frame_index = self._warped_frame_index()
+
             # Play current frame
             if self._current_frame_index < len(self._current_actions):
-                action = self._current_actions[self._current_frame_index]
+                action = self._crossfade(self._current_actions[self._current_frame_index])
                 # Apply modifiers (music bob, breathing, etc.)
                 original_pitch = action.get("wrist_pitch.pos", 0)
                 modified_action = self._modifiers.apply(action)
@@ -629,6 +779,7 @@ class AnimationService:
                 self._current_frame_index += 1
             else:
                 # Recording finished
+                self._clear_transition()
                 if self._current_recording != self.idle_recording:
                     # Check if we're in dance mode - if so, play next dance animation
                     if self._dance_mode:
@@ -645,13 +796,12 @@ class AnimationService:
                     # Interpolate back to idle
                     idle_actions = self._load_recording(self.idle_recording)
                     if idle_actions is not None and len(idle_actions) > 0:
+                        self._current_warp = None
                         self._current_recording = self.idle_recording
                         self._current_actions = idle_actions
                         self._current_frame_index = 0
-                        # Set up interpolation back to idle
-                        if self._current_state is not None:
-                            self._interpolation_frames = int(self.duration * self.fps)
-                            self._interpolation_target = idle_actions[0]
+                        # Planned move back to idle (the finished recording is holding still)
+                        self._start_transition(idle_actions[0], [])
                 else:
                     # Loop idle recording (or dance mode without high energy)
                     if self._dance_mode:
@@ -662,6 +812,7 @@ class AnimationService:
                             return
                     # Otherwise just loop idle
                     self._current_frame_index = 0
+                    self._warp_start_beat = None
 
         except Exception as e:
             print(f"Error in playback: {e}")
@@ -672,17 +823,93 @@ class AnimationService:
         finally:
             self._bus_lock.release()
     
+    # ==================== Tempo-Aware Time Warping ====================
+
+    def _should_warp(self, recording_name: str) -> bool:
+        """Only dance recordings in dance mode follow the music tempo."""
+        if not self._time_warp_enabled or not self._dance_mode:
+            return False
+        return (recording_name in self._dance_animations
+                or recording_name in self._excited_animations
+                or recording_name.startswith("dancing"))
+
+    def _get_music_bpm(self) -> Optional[float]:
+        """Tempo of the music playing now: beat tracker first, then Spotify."""
+        if self._beat_tracker is not None:
+            state = self._beat_tracker.get_state()
+            if state.active and state.bpm > 0:
+                return state.bpm
+
+        music_mod = self._modifiers.get("music")
+        if music_mod and music_mod.bpm_callback and music_mod.is_playing_callback:
+            try:
+                if music_mod.is_playing_callback():
+                    bpm = music_mod.bpm_callback()
+                    return bpm if bpm and bpm > 0 else None
+            except Exception:
+                return None
+        return None
+
+    def _warped_frame_index(self) -> int:
+        """
+        Frame of the warped recording to show now.
+
+        With a beat tracker the index follows the beat position (the first
+        accent waits for the next beat), so playback stays phase locked
+        whether the loop runs late or the beat grid runs slower than
+        playback. Each tick moves at most WARP_MAX_CORRECTION frames away
+        from normal playback, in either direction, so tempo corrections
+        don't jump. Without a tracker, frames simply advance one per tick
+        at the warped tempo.
+        """
+        index = self._current_frame_index
+        tracker = self._beat_tracker
+        if tracker is None or not tracker.get_state().active:
+            return index
+
+        music_mod = self._modifiers.get("music")
+        lead = music_mod.config.beat_lead if music_mod else 0.0
+        position = tracker.beat_position(time.time() + lead)
+        if position is None:
+            return index
+
+        warp = self._current_warp
+        if self._warp_start_beat is None:
+            self._warp_start_beat = float(math.ceil(position + warp.beat_offset / warp.frames_per_beat))
+        frame = int(warp.beat_offset + (position - self._warp_start_beat) * warp.frames_per_beat)
+        if frame < 0:
+            return 0  # Hold the first frame until the beat
+        # Catch up or hold back by the same bounded amount
+        correction = max(-WARP_MAX_CORRECTION, min(WARP_MAX_CORRECTION, frame - index))
+        return max(0, index + correction)
+
+    def get_time_warp_stats(self) -> dict:
+        stats = self._time_warper.get_stats()
+        stats["enabled"] = self._time_warp_enabled
+        stats["current"] = None
+        if self._current_warp is not None:
+            stats["current"] = {
+                "recording": self._current_warp.name,
+                "bpm": self._current_warp.bpm,
+                "scale": round(self._current_warp.scale, 3),
+                "anchors": self._current_warp.anchors,
+            }
+        return stats
+
     def get_available_recordings(self) -> List[str]:
         """Get list of recording names available (from both user and builtin directories)"""
-        # Use user_data helper to get all recordings from both locations
-        all_recordings = list_all_recordings()
-        return sorted([r['name'] for r in all_recordings])
+        return [entry.name for entry in get_recording_catalog().list()]
     
     def apply_preset(self, preset_name: str = None) -> bool:
         """Apply a motor preset at runtime."""
         if self.robot:
             with self._bus_lock:
-                return self.robot.apply_preset(preset_name)
+                applied = self.robot.apply_preset(preset_name)
+            if applied:
+                # Transitions follow the preset's velocity/acceleration limits
+                preset = preset_name or self._config.get("motor_preset", "Normal")
+                self._planner.limits = load_joint_limits({**self._config, "motor_preset": preset})
+            return applied
         return False
 
     def get_available_presets(self) -> List[str]:
@@ -780,34 +1007,11 @@ class AnimationService:
             self._bus_lock.release()
 
     def _load_recording(self, recording_name: str) -> Optional[List[Dict[str, float]]]:
-        """Load a recording from cache or file (checks user dir first, then builtin)"""
-        # Check cache first
-        if recording_name in self._recording_cache:
-            return self._recording_cache[recording_name]
-
-        # Use user_data helper to find recording (prefers user dir)
-        csv_path = get_recording_path(recording_name)
-
-        if csv_path is None:
+        """Load a recording from the catalog (checks user dir first, then builtin)"""
+        actions = get_recording_catalog().load(recording_name)
+        if actions is None:
             print(f"Recording not found: {recording_name}")
-            return None
-
-        try:
-            with open(csv_path, 'r') as csvfile:
-                csv_reader = csv.DictReader(csvfile)
-                actions = []
-                for row in csv_reader:
-                    # Extract action data (exclude timestamp column)
-                    action = {key: float(value) for key, value in row.items() if key != 'timestamp'}
-                    actions.append(action)
-
-            # Cache the recording
-            self._recording_cache[recording_name] = actions
-            return actions
-            
-        except Exception as e:
-            print(f"Error loading recording {recording_name}: {e}")
-            return None
+        return actions
 
     def hand_control_callback(self, hand_data):
         """
@@ -94,6 +94,7 @@ class MusicConfig:
     wave_spread: float = 0.08     # Phase offset between joints
     energy_threshold: float = 0.25
     energy_scale: float = 1.5
+    beat_lead: float = 0.06       # Seconds to move ahead of the beat (servo lag)
 
 
 class MusicModifier(Modifier):
@@ -102,6 +103,10 @@ class MusicModifier(Modifier):
 
     Designed to be fast and not interfere with base animations.
     Uses cached values to minimize callback overhead.
+
+    With a beat source (BeatTracker) that hears music, the wave is phase
+    locked to the detected beats; otherwise it free-runs at the BPM from
+    the callbacks (Spotify).
     """
 
     def __init__(
@@ -111,6 +116,7 @@ class MusicModifier(Modifier):
         bpm_callback: Callable[[], float] = None,
         is_playing_callback: Callable[[], bool] = None,
         energy_callback: Callable[[], float] = None,
+        beat_source=None,
     ):
         self.config = config or MusicConfig()
         target_joints = target_joints or {self.config.joint}
@@ -119,6 +125,8 @@ class MusicModifier(Modifier):
         self.bpm_callback = bpm_callback
         self.is_playing_callback = is_playing_callback
         self.energy_callback = energy_callback
+        self.beat_source = beat_source
+        self._beat_locked = False
 
         # Cached values (updated periodically, not every frame)
         self._cached_bpm = self.config.fallback_bpm
@@ -140,6 +148,10 @@ class MusicModifier(Modifier):
     def set_energy_callback(self, callback: Callable[[], float]):
         self.energy_callback = callback
 
+    def set_beat_source(self, beat_source):
+        """Phase lock to a BeatTracker (None to go back to the callbacks)."""
+        self.beat_source = beat_source
+
     def set_amplitude(self, amplitude: float):
         self.config.amplitude = amplitude
 
@@ -164,6 +176,16 @@ class MusicModifier(Modifier):
 
     def _update_cache(self):
         """Update cached values from callbacks (called periodically, not every frame)."""
+        if self.beat_source is not None:
+            state = self.beat_source.get_state()
+            self._beat_locked = state.active
+            if state.active:
+                self._cached_playing = True
+                self._cached_bpm = state.bpm
+                self._cached_energy = state.energy
+                return
+            self._cached_playing = False
+
         if self.is_playing_callback:
             try:
                 self._cached_playing = self.is_playing_callback()
@@ -189,9 +211,11 @@ class MusicModifier(Modifier):
         if joint not in self.target_joints:
             return 0.0
 
-        # Update cache periodically (not every frame)
+        # Update cache periodically (not every frame); a beat source is
+        # cheap to read and its energy follows the music, so poll it faster
         self._cache_counter += 1
-        if self._cache_counter >= self._cache_interval:
+        interval = 3 if self.beat_source is not None else self._cache_interval
+        if self._cache_counter >= interval:
             self._cache_counter = 0
             self._update_cache()
 
@@ -212,16 +236,23 @@ class MusicModifier(Modifier):
         if energy_mult < 0.02:
             return 0.0
 
-        # Simple phase calculation
-        elapsed = current_time - self._start_time
-        freq = (self._cached_bpm / 60.0) / self.config.beat_divisor
-
         # Joint phase offset for wave effect
         try:
             idx = self._joint_order.index(joint)
         except ValueError:
             idx = 0
-        phase = (elapsed * freq + idx * self.config.wave_spread) % 1.0
+
+        beats = None
+        if self._beat_locked:
+            beats = self.beat_source.beat_position(current_time + self.config.beat_lead)
+        if beats is not None:
+            # Phase locked: the wave peaks on the beat (every beat_divisor beats)
+            phase = (beats / self.config.beat_divisor + 0.25 + idx * self.config.wave_spread) % 1.0
+        else:
+            # Free-running at the callback BPM
+            elapsed = current_time - self._start_time
+            freq = (self._cached_bpm / 60.0) / self.config.beat_divisor
+            phase = (elapsed * freq + idx * self.config.wave_spread) % 1.0
 
         # Simple sine wave with optional groove
         wave = math.sin(phase * 2 * math.pi)
@@ -1,10 +1,10 @@
 import os
-import csv
 import time
 import logging
 from typing import Any, List, Dict, Literal
 from ..base import ServiceBase
 from lelamp.follower import LeLampFollowerConfig, LeLampFollower
+from lelamp.recording_catalog import get_recording_catalog
 
 LAMP_ID = "lelamp"
 logger = logging.getLogger(__name__)
@@ -74,25 +74,18 @@ class MotorsService(ServiceBase):
             self.logger.error("Robot not connected")
             return
 
-        csv_filename = f"{recording_name}.csv"
-        csv_path = os.path.join(self.recordings_dir, csv_filename)
-        
-        if not os.path.exists(csv_path):
-            self.logger.error(f"Recording not found: {csv_path}")
+        actions = get_recording_catalog().load(recording_name)
+        if actions is None:
+            self.logger.error(f"Recording not found: {recording_name}")
             return
-        
+        get_recording_catalog().record_play(recording_name)
+
         try:
-            with open(csv_path, 'r') as csvfile:
-                csv_reader = csv.DictReader(csvfile)
-                actions = list(csv_reader)
-            
             self.logger.info(f"Playing {len(actions)} actions from {recording_name}")
             
-            for row in actions:
+            for action in actions:
                 t0 = time.perf_counter()
                 
-                # Extract action data (exclude timestamp column)
-                action = {key: float(value) for key, value in row.items() if key != 'timestamp'}
                 self.robot.send_action(action)
                 
                 # Use time.sleep instead of busy_wait to avoid blocking other threads
@@ -107,17 +100,7 @@ class MotorsService(ServiceBase):
     
     def get_available_recordings(self) -> List[str]:
         """Get list of available recording names"""
-        if not os.path.exists(self.recordings_dir):
-            return []
-
-        recordings = []
-
-        for filename in os.listdir(self.recordings_dir):
-            if filename.endswith(".csv"):
-                recording_name = filename[:-4]  # Remove .csv
-                recordings.append(recording_name)
-
-        return sorted(recordings)
+        return [entry.name for entry in get_recording_catalog().list()]
 
 
 def fix_motor_voltage_limits(port: str, voltage: Literal["7.4", "12"]) -> Dict[str, Any]:
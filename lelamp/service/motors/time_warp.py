@@ -0,0 +1,236 @@
+"""
+Tempo-aware time warping for LeLamp recordings.
+
+Recordings are played frame by frame at the animation fps, so a dance
+recorded at one tempo never lines up with the music that is playing. The
+TimeWarper resamples a recording onto a target BPM and beat grid:
+
+1. Rhythm analysis (once per recording): motion accents are the moments
+   the lamp reverses direction (local minima of joint speed between fast
+   movements); the dominant accent period comes from the autocorrelation
+   of joint speed
+2. Warp curve (once per recording and BPM): the whole recording is scaled
+   so its accent period becomes a whole number of beats (or half a beat),
+   then each accent is snapped to the nearest grid line and the time
+   between accents is stretched piecewise linearly
+3. The warped trajectory is sampled at the playback fps and cached, so
+   playback is a list lookup per frame, exactly like an unwarped recording
+
+Grid lines start at `beat_offset` (the first accent) and are
+`frames_per_beat` (or half of it) frames apart, which is what lets the
+animation loop index frames by beat position.
+"""
+
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class RecordingRhythm:
+    """Motion rhythm of a recording."""
+    duration: float  # Seconds at the playback fps
+    period: float  # Dominant accent period in seconds (0 if none found)
+    accents: np.ndarray  # Accent times in seconds
+
+
+@dataclass
+class WarpedRecording:
+    """A recording resampled onto a beat grid."""
+    name: str
+    bpm: float
+    frames: List[Dict[str, float]]
+    frames_per_beat: float  # At the playback fps
+    beats_per_period: float  # Beats per source accent period
+    scale: float  # Overall time scale applied before snapping (>1 = slower)
+    anchors: int  # Accents snapped to the grid
+    beat_offset: float  # Frame of the first grid line (the first accent)
+
+
+class TimeWarper:
+    """Builds and caches beat-aligned versions of recordings."""
+
+    MIN_PERIOD = 0.25  # Seconds; accent periods searched between these
+    MAX_PERIOD = 2.5
+    MIN_SCALE = 0.67  # Never speed a recording up by more than 1.5x
+    MAX_SCALE = 2.0
+    MAX_LOCAL_STRETCH = 1.6  # Max speed change between neighbouring anchors
+    BEAT_MULTIPLES = (0.5, 1.0, 2.0, 4.0)
+
+    def __init__(self, fps: int = 30, max_entries: int = 32):
+        self.fps = fps
+        self.max_entries = max_entries
+        self._rhythms: Dict[str, Tuple[int, RecordingRhythm]] = {}
+        self._warps: "OrderedDict[Tuple[str, int], Tuple[int, WarpedRecording]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def bpm_key(bpm: float) -> int:
+        """Cache granularity: tempos within 0.5 BPM share a warp."""
+        return int(round(bpm))
+
+    def warp(self, name: str, actions: List[Dict[str, float]], bpm: float) -> Optional[WarpedRecording]:
+        """
+        Beat-aligned version of a recording, from cache when possible.
+
+        Returns None when the recording has no usable rhythm (too short, or
+        no repeated accents), in which case it should play unwarped.
+        """
+        if not actions or bpm <= 0:
+            return None
+
+        key = (name, self.bpm_key(bpm))
+        source = id(actions)  # Recording reloaded from disk -> stale entry
+        entry = self._warps.get(key)
+        if entry is not None and entry[0] == source:
+            self._warps.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        warped = self._build(name, actions, float(key[1]))
+        if warped is None:
+            return None
+        self._warps[key] = (source, warped)
+        while len(self._warps) > self.max_entries:
+            self._warps.popitem(last=False)
+        return warped
+
+    def invalidate(self, name: str):
+        """Drop cached analysis and warps for a recording."""
+        self._rhythms.pop(name, None)
+        for key in [k for k in self._warps if k[0] == name]:
+            del self._warps[key]
+
+    def get_stats(self) -> dict:
+        return {"entries": len(self._warps), "hits": self.hits, "misses": self.misses}
+
+    # =========================================================================
+    # Analysis
+    # =========================================================================
+
+    def rhythm(self, name: str, actions: List[Dict[str, float]]) -> RecordingRhythm:
+        entry = self._rhythms.get(name)
+        if entry is not None and entry[0] == id(actions):
+            return entry[1]
+        rhythm = self._analyse(self._to_array(actions)[1])
+        self._rhythms[name] = (id(actions), rhythm)
+        return rhythm
+
+    @staticmethod
+    def _to_array(actions: List[Dict[str, float]]) -> Tuple[List[str], np.ndarray]:
+        joints = list(actions[0].keys())
+        return joints, np.array([[a.get(j, 0.0) for j in joints] for a in actions], dtype=np.float64)
+
+    def _analyse(self, positions: np.ndarray) -> RecordingRhythm:
+        n = len(positions)
+        duration = n / self.fps
+        if n < self.fps:
+            return RecordingRhythm(duration, 0.0, np.zeros(0))
+
+        speed = np.linalg.norm(np.diff(positions, axis=0), axis=1) * self.fps  # deg/s
+        kernel = np.hanning(7)[1:-1]
+        speed = np.convolve(speed, kernel / kernel.sum(), mode="same")
+
+        # Dominant period from the speed autocorrelation. Speed peaks twice per
+        # back-and-forth movement, so one period here is one accent to the next
+        centered = speed - speed.mean()
+        ac = np.correlate(centered, centered, mode="full")[len(centered) - 1:]
+        period = 0.0
+        if ac[0] > 0:
+            ac = ac / ac[0]
+            lo = int(self.MIN_PERIOD * self.fps)
+            hi = min(int(self.MAX_PERIOD * self.fps), len(ac) - 1)
+            # Highest true peak in range (the edges of the range are not peaks)
+            peaks = [lag for lag in range(max(lo, 1), hi) if ac[lag - 1] < ac[lag] >= ac[lag + 1]]
+            if peaks:
+                lag = max(peaks, key=lambda l: ac[l])
+                if ac[lag] > 0.1:
+                    a, b, c = ac[lag - 1], ac[lag], ac[lag + 1]
+                    shift = 0.5 * (a - c) / (a - 2 * b + c) if a - 2 * b + c < 0 else 0.0
+                    period = (lag + shift) / self.fps
+
+        # Accents: direction reversals, i.e. speed minima well below the
+        # movement on either side of them
+        window = max(2, int(0.3 * self.fps))
+        min_gap = max(1, int(0.15 * self.fps))
+        accents = []
+        for i in range(1, len(speed) - 1):
+            if not (speed[i] <= speed[i - 1] and speed[i] < speed[i + 1]):
+                continue
+            before = speed[max(0, i - window):i].max()
+            after = speed[i + 1:i + 1 + window].max()
+            if min(before, after) < 10.0 or speed[i] > 0.4 * min(before, after):
+                continue
+            if accents and i - accents[-1] < min_gap:
+                continue
+            accents.append(i)
+
+        # No clear periodicity: fall back to the typical accent spacing
+        if period == 0.0 and len(accents) >= 3:
+            period = float(np.clip(np.median(np.diff(accents)) / self.fps, self.MIN_PERIOD, self.MAX_PERIOD))
+
+        # Speed sample i sits between frames i and i+1
+        return RecordingRhythm(duration, period, (np.array(accents, dtype=np.float64) + 0.5) / self.fps)
+
+    # =========================================================================
+    # Warping
+    # =========================================================================
+
+    def _build(self, name: str, actions: List[Dict[str, float]], bpm: float) -> Optional[WarpedRecording]:
+        rhythm = self.rhythm(name, actions)
+        if rhythm.period <= 0 or len(rhythm.accents) < 2:
+            return None
+
+        beat = 60.0 / bpm
+
+        # Whole-recording scale: accent period -> nearest beat multiple
+        multiple = min(self.BEAT_MULTIPLES, key=lambda m: abs(math.log(m * beat / rhythm.period)))
+        scale = float(np.clip(multiple * beat / rhythm.period, self.MIN_SCALE, self.MAX_SCALE))
+        grid = beat * min(multiple, 1.0)
+
+        # The lead-in before the first accent is only scaled; the first accent
+        # defines grid line 0 and later accents snap to the grid after it,
+        # keeping the curve monotonic and the local speed change bounded
+        first = float(rhythm.accents[0])
+        lead_in = first * scale
+        source_points, target_points = [0.0, first], [0.0, lead_in]
+        for accent in rhythm.accents[1:]:
+            # Quantize each interval on its own so scale errors never accumulate
+            cells = max(1, round((accent - source_points[-1]) * scale / grid))
+            target = target_points[-1] + cells * grid
+            stretch = (target - target_points[-1]) / ((accent - source_points[-1]) * scale)
+            if not (1.0 / self.MAX_LOCAL_STRETCH <= stretch <= self.MAX_LOCAL_STRETCH):
+                continue
+            source_points.append(accent)
+            target_points.append(target)
+
+        # End on a grid line too, so looping recordings stay on the beat
+        end = target_points[-1] + max(1, round((rhythm.duration - source_points[-1]) * scale / grid)) * grid
+        source_points.append(rhythm.duration)
+        target_points.append(end)
+
+        # Sample the warped trajectory at the playback fps
+        joints, positions = self._to_array(actions)
+        frame_times = np.arange(int(round(end * self.fps))) / self.fps
+        source_frames = np.interp(frame_times, target_points, source_points) * self.fps
+        source_frames = np.clip(source_frames, 0, len(positions) - 1)
+        index = np.arange(len(positions))
+        columns = [np.interp(source_frames, index, positions[:, j]) for j in range(len(joints))]
+        warped = np.stack(columns, axis=1)
+
+        frames = [dict(zip(joints, row)) for row in warped.tolist()]
+        return WarpedRecording(
+            name=name,
+            bpm=bpm,
+            frames=frames,
+            frames_per_beat=beat * self.fps,
+            beats_per_period=multiple,
+            scale=scale,
+            anchors=len(source_points) - 2,
+            beat_offset=lead_in * self.fps,
+        )
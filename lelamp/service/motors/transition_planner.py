@@ -0,0 +1,200 @@
+"""
+Jerk-limited transition planning for LeLamp motion.
+
+Moving into an animation used to take a fixed number of frames no matter
+how far the lamp had to travel. The planner instead computes, per joint,
+the fastest seven-segment S-curve (jerk-limited acceleration, bounded
+acceleration and velocity) from the present pose to the target pose, then
+stretches every joint to the slowest one so all joints arrive together:
+
+- A lamp that is already close to the target starts the animation almost
+  immediately; a long move takes exactly as long as the limits require
+- Acceleration is continuous (jerk is bounded), so servos do not kick
+
+Limits come from the active motor preset in config.yaml
+(``motor_presets.<preset>.<joint>.max_velocity`` / ``max_acceleration`` /
+``max_jerk``, falling back to the preset's ``default`` block), in the same
+position units as the recordings.
+
+Crossfades between two running recordings use ``crossfade_frames`` to pick
+a blend length that keeps the jump between the two poses within limits.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Used when the motor preset has no limits configured
+DEFAULT_LIMITS = {
+    "max_velocity": 150.0,  # position units / s
+    "max_acceleration": 600.0,  # units / s^2
+    "max_jerk": 5000.0,  # units / s^3
+}
+
+
+@dataclass
+class JointLimits:
+    velocity: float
+    acceleration: float
+    jerk: float
+
+
+def load_joint_limits(config: Optional[Dict]) -> Dict[str, JointLimits]:
+    """Per-joint limits (keyed by motor name, without '.pos') from the active motor preset."""
+    config = config or {}
+    preset = config.get("motor_presets", {}).get(config.get("motor_preset", "Normal"), {}) or {}
+    defaults = {**DEFAULT_LIMITS, **{k: v for k, v in preset.get("default", {}).items() if k in DEFAULT_LIMITS}}
+
+    limits = {"default": JointLimits(defaults["max_velocity"], defaults["max_acceleration"], defaults["max_jerk"])}
+    for joint, joint_config in preset.items():
+        if joint == "default" or not isinstance(joint_config, dict):
+            continue
+        values = {k: joint_config.get(k, defaults[k]) for k in DEFAULT_LIMITS}
+        limits[joint] = JointLimits(values["max_velocity"], values["max_acceleration"], values["max_jerk"])
+    return limits
+
+
+class SCurve:
+    """Rest-to-rest seven-segment S-curve over a signed distance."""
+
+    def __init__(self, distance: float, limits: JointLimits, peak_velocity: Optional[float] = None):
+        self.distance = distance
+        self.limits = limits
+        d = abs(distance)
+        v = min(limits.velocity, self.max_peak_velocity(d, limits))
+        if peak_velocity is not None:
+            v = min(v, peak_velocity)
+        self.peak_velocity = v
+
+        if d <= 0 or v <= 0:
+            self.segments: List[Tuple[float, float]] = []
+            self.duration = 0.0
+            return
+
+        t_jerk, t_accel = _accel_times(v, limits)
+        accel_distance = v * (2 * t_jerk + t_accel) / 2
+        t_cruise = max(0.0, (d - 2 * accel_distance) / v)
+
+        sign = 1.0 if distance > 0 else -1.0
+        j = limits.jerk * sign
+        # (duration, jerk) pieces: accelerate, cruise, decelerate
+        self.segments = [
+            (t_jerk, j), (t_accel, 0.0), (t_jerk, -j),
+            (t_cruise, 0.0),
+            (t_jerk, -j), (t_accel, 0.0), (t_jerk, j),
+        ]
+        self.duration = sum(t for t, _ in self.segments)
+
+    @staticmethod
+    def max_peak_velocity(distance: float, limits: JointLimits) -> float:
+        """Highest peak velocity reachable when accelerating over half the distance."""
+        if distance <= 0:
+            return 0.0
+        a, j = limits.acceleration, limits.jerk
+        # Acceleration reaches its limit: v^2/a + v*a/j = d
+        v = a / 2 * (-(a / j) + math.sqrt((a / j) ** 2 + 4 * distance / a))
+        if v >= a * a / j:
+            return v
+        # Jerk-only ramp (triangular acceleration): 2 * v * sqrt(v/j) = d
+        return (distance * distance * j / 4) ** (1.0 / 3.0)
+
+    @staticmethod
+    def min_duration(distance: float, limits: JointLimits) -> float:
+        return SCurve(distance, limits).duration
+
+    @classmethod
+    def with_duration(cls, distance: float, limits: JointLimits, duration: float) -> "SCurve":
+        """Slowest-cruise S-curve that takes `duration` (at least the minimum)."""
+        fastest = cls(distance, limits)
+        if fastest.duration >= duration or fastest.duration == 0.0:
+            return fastest
+        lo, hi = 0.0, fastest.peak_velocity  # Duration falls as peak velocity rises
+        for _ in range(40):
+            mid = (lo + hi) / 2
+            if cls(distance, limits, mid).duration > duration:
+                lo = mid
+            else:
+                hi = mid
+        return cls(distance, limits, hi)
+
+    def position(self, t: float) -> float:
+        """Displacement from the start at time t (clamped to the end)."""
+        if t >= self.duration:
+            return self.distance
+        p = v = a = 0.0
+        for seg_time, jerk in self.segments:
+            dt = min(seg_time, t)
+            p += v * dt + a * dt * dt / 2 + jerk * dt ** 3 / 6
+            v += a * dt + jerk * dt * dt / 2
+            a += jerk * dt
+            t -= dt
+            if t <= 0:
+                break
+        return p
+
+
+def _accel_times(peak_velocity: float, limits: JointLimits) -> Tuple[float, float]:
+    """(jerk phase, constant-acceleration phase) durations to reach peak_velocity from rest."""
+    a, j = limits.acceleration, limits.jerk
+    if peak_velocity >= a * a / j:
+        return a / j, peak_velocity / a - a / j
+    return math.sqrt(peak_velocity / j), 0.0
+
+
+class TransitionPlanner:
+    """Plans synchronized, limit-respecting moves between poses."""
+
+    def __init__(self, limits: Dict[str, JointLimits], fps: int = 30):
+        self.limits = limits
+        self.fps = fps
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict], fps: int = 30) -> "TransitionPlanner":
+        return cls(load_joint_limits(config), fps)
+
+    def limits_for(self, joint: str) -> JointLimits:
+        motor = joint[:-4] if joint.endswith(".pos") else joint
+        return self.limits.get(motor) or self.limits["default"]
+
+    def duration(self, start: Dict[str, float], target: Dict[str, float]) -> float:
+        """Time-optimal synchronized duration between two poses."""
+        return max(
+            (SCurve.min_duration(target[j] - start.get(j, target[j]), self.limits_for(j)) for j in target),
+            default=0.0,
+        )
+
+    def plan(self, start: Dict[str, float], target: Dict[str, float]) -> List[Dict[str, float]]:
+        """
+        Frames (at fps) moving from `start` to `target`, ending exactly on target.
+
+        Joints missing from `start` jump straight to the target value.
+        """
+        total = self.duration(start, target)
+        if total <= 0:
+            return []
+
+        curves = {
+            j: SCurve.with_duration(target[j] - start.get(j, target[j]), self.limits_for(j), total)
+            for j in target
+        }
+        count = max(1, math.ceil(total * self.fps))
+        frames = []
+        for i in range(1, count + 1):
+            t = min(i / self.fps, total)
+            frames.append({
+                j: start.get(j, target[j]) + curve.position(t) for j, curve in curves.items()
+            })
+        frames[-1] = dict(target)
+        return frames
+
+    def crossfade_frames(self, from_pose: Dict[str, float], to_pose: Dict[str, float],
+                         min_seconds: float = 0.3, max_seconds: float = 4.0) -> int:
+        """Blend length between two running recordings, long enough for the pose gap."""
+        seconds = min(max(self.duration(from_pose, to_pose), min_seconds), max_seconds)
+        return max(1, int(round(seconds * self.fps)))
+
+
+def blend_weight(progress: float) -> float:
+    """Minimum-jerk (quintic smoothstep) blend weight for 0..1 progress."""
+    x = min(max(progress, 0.0), 1.0)
+    return x * x * x * (10 - 15 * x + 6 * x * x)
@@ -6,6 +6,18 @@ from .drivers import get_driver
 from .drivers.base import RGBDriver
 
 
+# Mood tint for each detected facial emotion
+EMOTION_COLORS = {
+    "happy": (255, 200, 0),
+    "sad": (0, 80, 255),
+    "angry": (255, 0, 0),
+    "surprise": (255, 255, 255),
+    "fear": (140, 0, 255),
+    "disgust": (80, 200, 0),
+    "neutral": (255, 180, 120),
+}
+
+
 class RGBService(ServiceBase):
     """
     RGB LED service with automatic driver selection.
@@ -241,6 +253,16 @@ class RGBService(ServiceBase):
         self.controller.stop_animation()
         self.logger.debug("Stopped animation")
 
+    def connect_emotion_service(self, emotion_service):
+        """Tint the current animation with the emotion of the most prominent face"""
+        def on_emotion(event):
+            color = EMOTION_COLORS.get(emotion_service.get_dominant_emotion())
+            if color:
+                self.dispatch("set_color", color)
+
+        emotion_service.subscribe(on_emotion)
+        self.logger.info("Connected to emotion service")
+
     def get_available_animations(self) -> dict:
         """Get all available animations with descriptions"""
         return list_animations()
@@ -9,15 +9,30 @@ ANIMATIONS: Dict[str, dict] = {}
 
 # Default FPS if config not loaded
 _rgb_fps: float = 1.0
+# Fraction of the configured FPS to run at (lowered by the thermal governor)
+_rgb_fps_scale: float = 1.0
 
 def set_rgb_fps(fps: float):
     """Set the global RGB FPS from config"""
     global _rgb_fps
     _rgb_fps = max(0.1, fps)  # Minimum 0.1 FPS
 
+def set_rgb_fps_scale(scale: float):
+    """Run animations at a fraction of the configured FPS"""
+    global _rgb_fps_scale
+    _rgb_fps_scale = max(0.05, min(1.0, scale))
+
+def get_rgb_fps_scale() -> float:
+    """Current FPS scale, for animations with their own fixed frame rate"""
+    return _rgb_fps_scale
+
+def get_rgb_fps() -> float:
+    """Effective RGB FPS"""
+    return max(0.1, _rgb_fps * _rgb_fps_scale)
+
 def get_frame_interval() -> float:
     """Get the frame interval (sleep time) based on configured FPS"""
-    return 1.0 / _rgb_fps
+    return 1.0 / get_rgb_fps()
 
 def register_animation(name: str, description: str):
     """Decorator to register an animation function"""
@@ -0,0 +1,49 @@
+"""Beat Pulse - Flash on every beat of the music the lamp hears"""
+
+import math
+import time
+from typing import Optional, Tuple
+from . import register_animation, get_frame_interval
+
+# Pulses need a faster frame rate than the configured ambient RGB fps
+MAX_FRAME_INTERVAL = 1.0 / 30.0
+
+
+@register_animation(
+    name="beat_pulse",
+    description="Pulses brightness on every beat of the music playing in the room, harder when the music is louder. Use while dancing or when music is on."
+)
+def beat_pulse(controller, color: Optional[Tuple[int, int, int]] = None, duration: Optional[float] = None):
+    """Beat-synced pulse driven by the on-device beat tracker"""
+    from lelamp.service.audio.beat_tracker import get_beat_tracker
+
+    tracker = get_beat_tracker()
+    start_time = time.time()
+    interval = min(get_frame_interval(), MAX_FRAME_INTERVAL)
+
+    while not controller._stop_animation.is_set():
+        now = time.time()
+        if duration and (now - start_time) >= duration:
+            break
+
+        base_color = color if color else controller.get_current_color()
+        state = tracker.get_state()
+
+        if state.active:
+            # Render half a frame ahead so the flash lands on the beat, then decay
+            phase = tracker.phase_at(now + interval / 2)
+            intensity = 0.25 + 0.75 * math.exp(-phase * 6.0) * (0.4 + 0.6 * state.energy)
+        else:
+            # No music: slow breathing so the ring isn't dead
+            intensity = 0.3 + 0.1 * math.sin(now * 1.5)
+
+        frame = [(0, 0, 0)] * controller.led_count
+        active_color = (int(base_color[0] * intensity),
+                        int(base_color[1] * intensity),
+                        int(base_color[2] * intensity))
+
+        for i in range(controller._active_led_start, controller._active_led_end + 1):
+            frame[i] = active_color
+
+        controller._update_frame(frame)
+        time.sleep(interval)
@@ -4,7 +4,7 @@ import time
 import math
 import random
 from typing import Optional, Tuple, List
-from . import register_animation
+from . import register_animation, get_rgb_fps_scale
 
 
 @register_animation(
@@ -256,7 +256,7 @@ def eye(controller, color: Optional[Tuple[int, int, int]] = None, duration: floa
 
         # FPS timing
         frame_end = time.time()
-        sleep_time = frame_time - (frame_end - current_time)
+        sleep_time = frame_time / get_rgb_fps_scale() - (frame_end - current_time)
         if sleep_time > 0:
             time.sleep(sleep_time)
 
@@ -281,6 +281,6 @@ def eye(controller, color: Optional[Tuple[int, int, int]] = None, duration: floa
             for i in range(led_count)
         ]
         controller._update_frame(frame)
-        time.sleep(frame_time)
+        time.sleep(frame_time / get_rgb_fps_scale())
 
     controller._update_frame([(0, 0, 0)] * led_count)
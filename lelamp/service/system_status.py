@@ -0,0 +1,296 @@
+"""
+Background system-status collector for LeLamp.
+
+Dashboard polling used to run every probe in get_system_status() per
+request (nmcli, ip, usb-devices, uname, vcgencmd, an HTTP WAN-IP lookup),
+so each open dashboard forked processes continuously. The collector
+samples each metric on its own thread and cadence instead:
+
+- cheap sysfs/procfs values (temperature, CPU, memory) every few seconds
+- network and servo-driver probes every 15-60 s, WAN IP every 10 minutes
+- device identity (serial, model, OS, version) once
+
+Samples go into a snapshot dict that is replaced wholesale, so readers
+(status endpoints, FanService, the thermal governor) get constant-time,
+lock-free reads. Every value carries the time it was sampled so callers
+can tell how stale it is. Demand is tracked per metric: a metric nobody
+has read for a while stops being sampled, so a background reader of
+temperature and CPU (the thermal governor, FanService) doesn't keep the
+network probes running. With no readers at all the thread sleeps until
+the next read.
+"""
+
+import logging
+import platform
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from lelamp import user_data
+
+logger = logging.getLogger(__name__)
+
+IDLE_AFTER = 60.0  # Seconds without a reader before a metric's sampling pauses
+
+# Seconds between samples per metric (None = sample once)
+DEFAULT_INTERVALS: Dict[str, Optional[float]] = {
+    "temperature": 2.0,
+    "cpu_percent": 2.0,
+    "memory": 5.0,
+    "disk": 60.0,
+    "uptime": 60.0,
+    "wifi": 15.0,
+    "internet": 30.0,
+    "local_ip": 30.0,
+    "wan_ip": 600.0,
+    "servo_driver_sn": 30.0,
+    "device": None,
+    "os": None,
+    "kernel": None,
+    "lelamp_version": None,
+}
+
+
+@dataclass(frozen=True)
+class Sample:
+    """One sampled value and when it was taken."""
+    value: Any
+    timestamp: float
+    error: Optional[str] = None  # Last probe error (value is the previous sample)
+
+
+class SystemStatusCollector:
+    """Samples system metrics on a background thread."""
+
+    def __init__(self, intervals: Optional[Dict[str, Optional[float]]] = None):
+        self.intervals = {**DEFAULT_INTERVALS, **(intervals or {})}
+        self._probes: Dict[str, Callable[[], Any]] = {
+            "temperature": user_data.get_temperature,
+            "cpu_percent": self._cpu_percent,
+            "memory": user_data.get_memory_usage,
+            "disk": lambda: user_data.get_disk_usage("/"),
+            "uptime": user_data.get_uptime,
+            "wifi": user_data.get_wifi_status,
+            "internet": user_data.get_internet_status,
+            "local_ip": self._local_ip,
+            "wan_ip": self._wan_ip,
+            "servo_driver_sn": user_data.get_servo_driver_sn,
+            "device": self._device,
+            "os": lambda: user_data.get_os_info().get('PRETTY_NAME', 'Unknown'),
+            "kernel": user_data.get_kernel_version,
+            "lelamp_version": user_data.get_lelamp_version,
+        }
+
+        self._snapshot: Dict[str, Sample] = {}
+        self._due: Dict[str, float] = {}
+        self._last_read: Dict[str, float] = {}  # Per metric
+        self._cpu_last = None  # (active, total) jiffies from the previous sample
+
+        self._lock = threading.Lock()  # Serialises sampling, never taken by readers
+        self._wake = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.probe_runs: Dict[str, int] = {name: 0 for name in self._probes}
+
+    # =========================================================================
+    # Probes that need the collector's own state
+    # =========================================================================
+
+    def _cpu_percent(self) -> Optional[float]:
+        """CPU usage between two /proc/stat samples (load average until then)."""
+        try:
+            with open('/proc/stat', 'r') as f:
+                parts = f.readline().split()
+            values = [int(v) for v in parts[1:8]]
+            active = sum(values) - values[3] - values[4]  # All but idle and iowait
+            total = sum(values)
+        except Exception as e:
+            logger.debug(f"Could not read /proc/stat: {e}")
+            return user_data.get_cpu_usage_instant()
+
+        last, self._cpu_last = self._cpu_last, (active, total)
+        if last is None or total <= last[1]:
+            return user_data.get_cpu_usage_instant()
+        return round((active - last[0]) / (total - last[1]) * 100, 1)
+
+    def _local_ip(self) -> Optional[str]:
+        wifi = self.get_value("wifi", {}, touch=False) or {}
+        return user_data.get_local_ip(wifi.get("interface", "wlan0"))
+
+    def _wan_ip(self) -> Optional[str]:
+        internet = self.get_value("internet", {}, touch=False) or {}
+        return user_data.get_wan_ip() if internet.get("connected") else None
+
+    def _device(self) -> Dict[str, Any]:
+        return {
+            "serial": user_data.get_device_serial(),
+            "serial_short": user_data.get_device_serial_short(),
+            "model": user_data.get_device_model(),
+            "hostname": platform.node(),
+        }
+
+    # =========================================================================
+    # Sampling
+    # =========================================================================
+
+    def sample(self, name: str):
+        """Run one probe now (outside its cadence) and publish its value."""
+        with self._lock:
+            self._sample(name)
+
+    def _sample(self, name: str):
+        now = time.time()
+        previous = self._snapshot.get(name)
+        try:
+            sample = Sample(self._probes[name](), now)
+        except Exception as e:
+            logger.debug(f"System status probe {name} failed: {e}")
+            sample = Sample(previous.value if previous else None, previous.timestamp if previous else now, str(e))
+        self.probe_runs[name] += 1
+        # Copy-on-write: readers keep whichever complete dict they grabbed
+        self._snapshot = {**self._snapshot, name: sample}
+        interval = self.intervals.get(name)
+        self._due[name] = now + interval if interval is not None else float("inf")
+
+    def sample_due(self, names: Optional[Iterable[str]] = None) -> float:
+        """Run every probe (of `names`, default all) that is due; returns seconds until the next one is."""
+        names = list(self._probes if names is None else names)
+        with self._lock:
+            for name in names:
+                if time.time() >= self._due.get(name, 0.0):
+                    self._sample(name)
+            return max(0.0, min(self._due.get(name, 0.0) for name in names) - time.time())
+
+    def _demanded(self) -> List[str]:
+        """Metrics read within IDLE_AFTER."""
+        cutoff = time.time() - IDLE_AFTER
+        return [name for name, last in self._last_read.items() if last >= cutoff]
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="system-status", daemon=True)
+        self._thread.start()
+        logger.info("System status collector started")
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _loop(self):
+        while self._running:
+            demanded = self._demanded()
+            if not demanded:
+                # Nobody is looking: sleep until the next read wakes us
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            wait = self.sample_due(demanded)
+            if self._wake.wait(min(wait, IDLE_AFTER)):
+                self._wake.clear()
+
+    # =========================================================================
+    # Reading (constant time, no locks, no probes)
+    # =========================================================================
+
+    def _touch(self, names: Iterable[str]):
+        now = time.time()
+        cutoff = now - IDLE_AFTER
+        woke = False
+        for name in names:
+            woke = woke or self._last_read.get(name, 0.0) < cutoff
+            self._last_read[name] = now
+        if not self._running:
+            self.start()
+        elif woke:
+            self._wake.set()
+
+    def get(self, name: str, touch: bool = True) -> Optional[Sample]:
+        """Latest sample of one metric; touch=True keeps that metric (only) sampled."""
+        if touch:
+            self._touch((name,))
+        return self._snapshot.get(name)
+
+    def get_value(self, name: str, default: Any = None, touch: bool = True) -> Any:
+        sample = self.get(name, touch)
+        return sample.value if sample is not None else default
+
+    def get_snapshot(self) -> Dict[str, Sample]:
+        self._touch(self._probes)
+        return self._snapshot
+
+    def get_status(self) -> Dict[str, Any]:
+        """Dashboard status in get_system_status() shape, plus sample ages."""
+        # Never probes on the caller's thread (often an async route): the first
+        # read after startup returns what's sampled so far and the background
+        # thread fills in the rest within a round
+        snapshot = self.get_snapshot()
+        now = time.time()
+
+        def value(name, default=None):
+            sample = snapshot.get(name)
+            return sample.value if sample is not None else default
+
+        device = dict(value("device", {}))
+        device["servo_driver_sn"] = value("servo_driver_sn")
+        return {
+            "temperature": value("temperature"),
+            "cpu_percent": value("cpu_percent"),
+            "memory": value("memory", {}),
+            "disk": value("disk", {}),
+            "uptime": self._uptime(snapshot.get("uptime"), now),
+            "network": {
+                "wifi_status": value("wifi", {}),
+                "internet_status": value("internet", {}),
+                "local_ip": value("local_ip"),
+                "wan_ip": value("wan_ip"),
+            },
+            "device": device,
+            "os": value("os", "Unknown"),
+            "kernel": value("kernel", platform.release()),
+            "lelamp_version": value("lelamp_version", "unknown"),
+            "sample_age": {name: round(now - s.timestamp, 1) for name, s in snapshot.items()},
+        }
+
+    @staticmethod
+    def _uptime(sample: Optional[Sample], now: float) -> Dict[str, Any]:
+        """Uptime advanced from its last sample (cheaper than sampling it often)."""
+        if sample is None or not sample.value or not sample.value.get("seconds"):
+            return {"seconds": 0, "formatted": "unknown"}
+        seconds = int(sample.value["seconds"] + now - sample.timestamp)
+        days, hours, minutes = seconds // 86400, (seconds % 86400) // 3600, (seconds % 3600) // 60
+        parts = []
+        if days > 0:
+            parts.append(f"{days}d")
+        if hours > 0 or days > 0:
+            parts.append(f"{hours}h")
+        parts.append(f"{minutes}m")
+        return {"seconds": seconds, "formatted": " ".join(parts)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "idle": not self._demanded(),
+            "demanded": self._demanded(),
+            "probe_runs": dict(self.probe_runs),
+        }
+
+
+# Global instance
+_collector: Optional[SystemStatusCollector] = None
+_collector_lock = threading.Lock()
+
+
+def get_status_collector() -> SystemStatusCollector:
+    """Get the global SystemStatusCollector instance (created on first use)"""
+    global _collector
+    with _collector_lock:
+        if _collector is None:
+            _collector = SystemStatusCollector()
+        return _collector
@@ -6,11 +6,13 @@ Provides themed audio playback with support for custom sound themes.
 
 import os
 import logging
-import subprocess
+import threading
 from pathlib import Path
 from typing import Optional
 from enum import Enum
 
+from lelamp.service.audio.audio_mixer import get_audio_mixer
+
 
 class ThemeSound(Enum):
     """Standard theme sound names"""
@@ -85,6 +87,7 @@ class ThemeService:
         else:
             self.logger.info(f"ThemeService initialized with theme '{theme_name}'")
             self._log_available_sounds()
+            self._preload_sounds()
 
     def _log_available_sounds(self):
         """Log which sounds are available in the current theme"""
@@ -95,6 +98,11 @@ class ThemeService:
                 available.append(sound.value)
         self.logger.info(f"Available theme sounds: {', '.join(available)}")
 
+    def _preload_sounds(self):
+        """Decode the theme's sounds into the mixer cache in the background"""
+        paths = [p for p in (self.get_sound_path(sound) for sound in ThemeSound) if p]
+        threading.Thread(target=get_audio_mixer().preload, args=(paths,), daemon=True).start()
+
     def set_theme(self, theme_name: str) -> bool:
         """
         Switch to a different theme.
@@ -114,6 +122,7 @@ class ThemeService:
         self.theme_path = new_path
         self.logger.info(f"Switched to theme '{theme_name}'")
         self._log_available_sounds()
+        self._preload_sounds()
         return True
 
     def get_sound_path(self, sound: ThemeSound) -> Optional[Path]:
@@ -151,7 +160,9 @@ class ThemeService:
 
     def _play_file(self, file_path: str, blocking: bool = False) -> bool:
         """
-        Play an audio file using aplay.
+        Play an audio file through the shared mixer.
+
+        Theme sounds mix over effects and each other instead of cutting them off.
 
         Args:
             file_path: Path to the audio file
@@ -160,32 +171,16 @@ class ThemeService:
         Returns:
             True if playback started/completed successfully
         """
-        try:
-            # cmd = ["aplay", "-q", "-D", "lelamp_playback", file_path]
-            import sounddevice as sd
-            import soundfile as sf
-            data, fs = sf.read(file_path)
-            sd.play(data, fs)
-            if blocking:
-                sd.wait()
-                # subprocess.run(cmd, timeout=30, check=False)
-            else:
-                pass
-                # subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-            self.logger.debug(f"Playing theme sound: {file_path}")
-            return True
-
-        except subprocess.TimeoutExpired:
-            self.logger.warning(f"Sound playback timed out: {file_path}")
-            return False
-        except FileNotFoundError:
-            self.logger.error("aplay not found - audio playback unavailable")
-            return False
-        except Exception as e:
-            self.logger.error(f"Error playing sound {file_path}: {e}")
+        voice = get_audio_mixer().play(file_path)
+        if voice is None:
+            self.logger.error(f"Error playing sound {file_path}")
             return False
 
+        self.logger.debug(f"Playing theme sound: {file_path}")
+        if blocking:
+            voice.wait(timeout=voice.duration + 2.0)
+        return True
+
     def list_themes(self) -> list:
         """
         List all available themes.
@@ -0,0 +1,282 @@
+"""
+Thermal-aware load governor for LeLamp.
+
+The camera loop, LED animations and scene analysis all run at fixed rates
+until the Pi firmware throttles the CPU, which then hurts latency
+everywhere (audio, motion, the agent). The governor sheds load first:
+
+- every few seconds it reads the SoC temperature and CPU load (from the
+  system status collector) and the overrun ratio of registered loops
+  (vision, animation); overruns only add pressure while the SoC is
+  already warm or busy, never on their own
+- while under pressure it steps up one throttle level at a time; each
+  level lowers more "knobs" (scene analysis, LED fps, detector rate,
+  hand tracking), cheapest-to-lose first
+- once there is clear headroom for long enough it steps back down
+
+Hysteresis comes from separate throttle/restore thresholds plus separate
+hold times, so a reading hovering at the limit doesn't flap the levels.
+Knobs are plain callables taking a rate scale (1.0 = full rate, 0 = off),
+so the services don't know about the governor.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Rate scale per knob at each throttle level (missing = 1.0)
+THROTTLE_LEVELS: List[Dict[str, float]] = [
+    {},
+    {"analysis": 0.5},
+    {"analysis": 0.25, "rgb": 0.5},
+    {"analysis": 0.25, "rgb": 0.5, "vision": 0.5, "hands": 0.5},
+    {"analysis": 0.0, "rgb": 0.25, "vision": 0.5, "hands": 0.0},
+    {"analysis": 0.0, "rgb": 0.25, "vision": 0.25, "hands": 0.0},
+]
+
+MIN_LOOP_FRAMES = 5  # Frames needed in a window before its overrun ratio counts
+
+
+def _collector_value(name: str) -> Optional[float]:
+    # Touches only this metric, so the collector's network probes stay idle
+    from lelamp.service.system_status import get_status_collector
+    return get_status_collector().get_value(name)
+
+
+class ThermalGovernor:
+    """Steps workload rates down under thermal/CPU pressure and back up with headroom."""
+
+    def __init__(
+        self,
+        throttle_temp: float = 70.0,
+        restore_temp: float = 62.0,
+        critical_temp: float = 80.0,
+        cpu_high: float = 90.0,
+        cpu_low: float = 70.0,
+        overrun_high: float = 0.3,
+        step_up_after: float = 6.0,
+        restore_after: float = 30.0,
+        interval: float = 2.0,
+        levels: Optional[List[Dict[str, float]]] = None,
+        read_temperature: Optional[Callable[[], Optional[float]]] = None,
+        read_cpu: Optional[Callable[[], Optional[float]]] = None,
+        time_fn: Callable[[], float] = time.time,
+    ):
+        self.throttle_temp = throttle_temp
+        self.restore_temp = restore_temp
+        self.critical_temp = critical_temp  # Jump straight to the last level
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.overrun_high = overrun_high  # Fraction of a loop's frames over budget
+        self.step_up_after = step_up_after  # Seconds of pressure per level up
+        self.restore_after = restore_after  # Seconds of headroom per level down
+        self.interval = interval
+        self.levels = levels or THROTTLE_LEVELS
+        self.read_temperature = read_temperature or (lambda: _collector_value("temperature"))
+        self.read_cpu = read_cpu or (lambda: _collector_value("cpu_percent"))
+        self.time_fn = time_fn
+
+        self.level = 0
+        self._knobs: Dict[str, Callable[[float], Any]] = {}
+        self._loops: Dict[str, Callable[[], Dict]] = {}
+        self._loop_last: Dict[str, tuple] = {}  # name -> (frames, overruns) at the last evaluation
+        self._pressure_since: Optional[float] = None
+        self._headroom_since: Optional[float] = None
+        self._last_inputs: Dict[str, Any] = {}
+        self.level_changes = 0
+
+        self._running = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> "ThermalGovernor":
+        governor = cls()
+        governor.configure(config)
+        return governor
+
+    def configure(self, config: Optional[Dict]):
+        """Apply thermal: settings (also used to hot-reload them)."""
+        config = config or {}
+        self.throttle_temp = config.get("throttle_temp", 70.0)
+        self.restore_temp = config.get("restore_temp", 62.0)
+        self.critical_temp = config.get("critical_temp", 80.0)
+        self.cpu_high = config.get("cpu_high", 90.0)
+        self.cpu_low = config.get("cpu_low", 70.0)
+        self.overrun_high = config.get("overrun_high", 0.3)
+        self.step_up_after = config.get("step_up_after", 6.0)
+        self.restore_after = config.get("restore_after", 30.0)
+        self.interval = config.get("interval", 2.0)
+
+    # =========================================================================
+    # Registration
+    # =========================================================================
+
+    def add_knob(self, name: str, apply: Callable[[float], Any]):
+        """Register a rate setter; it receives the current scale every evaluation."""
+        self._knobs[name] = apply
+        self._apply_knob(name)
+
+    def add_loop(self, name: str, get_stats: Callable[[], Dict]):
+        """Register a loop whose {"frames", "overruns"} counters signal overload."""
+        self._loops[name] = get_stats
+
+    # =========================================================================
+    # Evaluation
+    # =========================================================================
+
+    def _overrun_ratios(self) -> Dict[str, float]:
+        ratios = {}
+        for name, get_stats in self._loops.items():
+            try:
+                stats = get_stats()
+            except Exception as e:
+                logger.debug(f"Loop stats for {name} failed: {e}")
+                continue
+            if not stats:
+                continue
+            frames, overruns = stats.get("frames", 0), stats.get("overruns", 0)
+            last_frames, last_overruns = self._loop_last.get(name, (0, 0))
+            if frames - last_frames >= MIN_LOOP_FRAMES:
+                ratios[name] = round((overruns - last_overruns) / (frames - last_frames), 3)
+                self._loop_last[name] = (frames, overruns)
+            elif frames < last_frames:
+                self._loop_last[name] = (frames, overruns)  # Service restarted
+        return ratios
+
+    def evaluate(self) -> int:
+        """Read the inputs, move at most one level (or jump on critical temp), apply knobs."""
+        now = self.time_fn()
+        temperature = self.read_temperature()
+        cpu = self.read_cpu()
+        overruns = self._overrun_ratios()
+        worst_overrun = max(overruns.values(), default=0.0)
+        self._last_inputs = {"temperature": temperature, "cpu_percent": cpu, "overruns": overruns}
+
+        # Overruns only count while the SoC is warm or busy. A camera loop that
+        # simply can't reach its fps overruns on a cool lamp too, and shedding
+        # load for it would just clear the overruns and oscillate.
+        loaded = (
+            (temperature is not None and temperature > self.restore_temp)
+            or (cpu is not None and cpu > self.cpu_low)
+        )
+        pressure = (
+            (temperature is not None and temperature >= self.throttle_temp)
+            or (cpu is not None and cpu >= self.cpu_high)
+            or (loaded and worst_overrun >= self.overrun_high)
+        )
+        headroom = not loaded
+
+        top = len(self.levels) - 1
+        if temperature is not None and temperature >= self.critical_temp and self.level < top:
+            self._set_level(top, f"critical temperature {temperature:.1f}°C")
+        elif pressure:
+            self._headroom_since = None
+            if self._pressure_since is None:
+                self._pressure_since = now
+            elif now - self._pressure_since >= self.step_up_after and self.level < top:
+                self._set_level(self.level + 1, self._reason(temperature, cpu, worst_overrun))
+                self._pressure_since = now
+        elif headroom:
+            self._pressure_since = None
+            if self._headroom_since is None:
+                self._headroom_since = now
+            elif now - self._headroom_since >= self.restore_after and self.level > 0:
+                self._set_level(self.level - 1, "headroom")
+                self._headroom_since = now
+        else:
+            # Between the thresholds: hold the current level
+            self._pressure_since = None
+            self._headroom_since = None
+
+        for name in self._knobs:
+            self._apply_knob(name)
+        return self.level
+
+    def _reason(self, temperature, cpu, overrun) -> str:
+        parts = []
+        if temperature is not None and temperature >= self.throttle_temp:
+            parts.append(f"{temperature:.1f}°C")
+        if cpu is not None and cpu >= self.cpu_high:
+            parts.append(f"CPU {cpu:.0f}%")
+        if overrun >= self.overrun_high:
+            parts.append(f"{overrun:.0%} loop overruns")
+        return ", ".join(parts)
+
+    def _set_level(self, level: int, reason: str):
+        previous, self.level = self.level, level
+        self.level_changes += 1
+        if level > previous:
+            logger.warning(f"Thermal governor: level {previous} -> {level} ({reason}): {self.get_scales()}")
+        else:
+            logger.info(f"Thermal governor: level {previous} -> {level} ({reason})")
+
+    def get_scales(self) -> Dict[str, float]:
+        scales = self.levels[self.level]
+        return {name: scales.get(name, 1.0) for name in self._knobs}
+
+    def _apply_knob(self, name: str):
+        try:
+            self._knobs[name](self.levels[self.level].get(name, 1.0))
+        except Exception as e:
+            logger.debug(f"Thermal knob {name} failed: {e}")
+
+    # =========================================================================
+    # Lifecycle
+    # =========================================================================
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="thermal-governor", daemon=True)
+        self._thread.start()
+        logger.info("Thermal governor started")
+
+    def stop(self):
+        self._running = False
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        # Leave everything at full rate
+        self.level = 0
+        for name in self._knobs:
+            self._apply_knob(name)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.evaluate()
+            except Exception as e:
+                logger.error(f"Thermal governor error: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "level": self.level,
+            "max_level": len(self.levels) - 1,
+            "scales": self.get_scales(),
+            "inputs": self._last_inputs,
+            "level_changes": self.level_changes,
+        }
+
+
+# Global instance
+_thermal_governor: Optional[ThermalGovernor] = None
+
+
+def get_thermal_governor() -> Optional[ThermalGovernor]:
+    """Get the global ThermalGovernor instance"""
+    return _thermal_governor
+
+
+def init_thermal_governor(config: Optional[Dict] = None) -> ThermalGovernor:
+    """Initialize and return the global ThermalGovernor instance"""
+    global _thermal_governor
+    _thermal_governor = ThermalGovernor.from_config(config)
+    return _thermal_governor
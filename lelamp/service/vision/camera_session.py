@@ -0,0 +1,350 @@
+"""
+Shared camera session for LeLamp.
+
+The setup camera endpoints used to open a fresh cv2.VideoCapture for
+every snapshot and every preview stream: each paid the device open and
+auto-exposure settling time, and each fought VisionService (and each
+other) for the device. They now share one session instead:
+
+- consumers acquire() a lease for a device; the session opens it once,
+  reads frames on its own thread and keeps only the newest one, which
+  every consumer reads (JPEG-encoded once per frame and quality)
+- the device stays open while any lease is held, and for an idle timeout
+  after the last one goes away, so back-to-back snapshots are instant
+- acquiring a different device switches the session to it without a
+  restart; leases on the old device see active == False and end
+- if VisionService is already running on the requested device, frames
+  are taken from it rather than opening the device a second time
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+logger = logging.getLogger(__name__)
+
+IDLE_TIMEOUT = 10.0  # Seconds the device stays open after the last consumer
+PREVIEW_RESOLUTION = (640, 480)
+PREVIEW_FPS = 15
+FRESH_FRAME = 0.2  # A snapshot can reuse a frame this recent
+READ_FAILURES = 30  # Consecutive failed reads before the device is reopened
+
+
+@dataclass
+class CameraFrame:
+    """Newest frame read from the device."""
+    seq: int
+    timestamp: float
+    image: Any  # BGR numpy array
+    _jpeg: Dict[int, bytes] = field(default_factory=dict, repr=False)  # Quality -> encoded
+
+
+class CameraLease:
+    """A consumer's hold on the session; release() it when done."""
+
+    def __init__(self, session: "CameraSession", device: str):
+        self.session = session
+        self.device = device
+        self.released = False
+
+    @property
+    def active(self) -> bool:
+        """False once released or once the session switched to another device."""
+        return not self.released and self.session.device == self.device and self.session.error is None
+
+    def release(self):
+        self.session.release(self)
+
+
+def same_device(a: Any, b: Any) -> bool:
+    """Whether two camera identifiers (paths, symlinks or indexes) are the same device."""
+    def resolve(device):
+        if isinstance(device, int) or (isinstance(device, str) and device.isdigit()):
+            device = f"/dev/video{device}"
+        return os.path.realpath(device)
+    try:
+        return resolve(a) == resolve(b)
+    except (TypeError, ValueError):
+        return False
+
+
+def _open_capture(device: str):
+    """Open a device for preview; None if it can't be opened."""
+    if cv2 is None:
+        raise RuntimeError("OpenCV is not installed")
+    cap = cv2.VideoCapture(device)
+    if not cap.isOpened():
+        cap.release()
+        return None
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, PREVIEW_RESOLUTION[0])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, PREVIEW_RESOLUTION[1])
+    cap.set(cv2.CAP_PROP_FPS, PREVIEW_FPS)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+def _encode_jpeg(image, quality: int) -> Optional[bytes]:
+    ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes() if ok else None
+
+
+class _VisionFrames:
+    """cv2.VideoCapture-like reader over VisionService's newest frames."""
+
+    def __init__(self, vision_service, fps: int):
+        self.vision_service = vision_service
+        self.interval = 1.0 / fps
+        self._last_seq = 0
+
+    def read(self):
+        deadline = time.time() + 1.0
+        while time.time() < deadline and self.vision_service.cap is not None:
+            latest = self.vision_service.get_latest_frame()
+            if latest is not None and latest[0] != self._last_seq:
+                self._last_seq = latest[0]
+                return True, latest[2]
+            time.sleep(self.interval / 2)
+        return False, None
+
+    def release(self):
+        pass
+
+
+class CameraSession:
+    """
+    One open camera shared by reference-counted consumers.
+
+    acquire()/release() and the frame accessors are safe to call from any
+    thread or the event loop; only the session thread touches the device.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float = IDLE_TIMEOUT,
+        open_camera: Optional[Callable[[str], Any]] = None,
+        encode_jpeg: Optional[Callable[[Any, int], Optional[bytes]]] = None,
+        vision_service: Optional[Callable[[], Any]] = None,
+    ):
+        self.idle_timeout = idle_timeout
+        self._open_camera = open_camera or _open_capture
+        self._encode_jpeg = encode_jpeg or _encode_jpeg
+        self._vision_service = vision_service or self._global_vision_service
+
+        self.device: Optional[str] = None
+        self.error: Optional[str] = None  # Why the current device isn't delivering frames
+        self.source: Optional[str] = None  # "device" or "vision"
+        self._lock = threading.Lock()
+        self._refs = 0
+        self._idle_since: Optional[float] = None
+        self._frame: Optional[CameraFrame] = None
+        self._seq = 0
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+
+        self.opens = 0
+        self.frames = 0
+        self.encodes = 0
+
+    @staticmethod
+    def _global_vision_service():
+        import lelamp.globals as g
+        return g.vision_service
+
+    # =========================================================================
+    # Consumers
+    # =========================================================================
+
+    def acquire(self, device: str) -> CameraLease:
+        """Hold the session on device, opening it (or switching to it) if needed."""
+        with self._lock:
+            if device != self.device or self.error:
+                logger.info(f"Camera session: switching to {device}" if self.device else
+                            f"Camera session: opening {device}")
+                self.device = device
+                self.error = None
+                self._frame = None
+            self._refs += 1
+            self._idle_since = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="camera-session", daemon=True)
+                self._thread.start()
+            self._wake.set()
+        return CameraLease(self, device)
+
+    def release(self, lease: CameraLease):
+        with self._lock:
+            if lease.released:
+                return
+            lease.released = True
+            self._refs = max(0, self._refs - 1)
+            if self._refs == 0:
+                self._idle_since = time.time()
+
+    def get_frame(self) -> Optional[CameraFrame]:
+        return self._frame
+
+    async def wait_for_frame(self, lease: CameraLease, after_seq: int = 0,
+                             timeout: float = 2.0) -> Optional[CameraFrame]:
+        """Wait (without blocking the loop) for a frame newer than after_seq."""
+        deadline = time.time() + timeout
+        while lease.active and time.time() < deadline:
+            frame = self._frame
+            if frame is not None and frame.seq > after_seq:
+                return frame
+            await asyncio.sleep(0.01)
+        return None
+
+    def encode(self, frame: CameraFrame, quality: int = 70) -> Optional[bytes]:
+        """JPEG for a frame, encoded once per quality however many consumers ask."""
+        jpeg = frame._jpeg.get(quality)
+        if jpeg is None:
+            jpeg = self._encode_jpeg(frame.image, quality)
+            if jpeg is not None:
+                frame._jpeg[quality] = jpeg
+                self.encodes += 1
+        return jpeg
+
+    async def snapshot(self, device: str, quality: int = 85, timeout: float = 3.0) -> Optional[bytes]:
+        """One JPEG from device; reuses the stream's frame when one is fresh."""
+        lease = self.acquire(device)
+        try:
+            frame = self._frame
+            if frame is None or time.time() - frame.timestamp > FRESH_FRAME:
+                frame = await self.wait_for_frame(lease, frame.seq if frame else 0, timeout)
+            if frame is None or not lease.active:
+                return None
+            return self.encode(frame, quality)
+        finally:
+            lease.release()
+
+    def is_serving(self, device: str) -> bool:
+        """Whether the session currently has device open (so probing it would fail)."""
+        return self.device is not None and self.source is not None and same_device(self.device, device)
+
+    def close(self):
+        """Close the device now, regardless of consumers."""
+        with self._lock:
+            self.device = None
+            self._frame = None
+            thread, self._thread = self._thread, None
+            self._wake.set()
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=2)
+
+    # =========================================================================
+    # Session thread
+    # =========================================================================
+
+    def _should_stop(self) -> bool:
+        with self._lock:
+            idle = self._refs == 0 and self._idle_since is not None and (
+                time.time() - self._idle_since >= self.idle_timeout or self.error is not None)
+            if self.device is None or idle:
+                # Under the lock, so a concurrent acquire() starts a fresh thread
+                self.device = None
+                self._frame = None
+                if self._thread is threading.current_thread():
+                    self._thread = None
+                return True
+            return False
+
+    def _open(self, device: str):
+        vision = self._vision_service()
+        if vision is not None and getattr(vision, "cap", None) is not None \
+                and hasattr(vision, "get_latest_frame") and same_device(vision.camera_index, device):
+            self.source = "vision"
+            return _VisionFrames(vision, PREVIEW_FPS)
+        cap = self._open_camera(device)
+        if cap is not None:
+            self.source = "device"
+            self.opens += 1
+        return cap
+
+    def _run(self):
+        cap = None
+        device = None
+        failures = 0
+        try:
+            while not self._should_stop():
+                if self.device != device or cap is None:
+                    if cap is not None:
+                        cap.release()
+                        cap = None
+                    self.source = None
+                    device = self.device
+                    if device is None:
+                        continue
+                    try:
+                        cap = self._open(device)
+                    except Exception as e:
+                        cap = None
+                        logger.error(f"Camera session: failed to open {device}: {e}")
+                    if cap is None:
+                        if self.device == device:
+                            self.error = f"Failed to open camera {device}"
+                        self._wake.clear()
+                        self._wake.wait(0.5)  # Until a different device is requested (or retry)
+                        continue
+                    self.error = None
+                    failures = 0
+
+                ret, image = cap.read()
+                if not ret or image is None:
+                    failures += 1
+                    if failures >= READ_FAILURES:
+                        logger.warning(f"Camera session: {device} stopped delivering frames, reopening")
+                        cap.release()
+                        cap = None
+                    else:
+                        time.sleep(0.02)
+                    continue
+                failures = 0
+                if self.device != device:
+                    continue  # Switched while reading; don't publish the old device's frame
+                self._seq += 1
+                self._frame = CameraFrame(seq=self._seq, timestamp=time.time(), image=image)
+                self.frames += 1
+        except Exception as e:
+            logger.error(f"Camera session error: {e}")
+            self.error = str(e)
+        finally:
+            if cap is not None:
+                cap.release()
+            self.source = None
+            logger.info(f"Camera session: closed {device}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        frame = self._frame
+        return {
+            "device": self.device,
+            "source": self.source,
+            "consumers": self._refs,
+            "error": self.error,
+            "opens": self.opens,
+            "frames": self.frames,
+            "encodes": self.encodes,
+            "frame_age": round(time.time() - frame.timestamp, 3) if frame else None,
+        }
+
+
+# Global instance
+_camera_session: Optional[CameraSession] = None
+_camera_session_lock = threading.Lock()
+
+
+def get_camera_session() -> CameraSession:
+    """Get the global CameraSession instance (created on first use)"""
+    global _camera_session
+    with _camera_session_lock:
+        if _camera_session is None:
+            _camera_session = CameraSession()
+        return _camera_session
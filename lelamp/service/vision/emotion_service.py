@@ -0,0 +1,403 @@
+"""
+EmotionService - Facial emotion recognition on tracked faces
+
+Consumes the face boxes VisionService already detects instead of running a
+detector and classifier on every frame:
+
+1. Faces are matched to stable track IDs (IoU, then centre distance)
+2. A track is only re-classified when it is new, when its appearance
+   changed (small grayscale signature of the crop), while its smoothed
+   label disagrees with the latest reading, or when its re-classification
+   interval ran out
+3. Crops due for classification are batched and classified on a worker
+   thread, so the camera loop never waits for the model
+4. Per-track probabilities are smoothed (EMA) and the label only switches
+   when another emotion clearly wins, so one odd frame does not flip it
+
+Label changes are published as EmotionEvents to subscribers (RGB tint,
+animation reactions, ...).
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from deepface import DeepFace
+except ImportError:
+    DeepFace = None
+
+logger = logging.getLogger("service.EmotionService")
+
+EMOTIONS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+
+Box = Tuple[int, int, int, int]  # (x, y, w, h) in frame pixels
+
+
+@dataclass
+class EmotionEvent:
+    """Smoothed emotion of a tracked face changed (emotion None = face gone)"""
+    track_id: int
+    emotion: Optional[str]
+    confidence: float
+    previous: Optional[str]
+    box: Optional[Box]
+    timestamp: float
+
+
+@dataclass
+class FaceTrack:
+    track_id: int
+    box: Box
+    last_seen: float
+    signature: Optional[np.ndarray] = None  # Appearance at last classification
+    last_classified: float = 0.0
+    pending: bool = False  # Crop queued for the worker
+    probabilities: Dict[str, float] = field(default_factory=dict)  # Smoothed
+    raw_emotion: Optional[str] = None  # Top label of the last classification
+    emotion: Optional[str] = None
+    confidence: float = 0.0
+
+
+class DeepFaceClassifier:
+    """Classifies pre-cropped faces with DeepFace (face detection skipped)"""
+
+    def __init__(self):
+        if DeepFace is None:
+            raise RuntimeError("deepface is not installed")
+
+    def classify(self, crops: List[np.ndarray]) -> List[Dict[str, float]]:
+        results = []
+        for crop in crops:
+            analysis = DeepFace.analyze(
+                crop, actions=["emotion"], enforce_detection=False,
+                detector_backend="skip", silent=True,
+            )
+            scores = analysis[0]["emotion"]
+            total = sum(scores.values()) or 1.0
+            results.append({k: float(v) / total for k, v in scores.items()})
+        return results
+
+
+class EmotionService:
+    """Tracks faces and keeps a smoothed emotion per track"""
+
+    SIGNATURE_SIZE = 16
+
+    def __init__(
+        self,
+        classifier=None,
+        reclassify_interval: float = 3.0,
+        min_reclassify_interval: float = 0.5,
+        appearance_threshold: float = 0.15,
+        track_timeout: float = 1.5,
+        max_batch_size: int = 4,
+        smoothing: float = 0.4,
+        switch_margin: float = 0.1,
+        min_confidence: float = 0.35,
+    ):
+        self.classifier = classifier
+        self.reclassify_interval = reclassify_interval  # Re-check an unchanged face this often
+        self.min_reclassify_interval = min_reclassify_interval  # Even if it keeps changing
+        self.appearance_threshold = appearance_threshold  # Signature difference that counts as a change
+        self.track_timeout = track_timeout
+        self.max_batch_size = max_batch_size
+        self.smoothing = smoothing  # EMA weight of a new classification
+        self.switch_margin = switch_margin  # New label must beat the current one by this much
+        self.min_confidence = min_confidence
+
+        self._tracks: Dict[int, FaceTrack] = {}
+        self._next_track_id = 1
+        self._lock = threading.Lock()
+
+        self._pending: List[Tuple[int, np.ndarray, np.ndarray, float]] = []
+        self._pending_event = threading.Event()
+        self._subscribers: List[Callable[[EmotionEvent], None]] = []
+
+        self._running = False
+        self._worker: Optional[threading.Thread] = None
+
+        # Stats
+        self._frames = 0
+        self._face_observations = 0
+        self._batches = 0
+        self._classified = 0
+        self._classify_seconds = 0.0
+
+    # =========================================================================
+    # Lifecycle
+    # =========================================================================
+
+    def start(self):
+        if self._running:
+            return
+        if self.classifier is None:
+            self.classifier = DeepFaceClassifier()
+        self._running = True
+        self._worker = threading.Thread(target=self._worker_loop, daemon=True)
+        self._worker.start()
+        logger.info("Emotion service started")
+
+    def stop(self):
+        self._running = False
+        self._pending_event.set()
+        if self._worker:
+            self._worker.join(timeout=2.0)
+            self._worker = None
+        logger.info("Emotion service stopped")
+
+    def subscribe(self, callback: Callable[[EmotionEvent], None]):
+        """Register a callback for emotion changes"""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[EmotionEvent], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    # =========================================================================
+    # Camera side (called from the vision loop, must stay cheap)
+    # =========================================================================
+
+    def process_faces(self, frame: np.ndarray, boxes: List[Box], timestamp: Optional[float] = None):
+        """Update tracks with this frame's face boxes and queue crops that are due"""
+        now = timestamp if timestamp is not None else time.time()
+        lost = []
+        with self._lock:
+            self._frames += 1
+            self._face_observations += len(boxes)
+            matched = self._match(boxes, now)
+
+            for track_id in [t for t, track in self._tracks.items() if now - track.last_seen > self.track_timeout]:
+                lost.append(self._tracks.pop(track_id))
+
+            due = []
+            for track in matched:
+                crop = self._crop(frame, track.box)
+                if crop is None:
+                    continue
+                signature = self._signature(crop)
+                if self._is_due(track, signature, now):
+                    due.append((track, crop, signature))
+
+            # Largest faces first, the rest wait for the next frame
+            due.sort(key=lambda d: d[0].box[2] * d[0].box[3], reverse=True)
+            for track, crop, signature in due[:self.max_batch_size]:
+                track.pending = True
+                self._pending.append((track.track_id, crop.copy(), signature, now))
+
+        if self._pending:
+            self._pending_event.set()
+
+        for track in lost:
+            if track.emotion is not None:
+                self._publish(EmotionEvent(track.track_id, None, 0.0, track.emotion, None, now))
+
+    def _match(self, boxes: List[Box], now: float) -> List[FaceTrack]:
+        """Greedy IoU matching of boxes to live tracks; unmatched boxes start new tracks"""
+        candidates = []
+        for i, box in enumerate(boxes):
+            for track in self._tracks.values():
+                score = _iou(box, track.box)
+                if score == 0.0:
+                    # Fast movement between frames: fall back to centre distance
+                    distance = _centre_distance(box, track.box) / max(box[2], box[3], 1)
+                    score = 0.1 * (1.0 - distance) if distance < 0.75 else 0.0
+                if score > 0.0:
+                    candidates.append((score, i, track.track_id))
+
+        assigned_boxes, assigned_tracks, matched = set(), set(), []
+        for score, i, track_id in sorted(candidates, reverse=True):
+            if i in assigned_boxes or track_id in assigned_tracks:
+                continue
+            assigned_boxes.add(i)
+            assigned_tracks.add(track_id)
+            track = self._tracks[track_id]
+            track.box = tuple(int(v) for v in boxes[i])
+            track.last_seen = now
+            matched.append(track)
+
+        for i, box in enumerate(boxes):
+            if i not in assigned_boxes:
+                track = FaceTrack(self._next_track_id, tuple(int(v) for v in box), now)
+                self._tracks[track.track_id] = track
+                self._next_track_id += 1
+                matched.append(track)
+        return matched
+
+    def _is_due(self, track: FaceTrack, signature: np.ndarray, now: float) -> bool:
+        if track.pending:
+            return False
+        if track.signature is None:
+            return True  # New track
+        since = now - track.last_classified
+        if since >= self.reclassify_interval:
+            return True
+        if since >= self.min_reclassify_interval:
+            if track.raw_emotion != track.emotion:
+                return True  # Smoothed label still catching up with the latest reading
+            return float(np.abs(signature - track.signature).mean()) > self.appearance_threshold
+        return False
+
+    @staticmethod
+    def _crop(frame: np.ndarray, box: Box) -> Optional[np.ndarray]:
+        x, y, w, h = box
+        # A little margin around the face helps the classifier
+        margin_x, margin_y = int(w * 0.1), int(h * 0.1)
+        x0, y0 = max(0, x - margin_x), max(0, y - margin_y)
+        x1, y1 = min(frame.shape[1], x + w + margin_x), min(frame.shape[0], y + h + margin_y)
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        return frame[y0:y1, x0:x1]
+
+    def _signature(self, crop: np.ndarray) -> np.ndarray:
+        """Contrast-normalised tiny grayscale thumbnail of a face crop"""
+        gray = crop.mean(axis=2) if crop.ndim == 3 else crop.astype(np.float32)
+        rows = np.linspace(0, gray.shape[0] - 1, self.SIGNATURE_SIZE).astype(int)
+        cols = np.linspace(0, gray.shape[1] - 1, self.SIGNATURE_SIZE).astype(int)
+        small = gray[np.ix_(rows, cols)].astype(np.float32)
+        return (small - small.mean()) / (small.std() + 1e-6)
+
+    # =========================================================================
+    # Worker side
+    # =========================================================================
+
+    def _worker_loop(self):
+        while self._running:
+            self._pending_event.wait(timeout=1.0)
+            self._pending_event.clear()
+            if not self._running:
+                break
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if batch:
+                self._classify_batch(batch)
+
+    def _classify_batch(self, batch: List[Tuple[int, np.ndarray, np.ndarray, float]]):
+        started = time.time()
+        try:
+            results = self.classifier.classify([crop for _, crop, _, _ in batch])
+        except Exception as e:
+            logger.error(f"Emotion classification failed: {e}")
+            results = [None] * len(batch)
+        elapsed = time.time() - started
+
+        events = []
+        with self._lock:
+            self._batches += 1
+            self._classify_seconds += elapsed
+            for (track_id, _, signature, captured), scores in zip(batch, results):
+                track = self._tracks.get(track_id)
+                if track is None:
+                    continue  # Left while being classified
+                track.pending = False
+                if scores is None:
+                    continue
+                self._classified += 1
+                track.signature = signature
+                track.last_classified = captured
+                event = self._update_label(track, scores, captured)
+                if event:
+                    events.append(event)
+
+        for event in events:
+            self._publish(event)
+
+    def _update_label(self, track: FaceTrack, scores: Dict[str, float], now: float) -> Optional[EmotionEvent]:
+        """Smooth the probabilities; return an event if the label changed"""
+        track.raw_emotion = max(scores, key=scores.get)
+        if not track.probabilities:
+            track.probabilities = dict(scores)
+        else:
+            a = self.smoothing
+            track.probabilities = {
+                k: (1 - a) * track.probabilities.get(k, 0.0) + a * scores.get(k, 0.0)
+                for k in set(track.probabilities) | set(scores)
+            }
+
+        best = max(track.probabilities, key=track.probabilities.get)
+        best_p = track.probabilities[best]
+        current_p = track.probabilities.get(track.emotion, 0.0) if track.emotion else 0.0
+        if track.emotion is not None:
+            track.confidence = current_p
+
+        if best == track.emotion or best_p < self.min_confidence:
+            return None
+        if track.emotion is not None and best_p < current_p + self.switch_margin:
+            return None  # Not clearly better: keep the current label
+
+        previous = track.emotion
+        track.emotion, track.confidence = best, best_p
+        return EmotionEvent(track.track_id, best, best_p, previous, track.box, now)
+
+    def _publish(self, event: EmotionEvent):
+        if event.emotion:
+            logger.info(f"Face {event.track_id}: {event.previous or '-'} -> {event.emotion} ({event.confidence:.2f})")
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Error in emotion subscriber: {e}")
+
+    # =========================================================================
+    # Queries
+    # =========================================================================
+
+    def get_tracks(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {"track_id": t.track_id, "box": t.box, "emotion": t.emotion, "confidence": round(t.confidence, 3)}
+                for t in self._tracks.values()
+            ]
+
+    def get_dominant_emotion(self) -> Optional[str]:
+        """Emotion of the largest tracked face"""
+        with self._lock:
+            labelled = [t for t in self._tracks.values() if t.emotion]
+            if not labelled:
+                return None
+            return max(labelled, key=lambda t: t.box[2] * t.box[3]).emotion
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "frames": self._frames,
+                "tracks": len(self._tracks),
+                "face_observations": self._face_observations,
+                "classified": self._classified,
+                "skipped": self._face_observations - self._classified,
+                "batches": self._batches,
+                "avg_batch_ms": round(self._classify_seconds / self._batches * 1000, 1) if self._batches else 0.0,
+            }
+
+
+def _iou(a: Box, b: Box) -> float:
+    ax1, ay1, bx1, by1 = a[0] + a[2], a[1] + a[3], b[0] + b[2], b[1] + b[3]
+    iw = max(0, min(ax1, bx1) - max(a[0], b[0]))
+    ih = max(0, min(ay1, by1) - max(a[1], b[1]))
+    inter = iw * ih
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _centre_distance(a: Box, b: Box) -> float:
+    return float(np.hypot(a[0] + a[2] / 2 - b[0] - b[2] / 2, a[1] + a[3] / 2 - b[1] - b[3] / 2))
+
+
+# Global instance for easy access
+_emotion_service: Optional[EmotionService] = None
+
+
+def get_emotion_service() -> Optional[EmotionService]:
+    """Get the global EmotionService instance"""
+    return _emotion_service
+
+
+def init_emotion_service(**kwargs) -> EmotionService:
+    """Initialize and return the global EmotionService instance"""
+    global _emotion_service
+    _emotion_service = EmotionService(**kwargs)
+    return _emotion_service
@@ -1,6 +1,10 @@
 """
 OllamaVisionService - Scene analysis using Ollama vision models
 Provides periodic scene context for the LeLamp agent
+
+Frames only reach the LLM when the scene has materially changed (see
+SceneChangeDetector), so an unchanged room costs a thumbnail comparison
+per interval instead of a full vision inference.
 """
 
 import asyncio
@@ -16,8 +20,11 @@ from typing import Any, Callable, Dict, List, Optional
 
 import aiohttp
 import cv2
+import numpy as np
 from PIL import Image
 
+from lelamp.service.vision.scene_change import SceneChangeDetector
+
 logger = logging.getLogger("service.OllamaVisionService")
 logger.setLevel(logging.INFO)  # Quiet down - only show significant changes
 
@@ -131,7 +138,9 @@ class OllamaVisionService:
         camera_index: int = 0,
         resolution: tuple = (640, 480),
         max_frame_size: int = 512,
-        instructions_file: Optional[str] = None
+        instructions_file: Optional[str] = None,
+        scene_change_gating: bool = True,
+        max_skip_interval: float = 120.0
     ):
         self.ollama_url = ollama_url.rstrip('/')
         self.model = model
@@ -165,6 +174,15 @@ class OllamaVisionService:
         self._stable_people_count: int = 0  # Require consistent readings
         self._people_count_stable_frames: int = 0  # How many frames with same count
 
+        # Scene-change gating (skip the LLM while the room looks the same)
+        self.scene_change_gating = scene_change_gating
+        self._scene_detector = SceneChangeDetector(max_skip_interval=max_skip_interval)
+        self._analyses_executed = 0
+        self._analyses_skipped = 0
+        self._analysis_reasons: Dict[str, int] = {}
+        self._analysis_seconds = 0.0  # Total LLM time, for the average
+        self._rate_scale = 1.0  # Set by the thermal governor; 0 pauses analysis
+
         # Callbacks
         self._on_scene_change: Optional[Callable[[SceneContext, str], None]] = None
         self._on_context_update: Optional[Callable[[SceneContext], None]] = None
@@ -219,6 +237,13 @@ class OllamaVisionService:
 
     def _capture_frame(self) -> Optional[str]:
         """Capture and encode a frame as base64"""
+        frame = self._read_frame()
+        if frame is None:
+            return None
+        return self._encode_frame(frame)
+
+    def _read_frame(self) -> Optional[np.ndarray]:
+        """Grab a raw BGR frame from the camera"""
         with self._camera_lock:
             if self.cap is None or not self.cap.isOpened():
                 return None
@@ -226,7 +251,10 @@ class OllamaVisionService:
             ret, frame = self.cap.read()
             if not ret:
                 return None
+            return frame
 
+    def _encode_frame(self, frame: np.ndarray) -> Optional[str]:
+        """Resize and encode a frame as base64 JPEG"""
         try:
             # Resize if needed
             height, width = frame.shape[:2]
@@ -348,22 +376,55 @@ class OllamaVisionService:
                 raw_response=response
             )
 
+    def set_rate_scale(self, scale: float):
+        """Scale the analysis rate (1.0 = every analysis_interval, 0 = paused)"""
+        self._rate_scale = max(0.0, min(1.0, scale))
+
+    def _current_interval(self) -> float:
+        return self.analysis_interval / self._rate_scale if self._rate_scale > 0 else self.analysis_interval
+
     async def _analysis_loop(self):
         """Background loop for periodic scene analysis"""
         logger.info("Starting Ollama vision analysis loop")
 
         while self._running:
             try:
+                # Paused by the thermal governor
+                if self._rate_scale <= 0:
+                    self._analyses_skipped += 1
+                    self._analysis_reasons["throttled"] = self._analysis_reasons.get("throttled", 0) + 1
+                    await asyncio.sleep(self.analysis_interval)
+                    continue
+
                 # Capture frame
-                base64_image = self._capture_frame()
+                frame = self._read_frame()
+                if frame is None:
+                    await asyncio.sleep(self._current_interval())
+                    continue
+
+                # Only pay for an LLM call when the scene changed
+                reason = self._analysis_reason(frame)
+                if reason is None:
+                    self._analyses_skipped += 1
+                    await asyncio.sleep(self._current_interval())
+                    continue
+
+                base64_image = self._encode_frame(frame)
                 if base64_image is None:
-                    await asyncio.sleep(self.analysis_interval)
+                    await asyncio.sleep(self._current_interval())
                     continue
 
                 # Analyze with Ollama
+                started = time.time()
                 context = await self._analyze_frame(base64_image)
 
                 if context:
+                    self._scene_detector.mark_analyzed(time.time())
+                    self._analyses_executed += 1
+                    self._analysis_reasons[reason] = self._analysis_reasons.get(reason, 0) + 1
+                    self._analysis_seconds += time.time() - started
+                    logger.debug(f"Scene analysis ran ({reason}, change score {self._scene_detector.last_change_score:.2f})")
+
                     with self._context_lock:
                         self.previous_context = self.current_context
                         self.current_context = context
@@ -418,7 +479,35 @@ class OllamaVisionService:
             except Exception as e:
                 logger.error(f"Error in analysis loop: {e}")
 
-            await asyncio.sleep(self.analysis_interval)
+            await asyncio.sleep(self._current_interval())
+
+    def _analysis_reason(self, frame: np.ndarray) -> Optional[str]:
+        """Why this frame should go to the LLM, or None to skip it"""
+        if not self.scene_change_gating:
+            return "interval"
+
+        reason = self._scene_detector.check(frame, time.time())
+        # A changed people count needs a few confirming readings before a
+        # proactive comment, so keep analysing until it is stable
+        if reason is None and 0 < self._people_count_stable_frames < 3:
+            return "confirm"
+        return reason
+
+    def get_analysis_stats(self) -> Dict[str, Any]:
+        """Counters for executed vs skipped (unchanged scene) analyses"""
+        total = self._analyses_executed + self._analyses_skipped
+        average = self._analysis_seconds / self._analyses_executed if self._analyses_executed else 0.0
+        return {
+            "gating_enabled": self.scene_change_gating,
+            "executed": self._analyses_executed,
+            "skipped": self._analyses_skipped,
+            "skip_ratio": round(self._analyses_skipped / total, 3) if total else 0.0,
+            "reasons": dict(self._analysis_reasons),
+            "average_analysis_seconds": round(average, 2),
+            "estimated_seconds_saved": round(average * self._analyses_skipped, 1),
+            "last_change_score": round(self._scene_detector.last_change_score, 3),
+            "rate_scale": self._rate_scale,
+        }
 
     def start(self, event_loop: Optional[asyncio.AbstractEventLoop] = None):
         """Start the vision service"""
@@ -445,6 +534,7 @@ class OllamaVisionService:
 
         self._running = True
         self._event_loop = event_loop or asyncio.get_event_loop()
+        self._scene_detector.reset()  # Camera may have moved while stopped
 
         # Start analysis task
         self._analysis_task = self._event_loop.create_task(self._analysis_loop())
@@ -0,0 +1,155 @@
+"""
+Cheap scene-change detection in front of the vision LLM.
+
+Every analysis by the Ollama vision model costs seconds of inference, and
+most frames show the same room as the last one. SceneChangeDetector keeps
+a tiny signature per frame (64x48 grayscale thumbnail, 64-bit difference
+hash, 64-bin luminance histogram) and compares it against the frame that
+was last analysed:
+
+- dHash Hamming distance catches objects/people moving
+- Histogram (earth mover's) distance catches lighting changes, while
+  ignoring the small exposure flicker of the camera
+- Block SSIM catches structural changes the hash is too coarse for
+
+Each distance is divided by its threshold and the largest ratio is the
+change score, so a score >= 1.0 means "materially changed". Hysteresis
+keeps the gate from flapping: a change arms the gate, the gate disarms
+only when the score falls back below SETTLE_RATIO, and an armed gate fires
+once the scene has settled (frame-to-frame score below SETTLE_RATIO) so
+the LLM describes where people ended up rather than a motion blur. A
+periodic refresh keeps the context from going stale on slow drifts.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+@dataclass
+class FrameSignature:
+    thumb: np.ndarray  # float32 grayscale thumbnail
+    dhash: int  # 64-bit difference hash
+    histogram: np.ndarray  # Normalized luminance histogram
+
+
+class SceneChangeDetector:
+    """Decides when a camera frame is worth sending to the vision LLM."""
+
+    THUMB_SIZE = (64, 48)  # (width, height)
+    HASH_SIZE = 8
+    HIST_BINS = 64
+    HASH_MARGIN = 2.0  # Luminance step needed to set a hash bit (flat areas stay 0 under noise)
+    SSIM_BLOCK = 8
+    SETTLE_RATIO = 0.5  # Change score below this = unchanged / settled
+
+    def __init__(
+        self,
+        hash_threshold: int = 6,
+        histogram_threshold: float = 0.06,
+        ssim_threshold: float = 0.88,
+        max_settle_wait: float = 20.0,
+        max_skip_interval: float = 120.0,
+    ):
+        self.hash_threshold = hash_threshold  # Differing hash bits
+        self.histogram_threshold = histogram_threshold  # Mean luminance shift, fraction of full scale
+        self.ssim_threshold = ssim_threshold  # Mean block SSIM below this = changed
+        self.max_settle_wait = max_settle_wait  # Analyse a changed scene even if it keeps moving
+        self.max_skip_interval = max_skip_interval  # Refresh even without a change
+
+        self._reference: Optional[FrameSignature] = None  # Last analysed frame
+        self._reference_time = 0.0
+        self._previous: Optional[FrameSignature] = None
+        self._latest: Optional[FrameSignature] = None
+        self._armed_since: Optional[float] = None
+        self.last_change_score = 0.0
+        self.last_motion_score = 0.0
+
+    def signature(self, frame: np.ndarray) -> FrameSignature:
+        """Signature of a BGR (or grayscale) uint8 frame."""
+        frame = np.asarray(frame, dtype=np.float32)
+        if frame.ndim == 3:
+            gray = frame[..., 0] * 0.114 + frame[..., 1] * 0.587 + frame[..., 2] * 0.299
+        else:
+            gray = frame
+        thumb = _area_resize(gray, self.THUMB_SIZE)
+
+        small = _area_resize(thumb, (self.HASH_SIZE + 1, self.HASH_SIZE))
+        bits = (small[:, 1:] - small[:, :-1] > self.HASH_MARGIN).flatten()
+        dhash = int(np.packbits(bits).view(">u8")[0])
+
+        histogram, _ = np.histogram(thumb, bins=self.HIST_BINS, range=(0, 256))
+        histogram = histogram.astype(np.float32) / max(1, histogram.sum())
+        return FrameSignature(thumb, dhash, histogram)
+
+    def score(self, a: FrameSignature, b: FrameSignature) -> float:
+        """Change score between two frames (>= 1.0 means materially different)."""
+        hash_ratio = bin(a.dhash ^ b.dhash).count("1") / self.hash_threshold
+        shift = float(np.abs(np.cumsum(a.histogram) - np.cumsum(b.histogram)).sum()) / self.HIST_BINS
+        hist_ratio = shift / self.histogram_threshold
+        ssim_ratio = (1.0 - _block_ssim(a.thumb, b.thumb, self.SSIM_BLOCK)) / (1.0 - self.ssim_threshold)
+        return max(hash_ratio, hist_ratio, ssim_ratio)
+
+    def check(self, frame: np.ndarray, now: float) -> Optional[str]:
+        """
+        Feed a frame; returns why it should be analysed, or None to skip it.
+
+        Call mark_analyzed() once the analysis succeeded so the frame becomes
+        the new reference.
+        """
+        signature = self.signature(frame)
+        self._previous, self._latest = self._latest, signature
+        if self._reference is None:
+            return "first"
+
+        self.last_change_score = self.score(self._reference, signature)
+        self.last_motion_score = self.score(self._previous, signature) if self._previous else 0.0
+
+        if self.last_change_score >= 1.0:
+            if self._armed_since is None:
+                self._armed_since = now
+        elif self.last_change_score < self.SETTLE_RATIO:
+            self._armed_since = None  # Back to what was analysed last
+
+        if self._armed_since is not None:
+            if self.last_motion_score < self.SETTLE_RATIO:
+                return "changed"
+            if now - self._armed_since >= self.max_settle_wait:
+                return "changed"
+        if now - self._reference_time >= self.max_skip_interval:
+            return "refresh"
+        return None
+
+    def mark_analyzed(self, now: float):
+        """Make the last checked frame the reference for future changes."""
+        self._reference = self._latest
+        self._reference_time = now
+        self._armed_since = None
+
+    def reset(self):
+        self._reference = self._previous = self._latest = None
+        self._armed_since = None
+
+
+def _area_resize(image: np.ndarray, size) -> np.ndarray:
+    """Area-average downscale of a 2D array to (width, height)."""
+    width, height = size
+    rows = np.linspace(0, image.shape[0], height + 1).astype(int)
+    cols = np.linspace(0, image.shape[1], width + 1).astype(int)
+    summed = np.add.reduceat(np.add.reduceat(image, rows[:-1], axis=0), cols[:-1], axis=1)
+    counts = np.outer(np.diff(rows), np.diff(cols))
+    return (summed / counts).astype(np.float32)
+
+
+def _block_ssim(a: np.ndarray, b: np.ndarray, block: int) -> float:
+    """Mean SSIM over non-overlapping blocks of two equally sized thumbnails."""
+    h, w = (a.shape[0] // block) * block, (a.shape[1] // block) * block
+    a = a[:h, :w].reshape(h // block, block, w // block, block)
+    b = b[:h, :w].reshape(h // block, block, w // block, block)
+    mu_a, mu_b = a.mean(axis=(1, 3)), b.mean(axis=(1, 3))
+    var_a, var_b = a.var(axis=(1, 3)), b.var(axis=(1, 3))
+    cov = (a * b).mean(axis=(1, 3)) - mu_a * mu_b
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    ssim = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(ssim.mean())
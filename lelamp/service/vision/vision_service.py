@@ -71,7 +71,8 @@ class VisionService:
             image_fps: float = 1.0,
             max_frame_size: int = 512,
             min_detection_confidence: float = 0.5,
-            min_tracking_confidence: float = 0.5
+            min_tracking_confidence: float = 0.5,
+            max_num_faces: int = 1
     ):
         self.camera_index = camera_index
         self.resolution = resolution
@@ -83,6 +84,8 @@ class VisionService:
         self._camera_thread = None
         self._running = False
         self._video_frame_count = 0
+        self._latest_frame: Optional[tuple] = None  # (seq, timestamp, frame) for the setup camera session
+        self._frame_seq = 0
 
         # --- LiveKit Publishing State ---
         self.publish_image = publish_image
@@ -103,7 +106,7 @@ class VisionService:
             self.logger.info("Initializing MediaPipe solutions...")
             self.mp_face_mesh = mp.solutions.face_mesh
             self.face_mesh = self.mp_face_mesh.FaceMesh(
-                max_num_faces=1,
+                max_num_faces=max_num_faces,
                 refine_landmarks=True,
                 min_detection_confidence=min_detection_confidence,
                 min_tracking_confidence=min_tracking_confidence
@@ -137,6 +140,9 @@ class VisionService:
         # Hand Tracking
         self._hand_callback: Optional[Callable[[HandData], None]] = None
 
+        # Face box listeners (frame, [(x, y, w, h), ...], timestamp) - e.g. EmotionService
+        self._face_listeners: List[Callable] = []
+
         # Motor Control Direct Tracking
         self._motor_tracking_enabled = False
         self._motor_tracking_callback: Optional[Callable[[float, float, bool], None]] = None
@@ -145,6 +151,12 @@ class VisionService:
         self._face_detected_once = False
         self._last_face_detected = False
 
+        # Load shedding (set by the thermal governor)
+        self._rate_scale = 1.0  # Fraction of fps to process
+        self._hand_every = 1  # Run hand tracking every Nth frame (0 = off)
+        self._loop_frames = 0
+        self._loop_overruns = 0  # Frames whose processing exceeded the frame budget
+
     def start(self):
         """Start vision service"""
         if self._running:
@@ -186,6 +198,35 @@ class VisionService:
         """Set callback for hand tracking data"""
         self._hand_callback = callback
 
+    def set_rate_scale(self, scale: float):
+        """Process frames at a fraction of the configured fps (thermal throttling)"""
+        self._rate_scale = max(0.05, min(1.0, scale))
+
+    def set_hand_tracking_scale(self, scale: float):
+        """Run hand tracking on a fraction of frames (0 = off)"""
+        self._hand_every = round(1.0 / scale) if scale > 0 else 0
+
+    def get_loop_stats(self) -> Dict:
+        """Processed frames and overruns, for load monitoring"""
+        return {
+            "frames": self._loop_frames,
+            "overruns": self._loop_overruns,
+            "rate_scale": self._rate_scale,
+            "hand_every": self._hand_every,
+        }
+
+    def get_latest_frame(self) -> Optional[tuple]:
+        """Newest captured frame as (seq, timestamp, BGR frame), or None."""
+        return self._latest_frame
+
+    def add_face_listener(self, callback: Callable):
+        """Receive every processed frame with its face boxes in pixels"""
+        self._face_listeners.append(callback)
+
+    def remove_face_listener(self, callback: Callable):
+        if callback in self._face_listeners:
+            self._face_listeners.remove(callback)
+
     def _camera_loop(self):
         """Main camera capture and processing loop"""
         # 1. Open Camera
@@ -214,20 +255,22 @@ class VisionService:
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
 
-        frame_delay = 1.0 / self.fps
-
         while self._running:
+            frame_delay = 1.0 / (self.fps * self._rate_scale)
             start_time = time.time()
             ret, frame = self.cap.read()
             if not ret:
                 time.sleep(0.1)
                 continue
+            self._frame_seq += 1
+            self._latest_frame = (self._frame_seq, start_time, frame)
 
             # 3. Publish Image to LiveKit (if enabled)
             self._publish_image_frame(frame)
 
             face_data = None
             hand_data = None
+            face_boxes = []
 
             # 4. Process Vision (MediaPipe vs Haar)
             if self.use_mediapipe:
@@ -237,16 +280,20 @@ class VisionService:
                 # A. Face Mesh
                 mp_face_results = self.face_mesh.process(rgb_frame)
                 face_data = self._process_mediapipe_faces(mp_face_results, frame.shape)
+                if self._face_listeners:
+                    face_boxes = self._mediapipe_face_boxes(mp_face_results, frame.shape)
 
-                # B. Hands
-                mp_hand_results = self.hands.process(rgb_frame)
-                hand_data = self._process_hand_results(mp_hand_results, frame.shape)
+                # B. Hands (skipped on some frames when throttled)
+                if self._hand_every and self._loop_frames % self._hand_every == 0:
+                    mp_hand_results = self.hands.process(rgb_frame)
+                    hand_data = self._process_hand_results(mp_hand_results, frame.shape)
 
             else:
                 # Fallback to Haar Cascade (Gray)
                 gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
                 faces = self.face_cascade.detectMultiScale(gray, 1.1, 5, minSize=(40, 40))
                 face_data = self._process_haar_faces(faces, frame.shape)
+                face_boxes = [tuple(int(v) for v in f) for f in faces]
                 # No hand tracking in fallback mode
 
             # 5. Update State
@@ -287,6 +334,13 @@ class VisionService:
                 except Exception as e:
                     self.logger.error(f"Error in motor tracking callback: {e}")
 
+            # Face box listeners
+            for listener in list(self._face_listeners):
+                try:
+                    listener(frame, face_boxes, start_time)
+                except Exception as e:
+                    self.logger.error(f"Error in face listener: {e}")
+
             # Hand Tracking
             if self._hand_callback and hand_data and hand_data.detected:
                 try:
@@ -296,6 +350,9 @@ class VisionService:
 
             # FPS Control
             processing_time = time.time() - start_time
+            self._loop_frames += 1
+            if processing_time > frame_delay:
+                self._loop_overruns += 1
             sleep_time = max(0, frame_delay - processing_time)
             time.sleep(sleep_time)
 
@@ -342,6 +399,21 @@ class VisionService:
             head_pose=head_pose
         )
 
+    def _mediapipe_face_boxes(self, results, frame_shape) -> List[tuple]:
+        """Pixel bounding boxes (x, y, w, h) of the Face Mesh landmarks"""
+        if not results.multi_face_landmarks:
+            return []
+        frame_h, frame_w = frame_shape[:2]
+        boxes = []
+        for face_landmarks in results.multi_face_landmarks:
+            xs = [lm.x for lm in face_landmarks.landmark]
+            ys = [lm.y for lm in face_landmarks.landmark]
+            x0, y0 = max(0, int(min(xs) * frame_w)), max(0, int(min(ys) * frame_h))
+            x1, y1 = min(frame_w, int(max(xs) * frame_w)), min(frame_h, int(max(ys) * frame_h))
+            if x1 > x0 and y1 > y0:
+                boxes.append((x0, y0, x1 - x0, y1 - y0))
+        return boxes
+
     def _process_hand_results(self, results, frame_shape) -> HandData:
         """Process MediaPipe Hands results"""
         if not results.multi_hand_landmarks:
@@ -1,4 +1,5 @@
 """Wake word detection service"""
 from .wake_service import WakeService
+from .keyword_spotter import KeywordSpotter
 
-__all__ = ["WakeService"]
+__all__ = ["WakeService", "KeywordSpotter"]
@@ -0,0 +1,127 @@
+"""
+Wake word template enrollment.
+
+The keyword spotter only runs once templates exist in
+~/.lelamp/wake_templates; until then WakeService falls back to Whisper.
+This records utterances of the wake phrase from the lamp's microphone,
+checks each one contains speech, and saves it as a 16-bit mono WAV that
+KeywordSpotter.from_directory loads. Templates take effect the next time
+the wake service starts (i.e. the next time the lamp goes to sleep).
+
+Exposed through the setup API (/api/v1/setup/audio/wake-templates) and as
+a CLI:
+    python -m lelamp.service.wake.enrollment --count 4
+"""
+
+import argparse
+import logging
+import time
+import wave
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from lelamp.service.wake.keyword_spotter import HOP_LENGTH, SAMPLE_RATE, extract_features, load_templates
+
+logger = logging.getLogger(__name__)
+
+RECORD_RATE = 24000  # ALSA dsnoop rate, same as WakeService capture
+RECORD_SECONDS = 2.0
+MIN_SPEECH_SECONDS = 0.2  # Shorter than this after trimming is a click, not a phrase
+MIN_RMS = 0.005  # Quieter recordings are treated as silence
+RECOMMENDED_TEMPLATES = 3
+
+
+def templates_dir(directory=None) -> Path:
+    from lelamp.user_data import USER_WAKE_TEMPLATES_DIR
+    return Path(directory) if directory else USER_WAKE_TEMPLATES_DIR
+
+
+def record_utterance(seconds: float = RECORD_SECONDS, device=None) -> np.ndarray:
+    """Record mono float32 audio at RECORD_RATE from the capture device. Blocking."""
+    import sounddevice as sd
+    from lelamp.service.wake.wake_service import find_capture_device
+
+    if device is None:
+        device = find_capture_device()
+    audio = sd.rec(int(seconds * RECORD_RATE), samplerate=RECORD_RATE, channels=1, dtype="float32", device=device)
+    sd.wait()
+    return audio.ravel()
+
+
+def save_template(audio: np.ndarray, sample_rate: int, directory=None, name: Optional[str] = None) -> Path:
+    """
+    Validate an utterance and save it as a template WAV.
+
+    Raises:
+        ValueError: if the recording is silent or too short to be the wake phrase
+    """
+    audio = np.asarray(audio, dtype=np.float32).ravel()
+    if audio.size == 0 or float(np.sqrt(np.mean(audio ** 2))) < MIN_RMS:
+        raise ValueError("No speech detected - say the wake phrase closer to the lamp")
+    voiced_seconds = len(extract_features(audio, sample_rate)) * HOP_LENGTH / SAMPLE_RATE
+    if voiced_seconds < MIN_SPEECH_SECONDS:
+        raise ValueError("Recording too short - say the whole wake phrase")
+
+    directory = templates_dir(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name or time.strftime('wake_%Y%m%d_%H%M%S')}.wav"
+    if path.exists():
+        path = path.with_name(f"{path.stem}_{len(load_templates(directory))}.wav")
+
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    tmp = path.with_name(path.name + ".tmp")
+    with wave.open(str(tmp), "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        out.writeframes(pcm.tobytes())
+    tmp.replace(path)
+    logger.info(f"Saved wake word template {path.name} ({voiced_seconds:.2f}s of speech)")
+    return path
+
+
+def enroll(seconds: float = RECORD_SECONDS, directory=None, device=None) -> Path:
+    """Record one utterance and save it as a template. Blocking."""
+    return save_template(record_utterance(seconds, device), RECORD_RATE, directory)
+
+
+def list_templates(directory=None) -> List[Dict]:
+    templates = []
+    for path in load_templates(templates_dir(directory)):
+        with wave.open(str(path), "rb") as wav:
+            duration = wav.getnframes() / wav.getframerate()
+        templates.append({"name": path.stem, "duration": round(duration, 2)})
+    return templates
+
+
+def delete_template(name: str, directory=None) -> bool:
+    if not name or "/" in name or "\\" in name or name.startswith("."):
+        raise ValueError("Invalid template name")
+    path = templates_dir(directory) / f"{name}.wav"
+    if not path.exists():
+        return False
+    path.unlink()
+    return True
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Record wake word templates for the keyword spotter")
+    parser.add_argument("--count", type=int, default=4, help="Number of utterances to record")
+    parser.add_argument("--seconds", type=float, default=RECORD_SECONDS, help="Length of each recording")
+    parser.add_argument("--dir", default=None, help="Template directory (default: ~/.lelamp/wake_templates)")
+    args = parser.parse_args()
+
+    saved = 0
+    while saved < args.count:
+        input(f"[{saved + 1}/{args.count}] Press Enter, then say the wake phrase...")
+        try:
+            path = enroll(args.seconds, args.dir)
+        except ValueError as e:
+            print(f"  {e}, try again")
+            continue
+        print(f"  saved {path}")
+        saved += 1
+    print(f"{len(load_templates(templates_dir(args.dir)))} templates in {templates_dir(args.dir)}")
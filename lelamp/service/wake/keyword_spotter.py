@@ -0,0 +1,300 @@
+"""
+Streaming keyword spotter for local wake word detection.
+
+Audio is consumed at a fixed 10ms hop:
+- LogMelFrontend turns arbitrary-sized chunks into log-mel frames
+  incrementally (no re-analysis of overlapping windows)
+- KeywordSpotter matches the frame stream against enrolled templates with
+  streaming subsequence DTW; each frame costs one small matrix-vector product
+  per template, a few percent of one Pi core in total
+
+Templates are short WAV recordings of the wake phrase (any rate, mono or
+stereo), one utterance per file. Three to five recordings from the usual
+speakers are enough; leading and trailing silence is trimmed on load.
+"""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+try:
+    import soxr
+except ImportError:
+    soxr = None
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+WIN_LENGTH = 400  # 25ms
+HOP_LENGTH = 160  # 10ms
+N_FFT = 512
+N_MELS = 40
+
+
+def _mel_filterbank(sample_rate: int, n_fft: int, n_mels: int, fmin: float = 60.0, fmax: float = 7600.0) -> np.ndarray:
+    """Triangular mel filters, shape (n_mels, n_fft // 2 + 1)."""
+    def hz_to_mel(f):
+        return 2595.0 * np.log10(1.0 + f / 700.0)
+
+    def mel_to_hz(m):
+        return 700.0 * (10.0 ** (m / 2595.0) - 1.0)
+
+    mels = np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mels) / sample_rate).astype(int)
+
+    fb = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        for k in range(left, center):
+            fb[m - 1, k] = (k - left) / max(center - left, 1)
+        for k in range(center, right):
+            fb[m - 1, k] = (right - k) / max(right - center, 1)
+    return fb
+
+
+class LogMelFrontend:
+    """Incremental log-mel feature extraction at a fixed hop."""
+
+    def __init__(self):
+        self._window = np.hanning(WIN_LENGTH).astype(np.float32)
+        self._filters = _mel_filterbank(SAMPLE_RATE, N_FFT, N_MELS)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self.frames_emitted = 0
+
+    def reset(self):
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self.frames_emitted = 0
+
+    def process(self, samples: np.ndarray):
+        """
+        Consume 16kHz mono float32 samples.
+
+        Returns:
+            (features, log_energy): unit-norm mean-removed log-mel frames of
+            shape (n, N_MELS) and their log energies of shape (n,)
+        """
+        self._buffer = np.concatenate([self._buffer, samples.astype(np.float32, copy=False).ravel()])
+        n = (len(self._buffer) - WIN_LENGTH) // HOP_LENGTH + 1
+        if n <= 0:
+            return np.zeros((0, N_MELS), dtype=np.float32), np.zeros(0, dtype=np.float32)
+
+        idx = np.arange(WIN_LENGTH)[None, :] + HOP_LENGTH * np.arange(n)[:, None]
+        frames = self._buffer[idx] * self._window
+        self._buffer = self._buffer[n * HOP_LENGTH:]
+        self.frames_emitted += n
+
+        power = np.abs(np.fft.rfft(frames, N_FFT)) ** 2
+        logmel = np.log(power @ self._filters.T + 1e-6).astype(np.float32)
+        log_energy = np.log(np.sum(power, axis=1) + 1e-6).astype(np.float32)
+
+        # Per-frame mean removal + L2 norm: gain invariant, cosine distance via dot
+        logmel -= logmel.mean(axis=1, keepdims=True)
+        logmel /= np.linalg.norm(logmel, axis=1, keepdims=True) + 1e-6
+        return logmel, log_energy
+
+
+def extract_features(audio: np.ndarray, sample_rate: int, trim_db: float = 30.0) -> np.ndarray:
+    """Features of a whole utterance, with leading/trailing silence trimmed."""
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sample_rate != SAMPLE_RATE:
+        audio = soxr.resample(audio, sample_rate, SAMPLE_RATE).astype(np.float32)
+
+    features, log_energy = LogMelFrontend().process(audio)
+    if len(features) == 0:
+        return features
+
+    voiced = np.where(log_energy > log_energy.max() - trim_db / 10.0 * np.log(10.0))[0]
+    return features[voiced[0]:voiced[-1] + 1]
+
+
+@dataclass
+class Detection:
+    """A keyword match in the frame stream."""
+    template: str
+    score: float
+    frame: int  # Frame index (10ms units) where the match ended
+    num_frames: int  # Matched length in frames
+    reported_frame: int = -1  # Frame index at which the match was reported
+
+    @property
+    def end_time(self) -> float:
+        """Stream time in seconds at which the keyword ended."""
+        return (self.frame + 1) * HOP_LENGTH / SAMPLE_RATE
+
+    @property
+    def reported_time(self) -> float:
+        """Stream time in seconds at which the detection was reported."""
+        return (self.reported_frame + 1) * HOP_LENGTH / SAMPLE_RATE
+
+
+class _TemplateBank:
+    """
+    Streaming subsequence DTW against all templates at once.
+
+    Templates are stacked into one (total_frames, N_MELS) matrix so a frame
+    costs one matrix-vector product and a handful of vector ops, however
+    many templates are enrolled.
+    """
+
+    def __init__(self, names: Sequence[str], templates: Sequence[np.ndarray]):
+        self.names = list(names)
+        self.features = np.concatenate(templates).astype(np.float32)
+        lengths = np.array([len(t) for t in templates])
+        self.starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        self.ends = self.starts + lengths - 1
+        self.max_path = 2 * lengths  # Reject alignments over twice the template length
+
+        total = len(self.features)
+        self._cols = np.arange(total)
+        self._candidates = np.empty((3, total), dtype=np.float32)
+        self._lengths = np.empty((3, total), dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        self._cost = np.full(len(self.features), np.inf, dtype=np.float32)
+        self._path = np.zeros(len(self.features), dtype=np.float32)
+
+    def step(self, frame: np.ndarray) -> np.ndarray:
+        """Advance by one input frame; return each template's normalized cost of a full match ending here."""
+        dist = 1.0 - self.features @ frame
+        cost, path = self._candidates, self._lengths
+
+        # Predecessors: template frame stays (j), advances by 1 (j-1) or 2 (j-2).
+        # A new path can start at each template's first frame on any input frame.
+        cost[0], path[0] = self._cost, self._path
+        cost[1, 1:], path[1, 1:] = self._cost[:-1], self._path[:-1]
+        cost[2, 2:], path[2, 2:] = self._cost[:-2], self._path[:-2]
+        cost[1, self.starts], path[1, self.starts] = 0.0, 0.0
+        cost[2, :2] = np.inf
+        cost[2, self.starts] = np.inf
+        cost[2, np.minimum(self.starts + 1, self.ends)] = np.inf
+
+        choice = np.argmin((cost + dist) / (path + 1.0), axis=0)
+        self._cost = cost[choice, self._cols] + dist
+        self._path = path[choice, self._cols] + 1.0
+
+        end_path = self._path[self.ends]
+        scores = self._cost[self.ends] / end_path
+        scores[end_path > self.max_path] = np.inf
+        return scores
+
+    def matched_frames(self, index: int) -> int:
+        return int(self._path[self.ends[index]])
+
+
+class KeywordSpotter:
+    """
+    Frame-streaming keyword spotter.
+
+    Feed 16kHz audio with process(); it returns a Detection when the stream
+    matches any template with a normalized DTW cost below `threshold`.
+
+    The cost keeps falling while the keyword is still being spoken, so a
+    match is reported at its local minimum: once the cost rises by
+    PEAK_RISE or PEAK_HOLD_FRAMES pass without a better score.
+    """
+
+    DEFAULT_THRESHOLD = 0.4
+    REFRACTORY_SECONDS = 1.0
+    PEAK_RISE = 0.03
+    PEAK_HOLD_FRAMES = 15
+
+    def __init__(
+        self,
+        templates: Sequence[np.ndarray],
+        names: Optional[Sequence[str]] = None,
+        threshold: float = DEFAULT_THRESHOLD,
+        min_energy: float = -2.0,
+    ):
+        """
+        Args:
+            templates: Feature arrays from extract_features()
+            names: Optional name per template (for logging)
+            threshold: Maximum normalized DTW cost (cosine distance) to accept
+            min_energy: Frames quieter than this log energy never end a match
+        """
+        if not templates:
+            raise ValueError("KeywordSpotter needs at least one template")
+        names = names or [f"template_{i}" for i in range(len(templates))]
+        kept = [(n, t) for n, t in zip(names, templates) if len(t) > 2]
+        if not kept:
+            raise ValueError("All templates were empty after trimming silence")
+        self._bank = _TemplateBank([n for n, _ in kept], [t for _, t in kept])
+
+        self.threshold = threshold
+        self.min_energy = min_energy
+        self.frontend = LogMelFrontend()
+        self._refractory_frames = int(self.REFRACTORY_SECONDS * SAMPLE_RATE / HOP_LENGTH)
+        self._last_detection_frame = -self._refractory_frames
+        self._pending: Optional[Detection] = None
+        self.last_score = float("inf")
+
+    @classmethod
+    def from_directory(cls, directory, **kwargs) -> "KeywordSpotter":
+        """Load every WAV in a directory as a template."""
+        paths = sorted(Path(directory).glob("*.wav"))
+        templates, names = [], []
+        for path in paths:
+            audio, rate = sf.read(str(path), dtype="float32")
+            templates.append(extract_features(audio, rate))
+            names.append(path.stem)
+        logger.info(f"Loaded {len(templates)} wake word templates from {directory}")
+        return cls(templates, names, **kwargs)
+
+    def reset(self):
+        self.frontend.reset()
+        self._bank.reset()
+        self._last_detection_frame = -self._refractory_frames
+        self._pending = None
+
+    def process(self, samples: np.ndarray) -> Optional[Detection]:
+        """Consume 16kHz mono samples; return the first detection in them, if any."""
+        features, log_energy = self.frontend.process(samples)
+        first_frame = self.frontend.frames_emitted - len(features)
+        detection = None
+
+        for i, frame in enumerate(features):
+            scores = self._bank.step(frame)
+            best = int(np.argmin(scores))
+            score = float(scores[best])
+            self.last_score = score
+
+            frame_index = first_frame + i
+            pending = self._pending
+
+            if pending is not None:
+                if score < pending.score:
+                    self._pending = self._candidate(best, score, frame_index)
+                elif score > pending.score + self.PEAK_RISE or frame_index - pending.frame >= self.PEAK_HOLD_FRAMES:
+                    if detection is None:
+                        pending.reported_frame = frame_index
+                        detection = pending
+                    self._last_detection_frame = frame_index
+                    self._pending = None
+            elif (
+                score < self.threshold
+                and log_energy[i] > self.min_energy
+                and frame_index - self._last_detection_frame >= self._refractory_frames
+            ):
+                self._pending = self._candidate(best, score, frame_index)
+
+        return detection
+
+    def _candidate(self, index: int, score: float, frame_index: int) -> Detection:
+        return Detection(self._bank.names[index], score, frame_index, self._bank.matched_frames(index))
+
+
+def load_templates(directory) -> List[Path]:
+    """List template WAVs in a directory (empty if it does not exist)."""
+    directory = Path(directory)
+    return sorted(directory.glob("*.wav")) if directory.is_dir() else []
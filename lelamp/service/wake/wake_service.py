@@ -1,15 +1,30 @@
 """
-Wake Service - Local wake word detection using Whisper
+Wake Service - Local wake word detection
 Listens for "wake up" locally without sending audio to cloud
+
+Detection runs a streaming keyword spotter (log-mel + template DTW) on
+10ms frames when wake word templates are enrolled in
+~/.lelamp/wake_templates/*.wav (recorded by enrollment.py). Whisper is an
+optional second-stage verifier for spotter hits, and the fallback when no
+templates exist.
 """
 import threading
 import logging
+from collections import deque
+from pathlib import Path
 from typing import Optional, Callable
 import numpy as np
 import sounddevice as sd
 import queue
 import time
 
+from lelamp.service.wake.keyword_spotter import KeywordSpotter, load_templates, SAMPLE_RATE as SPOTTER_RATE
+
+try:
+    import soxr
+except ImportError:
+    soxr = None
+
 try:
     import whisper
     WHISPER_AVAILABLE = True
@@ -18,28 +33,77 @@ except ImportError:
     whisper = None
 
 
+def find_capture_device(logger: Optional[logging.Logger] = None):
+    """
+    Index of the shared dsnoop capture device (lelamp_capture or hw_capture_dsnoop).
+
+    Looked up by name since the index can change; falls back to the default
+    input (None if even that lookup fails).
+    """
+    logger = logger or logging.getLogger("service.WakeService")
+    device = None
+    try:
+        devices = sd.query_devices()
+        for i, dev in enumerate(devices):
+            dev_name = dev['name'] if isinstance(dev, dict) else str(dev)
+            if 'lelamp_capture' in dev_name or 'hw_capture_dsnoop' in dev_name:
+                device = i
+                logger.info(f"Found capture device: {dev_name} (index {i})")
+                break
+        if device is None:
+            # Fallback to default input
+            device = sd.default.device[0]
+            logger.warning(f"Using default input device: {device}")
+    except Exception as e:
+        logger.warning(f"Error finding device, using default: {e}")
+    return device
+
+
 class WakeService:
     """
-    Local wake word detection service using Whisper tiny model
+    Local wake word detection service
     Runs in background thread, calls callback when wake word detected
     """
 
-    def __init__(self, wake_phrases: list = None, model_size: str = "tiny"):
+    VERIFY_SECONDS = 2.0  # Audio handed to Whisper when verifying a spotter hit
+
+    def __init__(
+        self,
+        wake_phrases: list = None,
+        model_size: str = "tiny",
+        templates_dir: Optional[str] = None,
+        threshold: float = KeywordSpotter.DEFAULT_THRESHOLD,
+        verify_with_whisper: bool = False,
+    ):
         """
         Initialize wake service
 
         Args:
             wake_phrases: List of phrases to detect (default: ["wake up", "hey lamp"])
             model_size: Whisper model size (tiny, base, small) - tiny is fastest
+            templates_dir: Directory of wake word WAV templates (default: ~/.lelamp/wake_templates)
+            threshold: Keyword spotter match threshold (lower = stricter)
+            verify_with_whisper: Confirm spotter hits with Whisper before waking
         """
-        if not WHISPER_AVAILABLE:
-            raise RuntimeError("Whisper not installed. Install with: pip install openai-whisper")
+        from lelamp.user_data import USER_WAKE_TEMPLATES_DIR
+
+        self.templates_dir = Path(templates_dir) if templates_dir else USER_WAKE_TEMPLATES_DIR
+        self.threshold = threshold
+        self.verify_with_whisper = verify_with_whisper
+
+        if not load_templates(self.templates_dir) and not WHISPER_AVAILABLE:
+            raise RuntimeError(
+                f"No wake word templates in {self.templates_dir} and Whisper not installed. "
+                "Record templates (python -m lelamp.service.wake.enrollment) "
+                "or install with: pip install openai-whisper"
+            )
 
         self.logger = logging.getLogger("service.WakeService")
 
         self.wake_phrases = wake_phrases or ["wake up", "hey lamp", "wake"]
         self.model_size = model_size
         self.model = None
+        self.spotter: Optional[KeywordSpotter] = None
         self._running = False
         self._thread = None
         self._callback: Optional[Callable[[], None]] = None
@@ -56,6 +120,17 @@ class WakeService:
         # Overflow tracking
         self._overflow_logged = False
 
+        # Spotter stats
+        self._stats = {
+            "mode": None,
+            "audio_seconds": 0.0,
+            "processing_seconds": 0.0,
+            "detections": 0,
+            "verifier_rejections": 0,
+            "last_detection_latency_ms": None,
+            "last_score": None,
+        }
+
     def start(self, callback: Callable[[], None]):
         """
         Start listening for wake word
@@ -70,30 +145,23 @@ class WakeService:
         self._callback = callback
         self._running = True
 
-        # Load Whisper model
         try:
-            self.logger.info(f"Loading Whisper {self.model_size} model...")
-            self.model = whisper.load_model(self.model_size)
-            self.logger.info("Whisper model loaded")
+            if load_templates(self.templates_dir):
+                self.spotter = KeywordSpotter.from_directory(self.templates_dir, threshold=self.threshold)
+                listen_loop = self._spotter_loop
+            else:
+                self.logger.warning(f"No wake word templates in {self.templates_dir}, falling back to Whisper")
+                listen_loop = self._listen_loop
+            self._stats["mode"] = "spotter" if self.spotter else "whisper"
+
+            # Whisper is only needed for the fallback loop or to verify spotter hits
+            if self.spotter is None or (self.verify_with_whisper and WHISPER_AVAILABLE):
+                self.logger.info(f"Loading Whisper {self.model_size} model...")
+                self.model = whisper.load_model(self.model_size)
+                self.logger.info("Whisper model loaded")
 
             # Start audio capture with smaller blocksize to reduce overflow
-            # Use the dsnoop device for mic sharing (lelamp_capture or hw_capture_dsnoop)
-            # Find the device by name since index can change
-            device = None
-            try:
-                devices = sd.query_devices()
-                for i, dev in enumerate(devices):
-                    dev_name = dev['name'] if isinstance(dev, dict) else str(dev)
-                    if 'lelamp_capture' in dev_name or 'hw_capture_dsnoop' in dev_name:
-                        device = i
-                        self.logger.info(f"Found capture device: {dev_name} (index {i})")
-                        break
-                if device is None:
-                    # Fallback to default input
-                    device = sd.default.device[0]
-                    self.logger.warning(f"Using default input device: {device}")
-            except Exception as e:
-                self.logger.warning(f"Error finding device, using default: {e}")
+            device = find_capture_device(self.logger)
 
             self._audio_stream = sd.InputStream(
                 samplerate=self.capture_rate,
@@ -106,7 +174,7 @@ class WakeService:
             self._audio_stream.start()
 
             # Start processing thread
-            self._thread = threading.Thread(target=self._listen_loop, daemon=True)
+            self._thread = threading.Thread(target=listen_loop, daemon=True)
             self._thread.start()
 
             self.logger.info(f"Wake word service started, listening for: {self.wake_phrases}")
@@ -137,26 +205,83 @@ class WakeService:
                 self.logger.info(f"Audio input overflow (CPU busy) - this is normal during processing")
                 self._overflow_logged = True
 
-        # Try to add to queue, drop if full
+        # Try to add to queue, drop if full (arrival time is kept for latency stats)
+        item = (indata.copy(), time.monotonic())
         try:
-            self._audio_queue.put_nowait(indata.copy())
+            self._audio_queue.put_nowait(item)
         except queue.Full:
             # Queue full, drop oldest audio chunk to make room
             try:
                 self._audio_queue.get_nowait()
-                self._audio_queue.put_nowait(indata.copy())
+                self._audio_queue.put_nowait(item)
             except:
                 pass  # Just drop this frame if we can't add it
 
+    def _spotter_loop(self):
+        """Streaming keyword spotter loop (runs in background thread)"""
+        resampler = soxr.ResampleStream(self.capture_rate, SPOTTER_RATE, 1, dtype="float32")
+        recent = deque(maxlen=int(SPOTTER_RATE * self.VERIFY_SECONDS))
+        self.spotter.reset()
+
+        while self._running:
+            try:
+                try:
+                    chunk, arrived = self._audio_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                t0 = time.process_time()
+                audio_16k = resampler.resample_chunk(chunk.ravel())
+                detection = self.spotter.process(audio_16k)
+                self._stats["processing_seconds"] += time.process_time() - t0
+                self._stats["audio_seconds"] += len(chunk) / self.capture_rate
+                if self.model is not None:
+                    recent.extend(audio_16k)
+
+                if detection is None:
+                    continue
+
+                self._stats["last_score"] = round(detection.score, 3)
+                self._stats["last_detection_latency_ms"] = round((time.monotonic() - arrived) * 1000, 1)
+                self.logger.info(
+                    f"Wake word matched template '{detection.template}' "
+                    f"(score {detection.score:.3f})"
+                )
+
+                if self.model is not None and not self._verify(np.array(recent, dtype=np.float32)):
+                    self._stats["verifier_rejections"] += 1
+                    continue
+
+                self._stats["detections"] += 1
+                recent.clear()
+                if self._callback:
+                    try:
+                        self._callback()
+                    except Exception as e:
+                        self.logger.error(f"Error in wake word callback: {e}")
+
+            except Exception as e:
+                if self._running:
+                    self.logger.error(f"Error in wake word detection: {e}")
+                time.sleep(0.1)
+
+    def _verify(self, audio_16k: np.ndarray) -> bool:
+        """Second-stage check of a spotter hit with Whisper"""
+        result = self.model.transcribe(audio_16k, language="en", fp16=False, task="transcribe")
+        text = result["text"].lower().strip()
+        verified = any(phrase in text for phrase in self.wake_phrases)
+        self.logger.info(f"Whisper verifier heard '{text}': {'accepted' if verified else 'rejected'}")
+        return verified
+
     def _listen_loop(self):
-        """Main listening loop (runs in background thread)"""
+        """Whisper-only listening loop, used when no templates are enrolled (runs in background thread)"""
         audio_buffer = []
 
         while self._running:
             try:
                 # Get audio chunk (timeout to allow checking _running flag)
                 try:
-                    chunk = self._audio_queue.get(timeout=0.5)
+                    chunk, _ = self._audio_queue.get(timeout=0.5)
                     audio_buffer.append(chunk)
                 except queue.Empty:
                     continue
@@ -236,3 +361,12 @@ class WakeService:
     def is_running(self) -> bool:
         """Check if service is running"""
         return self._running
+
+    def get_stats(self) -> dict:
+        """Detection stats: mode, CPU share, detections, verifier rejections and latency"""
+        stats = dict(self._stats)
+        audio = stats.pop("audio_seconds")
+        processing = stats.pop("processing_seconds")
+        stats["cpu_percent"] = round(100.0 * processing / audio, 2) if audio else 0.0
+        stats["audio_seconds"] = round(audio, 1)
+        return stats
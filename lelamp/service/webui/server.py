@@ -15,6 +15,8 @@ from pathlib import Path
 import uvicorn
 
 import lelamp.globals as g
+from lelamp.service.boot_orchestrator import BootOrchestrator
+from lelamp.service.boot_graph import add_lamp_steps
 
 logger = logging.getLogger(__name__)
 
@@ -62,68 +64,174 @@ def init_hardware_services():
     This is the single source of truth for service initialization.
     Services are stored in globals (g.*) and used by both WebUI and Agent.
     The agent consumes these services - it doesn't create them.
+
+    Independent services start concurrently in dependency order; per-service
+    status and timings are available from g.boot_orchestrator.
     """
     global _hardware_initialized
 
     if _hardware_initialized:
         return
 
-    config = g.CONFIG
     logger.info("Initializing hardware services (server.py is primary)...")
 
-    # Auto-detect hardware and update config if needed
-    # This handles missing USB camera gracefully
+    # Steps read g.CONFIG when they run: hardware detection may disable vision
+    boot_config = g.CONFIG.get("boot", {})
+    boot = BootOrchestrator(
+        max_workers=boot_config.get("workers", 4),
+        idle_delay=boot_config.get("deferred_delay", 5.0),
+    )
+    g.boot_orchestrator = boot
+
+    def cfg(*keys, default=None):
+        value = g.CONFIG
+        for key in keys[:-1]:
+            value = value.get(key, {})
+        return value.get(keys[-1], default)
+
+    # g.vision_service.set_hand_callback(g.animation_service.hand_control_callback)
+
+    # Set system volumes
+    # _set_system_volumes(config)
+
+    # The graph (dependencies, interactive/deferred steps) lives in boot_graph
+    add_lamp_steps(
+        boot,
+        init={
+            "hardware_detection": _detect_hardware,
+            "rgb": lambda: _init_rgb_service(g.CONFIG),
+            "recordings": _prewarm_recordings,
+            "motors": lambda: _init_motors(g.CONFIG),
+            "audio": lambda: _init_audio_service(g.CONFIG),
+            "theme": lambda: _init_theme_service(g.CONFIG),
+            "beat_tracker": lambda: _init_beat_tracker(g.CONFIG),
+            "level_meter": lambda: _init_level_meter(g.CONFIG),
+            "vision": lambda: _init_vision_service(g.CONFIG),
+            "emotion": lambda: _init_emotion_service(g.CONFIG),
+            "workflows": lambda: _init_workflow_service(g.CONFIG),
+            "workflow_triggers": lambda: _init_workflow_triggers(g.CONFIG),
+            "thermal_governor": lambda: _init_thermal_governor(g.CONFIG),
+            "wake": lambda: _init_wake_service(g.CONFIG),
+            "agent": _start_agent_thread,
+        },
+        enabled={
+            "rgb": lambda: cfg("rgb", "enabled", default=True),
+            "motors": lambda: cfg("motors", "enabled", default=True),
+            "beat_tracker": lambda: cfg("modifiers", "music", "beat_tracking", "enabled", default=True),
+            # Vision Service - if vision or face_tracking enabled
+            "vision": lambda: cfg("vision", "enabled", default=True) or cfg("face_tracking", "enabled", default=False),
+            "emotion": lambda: g.vision_service is not None and cfg("vision", "emotion", "enabled", default=False),
+            "workflow_triggers": lambda: g.workflow_service is not None and cfg("workflows", "triggers", "enabled", default=True),
+            "thermal_governor": lambda: cfg("thermal", "enabled", default=True),
+            "wake": lambda: cfg("wake", "enabled", default=True),
+        },
+        check={
+            "rgb": lambda: g.rgb_service is not None,
+            "motors": lambda: g.animation_service is not None,
+            "audio": lambda: g.audio_service is not None,
+            "theme": lambda: g.theme_service is not None,
+            "vision": lambda: g.vision_service is not None,
+            "emotion": lambda: g.emotion_service is not None,
+            "workflows": lambda: g.workflow_service is not None,
+            "thermal_governor": lambda: g.thermal_governor is not None,
+            "wake": lambda: g.wake_service is not None,
+        },
+    )
+
+    boot.run()
+
+    _hardware_initialized = True
+    logger.info("Hardware services initialized")
+
+
+def _detect_hardware():
+    """Auto-detect hardware and update config if needed."""
     detection = g.auto_detect_hardware()
     if detection["updated_config"]:
-        config = g.CONFIG  # Reload after save
         logger.info(f"Hardware detection: camera_audio={detection['camera_audio']}, "
                    f"camera_video={detection['camera_video']}")
     elif not detection["camera_detected"]:
         logger.info("USB camera not detected (audio capture may fail)")
 
-    # RGB Service - default enabled
-    if config.get("rgb", {}).get("enabled", True):
-        _init_rgb_service(config)
-    else:
-        logger.info("RGB disabled in config")
 
-    # Motor/Animation Service - default enabled
-    if config.get("motors", {}).get("enabled", True):
-        # Check if Waveshare board matches udev rules (handles board replacement)
-        _check_servo_driver_udev()
-        _init_animation_service(config)
-    else:
-        logger.info("Motors disabled in config")
+def _prewarm_recordings():
+    """Scan the recording directories and parse the frequently played ones."""
+    from lelamp.recording_catalog import get_recording_catalog
 
-    # Audio Service - always start (needed for playing system sounds)
-    _init_audio_service(config)
+    try:
+        get_recording_catalog().prewarm()
+    except Exception as e:
+        logger.warning(f"Recording prewarm failed: {e}")
 
-    # Theme Service - always start
-    _init_theme_service(config)
 
-    # Vision Service - if vision or face_tracking enabled
-    if config.get("vision", {}).get("enabled", True) or config.get("face_tracking", {}).get("enabled", False):
-        _init_vision_service(config)
-    else:
-        logger.info("Vision disabled in config")
+def _init_motors(config: dict):
+    """Check the servo driver, then start the animation service."""
+    # Check if Waveshare board matches udev rules (handles board replacement)
+    _check_servo_driver_udev()
+    _init_animation_service(config)
 
-    # Workflow Service - for automation workflows
-    _init_workflow_service(config)
 
-    # g.vision_service.set_hand_callback(g.animation_service.hand_control_callback)
+def _agent_finished(ready: bool, error=None):
+    """Report the agent boot step; the pipelines call this once they're live (or have died)."""
+    if g.boot_orchestrator is not None:
+        g.boot_orchestrator.finish("agent", ready, error=error)
 
-    # Set system volumes
-    # _set_system_volumes(config)
+
+def _start_agent_thread():
+    """Start the configured voice pipeline on its own event loop."""
+    if g.CONFIG.get("pipeline", {}).get("type", "livekit") == "local":
+        _start_local_pipeline()
+        return
 
     import asyncio
     from lelamp.service.agent.agent_service import init_agent_service
     def run_async_in_thread():
-        asyncio.run(init_agent_service())
+        try:
+            asyncio.run(init_agent_service(on_ready=lambda: _agent_finished(True)))
+        except Exception as e:
+            logger.error(f"Voice agent stopped: {e}")
+            _agent_finished(False, error=str(e))
+        else:
+            _agent_finished(False)  # Returned without ever connecting
     thread = threading.Thread(target=run_async_in_thread)
     thread.start()
 
-    _hardware_initialized = True
-    logger.info("Hardware services initialized")
+
+def _start_local_pipeline():
+    """Start the on-device Whisper + Ollama + Piper pipeline (pipeline.type: local)."""
+    from lelamp.service.local_voice import VoiceOrchestrator
+
+    try:
+        g.voice_orchestrator = VoiceOrchestrator.from_config(g.CONFIG, metrics_service=g.metrics_service)
+        g.voice_orchestrator.start_thread(
+            on_ready=lambda: _agent_finished(True),
+            on_error=lambda e: _agent_finished(False, error=str(e)),
+        )
+        logger.info("Local voice pipeline started")
+    except Exception as e:
+        logger.error(f"Local voice pipeline failed: {e}")
+        g.voice_orchestrator = None
+        _agent_finished(False, error=str(e))
+
+
+def _init_wake_service(config: dict):
+    """Create the wake word service; sleep mode starts and stops it."""
+    from lelamp.service.wake import KeywordSpotter, WakeService
+
+    wake_config = config.get("wake", {})
+    try:
+        g.wake_service = WakeService(
+            wake_phrases=wake_config.get("phrases"),
+            model_size=wake_config.get("whisper_model", "tiny"),
+            templates_dir=wake_config.get("templates_dir"),
+            threshold=wake_config.get("threshold", KeywordSpotter.DEFAULT_THRESHOLD),
+            verify_with_whisper=wake_config.get("verify_with_whisper", False),
+        )
+        logger.info("Wake word service ready")
+    except Exception as e:
+        logger.warning(f"Wake word service unavailable: {e}")
+        g.wake_service = None
+
 
 def _init_rgb_service(config: dict):
     """Initialize RGB LED service."""
@@ -138,6 +246,7 @@ def _init_rgb_service(config: dict):
         return
 
     set_rgb_fps(rgb_config.get("fps", 1))
+    g.config_store.subscribe("rgb.fps", lambda changes: set_rgb_fps(changes["rgb.fps"][1] or 1))
 
     try:
         g.rgb_service = RGBService(
@@ -238,6 +347,56 @@ def _init_theme_service(config: dict):
         g.theme_service = None
 
 
+def _init_beat_tracker(config: dict):
+    """Initialize the on-device beat tracker and connect it to motion."""
+    from lelamp.service.audio import get_beat_tracker
+
+    music_config = config.get("modifiers", {}).get("music", {})
+    tracking_config = music_config.get("beat_tracking", {})
+
+    try:
+        tracker = get_beat_tracker()
+
+        # Capture services feed the tracker themselves; otherwise capture directly,
+        # but only when the music modifier will use it (no idle arecord at boot)
+        capture = g.audio_router or g.microphone_service
+        if capture is not None:
+            capture.set_beat_tracker(tracker)
+        elif not music_config.get("enabled", False):
+            logger.info("Beat tracker idle - music modifier disabled")
+            return
+        elif g.detect_usb_camera():
+            tracker.start_capture(tracking_config.get("device", "lelamp_capture"))
+        else:
+            logger.info("Beat tracker idle - USB camera mic not detected")
+            return
+
+        if g.animation_service:
+            g.animation_service.connect_beat_tracker(tracker)
+        logger.info("Beat tracker started")
+    except Exception as e:
+        logger.warning(f"Beat tracker failed: {e}")
+
+
+def _init_level_meter(config: dict):
+    """Connect the shared level meter to whichever capture is running."""
+    from lelamp.service.audio import get_beat_tracker, get_level_meter
+
+    try:
+        meter = get_level_meter()
+        capture = g.audio_router or g.microphone_service
+        if capture is not None:
+            capture.set_level_meter(meter)
+        elif get_beat_tracker().capturing:
+            get_beat_tracker().set_level_meter(meter)
+        else:
+            logger.info("Level meter will capture on demand")
+            return
+        logger.info("Level meter connected to capture")
+    except Exception as e:
+        logger.warning(f"Level meter failed: {e}")
+
+
 def _init_vision_service(config: dict):
     """Initialize vision service for camera/face tracking."""
     from lelamp.service.vision.vision_service import VisionService
@@ -256,12 +415,15 @@ def _init_vision_service(config: dict):
 
     resolution = tuple(vision_config.get("resolution", [320, 240]))
     fps = vision_config.get("fps", 10)
+    emotion_config = vision_config.get("emotion", {})
+    max_faces = emotion_config.get("max_faces", 1) if emotion_config.get("enabled", False) else 1
 
     try:
         g.vision_service = VisionService(
             camera_index=camera_index,
             resolution=resolution,
             fps=fps,
+            max_num_faces=max_faces,
         )
         g.vision_service.start()
         logger.info(f"Vision service started (camera: {camera_index})")
@@ -270,6 +432,32 @@ def _init_vision_service(config: dict):
         g.vision_service = None
 
 
+def _init_emotion_service(config: dict):
+    """Initialize facial emotion recognition on the vision service's faces."""
+    from lelamp.service.vision.emotion_service import init_emotion_service
+
+    if g.vision_service is None:
+        return
+
+    emotion_config = config.get("vision", {}).get("emotion", {})
+
+    try:
+        g.emotion_service = init_emotion_service(
+            reclassify_interval=emotion_config.get("reclassify_interval", 3.0),
+        )
+        g.emotion_service.start()
+        g.vision_service.add_face_listener(g.emotion_service.process_faces)
+
+        if emotion_config.get("react_rgb", True) and g.rgb_service:
+            g.rgb_service.connect_emotion_service(g.emotion_service)
+        if emotion_config.get("react_animation", True) and g.animation_service:
+            g.animation_service.connect_emotion_service(g.emotion_service)
+        logger.info("Emotion service started")
+    except Exception as e:
+        logger.warning(f"Emotion service failed: {e}")
+        g.emotion_service = None
+
+
 def _init_workflow_service(config: dict):
     """Initialize workflow service."""
     from lelamp.service.workflows.workflow_service import WorkflowService
@@ -283,6 +471,54 @@ def _init_workflow_service(config: dict):
         logger.warning(f"Workflow service failed: {e}")
         g.workflow_service = None
 
+def _init_workflow_triggers(config: dict):
+    """Start the workflow trigger engine and feed it presence and music events."""
+    from lelamp.service.audio import get_beat_tracker
+
+    trigger_config = config.get("workflows", {}).get("triggers", {})
+
+    try:
+        engine = g.workflow_service.start_trigger_engine(
+            absence_timeout=trigger_config.get("absence_timeout", 30.0),
+            music_gap=trigger_config.get("music_gap", 60.0),
+        )
+        if g.vision_service:
+            g.vision_service.add_face_listener(engine.note_faces)
+        if config.get("modifiers", {}).get("music", {}).get("beat_tracking", {}).get("enabled", True):
+            get_beat_tracker().add_beat_listener(engine.note_beat)
+        logger.info("Workflow trigger engine started")
+    except Exception as e:
+        logger.warning(f"Workflow trigger engine failed: {e}")
+
+
+def _init_thermal_governor(config: dict):
+    """Start the thermal governor with the loops and rates it may throttle."""
+    from lelamp.service.rgb.sequences import set_rgb_fps_scale
+    from lelamp.service.thermal_governor import init_thermal_governor
+
+    def set_analysis_scale(scale):
+        # Scene analysis is started by the agent, possibly after boot
+        if g.ollama_vision_service:
+            g.ollama_vision_service.set_rate_scale(scale)
+
+    try:
+        governor = init_thermal_governor(config.get("thermal", {}))
+        governor.add_knob("analysis", set_analysis_scale)
+        governor.add_knob("rgb", set_rgb_fps_scale)
+        if g.vision_service:
+            governor.add_knob("vision", g.vision_service.set_rate_scale)
+            governor.add_knob("hands", g.vision_service.set_hand_tracking_scale)
+            governor.add_loop("vision", g.vision_service.get_loop_stats)
+        if g.animation_service:
+            governor.add_loop("animation", g.animation_service.get_loop_stats)
+        governor.start()
+        g.config_store.subscribe("thermal", lambda changes: governor.configure(g.CONFIG.get("thermal", {})))
+        g.thermal_governor = governor
+    except Exception as e:
+        logger.warning(f"Thermal governor failed: {e}")
+        g.thermal_governor = None
+
+
 def _set_system_volumes(config: dict):
     """Set system audio volumes from config."""
     speaker_vol = config.get("volume", 50)
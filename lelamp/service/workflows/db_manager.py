@@ -256,8 +256,9 @@ class WorkflowDatabase:
         """
         try:
             with sqlite3.connect(self.db_path) as conn:
-                # Delete associated steps first (foreign key cleanup)
+                # Delete associated steps and triggers first (foreign key cleanup)
                 conn.execute("DELETE FROM workflow_steps WHERE run_id = ?", (run_id,))
+                conn.execute("DELETE FROM workflow_active_triggers WHERE run_id = ?", (run_id,))
                 # Delete the run itself
                 conn.execute("DELETE FROM workflow_runs WHERE run_id = ?", (run_id,))
                 conn.commit()
@@ -591,6 +592,177 @@ class WorkflowDatabase:
             self.logger.error(f"Error getting state for run {run_id}: {e}")
             return {}
 
+    # ========================================================================
+    # Triggers
+    # ========================================================================
+
+    def add_trigger(
+        self,
+        workflow_id: str,
+        trigger_type: str,
+        trigger_config: Dict = None,
+        enabled: bool = True
+    ) -> str:
+        """
+        Add a trigger that starts a workflow automatically.
+
+        Args:
+            workflow_id: Which workflow to start
+            trigger_type: "time_of_day", "presence", "music_start", ...
+            trigger_config: Trigger-specific config (e.g. {"time": "07:30"})
+            enabled: Whether the trigger is armed
+
+        Returns:
+            trigger_id
+        """
+        trigger_id = str(uuid.uuid4())
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    INSERT INTO workflow_triggers
+                    (trigger_id, workflow_id, trigger_type, trigger_config, enabled)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (
+                    trigger_id,
+                    workflow_id,
+                    trigger_type,
+                    json.dumps(trigger_config or {}),
+                    1 if enabled else 0
+                ))
+                conn.commit()
+
+            return trigger_id
+
+        except Exception as e:
+            self.logger.error(f"Error adding trigger for {workflow_id}: {e}")
+            raise
+
+    def list_triggers(self, enabled_only: bool = True) -> List[Dict]:
+        """List workflow start triggers"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+
+                query = "SELECT * FROM workflow_triggers"
+                if enabled_only:
+                    query += " WHERE enabled = 1"
+
+                cursor = conn.execute(query)
+                return [dict(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            self.logger.error(f"Error listing triggers: {e}")
+            return []
+
+    def delete_trigger(self, trigger_id: str) -> bool:
+        """Delete a workflow start trigger"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.execute(
+                    "DELETE FROM workflow_triggers WHERE trigger_id = ?",
+                    (trigger_id,)
+                )
+                conn.commit()
+                return cursor.rowcount > 0
+
+        except Exception as e:
+            self.logger.error(f"Error deleting trigger {trigger_id}: {e}")
+            return False
+
+    def add_active_triggers(
+        self,
+        run_id: str,
+        workflow_id: str,
+        triggers: List[Dict]
+    ) -> List[str]:
+        """
+        Arm progression triggers for a running workflow in one transaction.
+
+        Args:
+            run_id: The run the triggers belong to
+            workflow_id: Which workflow (for quick lookups)
+            triggers: Dicts with trigger_type, trigger_config, next_check_at
+                (datetime or None) and check_interval_seconds
+
+        Returns:
+            active_trigger_id for each trigger, in order
+        """
+        ids = [str(uuid.uuid4()) for _ in triggers]
+
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany("""
+                    INSERT INTO workflow_active_triggers
+                    (active_trigger_id, run_id, workflow_id, trigger_type, trigger_config,
+                     next_check_at, check_interval_seconds)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (
+                        active_trigger_id,
+                        run_id,
+                        workflow_id,
+                        trigger["trigger_type"],
+                        json.dumps(trigger.get("trigger_config") or {}),
+                        trigger["next_check_at"].isoformat() if trigger.get("next_check_at") else None,
+                        trigger.get("check_interval_seconds")
+                    )
+                    for active_trigger_id, trigger in zip(ids, triggers)
+                ])
+                conn.commit()
+
+            return ids
+
+        except Exception as e:
+            self.logger.error(f"Error arming triggers for run {run_id}: {e}")
+            raise
+
+    def list_active_triggers(self) -> List[Dict]:
+        """Enabled progression triggers whose run is still running"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute("""
+                    SELECT t.* FROM workflow_active_triggers t
+                    JOIN workflow_runs r ON r.run_id = t.run_id
+                    WHERE t.enabled = 1 AND r.status = ?
+                    ORDER BY t.next_check_at
+                """, (RunStatus.RUNNING.value,))
+                return [dict(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            self.logger.error(f"Error listing active triggers: {e}")
+            return []
+
+    def record_active_triggers_fired(self, fired: List[tuple]):
+        """
+        Record trigger firings in one transaction.
+
+        Args:
+            fired: (active_trigger_id, checked_at, next_check_at or None) tuples
+        """
+        if not fired:
+            return
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany("""
+                    UPDATE workflow_active_triggers
+                    SET last_checked_at = ?, next_check_at = ?,
+                        triggered_count = triggered_count + 1
+                    WHERE active_trigger_id = ?
+                """, [
+                    (
+                        checked_at.isoformat(),
+                        next_check_at.isoformat() if next_check_at else None,
+                        active_trigger_id
+                    )
+                    for active_trigger_id, checked_at, next_check_at in fired
+                ])
+                conn.commit()
+
+        except Exception as e:
+            self.logger.error(f"Error updating active triggers: {e}")
+
     # ========================================================================
     # Monitoring & Stats
     # ========================================================================
@@ -0,0 +1,467 @@
+"""
+Event-driven trigger engine for workflows.
+
+Arms the triggers stored in the database and fires them without polling:
+
+- workflow_triggers start a workflow ("time_of_day", "presence",
+  "music_start", ...)
+- workflow_active_triggers progress a running workflow ("time_interval",
+  "keyword", "state_change"); they are armed from the workflow's
+  progression_triggers when it starts
+
+Timed triggers live in a heap ordered by their next fire time, and the
+engine thread sleeps until exactly the earliest one. Event triggers are
+indexed by event name and only run when emit() delivers that event, for
+example presence changes from vision, the first beat of music, or the
+user's speech. The database is read once at start; after that it is only
+written when a trigger is armed or fires (one transaction per wakeup), so
+hundreds of armed triggers cost nothing while idle.
+"""
+
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TIMED_TRIGGERS = ("time_of_day", "time_interval")
+
+# Event each event-driven trigger type listens for (default: its own name)
+TRIGGER_EVENTS = {
+    "keyword": "user_speech",
+    "face_detected": "presence",
+}
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+@dataclass
+class ArmedTrigger:
+    """A trigger held in memory by the engine."""
+
+    trigger_id: str
+    workflow_id: str
+    trigger_type: str
+    config: Dict[str, Any] = field(default_factory=dict)
+    run_id: Optional[str] = None  # Set for progression triggers of a running workflow
+    next_fire_at: Optional[float] = None  # Epoch seconds, timed triggers only
+    triggered_count: int = 0
+    last_fired_at: float = 0.0
+    version: int = 0  # Bumped on reschedule/disarm; stale heap entries are skipped
+
+    @property
+    def event(self) -> Optional[str]:
+        if self.trigger_type in TIMED_TRIGGERS:
+            return None
+        return TRIGGER_EVENTS.get(self.trigger_type, self.trigger_type)
+
+
+def _parse_clock(value: str):
+    hour, minute = value.split(":")
+    return int(hour), int(minute)
+
+
+def _clock_minutes(value: str) -> int:
+    hour, minute = _parse_clock(value)
+    return hour * 60 + minute
+
+
+def next_time_of_day(config: Dict[str, Any], after: float) -> Optional[float]:
+    """Next epoch time matching config {"time": "HH:MM", "days": ["mon", ...]}."""
+    try:
+        hour, minute = _parse_clock(config["time"])
+    except (KeyError, ValueError):
+        return None
+    days = {d[:3].lower() for d in config.get("days", [])} or set(WEEKDAYS)
+
+    start = datetime.fromtimestamp(after)
+    candidate = start.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if candidate.timestamp() <= after:
+        candidate += timedelta(days=1)
+    for _ in range(8):
+        if WEEKDAYS[candidate.weekday()] in days:
+            return candidate.timestamp()
+        candidate += timedelta(days=1)
+    return None
+
+
+def _in_window(config: Dict[str, Any], now: float) -> bool:
+    """Optional "after"/"before" HH:MM window for event triggers (may wrap midnight)."""
+    after, before = config.get("after"), config.get("before")
+    if not after and not before:
+        return True
+    current = datetime.fromtimestamp(now)
+    minutes = current.hour * 60 + current.minute
+    start = _clock_minutes(after) if after else 0
+    end = _clock_minutes(before) if before else 24 * 60
+    if start <= end:
+        return start <= minutes < end
+    return minutes >= start or minutes < end
+
+
+def _to_epoch(value) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+class TriggerEngine:
+    """Arms workflow triggers and fires them on time or on in-process events."""
+
+    def __init__(
+        self,
+        db,
+        on_fire: Callable[[ArmedTrigger, Dict[str, Any]], None],
+        absence_timeout: float = 30.0,
+        music_gap: float = 60.0,
+        time_fn: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            db: WorkflowDatabase holding the trigger tables
+            on_fire: Called with (trigger, event data) on the engine thread
+            absence_timeout: Seconds without a face before presence goes false
+            music_gap: Seconds without beats before the next beat is a new "music_start"
+            time_fn: Clock (epoch seconds)
+        """
+        self.db = db
+        self.on_fire = on_fire
+        self.absence_timeout = absence_timeout
+        self.music_gap = music_gap
+        self.time_fn = time_fn
+
+        self._triggers: Dict[str, ArmedTrigger] = {}
+        self._by_event: Dict[str, Dict[str, ArmedTrigger]] = {}
+        self._by_run: Dict[str, List[str]] = {}
+        self._heap: List[tuple] = []  # (next_fire_at, version, trigger_id)
+
+        self._events = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Edge detection for continuous sources
+        self._present = False
+        self._last_face_at = 0.0
+        self._last_beat_at = 0.0
+
+        # Stats
+        self.fired = 0
+        self.events_received = 0
+        self.events_matched = 0
+        self.wakeups = 0
+
+    # =========================================================================
+    # Lifecycle
+    # =========================================================================
+
+    def start(self):
+        """Load enabled triggers (one query per table) and start the engine thread."""
+        if self._running:
+            return
+
+        for row in self.db.list_triggers(enabled_only=True):
+            self._arm(ArmedTrigger(
+                trigger_id=row["trigger_id"],
+                workflow_id=row["workflow_id"],
+                trigger_type=row["trigger_type"],
+                config=self._load_config(row.get("trigger_config")),
+            ))
+        for row in self.db.list_active_triggers():
+            self._arm(ArmedTrigger(
+                trigger_id=row["active_trigger_id"],
+                workflow_id=row["workflow_id"],
+                trigger_type=row["trigger_type"],
+                config=self._load_config(row.get("trigger_config")),
+                run_id=row["run_id"],
+                next_fire_at=_to_epoch(row.get("next_check_at")),
+                triggered_count=row.get("triggered_count") or 0,
+            ))
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="workflow-triggers")
+        self._thread.start()
+        logger.info(f"Trigger engine started with {len(self._triggers)} armed triggers")
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    @staticmethod
+    def _load_config(value) -> Dict[str, Any]:
+        if isinstance(value, dict):
+            return value
+        try:
+            return json.loads(value) if value else {}
+        except (TypeError, ValueError):
+            return {}
+
+    # =========================================================================
+    # Arming
+    # =========================================================================
+
+    def add_trigger(self, workflow_id: str, trigger_type: str, config: Dict[str, Any] = None) -> str:
+        """Persist a workflow start trigger and arm it."""
+        trigger_id = self.db.add_trigger(workflow_id, trigger_type, config or {})
+        self._arm(ArmedTrigger(trigger_id, workflow_id, trigger_type, dict(config or {})))
+        return trigger_id
+
+    def remove_trigger(self, trigger_id: str) -> bool:
+        self.disarm(trigger_id)
+        return self.db.delete_trigger(trigger_id)
+
+    def arm_run_triggers(self, run_id: str, workflow_id: str, progression_triggers: List[Dict[str, Any]]) -> List[str]:
+        """Arm a started workflow's progression_triggers (from workflow.json)."""
+        now = self.time_fn()
+        armed = []
+        for spec in progression_triggers or []:
+            trigger_type = spec.get("type")
+            if not trigger_type:
+                continue
+            config = {k: v for k, v in spec.items() if k != "type"}
+            interval = config.get("interval_seconds")
+            next_fire_at = now + interval if trigger_type == "time_interval" and interval else None
+            armed.append(ArmedTrigger("", workflow_id, trigger_type, config, run_id=run_id, next_fire_at=next_fire_at))
+        if not armed:
+            return []
+
+        ids = self.db.add_active_triggers(run_id, workflow_id, [
+            {
+                "trigger_type": t.trigger_type,
+                "trigger_config": t.config,
+                "next_check_at": datetime.fromtimestamp(t.next_fire_at) if t.next_fire_at else None,
+                "check_interval_seconds": t.config.get("interval_seconds"),
+            }
+            for t in armed
+        ])
+        for trigger_id, trigger in zip(ids, armed):
+            trigger.trigger_id = trigger_id
+            self._arm(trigger)
+        logger.info(f"Armed {len(armed)} progression triggers for run {run_id}")
+        return ids
+
+    def disarm_run(self, run_id: str):
+        """Drop a run's progression triggers (the rows go with the run in complete_run)."""
+        with self._cond:
+            trigger_ids = self._by_run.pop(run_id, [])
+        for trigger_id in trigger_ids:
+            self.disarm(trigger_id)
+
+    def disarm(self, trigger_id: str):
+        with self._cond:
+            trigger = self._triggers.pop(trigger_id, None)
+            if trigger is None:
+                return
+            trigger.version += 1  # Invalidates its heap entry
+            if trigger.event:
+                self._by_event.get(trigger.event, {}).pop(trigger_id, None)
+            if trigger.run_id and trigger_id in self._by_run.get(trigger.run_id, []):
+                self._by_run[trigger.run_id].remove(trigger_id)
+
+    def _arm(self, trigger: ArmedTrigger):
+        with self._cond:
+            self._triggers[trigger.trigger_id] = trigger
+            if trigger.run_id:
+                self._by_run.setdefault(trigger.run_id, []).append(trigger.trigger_id)
+            if trigger.event:
+                self._by_event.setdefault(trigger.event, {})[trigger.trigger_id] = trigger
+                return
+            if trigger.next_fire_at is None:
+                trigger.next_fire_at = self._next_fire(trigger, self.time_fn())
+            if trigger.next_fire_at is not None:
+                self._schedule(trigger)
+
+    def _schedule(self, trigger: ArmedTrigger):
+        """Push onto the heap; wake the thread if this is now the earliest."""
+        trigger.version += 1
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (trigger.next_fire_at, trigger.version, trigger.trigger_id))
+        if earliest is None or trigger.next_fire_at < earliest:
+            self._cond.notify()
+
+    def _next_fire(self, trigger: ArmedTrigger, after: float) -> Optional[float]:
+        if trigger.trigger_type == "time_of_day":
+            return next_time_of_day(trigger.config, after)
+        interval = trigger.config.get("interval_seconds")
+        return after + float(interval) if interval else None
+
+    # =========================================================================
+    # Events
+    # =========================================================================
+
+    def emit(self, event: str, data: Optional[Dict[str, Any]] = None):
+        """Deliver an in-process event; cheap and non-blocking for the caller."""
+        with self._cond:
+            if event not in self._by_event:
+                return
+            self._events.append((event, dict(data or {}), self.time_fn()))
+            self._cond.notify()
+
+    def note_faces(self, frame=None, boxes=None, timestamp: Optional[float] = None):
+        """Vision face listener: emits "presence" only when someone arrives or leaves."""
+        now = self.time_fn()
+        if boxes:
+            self._last_face_at = now
+            if not self._present:
+                self._present = True
+                self.emit("presence", {"present": True, "faces": len(boxes)})
+        elif self._present and now - self._last_face_at >= self.absence_timeout:
+            self._present = False
+            self.emit("presence", {"present": False})
+
+    def note_beat(self, state=None):
+        """Beat listener: the first beat after a quiet gap emits "music_start"."""
+        now = self.time_fn()
+        if now - self._last_beat_at >= self.music_gap:
+            data = {"bpm": round(getattr(state, "bpm", 0.0), 1)} if state is not None else {}
+            self.emit("music_start", data)
+        self._last_beat_at = now
+
+    def _matches(self, trigger: ArmedTrigger, data: Dict[str, Any], now: float) -> bool:
+        config = trigger.config
+        if trigger.last_fired_at and now - trigger.last_fired_at < config.get("cooldown_seconds", 0):
+            return False
+        if not _in_window(config, now):
+            return False
+
+        if trigger.trigger_type == "keyword":
+            text = f" {re.sub(r'[^a-z0-9 ]', ' ', data.get('text', '').lower())} "
+            text = re.sub(r"\s+", " ", text)
+            return any(f" {re.sub(r'[^a-z0-9 ]', ' ', k.lower()).strip()} " in text
+                       for k in config.get("keywords", []))
+        if trigger.trigger_type == "state_change":
+            if data.get("key") != config.get("state_key"):
+                return False
+            return "value" not in config or data.get("value") == config["value"]
+        if trigger.event == "presence":
+            return data.get("present") == config.get("present", True)
+        # Generic events: every key in "match" must equal the event data
+        return all(data.get(k) == v for k, v in config.get("match", {}).items())
+
+    # =========================================================================
+    # Engine thread
+    # =========================================================================
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._events and not self._due():
+                    self._cond.wait(self._timeout())
+                if not self._running:
+                    return
+                self.wakeups += 1
+                events = list(self._events)
+                self._events.clear()
+                due = self._pop_due()
+
+            if due:
+                self._record(due)
+            for trigger in due:
+                self._fire(trigger, {"event": trigger.trigger_type, "scheduled_at": trigger.last_fired_at})
+            for event, data, received_at in events:
+                self._dispatch(event, data, received_at)
+
+    def _drop_stale(self):
+        while self._heap:
+            _, version, trigger_id = self._heap[0]
+            trigger = self._triggers.get(trigger_id)
+            if trigger is not None and trigger.version == version:
+                return
+            heapq.heappop(self._heap)
+
+    def _due(self) -> bool:
+        self._drop_stale()
+        return bool(self._heap) and self._heap[0][0] <= self.time_fn()
+
+    def _timeout(self) -> Optional[float]:
+        """Seconds until the earliest timed trigger (None: sleep until notified)."""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self.time_fn())
+
+    def _pop_due(self) -> List[ArmedTrigger]:
+        """Pop due timed triggers and reschedule the repeating ones."""
+        now = self.time_fn()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, version, trigger_id = heapq.heappop(self._heap)
+            trigger = self._triggers.get(trigger_id)
+            if trigger is None or trigger.version != version:
+                continue
+            trigger.last_fired_at = trigger.next_fire_at
+            # Missed while the lamp was off: fire once, then continue from now
+            trigger.next_fire_at = self._next_fire(trigger, max(now, trigger.next_fire_at))
+            if trigger.next_fire_at is not None:
+                self._schedule(trigger)
+            due.append(trigger)
+        return due
+
+    def _dispatch(self, event: str, data: Dict[str, Any], received_at: float):
+        self.events_received += 1
+        with self._cond:
+            listeners = list(self._by_event.get(event, {}).values())
+        for trigger in listeners:
+            if self._matches(trigger, data, received_at):
+                self.events_matched += 1
+                trigger.last_fired_at = received_at
+                self._record([trigger])
+                self._fire(trigger, {"event": event, **data})
+
+    def _record(self, triggers: List[ArmedTrigger]):
+        """Persist firings of progression triggers, one transaction per batch."""
+        checked_at = datetime.fromtimestamp(self.time_fn())
+        self.db.record_active_triggers_fired([
+            (t.trigger_id, checked_at, datetime.fromtimestamp(t.next_fire_at) if t.next_fire_at else None)
+            for t in triggers if t.run_id
+        ])
+
+    def _fire(self, trigger: ArmedTrigger, data: Dict[str, Any]):
+        self.fired += 1
+        trigger.triggered_count += 1
+        logger.info(f"Trigger fired: {trigger.trigger_type} -> {trigger.workflow_id}"
+                    f"{f' (run {trigger.run_id})' if trigger.run_id else ''}")
+        try:
+            self.on_fire(trigger, data)
+        except Exception as e:
+            logger.error(f"Error handling trigger {trigger.trigger_id}: {e}")
+
+    # =========================================================================
+    # Status
+    # =========================================================================
+
+    def get_next_fire_at(self) -> Optional[float]:
+        with self._cond:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            armed = len(self._triggers)
+            timed = sum(1 for t in self._triggers.values() if t.event is None)
+            subscriptions = {event: len(triggers) for event, triggers in self._by_event.items() if triggers}
+        next_fire_at = self.get_next_fire_at()
+        return {
+            "armed": armed,
+            "timed": timed,
+            "subscriptions": subscriptions,
+            "next_fire_in": round(next_fire_at - self.time_fn(), 1) if next_fire_at else None,
+            "fired": self.fired,
+            "events_received": self.events_received,
+            "events_matched": self.events_matched,
+            "wakeups": self.wakeups,
+        }
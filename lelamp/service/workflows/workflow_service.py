@@ -1,6 +1,7 @@
 import json
 import os
 import logging
+import threading
 import traceback as tb
 import importlib.util
 import inspect
@@ -45,6 +46,11 @@ class WorkflowService:
         # Tool management
         self.workflow_tools: Dict[str, Callable] = {}
         self.agent_instance = None
+        # Sends instructions to the running voice agent (set by the agent once connected)
+        self.prompt_handler: Optional[Callable[[str], bool]] = None
+
+        # Workflows start from voice tools, callbacks and the trigger engine thread
+        self._lock = threading.RLock()
 
         # Persistence & monitoring
         self.db = WorkflowDatabase(db_path)
@@ -52,6 +58,9 @@ class WorkflowService:
         self.current_step_id: Optional[str] = None
         self.step_counter: int = 0
 
+        # Automatic start/progression triggers (see trigger_engine.py)
+        self.trigger_engine = None
+
         # Logging
         self.logger = logging.getLogger(__name__)
         self.logger.info("WorkflowService initialized with database persistence")
@@ -61,6 +70,18 @@ class WorkflowService:
         self.agent_instance = agent
         self.logger.info("Agent instance set for workflow service")
 
+    def set_prompt_handler(self, handler: Optional[Callable[[str], bool]]):
+        """Set how triggers prompt the agent: handler(instructions) -> delivered"""
+        self.prompt_handler = handler
+
+    def start_trigger_engine(self, **kwargs):
+        """Start the trigger engine that starts and progresses workflows automatically."""
+        from lelamp.service.workflows.trigger_engine import TriggerEngine
+
+        self.trigger_engine = TriggerEngine(self.db, on_fire=self.handle_trigger, **kwargs)
+        self.trigger_engine.start()
+        return self.trigger_engine
+
     # ========================================================================
     # Workflow Discovery & Management
     # ========================================================================
@@ -272,57 +293,64 @@ class WorkflowService:
         Returns:
             run_id for this execution
         """
-        try:
-            # Load workflow.json
-            workflow_path = os.path.join(self.workflows_dir, workflow_name, "workflow.json")
-            with open(workflow_path, "r") as f:
-                workflow_data = json.load(f)
+        with self._lock:
+            try:
+                # Load workflow.json
+                workflow_path = os.path.join(self.workflows_dir, workflow_name, "workflow.json")
+                with open(workflow_path, "r") as f:
+                    workflow_data = json.load(f)
+
+                self.workflow_graph = Workflow.from_json(workflow_data)
+                self.workflow_data = workflow_data  # Store raw JSON for entry_points
+                self.trigger_type = trigger_type  # Store trigger type for entry point logic
+                self.active_workflow = workflow_name
+
+                # Initialize state from schema
+                self.state = {
+                    key: var.default
+                    for key, var in self.workflow_graph.state_schema.items()
+                }
 
-            self.workflow_graph = Workflow.from_json(workflow_data)
-            self.workflow_data = workflow_data  # Store raw JSON for entry_points
-            self.trigger_type = trigger_type  # Store trigger type for entry point logic
-            self.active_workflow = workflow_name
+                self.current_node = None
+                self.workflow_complete = False
+                self.step_counter = 0
 
-            # Initialize state from schema
-            self.state = {
-                key: var.default
-                for key, var in self.workflow_graph.state_schema.items()
-            }
+                # Start database run tracking
+                self.current_run_id = self.db.start_run(
+                    workflow_id=workflow_name,
+                    trigger_type=trigger_type,
+                    trigger_data=trigger_data
+                )
 
-            self.current_node = None
-            self.workflow_complete = False
-            self.step_counter = 0
+                self.logger.info(f"Started workflow '{workflow_name}' (run_id: {self.current_run_id})")
 
-            # Start database run tracking
-            self.current_run_id = self.db.start_run(
-                workflow_id=workflow_name,
-                trigger_type=trigger_type,
-                trigger_data=trigger_data
-            )
+                # Arm progression triggers for this run
+                if self.trigger_engine:
+                    self.trigger_engine.arm_run_triggers(
+                        self.current_run_id, workflow_name, workflow_data.get("progression_triggers", [])
+                    )
 
-            self.logger.info(f"Started workflow '{workflow_name}' (run_id: {self.current_run_id})")
+                # Load workflow-specific tools
+                self._load_workflow_tools(workflow_name)
 
-            # Load workflow-specific tools
-            self._load_workflow_tools(workflow_name)
+                return self.current_run_id
 
-            return self.current_run_id
+            except Exception as e:
+                self.logger.error(f"Error starting workflow {workflow_name}: {e}")
+                self.logger.error(tb.format_exc())
 
-        except Exception as e:
-            self.logger.error(f"Error starting workflow {workflow_name}: {e}")
-            self.logger.error(tb.format_exc())
-
-            # Log error to database if we have a run_id
-            if self.current_run_id:
-                self.db.log_error(
-                    run_id=self.current_run_id,
-                    error_class=ErrorClass.SYSTEM,
-                    error_type=type(e).__name__,
-                    error_message=str(e),
-                    stack_trace=tb.format_exc(),
-                    context={"workflow_name": workflow_name}
-                )
+                # Log error to database if we have a run_id
+                if self.current_run_id:
+                    self.db.log_error(
+                        run_id=self.current_run_id,
+                        error_class=ErrorClass.SYSTEM,
+                        error_type=type(e).__name__,
+                        error_message=str(e),
+                        stack_trace=tb.format_exc(),
+                        context={"workflow_name": workflow_name}
+                    )
 
-            raise
+                raise
 
     def cancel_workflow(self, run_id: str) -> bool:
         """Cancel a specific workflow run by ID.
@@ -340,6 +368,8 @@ class WorkflowService:
                 return True
 
             # Otherwise just cancel in database
+            if self.trigger_engine:
+                self.trigger_engine.disarm_run(run_id)
             result = self.db.cancel_run(run_id)
             if result:
                 self.logger.info(f"Cancelled workflow run {run_id}")
@@ -417,31 +447,34 @@ class WorkflowService:
 
     def stop_workflow(self, status: RunStatus = RunStatus.COMPLETED):
         """Stop the current workflow and persist final state"""
-        if not self.active_workflow:
-            return
+        with self._lock:
+            if not self.active_workflow:
+                return
 
-        try:
-            # Mark run as complete in database
-            if self.current_run_id:
-                self.db.complete_run(self.current_run_id, status)
+            try:
+                # Mark run as complete in database
+                if self.current_run_id:
+                    if self.trigger_engine:
+                        self.trigger_engine.disarm_run(self.current_run_id)
+                    self.db.complete_run(self.current_run_id, status)
 
-            # Unload tools
-            self._unload_workflow_tools()
+                # Unload tools
+                self._unload_workflow_tools()
 
-            self.logger.info(f"Stopped workflow '{self.active_workflow}' with status {status.value}")
+                self.logger.info(f"Stopped workflow '{self.active_workflow}' with status {status.value}")
 
-            # Reset state
-            self.active_workflow = None
-            self.state = None
-            self.workflow_graph = None
-            self.current_node = None
-            self.workflow_complete = False
-            self.current_run_id = None
-            self.current_step_id = None
-            self.step_counter = 0
+                # Reset state
+                self.active_workflow = None
+                self.state = None
+                self.workflow_graph = None
+                self.current_node = None
+                self.workflow_complete = False
+                self.current_run_id = None
+                self.current_step_id = None
+                self.step_counter = 0
 
-        except Exception as e:
-            self.logger.error(f"Error stopping workflow: {e}")
+            except Exception as e:
+                self.logger.error(f"Error stopping workflow: {e}")
 
     # ========================================================================
     # Step Execution
@@ -576,6 +609,8 @@ class WorkflowService:
 
                     self.state[key] = value
                     self.logger.info(f"✓ Updated state: {key} = {value}")
+                    if self.trigger_engine:
+                        self.trigger_engine.emit("state_change", {"key": key, "value": value})
 
                     # Persist state update
                     if self.current_run_id:
@@ -658,6 +693,73 @@ class WorkflowService:
 
             return f"Error completing step: {str(e)}"
 
+    # ========================================================================
+    # Triggers
+    # ========================================================================
+
+    def handle_trigger(self, trigger, event: Dict[str, Any]):
+        """
+        Act on a fired trigger (called on the trigger engine thread).
+
+        Start triggers start their workflow unless one is already running;
+        progression triggers update state or prompt the agent for their run.
+        """
+        prompt = None
+        with self._lock:
+            if trigger.run_id is None:
+                if self.active_workflow:
+                    self.logger.info(f"Trigger for '{trigger.workflow_id}' ignored - '{self.active_workflow}' is running")
+                    return
+                self.start_workflow(
+                    workflow_name=trigger.workflow_id,
+                    trigger_type=trigger.trigger_type,
+                    trigger_data={"trigger_id": trigger.trigger_id, **event}
+                )
+                first_step = self.get_next_step()
+                prompt = (
+                    f"Workflow '{trigger.workflow_id}' started by a {trigger.trigger_type} trigger.\n\n"
+                    f"{first_step}\n\nExecute NOW!"
+                )
+
+            elif trigger.run_id != self.current_run_id:
+                # Left over from a run that is no longer active
+                self.trigger_engine.disarm_run(trigger.run_id)
+                return
+
+            else:
+                action = trigger.config.get("action", "prompt_agent")
+                if action == "update_state":
+                    for key, value in trigger.config.get("state_updates", {}).items():
+                        if key not in self.workflow_graph.state_schema or self.state.get(key) == value:
+                            continue
+                        self.state[key] = value
+                        self.db.update_state(
+                            run_id=self.current_run_id,
+                            state_key=key,
+                            state_value=value,
+                            state_type=self.workflow_graph.state_schema[key].type
+                        )
+                        self.logger.info(f"✓ Trigger updated state: {key} = {value}")
+                        self.trigger_engine.emit("state_change", {"key": key, "value": value})
+                elif action == "prompt_agent":
+                    prompt = trigger.config.get("prompt") or f"Check {self.active_workflow} workflow progress"
+                    prompt = f"{prompt}. Call get_next_step() to continue the workflow."
+
+        if prompt:
+            self._prompt_agent(prompt)
+
+    def _prompt_agent(self, instructions: str) -> bool:
+        """Ask the agent to reply, from any thread."""
+        handler = self.prompt_handler
+        if handler is None:
+            self.logger.info("No agent connected to prompt for workflow trigger")
+            return False
+        try:
+            return bool(handler(instructions))
+        except Exception as e:
+            self.logger.error(f"Error prompting agent for workflow trigger: {e}")
+            return False
+
     def _resolve_edge_target(self, edge: Edge) -> str:
         """Resolve the target node ID based on edge type and current state"""
         if edge.type == EdgeType.NORMAL:
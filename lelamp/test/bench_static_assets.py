@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Web UI static serving benchmark.
+
+Serves a frontend build two ways through the ASGI app in-process:
+- before: plain StaticFiles + FileResponse for index.html
+- after:  PrecompressedStaticFiles + IndexPage (api/static.py)
+
+and reports, for a first visit and a repeat visit of the dashboard:
+- bytes on the wire and request count
+- server time per page load
+- estimated transfer time over the lamp's Wi-Fi (--mbps, --rtt)
+
+Without --dist (or if frontend/dist isn't built), a stand-in bundle is
+made from the frontend sources so the benchmark runs anywhere.
+
+Usage:
+    python lelamp/test/bench_static_assets.py
+    python lelamp/test/bench_static_assets.py --dist frontend/dist --mbps 5 --rtt 20
+"""
+
+import argparse
+import gzip
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from api.static import IndexPage, PrecompressedStaticFiles, brotli, precompress
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+BROWSER_ACCEPT = "gzip, deflate, br"
+
+
+def synthetic_dist(directory: Path) -> Path:
+    """A dist/ laid out like Vite's, with the frontend sources as the bundle."""
+    sources = sorted((REPO_ROOT / "frontend" / "src").rglob("*.ts*"))
+    code = "\n".join(path.read_text(errors="ignore") for path in sources)
+    css = "\n".join(path.read_text(errors="ignore") for path in (REPO_ROOT / "frontend" / "src").rglob("*.css"))
+    assets = directory / "dist-assets"
+    assets.mkdir(parents=True)
+    (assets / "index-BxYz12_a.js").write_text(code * max(1, 600_000 // max(len(code), 1)))
+    (assets / "index-Q1w2E3r4.css").write_text(css * max(1, 60_000 // max(len(css), 1)))
+    (directory / "index.html").write_text(
+        '<!doctype html><html lang="en"><head><meta charset="UTF-8" /><title>LeLamp</title>'
+        '<script type="module" crossorigin src="/dist-assets/index-BxYz12_a.js"></script>'
+        '<link rel="stylesheet" crossorigin href="/dist-assets/index-Q1w2E3r4.css"></head>'
+        '<body><div id="root"></div></body></html>\n'
+    )
+    return directory
+
+
+def make_client(dist: Path, optimized: bool) -> TestClient:
+    app = FastAPI()
+    if optimized:
+        index_page = IndexPage(dist / "index.html")
+        app.mount("/dist-assets", PrecompressedStaticFiles(directory=dist / "dist-assets", immutable_hashed=True), name="dist-assets")
+
+        @app.get("/dashboard")
+        async def serve_spa(request: Request):
+            return index_page.response(request)
+    else:
+        app.mount("/dist-assets", StaticFiles(directory=dist / "dist-assets"), name="dist-assets")
+
+        @app.get("/dashboard")
+        async def serve_spa():
+            return FileResponse(dist / "index.html")
+    return TestClient(app)
+
+
+def decode(raw: bytes, encoding) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(raw)
+    if encoding == "br":
+        return brotli.decompress(raw)
+    return raw
+
+
+def page_load(client: TestClient, cache: dict) -> dict:
+    """Load /dashboard and its assets like a browser with an HTTP cache."""
+    stats = {"requests": 0, "bytes": 0, "seconds": 0.0}
+
+    def fetch(url):
+        cached = cache.get(url)
+        if cached and "immutable" in cached["cache-control"]:
+            return cached  # Served from the browser cache, no request
+        headers = {"Accept-Encoding": BROWSER_ACCEPT}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        start = time.perf_counter()
+        with client.stream("GET", url, headers=headers) as response:
+            raw = b"".join(response.iter_raw())
+        stats["seconds"] += time.perf_counter() - start
+        stats["requests"] += 1
+        stats["bytes"] += len(raw) + sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+        if response.status_code == 304:
+            return cached
+        entry = {
+            "etag": response.headers.get("etag"),
+            "cache-control": response.headers.get("cache-control", ""),
+            "body": decode(raw, response.headers.get("content-encoding")),
+        }
+        cache[url] = entry
+        return entry
+
+    html = fetch("/dashboard")["body"].decode()
+    for url in re.findall(r'(?:src|href)="(/dist-assets/[^"]+)"', html):
+        fetch(url)
+    return stats
+
+
+def transfer_seconds(stats: dict, mbps: float, rtt_ms: float) -> float:
+    return stats["bytes"] * 8 / (mbps * 1e6) + stats["requests"] * rtt_ms / 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Static asset serving benchmark")
+    parser.add_argument("--dist", type=Path, help="Built frontend (default: frontend/dist, else synthetic)")
+    parser.add_argument("--mbps", type=float, default=5.0, help="Effective Wi-Fi throughput")
+    parser.add_argument("--rtt", type=float, default=20.0, help="Round trip time in ms")
+    parser.add_argument("--loads", type=int, default=20, help="Page loads to time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dist = args.dist or REPO_ROOT / "frontend" / "dist"
+        if not (dist / "index.html").exists():
+            dist = synthetic_dist(Path(tmp) / "dist")
+            print(f"Using a synthetic bundle in {dist}")
+
+        start = time.perf_counter()
+        totals = precompress(dist)
+        print(f"Precompressed {totals['files']} files in {time.perf_counter() - start:.2f}s "
+              f"({totals['original'] / 1024:.0f} KB -> gzip {totals['gzip'] / 1024:.0f} KB"
+              + (f", br {totals['br'] / 1024:.0f} KB" if "br" in totals else "") + ")")
+
+        print(f"\n{'':8} {'visit':7} {'reqs':>5} {'KB':>9} {'server ms':>10} {'wire ms':>9}")
+        for label, optimized in (("before", False), ("after", True)):
+            client = make_client(dist, optimized)
+            for visit in ("first", "repeat"):
+                runs = []
+                for _ in range(args.loads):
+                    cache = {}
+                    if visit == "repeat":
+                        page_load(client, cache)
+                    runs.append(page_load(client, cache))
+                stats = runs[-1]
+                server_ms = sum(run["seconds"] for run in runs) / len(runs) * 1000
+                wire_ms = transfer_seconds(stats, args.mbps, args.rtt) * 1000
+                print(f"{label:8} {visit:7} {stats['requests']:>5} {stats['bytes'] / 1024:>9.1f} "
+                      f"{server_ms:>10.2f} {wire_ms:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import sys
+import os
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.audio import audio_mixer
+from lelamp.service.audio.audio_mixer import AudioMixer
+
+BLOCK = AudioMixer.BLOCK_SIZE
+
+
+class Status:
+    output_underflow = False
+
+
+class FakeStream:
+    """Stands in for sd.OutputStream; pull() runs one audio callback like PortAudio would."""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.started = False
+        self.closed = False
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.started = False
+
+    def close(self):
+        self.closed = True
+
+    def pull(self, frames=BLOCK):
+        out = np.zeros((frames, AudioMixer.CHANNELS), dtype=np.float32)
+        self.callback(out, frames, None, Status())
+        return out
+
+
+def make_mixer(clips, **kwargs):
+    """Mixer on a FakeStream whose cache serves the given {path: pcm} clips."""
+    mixer = AudioMixer(**kwargs)
+    mixer._open_stream = lambda dtype, callback: FakeStream(callback)
+    mixer.cache.get = lambda path: clips[path]
+    references = []
+    mixer.set_reference_sink(references.append)
+    return mixer, references
+
+
+def constant(value, seconds):
+    frames = int(seconds * AudioMixer.SAMPLE_RATE)
+    return np.full((frames, AudioMixer.CHANNELS), value, dtype=np.float32)
+
+
+def with_audio_modules(test):
+    """The mixer refuses to start without sounddevice/soundfile/soxr; the fake stream replaces them."""
+    def run():
+        saved = audio_mixer.sd, audio_mixer.sf, audio_mixer.soxr
+        audio_mixer.sd = audio_mixer.sf = audio_mixer.soxr = object()
+        try:
+            test()
+        finally:
+            audio_mixer.sd, audio_mixer.sf, audio_mixer.soxr = saved
+    run.__name__ = test.__name__
+    return run
+
+
+@with_audio_modules
+def test_voices_mix_with_gain():
+    print("Testing two voices mix with their gains...")
+    mixer, references = make_mixer({"a.wav": constant(0.2, 1.0), "b.wav": constant(0.1, 1.0)})
+    a = mixer.play("a.wav", gain=1.0)
+    b = mixer.play("b.wav", gain=0.5)
+    block = mixer._stream.pull()
+    assert np.allclose(block, 0.2 + 0.05)
+    assert a.duration == 1.0 and mixer.get_stats()["active_voices"] == 2
+    # The echo reference gets the mono mixdown of the same block
+    assert len(references) == 1 and np.allclose(references[0], 0.25)
+
+    mixer.stop_voice(b)
+    assert b.wait(0) and np.allclose(mixer._stream.pull(), 0.2)
+    mixer.stop()
+    assert a.wait(0)
+
+
+@with_audio_modules
+def test_ducking_ramps_other_voices():
+    print("Testing ducking ramps voices down and back up...")
+    mixer, _ = make_mixer({"theme.wav": constant(0.5, 5.0)}, duck_gain=0.3, duck_ramp_ms=40.0)
+    mixer.play("theme.wav")
+    assert np.allclose(mixer._stream.pull(), 0.5)
+
+    mixer.set_ducking(True)
+    first = mixer._stream.pull()
+    # Ramped within the block, no step
+    assert first[0, 0] > first[-1, 0] > 0.5 * 0.3
+    assert np.all(np.diff(first[:, 0]) <= 1e-6)
+    for _ in range(10):
+        ducked = mixer._stream.pull()
+    assert np.allclose(ducked, 0.5 * 0.3, atol=1e-3)
+
+    mixer.set_ducking(False)
+    for _ in range(10):
+        restored = mixer._stream.pull()
+    assert np.allclose(restored, 0.5, atol=1e-3)
+    mixer.stop()
+
+
+@with_audio_modules
+def test_voice_end():
+    print("Testing a voice ends, releases waiters and the reference goes silent...")
+    frames = BLOCK + BLOCK // 2
+    clip = np.full((frames, AudioMixer.CHANNELS), 0.3, dtype=np.float32)
+    mixer, references = make_mixer({"beep.wav": clip})
+    voice = mixer.play("beep.wav")
+
+    waited = []
+    waiter = threading.Thread(target=lambda: waited.append(voice.wait(timeout=2.0)))
+    waiter.start()
+    mixer._stream.pull()
+    assert not voice.done.is_set()
+    tail = mixer._stream.pull()
+    waiter.join()
+    assert waited == [True] and not mixer.is_playing()
+    # The last block holds the rest of the clip, then silence
+    assert np.allclose(tail[:BLOCK // 2], 0.3) and np.allclose(tail[BLOCK // 2:], 0.0)
+
+    # One silent reference block marks playback as stopped, then nothing
+    mixer._stream.pull()
+    mixer._stream.pull()
+    assert len(references) == 3 and np.allclose(references[-1], 0.0)
+
+    # A stalled stream doesn't block past the clip's length
+    stalled = mixer.play("beep.wav")
+    start = time.time()
+    assert not stalled.wait(timeout=stalled.duration)
+    assert time.time() - start < stalled.duration + 0.5
+    mixer.stop()
+
+
+if __name__ == "__main__":
+    test_voices_mix_with_gain()
+    test_ducking_ramps_other_voices()
+    test_voice_end()
+    print("Audio mixer tests completed!")
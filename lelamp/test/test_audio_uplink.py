@@ -0,0 +1,105 @@
+import sys
+import os
+import asyncio
+import base64
+import json
+
+import numpy as np
+import websockets
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.agent.audio_uplink import AudioUplink
+
+RATE = 24000
+BLOCK = 1024  # Same block size as LLM.CHUNK_SIZE
+
+
+def make_blocks(seconds, amplitude):
+    """Mic blocks as the input callback delivers them (int16 bytes)."""
+    count = int(seconds * RATE / BLOCK)
+    t = np.arange(BLOCK) / RATE
+    blocks = []
+    for i in range(count):
+        noise = np.random.default_rng(i).normal(0, 30, BLOCK)  # Room noise, ~0.001 RMS
+        tone = amplitude * 32767 * np.sin(2 * np.pi * 220 * (t + i * BLOCK / RATE))
+        blocks.append((noise + tone).astype(np.int16).tobytes())
+    return blocks
+
+
+async def stream_through_server(uplink, blocks):
+    """Send blocks through the uplink to a local websocket server; returns what it received."""
+    received = []
+
+    async def handler(connection):
+        async for message in connection:
+            received.append(json.loads(message))
+
+    async with websockets.serve(handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        async with websockets.connect(f"ws://127.0.0.1:{port}") as websocket:
+            queue = asyncio.Queue()
+            for block in blocks:
+                queue.put_nowait(block)
+            task = asyncio.create_task(uplink.run(queue, websocket))
+            while not queue.empty():
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.1)
+            task.cancel()
+        await asyncio.sleep(0.05)
+    return received
+
+
+def test_silence_is_not_sent():
+    print("Testing speech gating with pre-roll and hangover...")
+    silence, speech = make_blocks(3.0, 0.0), make_blocks(1.0, 0.2)
+    blocks = silence + speech + silence
+    uplink = AudioUplink(sample_rate=RATE, frame_ms=100, pre_roll_ms=300, hangover_ms=800)
+    received = asyncio.run(stream_through_server(uplink, blocks))
+    stats = uplink.get_stats()
+    print(f"  {stats}")
+
+    assert all(m["type"] == "input_audio_buffer.append" for m in received)
+    audio = b"".join(base64.b64decode(m["audio"]) for m in received)
+    block_bytes = BLOCK * 2
+    # Every speech block is sent, preceded by the pre-roll and followed by the hangover
+    start = audio.index(speech[0])
+    assert audio[start:start + len(speech) * block_bytes] == b"".join(speech)
+    assert start == 8 * block_bytes  # 300 ms pre-roll, whole blocks
+    assert len(audio) - start - len(speech) * block_bytes == 19 * block_bytes  # 800 ms hangover
+
+    # Frames are coalesced to 100 ms (2400 samples) except the final flush
+    assert all(len(base64.b64decode(m["audio"])) == 4800 for m in received[:-1])
+    assert stats["frames_sent"] == len(received) and stats["audio_bytes_sent"] == len(audio)
+    assert stats["bytes_sent"] == sum(len(json.dumps(m)) for m in received)
+    assert stats["frames_suppressed"] + len(audio) // block_bytes + len(uplink._pre_roll) == len(blocks)
+    assert stats["utterances"] == 1 and stats["suppressed_ratio"] > 0.6
+    # One message per block before; now a few per second of speech
+    assert len(received) < len(blocks) / 5
+
+
+def test_pause_inside_utterance():
+    print("Testing short pauses stay inside the hangover...")
+    uplink = AudioUplink(sample_rate=RATE, hangover_ms=800)
+    blocks = make_blocks(0.5, 0.2) + make_blocks(0.4, 0.0) + make_blocks(0.5, 0.2) + make_blocks(2.0, 0.0)
+    frames = [frame for block in blocks for frame in uplink.push(block)]
+    assert uplink.get_stats()["utterances"] == 1
+    # Nothing of the utterance, including the pause, was dropped
+    assert len(b"".join(frames)) == (len(blocks) - uplink.frames_suppressed - len(uplink._pre_roll)) * BLOCK * 2
+
+
+def test_vad_disabled_only_coalesces():
+    print("Testing pass-through mode...")
+    uplink = AudioUplink(sample_rate=RATE, frame_ms=200, vad=False)
+    blocks = make_blocks(1.0, 0.0)
+    frames = [frame for block in blocks for frame in uplink.push(block)]
+    assert uplink.frames_suppressed == 0
+    assert all(len(f) == 9600 for f in frames)
+    assert len(frames) == len(blocks) * BLOCK * 2 // 9600
+
+
+if __name__ == "__main__":
+    test_silence_is_not_sent()
+    test_pause_inside_utterance()
+    test_vad_disabled_only_coalesces()
+    print("Audio uplink tests completed!")
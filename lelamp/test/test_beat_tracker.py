@@ -0,0 +1,87 @@
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.audio.beat_tracker import BeatTracker, SAMPLE_RATE
+
+BLOCK_SIZE = 1024  # AudioRouter / MicrophoneService block
+START = 1000.0  # Fake wall clock for the replay
+
+
+def drum_loop(bpm: float, seconds: float, offset: float = 0.37, seed: int = 0):
+    """Kick on every beat (accented every other), hi-hat on the off-beat, some noise."""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0, 0.01, int(SAMPLE_RATE * seconds)).astype(np.float32)
+    period = 60.0 / bpm
+    beats = np.arange(offset, seconds, period)
+
+    t = np.arange(int(0.15 * SAMPLE_RATE)) / SAMPLE_RATE
+    kick = 0.6 * np.sin(2 * np.pi * (50 + 80 * np.exp(-t * 30)) * t) * np.exp(-t * 12)
+    hat = 0.15 * rng.normal(0, 1, int(0.03 * SAMPLE_RATE)) * np.exp(-np.arange(int(0.03 * SAMPLE_RATE)) / SAMPLE_RATE * 150)
+
+    for i, beat in enumerate(beats):
+        for sound, at in ((kick * (1.0 if i % 2 == 0 else 0.7), beat), (hat, beat + period / 2)):
+            start = int(at * SAMPLE_RATE)
+            end = min(start + len(sound), len(audio))
+            if start < end:
+                audio[start:end] += sound[:end - start]
+    return audio, beats
+
+
+def replay(tracker: BeatTracker, audio: np.ndarray, on_block=None):
+    for start in range(0, len(audio), BLOCK_SIZE):
+        block = audio[start:start + BLOCK_SIZE]
+        now = START + (start + len(block)) / SAMPLE_RATE
+        tracker.feed(block, timestamp=now)
+        if on_block:
+            on_block(now)
+
+
+def test_tempo_and_phase():
+    print("Testing beat tracker on synthetic drum loops...")
+    for bpm in (90, 110, 128, 145):
+        audio, beats = drum_loop(bpm, seconds=20)
+        tracker = BeatTracker()
+        heard = []
+        tracker.add_beat_listener(lambda state: heard.append(state.timestamp))
+
+        errors = []
+
+        def check(now):
+            if now - START < 8:
+                return  # Let it lock first
+            predicted = tracker.next_beat_time(now) - START
+            errors.append(abs(predicted - beats[np.argmin(np.abs(beats - predicted))]) * 1000)
+
+        replay(tracker, audio, check)
+        stats = tracker.get_stats()
+        print(f"  {bpm} BPM -> {tracker.get_bpm():.1f} BPM, "
+              f"phase error p95 {np.percentile(errors, 95):.1f}ms, "
+              f"{len(heard)} beat events, CPU {stats['cpu_percent']}%")
+
+        assert abs(tracker.get_bpm() - bpm) / bpm < 0.015
+        assert np.percentile(errors, 95) < 30.0
+        assert tracker.get_state().active
+        # Events for (almost) every beat after lock
+        assert len(heard) >= 0.8 * len(beats[beats > 3.0])
+        assert stats["cpu_percent"] < 5.0
+
+
+def test_silence_is_inactive():
+    print("Testing beat tracker on silence after music...")
+    audio, _ = drum_loop(120, seconds=10)
+    tracker = BeatTracker()
+    replay(tracker, np.concatenate([audio, np.zeros(SAMPLE_RATE * 6, dtype=np.float32)]))
+    state = tracker.get_state()
+    print(f"  active={state.active} energy={state.energy:.3f}")
+    assert not state.active
+    assert state.energy < 0.05
+
+
+if __name__ == "__main__":
+    test_tempo_and_phase()
+    test_silence_is_inactive()
+    print("Beat tracker tests completed!")
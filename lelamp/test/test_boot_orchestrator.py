@@ -0,0 +1,186 @@
+import sys
+import os
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.boot_graph import LAMP_BOOT_GRAPH, add_lamp_steps
+from lelamp.service.boot_orchestrator import BootOrchestrator
+
+# Simulated init times (seconds), roughly the lamp's relative costs
+DURATIONS = {
+    "hardware_detection": 0.10,
+    "rgb": 0.05,
+    "recordings": 0.08,  # Catalog scan + prewarm
+    "motors": 0.30,  # Servo bus scan
+    "audio": 0.10,
+    "theme": 0.02,
+    "beat_tracker": 0.05,
+    "level_meter": 0.01,
+    "vision": 0.40,  # Camera open + face model
+    "emotion": 0.50,  # TensorFlow load
+    "workflows": 0.10,
+    "workflow_triggers": 0.02,
+    "thermal_governor": 0.01,
+    "wake": 0.05,
+    "agent": 0.05,  # Session connect, after its thread has started
+}
+
+
+def simulated_boot(idle_delay=0.2, failing=(), agent_ready=True):
+    """The lamp's boot graph with sleep-based steps; returns (orchestrator, run order)."""
+    boot = BootOrchestrator(max_workers=4, idle_delay=idle_delay)
+    order = []
+    lock = threading.Lock()
+
+    def step(name):
+        def init():
+            time.sleep(DURATIONS[name])
+            if name in failing:
+                raise RuntimeError(f"{name} not found")
+            with lock:
+                order.append(name)
+        return init
+
+    def start_agent():
+        # Like _start_agent_thread: spawn the pipeline, which reports back once connected
+        def connect():
+            step("agent")()
+            if agent_ready:
+                boot.finish("agent", True)
+        threading.Thread(target=connect, daemon=True).start()
+
+    init = {name: step(name) for name in DURATIONS}
+    init["agent"] = start_agent
+    return add_lamp_steps(boot, init), order
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_parallel_boot():
+    print("Testing parallel dependency-ordered boot...")
+    assert set(DURATIONS) == {spec.name for spec in LAMP_BOOT_GRAPH}
+    boot, order = simulated_boot(idle_delay=60)
+    start = time.time()
+    boot.run()
+    elapsed = time.time() - start
+    assert wait_for(lambda: boot.is_ready("agent"))
+    status = boot.get_status()
+    serial = sum(DURATIONS.values())
+    print(f"  boot {status['boot_ms']}ms (serial {serial * 1000:.0f}ms), "
+          f"first interaction {status['time_to_first_interaction_ms']}ms, critical path {boot.critical_path()}")
+
+    # Independent services overlap; the heavy model isn't on the boot path at all
+    assert elapsed < (serial - DURATIONS["emotion"]) * 0.7
+    assert "emotion" not in order and status["pending_deferred"] == ["emotion"]
+
+    # Every step ran after its dependencies
+    for name, step in boot.steps.items():
+        if name in order:
+            assert all(order.index(dep) < order.index(name) for dep in step.depends), name
+    assert all(s["status"] == "ready" for n, s in status["services"].items() if n != "emotion")
+
+    # The lamp can respond before the slow tail (vision, triggers) has finished
+    assert status["time_to_first_interaction_ms"] < status["boot_ms"]
+    assert status["services"]["agent"]["finished_ms"] <= status["time_to_first_interaction_ms"]
+    assert boot.critical_path()[-1] == "workflow_triggers"
+    boot.stop()
+
+
+def test_agent_ready_when_connected():
+    print("Testing the agent counts as ready only once it reports in...")
+    boot, order = simulated_boot(idle_delay=60, agent_ready=False)
+    boot.run()
+    time.sleep(DURATIONS["agent"] * 2)
+    # Its thread is up (and done connecting), but nothing has said it's live
+    assert "agent" in order and boot.steps["agent"].status == "running"
+    assert boot.first_interaction_at is None
+
+    boot.finish("agent", True)
+    status = boot.get_status()
+    assert status["services"]["agent"]["status"] == "ready"
+    assert status["time_to_first_interaction_ms"] == status["services"]["agent"]["finished_ms"]
+    # Later reports (the session dropping) don't rewrite the boot record
+    boot.finish("agent", False, error="disconnected")
+    assert boot.steps["agent"].status == "ready" and boot.steps["agent"].error is None
+    boot.stop()
+
+    boot, _ = simulated_boot(idle_delay=60, agent_ready=False)
+    boot.run()
+    boot.finish("agent", False, error="no API key")
+    assert boot.steps["agent"].status == "failed" and boot.first_interaction_at is not None
+    boot.stop()
+
+    bad = BootOrchestrator()
+    bad.add("agent", lambda: None, background=True)
+    bad.add("after", lambda: None, depends=("agent",))
+    try:
+        bad.run()
+        assert False, "dependency on a background step not rejected"
+    except ValueError as e:
+        assert "background" in str(e)
+
+
+def test_deferred_steps():
+    print("Testing deferred steps run when idle or on first use...")
+    boot, order = simulated_boot(idle_delay=0.2)
+    boot.run()
+    assert boot.steps["emotion"].status == "deferred"
+    deadline = time.time() + 2.0
+    while not boot.is_ready("emotion") and time.time() < deadline:
+        time.sleep(0.05)
+    assert boot.is_ready("emotion") and order.count("emotion") == 1
+
+    # First use before the idle delay loads it on the caller's thread, once
+    boot, order = simulated_boot(idle_delay=60)
+    boot.run()
+    start = time.time()
+    assert boot.ensure("emotion")
+    assert time.time() - start >= DURATIONS["emotion"]
+    assert boot.ensure("emotion") and order.count("emotion") == 1
+    boot.stop()
+
+
+def test_failure_does_not_block_dependents():
+    print("Testing a failed service is reported without blocking boot...")
+    boot, order = simulated_boot(idle_delay=60, failing=("vision",))
+    boot.run()
+    status = boot.get_status()["services"]
+    assert status["vision"]["status"] == "failed" and "not found" in status["vision"]["error"]
+    assert status["workflow_triggers"]["status"] == "ready"
+    assert wait_for(lambda: boot.first_interaction_at is not None)
+    boot.stop()
+
+    bad = BootOrchestrator()
+    bad.add("a", lambda: None, depends=("b",))
+    bad.add("b", lambda: None, depends=("a",))
+    try:
+        bad.run()
+        assert False, "cycle not detected"
+    except ValueError as e:
+        assert "cycle" in str(e)
+
+
+def test_disabled_step():
+    print("Testing config-disabled steps are skipped when due...")
+    enabled = {"vision": True}
+    boot = BootOrchestrator()
+    boot.add("detect", lambda: enabled.update(vision=False))  # Detection disables the camera
+    boot.add("vision", lambda: None, depends=("detect",), enabled=lambda: enabled["vision"])
+    boot.run()
+    assert boot.steps["vision"].status == "skipped"
+
+
+if __name__ == "__main__":
+    test_parallel_boot()
+    test_agent_ready_when_connected()
+    test_deferred_steps()
+    test_failure_does_not_block_dependents()
+    test_disabled_step()
+    print("Boot orchestrator tests completed!")
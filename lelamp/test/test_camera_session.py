@@ -0,0 +1,189 @@
+import sys
+import os
+import asyncio
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.vision.camera_session import CameraSession, same_device
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in: slow to open, ~30 fps reads."""
+    opened = []
+    open_now = 0
+
+    def __init__(self, device):
+        time.sleep(0.05)  # Device open + auto exposure
+        self.device = device
+        self.frame = 0
+        self.released = False
+        FakeCapture.opened.append(self)
+        FakeCapture.open_now += 1
+
+    def read(self):
+        time.sleep(1 / 30)
+        self.frame += 1
+        return True, f"{self.device}#{self.frame}"
+
+    def release(self):
+        self.released = True
+        FakeCapture.open_now -= 1
+
+
+def make_session(idle_timeout=0.3, fail=()):
+    FakeCapture.opened = []
+    FakeCapture.open_now = 0
+    encodes = []
+
+    def open_camera(device):
+        return None if device in fail else FakeCapture(device)
+
+    def encode(image, quality):
+        encodes.append(image)
+        return f"jpeg:{image}:{quality}".encode()
+
+    session = CameraSession(idle_timeout=idle_timeout, open_camera=open_camera,
+                            encode_jpeg=encode, vision_service=lambda: None)
+    return session, encodes
+
+
+async def consume(session, device, frames):
+    lease = session.acquire(device)
+    seen = []
+    try:
+        seq = 0
+        while lease.active and len(seen) < frames:
+            frame = await session.wait_for_frame(lease, after_seq=seq)
+            if frame is None:
+                continue
+            seq = frame.seq
+            seen.append(session.encode(frame, 70))
+    finally:
+        lease.release()
+    return seen
+
+
+def test_shared_device():
+    print("Testing consumers share one open device and one encode per frame...")
+    session, encodes = make_session()
+
+    async def run():
+        return await asyncio.gather(*(consume(session, "/dev/video0", 10) for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert len(FakeCapture.opened) == 1 and session.opens == 1
+    assert all(len(seen) == 10 for seen in results)
+    shared = set(results[0]) & set(results[1]) & set(results[2])
+    print(f"  {session.frames} frames read, {len(encodes)} encodes for {sum(map(len, results))} deliveries")
+    assert len(shared) >= 5  # Consumers get the same frames...
+    assert len(encodes) == len(set(encodes))  # ...each encoded once
+    session.close()
+
+
+def test_snapshots_reuse_open_device():
+    print("Testing snapshots keep the device warm for the idle timeout...")
+    session, _ = make_session(idle_timeout=0.5)
+
+    async def run():
+        timings = []
+        for _ in range(4):
+            start = time.perf_counter()
+            jpeg = await session.snapshot("/dev/video0")
+            timings.append(time.perf_counter() - start)
+            assert jpeg.startswith(b"jpeg:/dev/video0#") and jpeg.endswith(b":85")
+        return timings
+
+    timings = asyncio.run(run())
+    print(f"  snapshot ms: {[round(t * 1000) for t in timings]}")
+    assert len(FakeCapture.opened) == 1  # Opened once for all four
+    assert max(timings[1:]) < timings[0]
+
+    time.sleep(0.9)
+    assert FakeCapture.open_now == 0 and session.device is None  # Closed after the idle timeout
+    assert session.get_stats()["consumers"] == 0
+
+    # And reopens on the next consumer
+    assert asyncio.run(session.snapshot("/dev/video0")) is not None
+    assert len(FakeCapture.opened) == 2
+    session.close()
+
+
+def test_device_switch():
+    print("Testing switching devices without a restart...")
+    session, _ = make_session()
+
+    async def run():
+        old = session.acquire("/dev/video0")
+        first = await session.wait_for_frame(old)
+        assert first.image.startswith("/dev/video0")
+
+        new = session.acquire("/dev/video2")
+        assert not old.active and new.active  # The old stream ends
+        frame = await session.wait_for_frame(new)
+        old.release()
+        new.release()
+        return frame
+
+    frame = asyncio.run(run())
+    assert frame.image.startswith("/dev/video2")
+    time.sleep(0.1)
+    assert FakeCapture.opened[0].released and FakeCapture.open_now == 1
+    session.close()
+    assert FakeCapture.open_now == 0
+
+
+def test_open_failure():
+    print("Testing a device that won't open...")
+    session, _ = make_session(fail=("/dev/video9",))
+    assert asyncio.run(session.snapshot("/dev/video9", timeout=1.0)) is None
+    assert session.error and "video9" in session.error
+    # A working device afterwards is fine
+    assert asyncio.run(session.snapshot("/dev/video0")) is not None
+    session.close()
+
+
+def test_vision_service_frames():
+    print("Testing frames come from VisionService when it has the device...")
+
+    class FakeVision:
+        camera_index = "/dev/video0"
+        cap = object()
+
+        def __init__(self):
+            self.seq = 0
+
+        def get_latest_frame(self):
+            self.seq += 1
+            return (self.seq, time.time(), f"vision#{self.seq}")
+
+    FakeCapture.opened = []
+    session = CameraSession(idle_timeout=0.3, open_camera=FakeCapture,
+                            encode_jpeg=lambda image, quality: image.encode(), vision_service=FakeVision)
+    jpeg = asyncio.run(session.snapshot("/dev/video0"))
+    assert jpeg.startswith(b"vision#") and session.source == "vision"
+    assert FakeCapture.opened == []  # Never opened the device itself
+    session.close()
+
+    assert same_device(0, "/dev/video0") and same_device("2", "/dev/video2")
+    assert not same_device("/dev/video0", "/dev/video1")
+
+
+def test_concurrent_acquire_during_idle_close():
+    print("Testing acquire racing the idle close...")
+    session, _ = make_session(idle_timeout=0.05)
+    for _ in range(5):
+        assert asyncio.run(session.snapshot("/dev/video0")) is not None
+        time.sleep(0.05)  # Land around the idle close
+    session.close()
+    assert FakeCapture.open_now == 0
+
+
+if __name__ == "__main__":
+    test_shared_device()
+    test_snapshots_reuse_open_device()
+    test_device_switch()
+    test_open_failure()
+    test_vision_service_frames()
+    test_concurrent_acquire_during_idle_close()
+    print("Camera session tests completed!")
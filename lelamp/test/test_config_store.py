@@ -0,0 +1,137 @@
+import sys
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.config_store import ConfigStore, diff_config
+
+BASE = {
+    "volume": 50,
+    "rgb": {"enabled": True, "fps": 30, "default_color": [0, 0, 150]},
+    "vision": {"enabled": True, "emotion": {"enabled": False}},
+    "metrics": {"total_tokens": 0},
+}
+
+
+def make_store(directory, debounce=0.2):
+    path = Path(directory) / "config.yaml"
+    path.write_text(yaml.safe_dump(BASE, sort_keys=False))
+    store = ConfigStore(path, debounce=debounce)
+    store.load()
+    return store, path
+
+
+def test_reads_from_memory():
+    print("Testing typed reads without parsing YAML...")
+    with tempfile.TemporaryDirectory() as directory:
+        store, path = make_store(directory)
+        store.tree["rgb"]["fps"] = "45"  # e.g. a form posted a string
+        assert store.get("rgb.fps", 1, int) == 45
+        assert store.get("vision.emotion.enabled") is False
+        assert store.get("vision.missing.key", "default") == "default"
+        assert store.get("rgb.fps", cast=bool) is False  # "45" isn't a truthy word
+
+        load = yaml.safe_load
+        yaml.safe_load = None  # Any parse on the read path would fail
+        try:
+            start = time.perf_counter()
+            for _ in range(10000):
+                store.get("vision.emotion.enabled")
+            per_read_us = (time.perf_counter() - start) / 10000 * 1e6
+            copy = store.snapshot()
+        finally:
+            yaml.safe_load = load
+        print(f"  {per_read_us:.1f}us per get()")
+        copy["rgb"]["fps"] = 1
+        assert store.get("rgb.fps") == "45"  # Snapshots are independent copies
+
+
+def test_debounced_atomic_writes():
+    print("Testing coalesced, atomic persistence...")
+    with tempfile.TemporaryDirectory() as directory:
+        store, path = make_store(directory)
+        inode = path.stat().st_ino
+        for tokens in range(1, 51):  # A chatty conversation
+            store.set("metrics.total_tokens", tokens)
+        assert store.changes == 50 and store.writes == 0
+        assert yaml.safe_load(path.read_text())["metrics"]["total_tokens"] == 0  # Not yet written
+
+        time.sleep(0.4)
+        assert store.writes == 1
+        assert yaml.safe_load(path.read_text())["metrics"]["total_tokens"] == 50
+        assert path.stat().st_ino != inode  # Replaced by rename, not rewritten in place
+        assert os.listdir(directory) == ["config.yaml"]  # No temp files left behind
+
+        # A failed write leaves the previous file intact
+        store.set("rgb.default_color", object())  # Not serialisable
+        store.flush()
+        assert yaml.safe_load(path.read_text())["metrics"]["total_tokens"] == 50
+        assert os.listdir(directory) == ["config.yaml"]
+        store._dirty = False  # Don't retry at exit
+
+
+def test_subscriptions():
+    print("Testing change notifications carry only the changed keys...")
+    with tempfile.TemporaryDirectory() as directory:
+        store, path = make_store(directory)
+        seen = []
+        store.subscribe("rgb", seen.append)
+        everything = []
+        store.subscribe("", everything.append)
+
+        # save_config style: caller edits a copy and hands it back
+        config = store.snapshot()
+        config["rgb"]["fps"] = 60
+        config["volume"] = 70
+        tree = store.tree
+        store.update(config)
+        assert store.tree is tree  # g.CONFIG references stay valid
+        assert seen == [{"rgb.fps": (30, 60)}]
+        assert everything == [{"rgb.fps": (30, 60), "volume": (50, 70)}]
+
+        # Editing the live tree in place and saving it also diffs correctly
+        store.tree["vision"]["emotion"]["enabled"] = True
+        store.update(store.tree)
+        assert len(seen) == 1 and everything[-1] == {"vision.emotion.enabled": (False, True)}
+
+        # No change, no notification or write
+        store.update(store.snapshot())
+        assert len(everything) == 2
+        store.flush()
+        assert store.writes == 1
+
+
+def test_external_edit_reload():
+    print("Testing hand edits are picked up...")
+    with tempfile.TemporaryDirectory() as directory:
+        store, path = make_store(directory)
+        seen = []
+        store.subscribe("volume", seen.append)
+        edited = dict(BASE, volume=20)
+        time.sleep(0.01)
+        path.write_text(yaml.safe_dump(edited, sort_keys=False))
+        os.utime(path, (time.time() + 1, time.time() + 1))
+        store._last_external_check = 0.0
+        assert store.get("volume") == 20
+        assert seen == [{"volume": (50, 20)}]
+
+
+def test_diff_config():
+    print("Testing config diffs...")
+    assert diff_config({"a": {"b": 1}}, {"a": {"b": 1, "c": {"d": 2}}}) == {"a.c.d": (None, 2)}
+    assert diff_config({"a": [1, 2]}, {"a": [1, 3]}) == {"a": ([1, 2], [1, 3])}
+    assert diff_config({"a": {"b": 1}}, {}) == {"a.b": (1, None)}
+
+
+if __name__ == "__main__":
+    test_reads_from_memory()
+    test_debounced_atomic_writes()
+    test_subscriptions()
+    test_external_edit_reload()
+    test_diff_config()
+    print("Config store tests completed!")
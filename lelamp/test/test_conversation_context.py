@@ -0,0 +1,77 @@
+import sys
+import os
+import asyncio
+import json
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.local_voice.conversation_context import ConversationContext, SUMMARY_PREFIX
+
+SYSTEM_PROMPT = "You are LeLamp, a friendly desk lamp. " * 20
+TOOLS = [{"type": "function", "function": {"name": "play_recording", "description": "Move", "parameters": {}}}]
+
+
+def add_turn(context, i):
+    context.append({"role": "user", "content": f"Question number {i}: what about the weather on day {i}? " * 3})
+    if i % 3 == 0:
+        context.append({"role": "tool", "name": "get_weather", "content": f"Sunny, {20 + i} degrees"})
+    context.append({"role": "assistant", "content": f"On day {i} it will be lovely and warm outside. " * 4})
+
+
+def test_budget_and_rolling_summary():
+    print("Testing token budget with rolling summary...")
+    context = ConversationContext(context_length=2048, reserve_tokens=384, summary_tokens=160)
+    context.set_prefix(SYSTEM_PROMPT, TOOLS)
+    summaries = []
+
+    async def summarize(previous, messages):
+        summaries.append(len(messages))
+        assert messages[0]["role"] == "user"
+        return (previous + " " if previous else "") + f"Talked about {len(messages)} messages."
+
+    async def conversation():
+        prefixes = set()
+        for i in range(60):
+            add_turn(context, i)
+            if context.needs_folding():
+                await context.fold(summarize)
+            sent = context.build(SYSTEM_PROMPT)
+            prefixes.add(json.dumps(sent[0]))
+            assert context.history_tokens <= context.history_budget
+            assert sent[-1]["role"] == "assistant" and sent[1 if not context.summary else 2]["role"] == "user"
+        return prefixes
+
+    prefixes = asyncio.run(conversation())
+    stats = context.get_stats()
+    print(f"  {stats}")
+    # System prompt sent byte-identical every turn; summary is a separate message
+    assert len(prefixes) == 1
+    assert context.build(SYSTEM_PROMPT)[1]["content"].startswith(SUMMARY_PREFIX)
+    # Hysteresis: folding happens every few turns, not every turn
+    assert 3 <= stats["folds"] <= 20
+    assert context.count_tokens(context.summary) <= context.summary_tokens
+    # The latest turn is never folded
+    assert "day 59" in context.messages[-1]["content"]
+
+
+def test_failed_summary_falls_back():
+    print("Testing extractive fallback summary...")
+    context = ConversationContext(context_length=1024, reserve_tokens=256, summary_tokens=120)
+    context.set_prefix("Short prompt.")
+
+    async def broken(previous, messages):
+        raise ConnectionError("ollama is down")
+
+    for i in range(30):
+        add_turn(context, i)
+    assert context.needs_folding()
+    assert asyncio.run(context.fold(broken))
+    print(f"  summary: {context.summary[:80]}...")
+    assert context.summary and "Lamp:" in context.summary
+    assert context.history_tokens <= context.history_budget * context.low_watermark
+
+
+if __name__ == "__main__":
+    test_budget_and_rolling_summary()
+    test_failed_summary_falls_back()
+    print("Conversation context tests completed!")
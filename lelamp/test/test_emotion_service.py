@@ -0,0 +1,121 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.vision.emotion_service import EmotionService, EMOTIONS
+
+FPS = 20
+
+
+class ScriptedClassifier:
+    """Returns whatever emotion the test says each face (by crop brightness) shows."""
+
+    def __init__(self):
+        self.script = {}  # Face brightness -> emotion
+        self.calls = 0
+        self.crops = 0
+
+    def classify(self, crops):
+        self.calls += 1
+        self.crops += len(crops)
+        results = []
+        for crop in crops:
+            centre = crop[crop.shape[0] // 2, crop.shape[1] // 2].mean()
+            emotion = self.script.get(int(round(centre / 50.0)) * 50, "neutral")
+            scores = {e: 0.02 for e in EMOTIONS}
+            scores[emotion] = 0.88
+            results.append(scores)
+        return results
+
+
+def frame_with_faces(faces, rng, mouth_open=False):
+    """320x240 frame; each face is a textured square with its own brightness."""
+    frame = np.full((240, 320, 3), 20, dtype=np.uint8)
+    boxes = []
+    for x, y, brightness in faces:
+        patch = np.clip(brightness + rng.normal(0, 3, (60, 60, 3)), 0, 255)
+        patch[20:25, 15:25] = patch[20:25, 35:45] = 0  # Eyes
+        if mouth_open:
+            patch[40:55, 18:42] = 0
+        frame[y:y + 60, x:x + 60] = patch.astype(np.uint8)
+        boxes.append((x, y, 60, 60))
+    return frame, boxes
+
+
+def run(service, frames, start=1000.0):
+    """Feed frames at FPS from `start`; returns the time after the last frame."""
+    for i, (frame, boxes) in enumerate(frames):
+        service.process_faces(frame, boxes, timestamp=start + i / FPS)
+        # Let the worker catch up like it would between camera frames
+        deadline = time.time() + 1.0
+        while service._pending and time.time() < deadline:
+            time.sleep(0.001)
+    time.sleep(0.05)
+    return start + len(frames) / FPS
+
+
+def test_tracks_and_budget():
+    print("Testing face tracks and classification budget...")
+    rng = np.random.default_rng(0)
+    classifier = ScriptedClassifier()
+    classifier.script = {100: "happy", 200: "sad"}
+    service = EmotionService(classifier=classifier, reclassify_interval=3.0)
+    events = []
+    service.subscribe(events.append)
+    service.start()
+
+    # Two people for 10 seconds, one drifting slowly across the frame
+    frames = [frame_with_faces([(30 + i // 4, 80, 100), (200, 90, 200)], rng) for i in range(10 * FPS)]
+    now = run(service, frames)
+
+    stats = service.get_stats()
+    tracks = service.get_tracks()
+    print(f"  {stats}")
+    print(f"  {tracks}")
+    assert len(tracks) == 2 and {t["track_id"] for t in tracks} == {1, 2}
+    assert {t["emotion"] for t in tracks} == {"happy", "sad"}
+    # 400 face observations, classified only when new or every 3 s
+    assert stats["classified"] <= 2 * (10 / 3.0 + 2)
+    assert classifier.crops == stats["classified"]
+    assert [e.emotion for e in events].count("happy") == 1
+
+    # Faces leave -> tracks end with an event
+    run(service, [(np.zeros((240, 320, 3), dtype=np.uint8), [])] * (2 * FPS), start=now)
+    assert service.get_tracks() == []
+    assert sum(1 for e in events if e.emotion is None) == 2
+    service.stop()
+
+
+def test_smoothing_and_appearance_change():
+    print("Testing label smoothing and appearance-triggered reclassification...")
+    rng = np.random.default_rng(1)
+    classifier = ScriptedClassifier()
+    classifier.script = {100: "happy"}
+    service = EmotionService(classifier=classifier, reclassify_interval=30.0)
+    events = []
+    service.subscribe(events.append)
+    service.start()
+
+    now = run(service, [frame_with_faces([(100, 80, 100)], rng) for _ in range(FPS)])
+    assert service.get_dominant_emotion() == "happy"
+
+    # Expression changes (face looks different) -> reclassified well before 30 s
+    classifier.script = {100: "surprise"}
+    calls_before = classifier.calls
+    run(service, [frame_with_faces([(100, 80, 100)], rng, mouth_open=True) for _ in range(2 * FPS)], start=now)
+    print(f"  events: {[(e.previous, e.emotion) for e in events]}")
+    assert classifier.calls > calls_before
+    # Smoothed: needs more than one classification to switch
+    assert service.get_dominant_emotion() == "surprise"
+    assert [e.emotion for e in events] == ["happy", "surprise"]
+    service.stop()
+
+
+if __name__ == "__main__":
+    test_tracks_and_budget()
+    test_smoothing_and_appearance_change()
+    print("Emotion service tests completed!")
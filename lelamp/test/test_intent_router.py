@@ -0,0 +1,90 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.local_voice.intent_router import IntentRouter, run_intent
+
+RECORDINGS = ["curious", "happy_wiggle", "nod", "look_up", "look_left", "sad", "dancing1"]
+TOOLS = {"set_rgb_solid", "set_timer", "set_volume", "play_recording", "start_dancing", "stop_dancing", "go_to_sleep"}
+
+
+def test_commands_are_routed():
+    print("Testing fast-path routing of simple commands...")
+    router = IntentRouter(recordings=RECORDINGS)
+    cases = {
+        "Turn the light blue.": ("set_rgb_solid", {"red": 0, "green": 0, "blue": 255}),
+        "Hey lamp, make it warm white please": ("set_rgb_solid", {"red": 255, "green": 180, "blue": 120}),
+        "Can you turn off the lights?": ("set_rgb_solid", {"red": 0, "green": 0, "blue": 0}),
+        "Set a timer for five minutes.": ("set_timer", {"duration_seconds": 300}),
+        "Timer for 1 hour and 30 minutes for laundry": ("set_timer", {"duration_seconds": 5400, "label": "laundry"}),
+        "Set a twenty five second timer": ("set_timer", {"duration_seconds": 25}),
+        "Set the volume to 40 percent": ("set_volume", {"volume_percent": 40}),
+        "Mute": ("set_volume", {"volume_percent": 0}),
+        "Do a happy wiggle!": ("play_recording", {"recording_name": "happy_wiggle"}),
+        "Look up": ("play_recording", {"recording_name": "look_up"}),
+        "Stop dancing": ("stop_dancing", {}),
+        "Be quiet.": (None, {}),
+    }
+    for text, (tool, args) in cases.items():
+        match = router.route(text, TOOLS)
+        print(f"  {text!r} -> {match}")
+        assert match is not None, text
+        assert match.tool == tool and match.args == args, text
+
+
+def test_everything_else_goes_to_llm():
+    print("Testing fallback to the LLM...")
+    router = IntentRouter(recordings=RECORDINGS)
+    for text in [
+        "What color is the light?",
+        "Turn the light blue and tell me a joke",
+        "Why is the sky blue?",
+        "How much time is left on my timer?",
+        "Remind me to call mom tomorrow",
+        "Set an alarm for seven",
+        "Do a backflip",
+        "Set the volume to 400",
+    ]:
+        match = router.route(text, TOOLS)
+        print(f"  {text!r} -> {match}")
+        assert match is None, text
+
+    # Intents whose tool isn't registered fall back too
+    assert router.route("Turn the light red", {"set_timer"}) is None
+    stats = router.get_stats()
+    assert stats["routed"] == 0 and stats["fallbacks"] == 9 and stats["hit_rate"] == 0.0
+
+
+def test_tool_call_and_stats():
+    print("Testing tool execution and saved-latency stats...")
+    router = IntentRouter(recordings=RECORDINGS, default_llm_ms=2500.0)
+    calls = []
+
+    async def set_rgb_solid(red, green, blue):
+        calls.append((red, green, blue))
+        return f"Set RGB to ({red}, {green}, {blue})"
+
+    match = router.route("turn the light green", {"set_rgb_solid"})
+    result = asyncio.run(run_intent(match, {"set_rgb_solid": set_rgb_solid}))
+    assert calls == [(0, 255, 0)] and result.startswith("Set RGB")
+    router.record_fast_path(match, 20.0)
+
+    router.record_llm_turn(3000.0)  # Measured LLM tool turn replaces the default
+    router.route("what time is it", {"set_rgb_solid"})
+    router.record_fast_path(router.route("make the lights red", {"set_rgb_solid"}), 30.0)
+
+    stats = router.get_stats()
+    print(f"  {stats}")
+    assert stats["routed"] == 2 and stats["fallbacks"] == 1
+    assert abs(stats["hit_rate"] - 2 / 3) < 0.01
+    assert stats["saved_ms"] == (2500.0 - 20.0) + (3000.0 - 30.0)
+    assert stats["by_intent"] == {"set_color": 2}
+
+
+if __name__ == "__main__":
+    test_commands_are_routed()
+    test_everything_else_goes_to_llm()
+    test_tool_call_and_stats()
+    print("Intent router tests completed!")
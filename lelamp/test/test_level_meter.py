@@ -0,0 +1,108 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.audio.level_meter import LevelMeter, SPECTRUM_BANDS, WAVEFORM_POINTS
+
+RATE = 24000
+BLOCK = 1024
+
+
+def sine_block(i, freq=1000.0, amplitude=0.5):
+    t = (np.arange(BLOCK) + i * BLOCK) / RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def test_snapshot_values():
+    print("Testing RMS, peak, waveform and spectrum...")
+    meter = LevelMeter()
+    meter._last_read = time.time()  # A reader is active
+    meter.feed(sine_block(0))
+    snapshot = meter.get_snapshot()
+    print(f"  rms={snapshot.rms:.3f} peak={snapshot.peak:.3f} spectrum={snapshot.spectrum}")
+    assert abs(snapshot.rms - 0.5 / np.sqrt(2)) < 0.01
+    assert abs(snapshot.peak - 0.5) < 0.01
+    assert len(snapshot.waveform) == WAVEFORM_POINTS
+    assert max(abs(v) for v in snapshot.waveform) > 0.49  # Decimation keeps the peaks
+    assert len(snapshot.spectrum) == SPECTRUM_BANDS
+    loudest = int(np.argmax(snapshot.spectrum))
+    edges = meter._band_layout(BLOCK)[1]
+    assert edges[loudest] * RATE / BLOCK <= 1000 <= edges[loudest + 1] * RATE / BLOCK
+    assert not meter._capture_running  # Fed by a tap, so no own capture
+
+    # int16 blocks (own capture / beat tracker) read the same
+    meter.feed((sine_block(1) * 32767).astype(np.int16))
+    assert abs(meter.get_snapshot().rms - snapshot.rms) < 0.01
+
+
+def test_many_readers_one_analysis():
+    print("Testing many readers share one analysis per block...")
+    meter = LevelMeter()
+    meter._last_read = time.time()
+    meter.feed(sine_block(0))
+    stop = threading.Event()
+
+    def capture():
+        i = 1
+        while not stop.is_set():
+            meter.feed(sine_block(i), source="microphone_service")
+            i += 1
+            time.sleep(BLOCK / RATE)
+
+    async def client(received):
+        last_seq = 0
+        deadline = time.time() + 1.0
+        while time.time() < deadline:
+            snapshot = await meter.wait_for_snapshot(last_seq, timeout=0.1)
+            if snapshot is not None and snapshot.seq > last_seq:
+                last_seq = snapshot.seq
+                received.append(snapshot)
+
+    async def main():
+        lags = []
+
+        async def watch_loop():
+            for _ in range(40):
+                start = time.perf_counter()
+                await asyncio.sleep(0.02)
+                lags.append(time.perf_counter() - start - 0.02)
+
+        received = [[] for _ in range(20)]
+        await asyncio.gather(watch_loop(), *(client(r) for r in received))
+        return received, lags
+
+    thread = threading.Thread(target=capture, daemon=True)
+    thread.start()
+    received, lags = asyncio.run(main())
+    stop.set()
+    thread.join()
+
+    stats = meter.get_stats()
+    print(f"  {stats}, per-client blocks={[len(r) for r in received[:5]]}, max loop lag {max(lags) * 1000:.1f}ms")
+    # Every block analysed exactly once, however many clients read it
+    assert stats["analysed_blocks"] == stats["blocks"]
+    assert all(len(r) >= 15 for r in received)
+    assert stats["source"] == "microphone_service" and not stats["capturing"]
+    assert max(lags) < 0.05
+
+
+def test_idle_meter_skips_analysis():
+    print("Testing no waveform/spectrum work without readers...")
+    meter = LevelMeter()
+    for i in range(10):
+        meter.feed(sine_block(i))
+    assert meter.blocks == 10 and meter.analysed_blocks == 0
+    assert meter._snapshot.waveform == () and meter._snapshot.rms > 0.3
+
+
+if __name__ == "__main__":
+    test_snapshot_values()
+    test_many_readers_one_analysis()
+    test_idle_meter_skips_analysis()
+    print("Level meter tests completed!")
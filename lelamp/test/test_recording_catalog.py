@@ -0,0 +1,157 @@
+import sys
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.recording_catalog import RecordingCatalog, parse_recording
+
+BUILTIN_DIR = Path(__file__).parent.parent / "recordings"
+HEADER = "timestamp,base_yaw.pos,base_pitch.pos\n"
+
+
+def write_recording(path, rows):
+    lines = [HEADER] + [f"{i / 30:.3f},{yaw},{pitch}\n" for i, (yaw, pitch) in enumerate(rows)]
+    Path(path).write_text("".join(lines))
+
+
+def make_dirs(directory):
+    builtin, user = Path(directory) / "builtin", Path(directory) / "user"
+    builtin.mkdir()
+    user.mkdir()
+    write_recording(builtin / "idle.csv", [(0, 0)] * 30)
+    write_recording(builtin / "nod.csv", [(0, 0), (0, 3), (0, 6), (0, 3)])
+    write_recording(builtin / "wave.csv", [(0, 0), (10, 0), (20, 0)])
+    return builtin, user
+
+
+def make_catalog(builtin, user, index_path=None):
+    catalog = RecordingCatalog([("builtin", builtin), ("user", user)], index_path=index_path)
+    catalog.CHECK_INTERVAL = 0.0
+    return catalog
+
+
+def test_metadata():
+    print("Testing indexed metadata...")
+    frames, meta = parse_recording(b"timestamp,a.pos,b.pos\n0.0,1,5\n0.033,3,5\n0.066,-2,4\n", fps=30)
+    assert frames == [{"a.pos": 1.0, "b.pos": 5.0}, {"a.pos": 3.0, "b.pos": 5.0}, {"a.pos": -2.0, "b.pos": 4.0}]
+    assert meta["frames"] == 3 and meta["duration"] == 0.1
+    assert meta["joint_ranges"] == {"a.pos": [-2.0, 3.0], "b.pos": [4.0, 5.0]}
+    assert meta["peak_velocity"] == 150.0  # 5 units in one frame at 30 fps
+    assert len(meta["checksum"]) == 40
+
+
+def test_scan_once():
+    print("Testing lookups don't rescan or reparse...")
+    with tempfile.TemporaryDirectory() as directory:
+        builtin, user = make_dirs(directory)
+        write_recording(user / "nod.csv", [(0, 0), (0, 1)])  # User copy overrides the builtin
+        catalog = make_catalog(builtin, user)
+        catalog.CHECK_INTERVAL = 60.0
+
+        entries = {entry.name: entry for entry in catalog.list()}
+        assert sorted(entries) == ["idle", "nod", "wave"]
+        assert entries["nod"].source == "user" and entries["nod"].frames == 2
+        assert entries["wave"].joint_ranges["base_yaw.pos"] == [0.0, 20.0]
+        assert catalog.path("nod") == user / "nod.csv" and catalog.get("missing") is None
+
+        for _ in range(1000):
+            catalog.list()
+            catalog.path("wave")
+        assert catalog.scans == 1 and catalog.parses == 4
+
+        # Trajectories come from the scan's parse when worth keeping warm, else parsed once
+        assert catalog.load("idle") is catalog.load("idle") and catalog.parses == 4
+        assert catalog.load("wave")[2] == {"base_yaw.pos": 20.0, "base_pitch.pos": 0.0}
+        assert catalog.parses == 5 and catalog.load("missing") is None
+
+
+def test_change_events():
+    print("Testing new, edited and deleted recordings are picked up...")
+    with tempfile.TemporaryDirectory() as directory:
+        builtin, user = make_dirs(directory)
+        catalog = make_catalog(builtin, user)
+        assert catalog.load("wave") is not None
+        scans = catalog.scans
+
+        catalog.list()
+        assert catalog.scans == scans  # Nothing changed, no rescan
+
+        # New user recording: directory mtime changes
+        time.sleep(0.01)
+        write_recording(user / "spin.csv", [(0, 0), (90, 0)])
+        os.utime(user, (time.time() + 1, time.time() + 1))
+        assert catalog.get("spin").peak_velocity == 2700.0
+
+        # Overridden in the user dir: the cached builtin trajectory is dropped
+        write_recording(user / "wave.csv", [(0, 0), (-5, 0)])
+        catalog.invalidate("wave")
+        assert catalog.get("wave").source == "user"
+        assert catalog.load("wave")[1]["base_yaw.pos"] == -5.0
+
+        # Deleted
+        (user / "wave.csv").unlink()
+        os.utime(user, (time.time() + 2, time.time() + 2))
+        assert catalog.get("wave").source == "builtin"
+        assert catalog.load("wave")[1]["base_yaw.pos"] == 10.0
+
+        # Rewritten in place by another process (record.py): no directory change, no invalidate()
+        dir_stat = os.stat(builtin)
+        write_recording(builtin / "wave.csv", [(0, 0), (7, 0), (14, 0), (21, 0)])
+        os.utime(builtin, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+        assert catalog.get("wave").frames == 4
+        assert catalog.load("wave")[1]["base_yaw.pos"] == 7.0
+
+
+def test_persistent_index_and_prewarm():
+    print("Testing the index survives restarts and prewarm follows play counts...")
+    with tempfile.TemporaryDirectory() as directory:
+        builtin, user = make_dirs(directory)
+        index_path = Path(directory) / "recordings_index.json"
+        catalog = make_catalog(builtin, user, index_path)
+        catalog.list()
+        for _ in range(5):
+            catalog.record_play("wave")
+        catalog.record_play("nod")
+        catalog._save_index()
+
+        restarted = make_catalog(builtin, user, index_path)
+        assert [entry.name for entry in restarted.list()] == ["idle", "nod", "wave"]
+        assert restarted.parses == 0  # Metadata straight from the index
+
+        assert restarted.prewarm(limit=1) == 2  # idle is always warm, then the most played
+        assert restarted.get_stats()["warm"] == ["idle", "wave"]
+        start = time.perf_counter()
+        frames = restarted.load("wave")
+        first_play_us = (time.perf_counter() - start) * 1e6
+        print(f"  first play after prewarm: {first_play_us:.0f}us")
+        assert frames is not None and restarted.hits == 1 and restarted.misses == 2
+
+
+def test_builtin_recordings():
+    print("Testing the shipped recordings index cleanly...")
+    with tempfile.TemporaryDirectory() as directory:
+        builtin = Path(directory) / "builtin"
+        shutil.copytree(BUILTIN_DIR, builtin)
+        catalog = make_catalog(builtin, Path(directory) / "user")
+        start = time.perf_counter()
+        entries = catalog.list()
+        scan_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        catalog.list()
+        lookup_us = (time.perf_counter() - start) * 1e6
+        print(f"  {len(entries)} recordings: cold scan {scan_ms:.1f}ms, listing {lookup_us:.0f}us")
+        assert len(entries) == len(list(BUILTIN_DIR.glob("*.csv")))
+        assert all(entry.frames > 0 and entry.joint_ranges for entry in entries)
+
+
+if __name__ == "__main__":
+    test_metadata()
+    test_scan_once()
+    test_change_events()
+    test_persistent_index_and_prewarm()
+    test_builtin_recordings()
+    print("Recording catalog tests completed!")
@@ -0,0 +1,137 @@
+import sys
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from api.static import (
+    IMMUTABLE, REVALIDATE, IndexPage, PrecompressedStaticFiles, accepted_encodings, brotli, precompress,
+)
+
+BUNDLE = ("export function render(){return 'lamp'}\n" * 400).encode()
+
+
+def make_app(dist):
+    app = FastAPI()
+    index_page = IndexPage(dist / "index.html")
+    app.mount("/dist-assets", PrecompressedStaticFiles(directory=dist / "dist-assets", immutable_hashed=True), name="dist-assets")
+    app.mount("/assets", PrecompressedStaticFiles(directory=dist / "assets"), name="assets")
+
+    @app.get("/dashboard")
+    async def serve_spa(request: Request):
+        return index_page.response(request)
+
+    return TestClient(app)
+
+
+def make_dist(directory):
+    dist = Path(directory)
+    (dist / "dist-assets").mkdir()
+    (dist / "assets").mkdir()
+    (dist / "assets" / "Scifi-SignalLost.wav").write_bytes(os.urandom(2048))
+    (dist / "dist-assets" / "index-BxYz12_a.js").write_bytes(BUNDLE)
+    (dist / "dist-assets" / "tiny.css").write_text("body{margin:0}")
+    (dist / "dist-assets" / "photo.png").write_bytes(os.urandom(4096))
+    (dist / "index.html").write_text('<html><script src="/dist-assets/index-BxYz12_a.js"></script></html>' * 30)
+    return dist
+
+
+def test_negotiation():
+    print("Testing Accept-Encoding negotiation...")
+    assert accepted_encodings("gzip, deflate, br") == ["br", "gzip"]
+    assert accepted_encodings("gzip;q=1.0, br;q=0.5") == ["gzip", "br"]
+    assert accepted_encodings("br;q=0, gzip") == ["gzip"]
+    assert accepted_encodings("*") == ["br", "gzip"]
+    assert accepted_encodings("identity") == []
+    assert accepted_encodings("") == []
+
+
+def test_precompress():
+    print("Testing precompression writes only worthwhile, fresh siblings...")
+    with tempfile.TemporaryDirectory() as directory:
+        dist = make_dist(directory)
+        result = precompress(dist)
+        bundle = dist / "dist-assets" / "index-BxYz12_a.js"
+        assert (dist / "dist-assets" / "index-BxYz12_a.js.gz").exists()
+        assert (dist / "dist-assets" / "index-BxYz12_a.js.br").exists() == (brotli is not None)
+        assert not (dist / "dist-assets" / "tiny.css.gz").exists()  # Below MIN_SIZE
+        assert not (dist / "dist-assets" / "photo.png.gz").exists()  # Not compressible
+        assert result["gzip"] < result["original"] / 10
+
+        # A second run leaves fresh siblings alone
+        assert precompress(dist)["written"] == 0
+        os.utime(bundle, (time.time() + 5, time.time() + 5))
+        assert precompress(dist)["written"] >= 1
+
+
+def test_encoded_responses():
+    print("Testing encoded responses and cache headers...")
+    with tempfile.TemporaryDirectory() as directory:
+        dist = make_dist(directory)
+        precompress(dist)
+        client = make_app(dist)
+
+        response = client.get("/dist-assets/index-BxYz12_a.js", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200 and response.headers["content-encoding"] == "gzip"
+        assert response.content == BUNDLE  # httpx decodes it
+        assert int(response.headers["content-length"]) < len(BUNDLE) / 10
+        assert response.headers["cache-control"] == IMMUTABLE
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert response.headers["content-type"].startswith(("text/javascript", "application/javascript"))
+
+        identity = client.get("/dist-assets/index-BxYz12_a.js", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+        assert int(identity.headers["content-length"]) == len(BUNDLE)
+        assert identity.headers["etag"] != response.headers["etag"]  # One ETag per representation
+
+        # Unhashed files are revalidated instead
+        tiny = client.get("/dist-assets/tiny.css", headers={"Accept-Encoding": "gzip"})
+        assert tiny.headers["cache-control"] == REVALIDATE and "content-encoding" not in tiny.headers
+        revalidated = client.get("/dist-assets/tiny.css", headers={"If-None-Match": tiny.headers["etag"]})
+        assert revalidated.status_code == 304
+
+        # Hand-named assets only look hashed; they must still revalidate
+        sound = client.get("/assets/Scifi-SignalLost.wav")
+        assert sound.status_code == 200 and sound.headers["cache-control"] == REVALIDATE
+        assert client.get("/assets/Scifi-SignalLost.wav", headers={"If-None-Match": sound.headers["etag"]}).status_code == 304
+
+        # A stale sibling (source rebuilt after it) is not served
+        bundle = dist / "dist-assets" / "index-BxYz12_a.js"
+        os.utime(bundle, (time.time() + 5, time.time() + 5))
+        stale = client.get("/dist-assets/index-BxYz12_a.js", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in stale.headers
+
+
+def test_index_etag():
+    print("Testing index.html ETag revalidation...")
+    with tempfile.TemporaryDirectory() as directory:
+        dist = make_dist(directory)
+        client = make_app(dist)
+
+        first = client.get("/dashboard", headers={"Accept-Encoding": "gzip"})
+        etag = first.headers["etag"]
+        assert first.status_code == 200 and first.headers["content-encoding"] == "gzip"
+        assert first.headers["cache-control"] == REVALIDATE and b"index-BxYz12_a.js" in first.content
+
+        again = client.get("/dashboard", headers={"If-None-Match": etag})
+        assert again.status_code == 304 and again.content == b""
+
+        # A rebuild changes the content and so the ETag
+        (dist / "index.html").write_text('<html><script src="/dist-assets/index-C9q8w7e6.js"></script></html>')
+        os.utime(dist / "index.html", (time.time() + 5, time.time() + 5))
+        rebuilt = client.get("/dashboard", headers={"If-None-Match": etag})
+        assert rebuilt.status_code == 200 and rebuilt.headers["etag"] != etag
+        assert b"index-C9q8w7e6.js" in rebuilt.content
+
+
+if __name__ == "__main__":
+    test_negotiation()
+    test_precompress()
+    test_encoded_responses()
+    test_index_etag()
+    print("Static asset tests completed!")
@@ -0,0 +1,143 @@
+import sys
+import os
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service import system_status
+from lelamp.service.system_status import SystemStatusCollector
+
+
+def counting_collector(**intervals):
+    """Collector whose probes return canned values and count how often they run."""
+    collector = SystemStatusCollector(intervals)
+    calls = {name: 0 for name in collector._probes}
+
+    def probe(name, value):
+        def run():
+            calls[name] += 1
+            time.sleep(0.01)  # Stand-in for a subprocess
+            return value
+        return run
+
+    canned = {
+        "temperature": 48.5, "cpu_percent": 12.0, "memory": {"percent": 40.0}, "disk": {"percent": 20.0},
+        "uptime": {"seconds": 3600, "formatted": "1h 0m"}, "wifi": {"connected": True, "interface": "wlan0"},
+        "internet": {"connected": True}, "local_ip": "192.168.1.20", "wan_ip": "203.0.113.5",
+        "servo_driver_sn": "5A46083171", "device": {"serial": "a3b381c95fcefbc0"}, "os": "Debian",
+        "kernel": "6.12", "lelamp_version": "3.0.0",
+    }
+    for name, value in canned.items():
+        collector._probes[name] = probe(name, value)
+    return collector, calls
+
+
+def test_reads_do_not_probe():
+    print("Testing status reads are served from the snapshot...")
+    collector, calls = counting_collector(temperature=0.1, cpu_percent=0.1)
+    start = time.perf_counter()
+    status = collector.get_status()  # First read only starts the background round
+    assert time.perf_counter() - start < 0.005
+    deadline = time.time() + 2.0
+    while len(status["sample_age"]) < len(calls) and time.time() < deadline:
+        time.sleep(0.01)
+        status = collector.get_status()
+    assert status["temperature"] == 48.5 and status["network"]["wan_ip"] == "203.0.113.5"
+    assert status["device"]["servo_driver_sn"] == "5A46083171"
+    assert all(count == 1 for name, count in calls.items() if name not in ("temperature", "cpu_percent"))
+
+    # Many dashboards polling for half a second
+    start = time.perf_counter()
+    reads = 0
+    deadline = time.time() + 0.5
+    while time.time() < deadline:
+        collector.get_status()
+        reads += 1
+    per_read_us = (time.perf_counter() - start) / reads * 1e6
+    collector.stop()
+    print(f"  {reads} reads, {per_read_us:.0f}us each, probe runs {calls}")
+
+    assert reads > 1000 and per_read_us < 500
+    assert 3 <= calls["temperature"] <= 8  # Its own 0.1 s cadence, not per read
+    assert calls["wifi"] == 1 and calls["wan_ip"] == 1 and calls["kernel"] == 1
+    assert set(status["sample_age"]) == set(calls)
+
+
+def test_staleness_and_errors():
+    print("Testing sample timestamps and failed probes...")
+    collector, calls = counting_collector(wifi=0.05)
+    collector.sample_due()
+    first = collector.get("wifi", touch=False)
+
+    def broken():
+        raise RuntimeError("nmcli timed out")
+    collector._probes["wifi"] = broken
+    time.sleep(0.1)
+    collector.sample_due()
+    failed = collector.get("wifi", touch=False)
+    # Previous value kept, with its original timestamp, so the age shows it's stale
+    assert failed.value == first.value and failed.timestamp == first.timestamp
+    assert failed.error == "nmcli timed out"
+    assert collector.get_status()["sample_age"]["wifi"] >= 0.1
+    collector.stop()
+
+
+def test_idle_pause():
+    print("Testing sampling pauses without readers...")
+    idle_after = system_status.IDLE_AFTER
+    system_status.IDLE_AFTER = 0.2
+    try:
+        collector, calls = counting_collector(temperature=0.05)
+        collector.get_status()
+        time.sleep(0.6)
+        paused_at = calls["temperature"]
+        time.sleep(0.3)
+        assert calls["temperature"] == paused_at  # Nobody reading, nothing sampled
+
+        collector.get("temperature")  # A reader wakes it
+        time.sleep(0.15)
+        assert calls["temperature"] > paused_at
+        collector.stop()
+    finally:
+        system_status.IDLE_AFTER = idle_after
+
+
+def test_per_metric_demand():
+    print("Testing a temperature-only reader keeps only temperature sampled...")
+    idle_after = system_status.IDLE_AFTER
+    system_status.IDLE_AFTER = 0.2
+    try:
+        collector, calls = counting_collector(temperature=0.05, wifi=0.05, wan_ip=0.05)
+        collector.get_status()  # Dashboard opened once, then closed
+        time.sleep(0.4)
+        network_runs = calls["wifi"], calls["wan_ip"]
+        for _ in range(10):  # Thermal governor polling
+            collector.get_value("temperature")
+            time.sleep(0.05)
+        assert (calls["wifi"], calls["wan_ip"]) == network_runs
+        assert calls["temperature"] >= 5
+        assert collector.get_stats()["demanded"] == ["temperature"]
+        collector.stop()
+    finally:
+        system_status.IDLE_AFTER = idle_after
+
+
+def test_procfs_probes():
+    print("Testing procfs CPU sampling...")
+    collector = SystemStatusCollector()
+    collector._cpu_percent()
+    threading.Event().wait(0.1)
+    cpu = collector._cpu_percent()
+    print(f"  cpu={cpu}")
+    if os.path.exists("/proc/stat"):
+        assert cpu is not None and 0.0 <= cpu <= 100.0
+
+
+if __name__ == "__main__":
+    test_reads_do_not_probe()
+    test_staleness_and_errors()
+    test_idle_pause()
+    test_per_metric_demand()
+    test_procfs_probes()
+    print("System status tests completed!")
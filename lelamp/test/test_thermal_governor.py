@@ -0,0 +1,142 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.thermal_governor import ThermalGovernor, THROTTLE_LEVELS
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeLoop:
+    """Loop counters as VisionService/AnimationService report them."""
+    def __init__(self):
+        self.frames = 0
+        self.overruns = 0
+
+    def run(self, frames, overrun_ratio):
+        self.frames += frames
+        self.overruns += int(frames * overrun_ratio)
+
+    def get_stats(self):
+        return {"frames": self.frames, "overruns": self.overruns}
+
+
+def make_governor():
+    clock = Clock()
+    readings = {"temperature": 55.0, "cpu": 30.0}
+    governor = ThermalGovernor(
+        step_up_after=6.0, restore_after=30.0,
+        read_temperature=lambda: readings["temperature"],
+        read_cpu=lambda: readings["cpu"],
+        time_fn=clock,
+    )
+    applied = {}
+    for knob in ("analysis", "rgb", "vision", "hands"):
+        governor.add_knob(knob, lambda scale, knob=knob: applied.__setitem__(knob, scale))
+    return governor, clock, readings, applied
+
+
+def run_for(governor, clock, seconds, step=2.0, loop=None, overrun_ratio=0.0):
+    levels = []
+    for _ in range(int(seconds / step)):
+        clock.now += step
+        if loop is not None:
+            loop.run(20, overrun_ratio)
+        levels.append(governor.evaluate())
+    return levels
+
+
+def test_priority_order():
+    print("Testing load is shed in priority order while hot...")
+    governor, clock, readings, applied = make_governor()
+    assert applied == {"analysis": 1.0, "rgb": 1.0, "vision": 1.0, "hands": 1.0}
+
+    readings["temperature"] = 73.0
+    levels = run_for(governor, clock, 60)
+    print(f"  levels while hot: {levels}")
+    assert levels == sorted(levels) and governor.level == len(THROTTLE_LEVELS) - 1
+
+    # Optional analysis goes first, then LEDs, then the detectors
+    first_change = {knob: levels.index(next(l for l in levels if THROTTLE_LEVELS[l].get(knob, 1.0) < 1.0))
+                    for knob in applied}
+    assert first_change["analysis"] < first_change["rgb"] < first_change["vision"]
+    assert applied == THROTTLE_LEVELS[-1]
+
+
+def test_hysteresis():
+    print("Testing hysteresis between the thresholds...")
+    governor, clock, readings, applied = make_governor()
+    readings["temperature"] = 71.0
+    run_for(governor, clock, 14)
+    hot_level = governor.level
+    assert hot_level == 2
+
+    # Cooler, but not below the restore threshold: hold
+    readings["temperature"] = 66.0
+    assert set(run_for(governor, clock, 120)) == {hot_level}
+
+    # A reading flapping around the throttle point doesn't escalate
+    for temperature in (70.5, 69.0) * 10:
+        readings["temperature"] = temperature
+        run_for(governor, clock, 4)
+    assert governor.level == hot_level
+
+    # Real headroom: restore one level per restore_after
+    readings["temperature"] = 58.0
+    levels = run_for(governor, clock, 70)
+    print(f"  levels while cooling: {levels[::5]}")
+    assert governor.level == 0 and applied["analysis"] == 1.0 and applied["rgb"] == 1.0
+    assert levels.index(1) >= 14  # Held for restore_after before the first step down
+
+
+def test_overruns_and_critical():
+    print("Testing loop overruns and critical temperature...")
+    governor, clock, readings, applied = make_governor()
+    loop = FakeLoop()
+    governor.add_loop("vision", loop.get_stats)
+    readings["temperature"] = 66.0  # Warm, below the throttle point
+    run_for(governor, clock, 10, loop=loop, overrun_ratio=0.5)
+    assert governor.level >= 1
+    assert governor.get_status()["inputs"]["overruns"]["vision"] == 0.5
+
+    governor, clock, readings, applied = make_governor()
+    readings["temperature"] = 82.0
+    clock.now += 1
+    governor.evaluate()
+    assert governor.level == len(THROTTLE_LEVELS) - 1 and applied["hands"] == 0.0
+
+    governor.stop()
+    assert applied == {"analysis": 1.0, "rgb": 1.0, "vision": 1.0, "hands": 1.0}
+
+
+def test_cool_lamp_ignores_overruns():
+    print("Testing a cool lamp with a loop that can't reach its fps...")
+    governor, clock, readings, applied = make_governor()
+    loop = FakeLoop()
+    governor.add_loop("vision", loop.get_stats)
+    levels = run_for(governor, clock, 120, loop=loop, overrun_ratio=1.0)
+    assert set(levels) == {0} and governor.level_changes == 0
+    assert applied == {"analysis": 1.0, "rgb": 1.0, "vision": 1.0, "hands": 1.0}
+
+    # Throttled by heat, then cooled: overruns don't keep it throttled
+    readings["temperature"] = 73.0
+    run_for(governor, clock, 14, loop=loop, overrun_ratio=1.0)
+    assert governor.level >= 1
+    readings["temperature"] = 55.0
+    run_for(governor, clock, 200, loop=loop, overrun_ratio=1.0)
+    assert governor.level == 0
+
+
+if __name__ == "__main__":
+    test_priority_order()
+    test_hysteresis()
+    test_overruns_and_critical()
+    test_cool_lamp_ignores_overruns()
+    print("Thermal governor tests completed!")
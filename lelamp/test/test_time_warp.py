@@ -0,0 +1,71 @@
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.motors.time_warp import TimeWarper
+
+FPS = 30
+
+
+def nod_recording(period: float, seconds: float):
+    """Wrist nodding back and forth once per `period`, with a little base sway."""
+    t = np.arange(int(seconds * FPS)) / FPS
+    wrist = 20.0 * np.sin(2 * np.pi * t / period)
+    base = 5.0 * np.sin(2 * np.pi * t / 3.0)
+    return [{"base_yaw.pos": float(b), "wrist_pitch.pos": float(w)} for b, w in zip(base, wrist)]
+
+
+def test_accents_land_on_beats():
+    print("Testing time warp onto a beat grid...")
+    recording = nod_recording(period=0.9, seconds=12)  # Reversal every 0.45s
+    warper = TimeWarper(fps=FPS)
+
+    for bpm in (100, 128, 150):
+        warped = warper.warp("nod", recording, bpm)
+        assert warped is not None
+
+        # Reversals of the warped wrist trajectory should sit on the grid
+        wrist = np.array([f["wrist_pitch.pos"] for f in warped.frames])
+        velocity = np.diff(wrist)
+        reversals = np.where(np.sign(velocity[1:]) != np.sign(velocity[:-1]))[0] + 1
+        grid = warped.frames_per_beat * min(warped.beats_per_period, 1.0)
+        # The tail after the last accent is only stretched to the closing grid line
+        reversals = reversals[reversals < len(warped.frames) - grid]
+        offsets = [abs(r - warped.beat_offset - round((r - warped.beat_offset) / grid) * grid) for r in reversals]
+
+        print(f"  {bpm} BPM: x{warped.scale:.2f}, {warped.anchors} anchors, "
+              f"{len(warped.frames)} frames, max reversal offset {max(offsets):.1f} frames")
+        assert max(offsets) <= 1.5
+        # Whole recording ends on a grid line so loops stay on the beat
+        cells = (len(warped.frames) - warped.beat_offset) / grid
+        assert abs(cells - round(cells)) < 0.05
+
+
+def test_cache_per_recording_and_bpm():
+    print("Testing time warp cache...")
+    recording = nod_recording(period=1.0, seconds=8)
+    warper = TimeWarper(fps=FPS)
+
+    first = warper.warp("nod", recording, 120.2)
+    assert warper.warp("nod", recording, 119.8) is first  # Same 1-BPM bucket
+    assert warper.warp("nod", recording, 124) is not first
+
+    reloaded = nod_recording(period=1.0, seconds=8)  # e.g. re-recorded under the same name
+    assert warper.warp("nod", reloaded, 120) is not first
+
+    stats = warper.get_stats()
+    print(f"  {stats}")
+    assert stats["hits"] == 1 and stats["misses"] == 3
+
+    # No rhythm -> play unwarped
+    still = [{"wrist_pitch.pos": 0.0}] * (FPS * 5)
+    assert warper.warp("still", still, 120) is None
+
+
+if __name__ == "__main__":
+    test_accents_land_on_beats()
+    test_cache_per_recording_and_bpm()
+    print("Time warp tests completed!")
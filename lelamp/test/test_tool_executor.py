@@ -0,0 +1,171 @@
+import asyncio
+import json
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.agent.tools import Tool
+from lelamp.service.agent.agent_service import LLM
+from lelamp.service.agent.audio_uplink import AudioUplink
+from lelamp.service.agent.tool_executor import ToolExecutor
+from lelamp.service.metrics_service import get_metrics_service
+
+TOOL_SECONDS = 1.0
+AUDIO_INTERVAL = 0.02  # One mic block every 20ms
+
+
+class FakeAgent:
+    """Stands in for Agent with deliberately blocking tools"""
+
+    def test_slow_sync_tool(self, seconds: float) -> str:
+        """Sync tool that sleeps"""
+        time.sleep(seconds)
+        return "sync done"
+
+    async def test_blocking_async_tool(self, seconds: float) -> str:
+        """Async tool that blocks its loop, like feedparser.parse inside get_news"""
+        time.sleep(seconds)
+        return "async done"
+
+    async def test_loop_affine_tool(self) -> str:
+        """Async tool that binds the running loop, like wake_up starting scene analysis"""
+        self.bound_loop = asyncio.get_running_loop()
+        return "bound"
+
+
+def with_fake_tools(*funcs):
+    """Register the fake tools for one test and restore Tool's global registry afterwards."""
+    def decorator(test):
+        def run():
+            registry, schema = dict(Tool.tool_registry), list(Tool.tools_schema)
+            for func in funcs:
+                Tool.register_tool(func)
+            try:
+                test()
+            finally:
+                Tool.tool_registry.clear()
+                Tool.tool_registry.update(registry)
+                Tool.tools_schema[:] = schema
+        run.__name__ = test.__name__
+        return run
+    return decorator
+
+
+class FakeWebSocket:
+    """Replays server events and records what the client sends"""
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.sent = []  # (monotonic time, event)
+
+    async def send(self, message):
+        self.sent.append((time.monotonic(), json.loads(message)))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self.incoming.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+
+async def run_scenario():
+    llm = LLM(agent=FakeAgent())
+    # The fake mic sends silence; forward every block as-is so its gaps measure the loop
+    llm.uplink = AudioUplink(sample_rate=llm.SAMPLE_RATE, frame_ms=AUDIO_INTERVAL * 1000, vad=False)
+    ws = FakeWebSocket()
+    send_task = asyncio.create_task(llm.send_audio(ws))
+    receive_task = asyncio.create_task(llm.receive(ws))
+
+    async def microphone():
+        # Same path as the sounddevice callback, minus the cross-thread hop
+        while True:
+            llm.input_queue.put_nowait(b"\x00" * 960)
+            await asyncio.sleep(AUDIO_INTERVAL)
+
+    mic_task = asyncio.create_task(microphone())
+    await asyncio.sleep(0.2)
+
+    # One response asking for two slow tools in parallel
+    args = json.dumps({"seconds": TOOL_SECONDS})
+    tool_start = time.monotonic()
+    for call_id, name in (("call_1", "test_slow_sync_tool"), ("call_2", "test_blocking_async_tool")):
+        await ws.incoming.put(json.dumps({
+            "type": "response.function_call_arguments.done",
+            "call_id": call_id, "name": name, "arguments": args,
+        }))
+    await ws.incoming.put(json.dumps({"type": "response.done"}))
+
+    deadline = time.monotonic() + TOOL_SECONDS * 5
+    while not any(e["type"] == "response.create" for _, e in ws.sent) and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    tool_end = time.monotonic()
+
+    mic_task.cancel()
+    await ws.incoming.put(None)
+    await receive_task
+    send_task.cancel()
+
+    return ws.sent, tool_start, tool_end
+
+
+@with_fake_tools(FakeAgent.test_slow_sync_tool, FakeAgent.test_blocking_async_tool)
+def test_audio_flows_during_slow_tool():
+    print("Testing tool executor with a fake realtime websocket...")
+    sent, tool_start, tool_end = asyncio.run(run_scenario())
+
+    outputs = [e for _, e in sent if e["type"] == "conversation.item.create"]
+    creates = [t for t, e in sent if e["type"] == "response.create"]
+    appends = [t for t, e in sent if e["type"] == "input_audio_buffer.append"]
+    during = [t for t in appends if tool_start <= t <= tool_end]
+    gaps = [b - a for a, b in zip(during, during[1:])]
+
+    print(f"  Tool window: {(tool_end - tool_start) * 1000:.0f}ms for two {TOOL_SECONDS:g}s tools")
+    print(f"  Audio appends during tools: {len(during)}, max gap {max(gaps) * 1000:.0f}ms")
+    print(f"  Tool stats: {get_metrics_service().get_tool_stats()}")
+
+    assert {o["item"]["call_id"]: o["item"]["output"] for o in outputs} == {
+        "call_1": "sync done", "call_2": "async done",
+    }
+    assert len(creates) == 1, "expected one response.create for the whole response"
+    assert all(t <= creates[0] for t, e in sent if e["type"] == "conversation.item.create")
+
+    # Both tools ran concurrently
+    assert tool_end - tool_start < TOOL_SECONDS * 1.8
+    # Mic audio kept flowing the whole time
+    assert len(during) >= 0.5 * (tool_end - tool_start) / AUDIO_INTERVAL
+    assert max(gaps) < 0.2
+
+    stats = get_metrics_service().get_tool_stats()
+    assert stats["test_slow_sync_tool"]["calls"] == 1
+    assert stats["test_blocking_async_tool"]["avg_ms"] >= TOOL_SECONDS * 1000 * 0.9
+    print("Tool executor test completed!")
+
+
+@with_fake_tools(FakeAgent.test_loop_affine_tool)
+def test_loop_affine_tools_run_on_caller_loop():
+    print("Testing loop-affine tools run on the agent loop...")
+    agent = FakeAgent()
+
+    async def call(executor):
+        result = await executor.run("test_loop_affine_tool", "{}", agent)
+        return result, asyncio.get_running_loop()
+
+    executor = ToolExecutor(caller_loop_tools=["test_loop_affine_tool"])
+    result, agent_loop = asyncio.run(call(executor))
+    assert result == "bound" and agent.bound_loop is agent_loop
+
+    # Other async tools stay off the agent loop
+    executor = ToolExecutor()
+    result, agent_loop = asyncio.run(call(executor))
+    assert result == "bound" and agent.bound_loop is not agent_loop
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    test_audio_flows_during_slow_tool()
+    test_loop_affine_tools_run_on_caller_loop()
@@ -0,0 +1,102 @@
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.motors.transition_planner import TransitionPlanner, load_joint_limits, blend_weight
+
+FPS = 30
+
+CONFIG = {
+    "motor_preset": "Normal",
+    "motor_presets": {
+        "Normal": {
+            "default": {"torque_limit": 500, "max_velocity": 150, "max_acceleration": 600, "max_jerk": 5000},
+            "base_pitch": {"torque_limit": 550, "max_velocity": 100},
+        },
+    },
+}
+
+
+def derivatives(frames, joint):
+    positions = np.array([f[joint] for f in frames])
+    velocity = np.diff(positions) * FPS
+    acceleration = np.diff(velocity) * FPS
+    return positions, velocity, acceleration
+
+
+def test_limits_and_arrival():
+    print("Testing jerk-limited transitions...")
+    planner = TransitionPlanner.from_config(CONFIG, fps=FPS)
+    assert planner.limits_for("base_pitch.pos").velocity == 100
+    assert planner.limits_for("wrist_roll.pos").velocity == 150
+
+    start = {"base_yaw.pos": 0.0, "base_pitch.pos": 10.0, "wrist_roll.pos": 0.0}
+    target = {"base_yaw.pos": -80.0, "base_pitch.pos": 60.0, "wrist_roll.pos": 5.0}
+    frames = planner.plan(start, target)
+    print(f"  Long move: {len(frames)} frames ({len(frames) / FPS:.2f}s)")
+
+    assert frames[-1] == target
+    for joint in target:
+        limits = planner.limits_for(joint)
+        positions, velocity, acceleration = derivatives([start] + frames, joint)
+        # Sampled derivatives overshoot the continuous curve a little
+        assert np.abs(velocity).max() <= limits.velocity * 1.02
+        assert np.abs(acceleration).max() <= limits.acceleration * 1.1
+        # Monotonic, no overshoot
+        assert np.all(np.diff(positions) * np.sign(target[joint] - start[joint]) >= -1e-9)
+
+    # All joints arrive together: even the short wrist move is still moving halfway through
+    middle = frames[len(frames) // 2]
+    assert start["wrist_roll.pos"] < middle["wrist_roll.pos"] < target["wrist_roll.pos"]
+
+    # Short moves start the animation almost immediately
+    nudge = planner.plan(start, {**start, "base_yaw.pos": 3.0})
+    print(f"  Short move: {len(nudge)} frames ({len(nudge) / FPS:.2f}s)")
+    assert len(nudge) < FPS * 0.5
+    assert planner.plan(start, dict(start)) == []
+
+
+def test_presets_scale_duration():
+    print("Testing preset limits...")
+    config = {
+        "motor_preset": "Gentle",
+        "motor_presets": {
+            "Gentle": {"default": {"max_velocity": 90, "max_acceleration": 300, "max_jerk": 2000}},
+            "Sport": {"default": {"max_velocity": 240, "max_acceleration": 1200, "max_jerk": 12000}},
+        },
+    }
+    start, target = {"elbow_pitch.pos": 0.0}, {"elbow_pitch.pos": 70.0}
+    gentle = TransitionPlanner.from_config(config, fps=FPS).duration(start, target)
+    sport = TransitionPlanner(load_joint_limits({**config, "motor_preset": "Sport"}), fps=FPS).duration(start, target)
+    print(f"  Gentle {gentle:.2f}s, Sport {sport:.2f}s")
+    assert sport < gentle < 4.0
+
+
+def test_crossfade_is_continuous():
+    print("Testing crossfade between running recordings...")
+    planner = TransitionPlanner.from_config(CONFIG, fps=FPS)
+    t = np.arange(4 * FPS) / FPS
+    old = [{"wrist_pitch.pos": float(20 * np.sin(2 * np.pi * x))} for x in t]
+    new = [{"wrist_pitch.pos": float(40 + 10 * np.sin(2 * np.pi * x / 2))} for x in t]
+
+    length = planner.crossfade_frames(old[30], new[0], max_seconds=4.0)
+    blended = []
+    for step in range(length + 10):
+        weight = blend_weight((step + 1) / length)
+        a, b = old[min(30 + step, len(old) - 1)]["wrist_pitch.pos"], new[step]["wrist_pitch.pos"]
+        blended.append(a + (b - a) * weight)
+
+    jumps = np.abs(np.diff([old[29]["wrist_pitch.pos"]] + blended))
+    print(f"  {length} frames, largest step {jumps.max():.2f}")
+    assert blended[length - 1] == new[length - 1]["wrist_pitch.pos"]
+    assert jumps.max() * FPS <= planner.limits_for("wrist_pitch").velocity * 1.5
+
+
+if __name__ == "__main__":
+    test_limits_and_arrival()
+    test_presets_scale_duration()
+    test_crossfade_is_continuous()
+    print("Transition planner tests completed!")
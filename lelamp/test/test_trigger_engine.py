@@ -0,0 +1,208 @@
+import sys
+import os
+import time
+import tempfile
+import threading
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.workflows.db_manager import WorkflowDatabase
+from lelamp.service.workflows.trigger_engine import ArmedTrigger, TriggerEngine, next_time_of_day
+from lelamp.service.workflows.workflow_service import WorkflowService
+
+
+class CountingDatabase:
+    """Wraps WorkflowDatabase and counts calls, to check the engine never scans."""
+
+    def __init__(self, db):
+        self._db = db
+        self.calls = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._db, name)
+        if not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+class Recorder:
+    def __init__(self):
+        self.fired = []
+        self.lock = threading.Lock()
+
+    def __call__(self, trigger, event):
+        with self.lock:
+            self.fired.append((trigger, event, time.time()))
+
+
+def make_db():
+    path = os.path.join(tempfile.mkdtemp(), "triggers.db")
+    return CountingDatabase(WorkflowDatabase(path))
+
+
+def test_timed_triggers_sleep_until_due():
+    print("Testing hundreds of timed triggers without polling...")
+    db = make_db()
+    run_id = db.start_run("bedside_alarm")
+    recorder = Recorder()
+    engine = TriggerEngine(db, on_fire=recorder)
+    engine.start()
+
+    # 300 interval triggers between 0.2 and 0.8 s
+    specs = [{"type": "time_interval", "interval_seconds": 0.2 + (i % 7) * 0.1, "action": "prompt_agent"}
+             for i in range(300)]
+    engine.arm_run_triggers(run_id, "bedside_alarm", specs)
+    time.sleep(1.0)
+    engine.stop()
+    stats = engine.get_stats()
+    print(f"  {stats}")
+
+    # Each trigger fired on its own schedule, within a few ms of it being due
+    counts = {}
+    lateness = []
+    for trigger, event, fired_at in recorder.fired:
+        counts[trigger.trigger_id] = counts.get(trigger.trigger_id, 0) + 1
+        lateness.append(fired_at - event["scheduled_at"])
+    print(f"  median lateness {sorted(lateness)[len(lateness) // 2] * 1000:.1f}ms")
+    assert sorted(lateness)[len(lateness) // 2] < 0.05
+    assert len(counts) == 300
+    assert all(abs(c - int(1.0 / t.config["interval_seconds"])) <= 1
+               for t, c in ((engine._triggers[i], c) for i, c in counts.items()))
+    # Only 7 distinct intervals, so wakeups track distinct due times, not triggers or seconds
+    assert stats["wakeups"] < 40
+    # Read once at start; only writes afterwards
+    assert db.calls["list_active_triggers"] == 1 and db.calls["list_triggers"] == 1
+    assert db.calls["record_active_triggers_fired"] <= stats["wakeups"]
+
+
+def test_event_triggers():
+    print("Testing presence, music, keyword and state triggers...")
+    db = make_db()
+    run_id = db.start_run("bedside_alarm")
+    recorder = Recorder()
+    clock = [1000.0]
+    engine = TriggerEngine(db, on_fire=recorder, absence_timeout=30.0, music_gap=60.0,
+                           time_fn=lambda: clock[0])
+    engine.start()
+    engine.add_trigger("welcome_home", "presence", {"present": True, "cooldown_seconds": 600})
+    engine.add_trigger("party_it_up", "music_start", {})
+    engine.arm_run_triggers(run_id, "bedside_alarm", [
+        {"type": "keyword", "keywords": ["i'm up", "awake"], "action": "update_state",
+         "state_updates": {"user_awake": True}},
+        {"type": "state_change", "state_key": "user_awake", "value": True, "action": "prompt_agent"},
+    ])
+
+    def settle():
+        deadline = time.time() + 1.0
+        while (engine._events or engine.events_received < expected[0]) and time.time() < deadline:
+            time.sleep(0.005)
+
+    expected = [0]
+    # Faces every frame for a while: one presence event, not one per frame
+    for _ in range(50):
+        clock[0] += 0.1
+        engine.note_faces(None, [(10, 10, 50, 50)])
+    expected[0] += 1
+    settle()
+    # Leaves and returns within the cooldown: no second start
+    for _ in range(40):
+        clock[0] += 1.0
+        engine.note_faces(None, [])
+    engine.note_faces(None, [(10, 10, 50, 50)])
+    expected[0] += 2
+    settle()
+
+    # Music: only the first beat after a gap
+    for _ in range(20):
+        clock[0] += 0.5
+        engine.note_beat()
+    expected[0] += 1
+    settle()
+
+    engine.emit("user_speech", {"text": "Okay, I'm up!"})
+    engine.emit("state_change", {"key": "user_awake", "value": True})
+    engine.emit("user_speech", {"text": "make it pop"})  # "up" alone is not a keyword here
+    expected[0] += 3
+    settle()
+    engine.stop()
+
+    fired = [(t.workflow_id, t.trigger_type) for t, _, _ in recorder.fired]
+    print(f"  {fired}")
+    assert fired == [
+        ("welcome_home", "presence"),
+        ("party_it_up", "music_start"),
+        ("bedside_alarm", "keyword"),
+        ("bedside_alarm", "state_change"),
+    ]
+    assert engine.get_stats()["events_received"] == expected[0]
+
+
+def test_time_of_day_and_reload():
+    print("Testing time-of-day schedule and reload from the database...")
+    monday_7am = datetime(2026, 10, 19, 7, 0).timestamp()  # A Monday
+    assert next_time_of_day({"time": "07:30"}, monday_7am) == datetime(2026, 10, 19, 7, 30).timestamp()
+    assert next_time_of_day({"time": "06:00", "days": ["sat"]}, monday_7am) == \
+        datetime(2026, 10, 24, 6, 0).timestamp()
+
+    db = make_db()
+    run_id = db.start_run("focus_session")
+    engine = TriggerEngine(db, on_fire=Recorder())
+    engine.start()
+    engine.add_trigger("bedside_alarm", "time_of_day", {"time": "07:30", "days": ["mon", "tue"]})
+    engine.arm_run_triggers(run_id, "focus_session", [{"type": "time_interval", "interval_seconds": 600}])
+    engine.stop()
+
+    # A fresh engine re-arms everything from the two tables
+    restarted = TriggerEngine(db, on_fire=Recorder())
+    restarted.start()
+    stats = restarted.get_stats()
+    print(f"  {stats}")
+    assert stats["armed"] == 2 and stats["timed"] == 2
+    assert 590 <= stats["next_fire_in"] <= 600
+    # Completing the run removes its triggers
+    restarted.disarm_run(run_id)
+    db.complete_run(run_id)
+    assert restarted.get_stats()["armed"] == 1 and db.list_active_triggers() == []
+    restarted.stop()
+
+
+def test_triggers_prompt_the_agent():
+    print("Testing fired triggers start one workflow and reach the agent...")
+    service = WorkflowService(db_path=os.path.join(tempfile.mkdtemp(), "workflows.db"))
+    service.db = CountingDatabase(service.db)
+    # No agent connected yet: nothing to deliver to
+    assert service._prompt_agent("hello") is False
+
+    prompts = []
+    service.set_prompt_handler(lambda instructions: prompts.append(instructions) or True)
+
+    # Two start triggers firing at once (engine thread and a callback) start one run
+    triggers = [ArmedTrigger(f"t{i}", "bedside_alarm", "time_of_day", {}) for i in range(2)]
+    threads = [threading.Thread(target=service.handle_trigger, args=(t, {})) for t in triggers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert service.active_workflow == "bedside_alarm"
+    assert service.db.calls["start_run"] == 1
+    assert len(prompts) == 1 and "Workflow 'bedside_alarm' started" in prompts[0]
+
+    # Progression trigger of the running workflow
+    progress = ArmedTrigger("p1", "bedside_alarm", "time_interval", {"prompt": "Check on the user"},
+                            run_id=service.current_run_id)
+    service.handle_trigger(progress, {})
+    assert prompts[-1] == "Check on the user. Call get_next_step() to continue the workflow."
+    service.stop_workflow()
+
+
+if __name__ == "__main__":
+    test_timed_triggers_sleep_until_due()
+    test_event_triggers()
+    test_time_of_day_and_reload()
+    test_triggers_prompt_the_agent()
+    print("Trigger engine tests completed!")
@@ -0,0 +1,347 @@
+import sys
+import os
+import asyncio
+import queue
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.metrics_service import PipelineStage
+from lelamp.service.local_voice import audio_io, llm_service, stt_service, tts_service
+from lelamp.service.local_voice.orchestrator import (
+    Endpointer, VoiceOrchestrator, take_sentences, SPEECH_START, PAUSE, END_OF_TURN, NOISE,
+)
+
+BLOCK = 1024  # 64 ms at 16 kHz
+BLOCK_SECONDS = BLOCK / 16000
+SPEECH = np.full(BLOCK, 0.05, dtype=np.float32)
+ECHO = np.full(BLOCK, 0.02, dtype=np.float32)
+LOUD = np.full(BLOCK, 0.2, dtype=np.float32)
+SILENCE = np.zeros(BLOCK, dtype=np.float32)
+
+
+class FakeAudio:
+    def __init__(self):
+        self.played = []
+        self.stops = 0
+
+    def play_audio(self, data):
+        self.played.append((time.time(), data))
+
+    def stop_playback(self):
+        self.stops += 1
+
+    def signal_playback_end(self):
+        pass
+
+    async def wait_for_playback(self):
+        await asyncio.sleep(0.05)
+
+    def mute_mic(self, muted=True):
+        pass
+
+    def clear_input_queue(self):
+        pass
+
+
+class FakeSTT:
+    silence_threshold = 0.01
+    MIN_SPEECH_DURATION = 0.15
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def transcribe_buffer(self, audio):
+        self.calls += 1
+        time.sleep(0.05)
+        return self.text, 50.0
+
+    def is_garbage(self, text):
+        return not text
+
+
+class FakeLLM:
+    def __init__(self, reply, token_delay=0.02):
+        self.reply = reply
+        self.token_delay = token_delay
+        self.prompts = []
+        self.cancelled = False
+        self.interrupted = []
+        self.last_intent = None
+
+    async def generate_response(self, text):
+        self.prompts.append(text)
+        try:
+            for word in self.reply.split(" "):
+                await asyncio.sleep(self.token_delay)
+                yield word + " "
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        except GeneratorExit:
+            self.cancelled = True
+            raise
+
+    def record_interrupted_reply(self, spoken_text):
+        self.interrupted.append(spoken_text)
+
+
+class FakeTTS:
+    def __init__(self):
+        self.sentences = []
+        self.discards = 0
+
+    async def synthesize(self, text):
+        self.sentences.append(text)
+        await asyncio.sleep(0.03)
+        for _ in range(3):
+            yield b"\x00" * 2048
+
+    async def discard_pending(self):
+        self.discards += 1
+
+
+class FakeMetrics:
+    def __init__(self):
+        self.turns = []
+
+    def record_turn(self, turn):
+        self.turns.append(turn)
+
+    def set_user_speaking(self, speaking):
+        pass
+
+    def set_agent_state(self, state):
+        pass
+
+
+def make_orchestrator(text, reply, **kwargs):
+    orchestrator = VoiceOrchestrator(
+        FakeAudio(), FakeSTT(text), FakeLLM(reply), FakeTTS(),
+        min_delay=0.3, max_delay=1.0, metrics_service=FakeMetrics(), **kwargs,
+    )
+    return orchestrator
+
+
+async def speak(orchestrator, blocks, chunk=SPEECH):
+    for _ in range(blocks):
+        await orchestrator.feed(chunk)
+        await asyncio.sleep(BLOCK_SECONDS)
+
+
+async def wait_for_end_of_turn(orchestrator, limit=2.0):
+    deadline = time.time() + limit
+    while not orchestrator.responding and time.time() < deadline:
+        await orchestrator.feed(SILENCE)
+        await asyncio.sleep(BLOCK_SECONDS)
+    return time.time()
+
+
+def test_endpointer():
+    print("Testing endpointing on partial transcripts...")
+    ep = Endpointer(min_delay=0.8, max_delay=6.0, min_speech=0.15)
+    assert ep.update(True, 0.0) == SPEECH_START
+    assert ep.update(True, 1.0) is None
+    assert ep.update(False, 1.1) == PAUSE
+    # No partial yet: held open for max_delay
+    assert ep.update(False, 2.0) is None
+    ep.set_partial("Turn the light blue.")
+    assert ep.update(False, 2.0) == END_OF_TURN
+
+    ep.reset()
+    ep.update(True, 0.0)
+    ep.update(True, 1.0)
+    ep.update(False, 1.1)
+    ep.set_partial("Set a timer for five minutes and")
+    assert ep.update(False, 3.0) is None
+    assert ep.update(False, 7.0) == END_OF_TURN
+
+    # Resumed speech drops the stale partial
+    ep.reset()
+    ep.update(True, 0.0)
+    ep.update(True, 0.5)
+    ep.update(False, 0.6)
+    ep.set_partial("What's the")
+    ep.update(True, 0.9)
+    assert ep.partial is None
+
+    # A click is not a turn
+    ep.reset()
+    assert ep.update(True, 0.0) == SPEECH_START
+    assert ep.update(False, 0.05) == NOISE and not ep.in_turn
+
+
+def test_take_sentences():
+    print("Testing incremental sentence splitting...")
+    reply = "Sure! The light is now blue. That took 3.5 seconds, said Dr. Smith. Anything else?"
+    buffer, out = "", []
+    for token in reply.split(" "):
+        buffer += token + " "
+        ready, buffer = take_sentences(buffer)
+        out.extend(ready)
+    out.extend([buffer.strip()] if buffer.strip() else [])
+    print(f"  {out}")
+    assert out == ["Sure!", "The light is now blue.", "That took 3.5 seconds, said Dr. Smith.", "Anything else?"]
+
+
+def test_overlapped_turn():
+    print("Testing overlapped STT -> LLM -> TTS...")
+    reply = "The light is blue now. I picked a calm shade. Let me know if you want it brighter."
+    ducked = []
+    orchestrator = make_orchestrator("Turn the light blue.", reply, ducking=ducked.append)
+
+    async def run():
+        await speak(orchestrator, 10)
+        end_of_turn = await wait_for_end_of_turn(orchestrator)
+        await orchestrator._response_task
+        return end_of_turn
+
+    end_of_turn = asyncio.run(run())
+    turn = orchestrator.last_turn
+    ts = turn.timestamps
+    print(f"  {orchestrator.get_stats()}")
+
+    # The partial taken during the pause was reused; one transcription only
+    assert orchestrator.stt.calls == 1 and orchestrator.partials_reused == 1
+    assert orchestrator.llm.prompts == ["Turn the light blue."]
+    # Ended after min_delay (complete sentence), LLM started right away
+    silence = end_of_turn - ts[PipelineStage.VAD_END.value]
+    assert 0.3 <= silence < 0.6, silence
+    assert ts[PipelineStage.LLM_START.value] - end_of_turn < 0.05
+    # Speech started while the model was still generating
+    assert ts[PipelineStage.TTS_FIRST_AUDIO.value] < ts[PipelineStage.LLM_END.value]
+    assert orchestrator.tts.sentences == [
+        "The light is blue now.", "I picked a calm shade.", "Let me know if you want it brighter."]
+    for stage in PipelineStage:
+        assert stage.value in ts, stage
+    assert turn.end_to_end_latency_ms > 0 and turn.llm_time_to_first_token_ms > 0
+    assert orchestrator.metrics_service.turns == [turn]
+    # Effects ducked from the first audio until the reply finished
+    assert ducked == [True, False]
+
+
+def test_barge_in():
+    print("Testing barge-in cancels every stage within one block...")
+    reply = " ".join(f"This is sentence number {i}." for i in range(20))
+    orchestrator = make_orchestrator("Tell me a story.", reply)
+    audio, llm, tts = orchestrator.audio_io, orchestrator.llm, orchestrator.tts
+
+    async def run():
+        await speak(orchestrator, 10)
+        await wait_for_end_of_turn(orchestrator)
+        while not audio.played:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.1)
+        # Quiet echo of the lamp's own voice does not interrupt
+        await orchestrator.feed(ECHO)
+        assert orchestrator.responding
+
+        await orchestrator.feed(LOUD)
+        # Synchronously: playback dropped, response cancelled, next turn started
+        assert audio.stops == 1 and not orchestrator.responding
+        assert orchestrator.endpointer.in_turn
+        played = len(audio.played)
+        await asyncio.sleep(0.2)
+        return played
+
+    played = asyncio.run(run())
+    print(f"  spoken before barge-in: {llm.interrupted}")
+    assert len(audio.played) == played  # Nothing queued after the barge-in
+    assert llm.cancelled and tts.discards == 1
+    assert orchestrator.barge_ins == 1
+    assert llm.interrupted and llm.interrupted[0].startswith("This is sentence number 0.")
+    assert len(tts.sentences) < 20
+    turn = orchestrator.last_turn
+    assert turn.agent_text == llm.interrupted[0]
+    assert PipelineStage.AUDIO_PLAY_END.value in turn.timestamps
+
+
+def test_pipeline_from_config():
+    print("Testing the startup path drives a full turn...")
+    mic = queue.Queue()
+    built = {}
+
+    class MicAudio(FakeAudio):
+        def __init__(self):
+            super().__init__()
+            built["audio"] = self
+
+        def start(self):
+            pass
+
+        def stop(self):
+            pass
+
+        def get_audio_chunk(self, timeout=0.1):
+            try:
+                return mic.get(timeout=timeout)
+            except queue.Empty:
+                return None
+
+    class ConfiguredSTT(FakeSTT):
+        def __init__(self, model_size, **kwargs):
+            super().__init__("Turn the light blue.")
+            built["stt"] = model_size
+
+    class ConfiguredLLM(FakeLLM):
+        def __init__(self, model, **kwargs):
+            super().__init__("Done, the light is blue.")
+            built["llm"] = self
+            self.model = model
+
+        async def warm_up(self):
+            pass
+
+    class ConfiguredTTS(FakeTTS):
+        def __init__(self, voice, **kwargs):
+            super().__init__()
+            built["tts"] = self
+
+        async def start(self):
+            pass
+
+        async def stop(self):
+            pass
+
+    config = {
+        "pipeline": {"type": "local", "local": {"whisper_model": "base", "ollama_model": "qwen", "fast_path": False}},
+        "endpointing": {"min_delay": 0.3, "max_delay": 1.0},
+    }
+    originals = (audio_io.LocalAudioIO, stt_service.LocalSTTService,
+                 llm_service.LocalLLMService, tts_service.LocalTTSService)
+    audio_io.LocalAudioIO, stt_service.LocalSTTService = MicAudio, ConfiguredSTT
+    llm_service.LocalLLMService, tts_service.LocalTTSService = ConfiguredLLM, ConfiguredTTS
+    try:
+        metrics = FakeMetrics()
+        orchestrator = VoiceOrchestrator.from_config(config, metrics_service=metrics)
+        thread = orchestrator.start_thread()
+        for chunk in [SPEECH] * 10 + [SILENCE] * 30:
+            mic.put(chunk)
+            time.sleep(BLOCK_SECONDS)
+        deadline = time.time() + 3.0
+        while not metrics.turns and time.time() < deadline:
+            time.sleep(0.05)
+        orchestrator.shutdown()
+        thread.join(timeout=2.0)
+    finally:
+        (audio_io.LocalAudioIO, stt_service.LocalSTTService,
+         llm_service.LocalLLMService, tts_service.LocalTTSService) = originals
+
+    assert not thread.is_alive()
+    assert built["stt"] == "base" and built["llm"].model == "qwen"
+    assert built["llm"].prompts == ["Turn the light blue."]
+    assert built["tts"].sentences == ["Done, the light is blue."] and built["audio"].played
+    assert len(metrics.turns) == 1 and metrics.turns[0].user_text == "Turn the light blue."
+    assert orchestrator.endpointer.min_delay == 0.3
+
+
+if __name__ == "__main__":
+    test_endpointer()
+    test_take_sentences()
+    test_overlapped_turn()
+    test_barge_in()
+    test_pipeline_from_config()
+    print("Voice orchestrator tests completed!")
@@ -0,0 +1,46 @@
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from lelamp.service.wake.enrollment import delete_template, list_templates, save_template
+from lelamp.service.wake.keyword_spotter import KeywordSpotter, SAMPLE_RATE
+
+
+def phrase(rate=SAMPLE_RATE):
+    """Half a second of voiced-ish audio between short silences."""
+    t = np.arange(int(rate * 0.5)) / rate
+    voiced = 0.3 * np.sin(2 * np.pi * 180 * t) * np.sin(2 * np.pi * 700 * t)
+    silence = np.zeros(int(rate * 0.2))
+    return np.concatenate([silence, voiced, silence]).astype(np.float32)
+
+
+def test_enrollment_roundtrip():
+    print("Testing wake template enrollment...")
+    with tempfile.TemporaryDirectory() as directory:
+        first = save_template(phrase(), SAMPLE_RATE, directory, name="first")
+        save_template(phrase(), SAMPLE_RATE, directory, name="first")  # Name clash gets a suffix
+        assert first.exists() and len(list_templates(directory)) == 2
+
+        for bad in (np.zeros(SAMPLE_RATE, dtype=np.float32), phrase()[:int(SAMPLE_RATE * 0.22)]):
+            try:
+                save_template(bad, SAMPLE_RATE, directory)
+                assert False, "expected the recording to be rejected"
+            except ValueError:
+                pass
+        assert len(list_templates(directory)) == 2
+
+        # What enrollment writes is what the spotter loads
+        spotter = KeywordSpotter.from_directory(directory)
+        assert len(spotter._bank.names) == 2
+
+        assert delete_template("first", directory) and not delete_template("first", directory)
+        assert [t["name"] for t in list_templates(directory)] == ["first_1"]
+
+
+if __name__ == "__main__":
+    test_enrollment_roundtrip()
+    print("Wake enrollment tests completed!")
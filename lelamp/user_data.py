@@ -36,6 +36,7 @@ USER_ENV_FILE = USER_DATA_DIR / ".env"
 USER_CALIBRATION_DIR = USER_DATA_DIR / "calibration"
 USER_RECORDINGS_DIR = USER_DATA_DIR / "recordings"
 USER_TELEMETRY_DIR = USER_DATA_DIR / "telemetry"
+USER_WAKE_TEMPLATES_DIR = USER_DATA_DIR / "wake_templates"
 USER_SYSTEM_INFO_FILE = USER_DATA_DIR / "system_info.json"
 
 # Hardware paths
@@ -130,17 +131,8 @@ def get_recording_path(name: str) -> Optional[Path]:
     Returns:
         Path to recording file, or None if not found
     """
-    # Check user recordings first
-    user_path = USER_RECORDINGS_DIR / f"{name}.csv"
-    if user_path.exists():
-        return user_path
-
-    # Fall back to repo recordings
-    repo_path = get_repo_path(f"lelamp/recordings/{name}.csv")
-    if repo_path.exists():
-        return repo_path
-
-    return None
+    from lelamp.recording_catalog import get_recording_catalog
+    return get_recording_catalog().path(name)
 
 
 def save_recording_path(name: str) -> Path:
@@ -162,31 +154,16 @@ def list_all_recordings() -> list[dict]:
     List all recordings from both user and repo directories.
     User recordings take priority over repo recordings with same name.
 
+    Served from the recording catalog's index (no directory scan per call).
+
     Returns:
         List of dicts with 'name', 'path', 'source' ('user' or 'builtin')
     """
-    recordings = {}
-
-    # First add repo recordings (will be overwritten by user recordings if same name)
-    repo_dir = get_repo_path("lelamp/recordings")
-    if repo_dir.exists():
-        for f in repo_dir.glob("*.csv"):
-            recordings[f.stem] = {
-                'name': f.stem,
-                'path': f,
-                'source': 'builtin'
-            }
-
-    # Then add user recordings (overwrites repo ones with same name)
-    if USER_RECORDINGS_DIR.exists():
-        for f in USER_RECORDINGS_DIR.glob("*.csv"):
-            recordings[f.stem] = {
-                'name': f.stem,
-                'path': f,
-                'source': 'user'
-            }
-
-    return list(recordings.values())
+    from lelamp.recording_catalog import get_recording_catalog
+    return [
+        {'name': entry.name, 'path': Path(entry.path), 'source': entry.source}
+        for entry in get_recording_catalog().list()
+    ]
 
 
 def is_user_recording(name: str) -> bool:
@@ -205,6 +182,8 @@ def delete_recording(name: str) -> bool:
     user_path = USER_RECORDINGS_DIR / f"{name}.csv"
     if user_path.exists():
         user_path.unlink()
+        from lelamp.recording_catalog import get_recording_catalog
+        get_recording_catalog().invalidate(name)
         return True
     return False
 
@@ -324,18 +303,11 @@ def get_os_info() -> Dict[str, str]:
 
 def get_kernel_version() -> str:
     """
-    Get kernel version using uname.
+    Get kernel version (same as uname -r).
 
     Returns:
         Kernel version string (e.g., "6.12.47+rpt-rpi-2712")
     """
-    try:
-        result = subprocess.run(['uname', '-r'], capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            return result.stdout.strip()
-    except Exception as e:
-        logger.warning(f"Could not get kernel version: {e}")
-
     return platform.release()
 
 
@@ -776,12 +748,22 @@ def get_temperature() -> Optional[float]:
     """
     Get CPU temperature in Celsius.
 
-    Tries vcgencmd first (most accurate on Pi), falls back to thermal zone.
+    Reads the thermal zone first (same sensor vcgencmd reports, without
+    spawning a process), falls back to vcgencmd.
 
     Returns:
         Temperature in Celsius or None if unavailable
     """
-    # Try vcgencmd first (most accurate on Raspberry Pi)
+    # Read from thermal zone first
+    try:
+        temp_path = Path("/sys/class/thermal/thermal_zone0/temp")
+        if temp_path.exists():
+            temp_milli = int(temp_path.read_text().strip())
+            return temp_milli / 1000.0
+    except Exception as e:
+        logger.debug(f"thermal zone read failed: {e}")
+
+    # Fallback: vcgencmd
     try:
         result = subprocess.run(
             ["vcgencmd", "measure_temp"],
@@ -798,15 +780,6 @@ def get_temperature() -> Optional[float]:
     except Exception as e:
         logger.debug(f"vcgencmd failed: {e}")
 
-    # Fallback: read from thermal zone
-    try:
-        temp_path = Path("/sys/class/thermal/thermal_zone0/temp")
-        if temp_path.exists():
-            temp_milli = int(temp_path.read_text().strip())
-            return temp_milli / 1000.0
-    except Exception as e:
-        logger.debug(f"thermal zone read failed: {e}")
-
     return None
 
 
@@ -943,17 +916,34 @@ def get_uptime() -> Dict[str, Any]:
 # =============================================================================
 
 UDEV_RULE_FILE = Path("/etc/udev/rules.d/99-lelamp.rules")
+USB_DEVICES_PATH = Path("/sys/bus/usb/devices")
 
 
 def get_servo_driver_sn() -> Optional[str]:
     """
     Detect connected Waveshare USB Servo Bus Adapter serial number.
 
-    Uses usb-devices to find the Waveshare adapter (Vendor=1a86, ProdID=55d3).
+    Looks the adapter (Vendor=1a86, ProdID=55d3) up in sysfs, falling back
+    to usb-devices.
 
     Returns:
         Serial number string or None if not connected
     """
+    if USB_DEVICES_PATH.exists():
+        try:
+            for device in USB_DEVICES_PATH.iterdir():
+                vendor, product = device / "idVendor", device / "idProduct"
+                if not vendor.exists() or not product.exists():
+                    continue
+                if vendor.read_text().strip() == "1a86" and product.read_text().strip() == "55d3":
+                    serial = device / "serial"
+                    if serial.exists():
+                        return serial.read_text().strip() or None
+                    return None
+            return None
+        except Exception as e:
+            logger.debug(f"Could not scan USB devices in sysfs: {e}")
+
     try:
         result = subprocess.run(
             ["usb-devices"],
@@ -1093,28 +1083,12 @@ def get_system_status() -> Dict[str, Any]:
     """
     Get comprehensive system status for dashboard display.
 
+    Served from the background SystemStatusCollector, so this doesn't
+    probe anything itself; sample_age gives each value's age in seconds.
+
     Returns:
         Dict with temperature, cpu, memory, disk, uptime, network info
     """
-    # Use instant CPU usage (load average based) for API calls
-    # since delta-based requires two calls
-    cpu = get_cpu_usage_instant()
+    from lelamp.service.system_status import get_status_collector
 
-    return {
-        "temperature": get_temperature(),
-        "cpu_percent": cpu,
-        "memory": get_memory_usage(),
-        "disk": get_disk_usage("/"),
-        "uptime": get_uptime(),
-        "network": get_network_info(),
-        "device": {
-            "serial": get_device_serial(),
-            "serial_short": get_device_serial_short(),
-            "model": get_device_model(),
-            "hostname": platform.node(),
-            "servo_driver_sn": get_servo_driver_sn(),
-        },
-        "os": get_os_info().get('PRETTY_NAME', 'Unknown'),
-        "kernel": get_kernel_version(),
-        "lelamp_version": get_lelamp_version(),
-    }
+    return get_status_collector().get_status()
@@ -106,6 +106,14 @@ def cleanup_services():
     except Exception as e:
         logging.error(f"Error stopping LiveKit service: {e}")
 
+    # Local voice pipeline (pipeline.type: local)
+    try:
+        if g.voice_orchestrator:
+            g.voice_orchestrator.shutdown()
+            logging.info("Local voice pipeline stopped")
+    except Exception as e:
+        logging.error(f"Error stopping local voice pipeline: {e}")
+
     # All hardware services are in globals (initialized by server.py)
     services = [
         (g.alarm_service, "Alarm service"),